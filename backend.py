@@ -3,7 +3,7 @@ PRODUCTION-READY BACKEND.PY WITH CORS
 Complete backend with all functionality restored
 """
 
-from flask import Flask, request, jsonify, make_response, session, send_from_directory, redirect
+from flask import Flask, request, jsonify, make_response, session, send_from_directory, redirect, Response, stream_with_context
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -361,6 +361,12 @@ def initialize_managers():
         sse_manager = _sse_manager # Assign global
         sync_manager = SyncManager(data_manager, audit_manager, sse_manager)
         ad_claim_manager = AdClaimManager(data_manager, transaction_manager, secret_key=app.config['SECRET_KEY'])
+        try:
+            # Later limit checks reconcile again every RECONCILE_INTERVAL_SECONDS
+            tracked = ad_claim_manager.reconcile_limits()
+            logger.info(f"✓ Ad claim limiter warmed ({tracked} users)")
+        except Exception as e:
+            logger.error(f"✗ Failed to warm ad claim limiter: {e}")
         channel_lock_manager = ChannelLockManager(data_manager)
         giveaway_manager = GiveawayManager(data_manager, transaction_manager, shop_manager)
         giveaway_manager.set_cache_manager(cache_manager)
@@ -651,6 +657,42 @@ def get_ad_stats():
     except Exception as e:
         return safe_error_response(e)
 
+@app.route('/api/admin/discord-scheduler', methods=['GET'])
+@require_auth
+def get_discord_scheduler_stats():
+    """Outbound Discord request queue depth, latency and rate-limit state (Master Login Only)"""
+    user = request.user
+    if not (user.get('is_superadmin') or user.get('role') == 'superadmin'):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    try:
+        scheduler = getattr(_bot_instance, 'discord_scheduler', None)
+        if not scheduler or not getattr(_bot_instance, 'loop', None):
+            return jsonify({'available': False})
+
+        future = asyncio.run_coroutine_threadsafe(scheduler.collect_stats(), _bot_instance.loop)
+        return jsonify({'available': True, **future.result(timeout=5)})
+    except Exception as e:
+        return safe_error_response(e)
+
+@app.route('/api/admin/delayed-actions', methods=['GET'])
+@require_auth
+def get_delayed_action_stats():
+    """Pending delayed actions (message deletes/unpins) by kind (Master Login Only)"""
+    user = request.user
+    if not (user.get('is_superadmin') or user.get('role') == 'superadmin'):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    try:
+        service = getattr(_bot_instance, 'delayed_actions', None)
+        if not service or not getattr(_bot_instance, 'loop', None):
+            return jsonify({'available': False})
+
+        future = asyncio.run_coroutine_threadsafe(service.collect_stats(), _bot_instance.loop)
+        return jsonify({'available': True, **future.result(timeout=5)})
+    except Exception as e:
+        return safe_error_response(e)
+
 # ========== AD API CONFIGURATION (MASTER LOGIN ONLY) ==========
 @app.route('/api/admin/ad-clients', methods=['GET'])
 @require_auth
@@ -1038,6 +1080,7 @@ def stripe_webhook():
                             'subscription_tier': 'growth_insider',
                             'last_synced': datetime.now(timezone.utc).isoformat()
                         }).eq('guild_id', str(guild_id)).execute()
+                        data_manager.refresh_guild_config(guild_id)
                         
                         logger.info(f"✅ Successfully upgraded guild {guild_id} to Growth Insider via Stripe")
                         
@@ -1068,6 +1111,7 @@ def stripe_webhook():
                         'subscription_tier': new_tier,
                         'last_synced': datetime.now(timezone.utc).isoformat()
                     }).eq('guild_id', str(guild_id)).execute()
+                    data_manager.refresh_guild_config(guild_id)
                     logger.info(f"{'✅ Upgraded' if is_active else '📉 Downgraded'} guild {guild_id} to {new_tier} via Stripe subscription update")
                 except Exception as db_error:
                     logger.error(f"Database error updating guild subscription: {db_error}")
@@ -1084,6 +1128,7 @@ def stripe_webhook():
                         'subscription_tier': 'free',
                         'last_synced': datetime.now(timezone.utc).isoformat()
                     }).eq('guild_id', str(guild_id)).execute()
+                    data_manager.refresh_guild_config(guild_id)
                 except Exception as db_error:
                     logger.error(f"Database error downgrading guild: {db_error}")
 
@@ -1450,6 +1495,7 @@ def update_server_config(server_id):
                     'subscription_tier': data['subscription_tier'],
                     'last_synced': datetime.now(timezone.utc).isoformat()
                 }).eq('guild_id', str(server_id)).execute()
+                data_manager.refresh_guild_config(server_id)
                 logger.info(f"Synced subscription_tier update for guild {server_id} to guilds table")
             except Exception as sync_error:
                 logger.error(f"Failed to sync subscription_tier to guilds table: {sync_error}")
@@ -1476,7 +1522,9 @@ def get_channels(server_id):
                 channels.sort(key=lambda x: x['position'])
                 return jsonify({'channels': channels}), 200
         
-        # Fallback if bot not ready or guild not found
+        # Separate web process (or bot not ready): serve the bot's published snapshot
+        if data_manager.guild_metadata:
+            return jsonify({'channels': data_manager.guild_metadata.get_channels(server_id)}), 200
         return jsonify({'channels': []}), 200
     except Exception as e:
         return safe_error_response(e)
@@ -1495,7 +1543,13 @@ def get_roles(server_id):
                 # Sort by position (reverse)
                 roles.sort(key=lambda x: x['position'], reverse=True)
                 return jsonify({'roles': roles}), 200
-                
+
+        if data_manager.guild_metadata:
+            roles = [
+                {'id': r['id'], 'name': r['name'], 'color': f"#{r['color']:06x}", 'position': r['position']}
+                for r in data_manager.guild_metadata.get_roles(server_id)
+            ]
+            return jsonify({'roles': roles}), 200
         return jsonify({'roles': []}), 200
     except Exception as e:
         return safe_error_response(e)
@@ -1507,7 +1561,8 @@ def get_users(server_id):
     try:
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 50))
-        users = data_manager.get_guild_users(server_id, page, limit)
+        after = request.args.get('after')
+        users = data_manager.get_guild_users(server_id, page, limit, after)
         return jsonify(users), 200
     except Exception as e:
         return safe_error_response(e)
@@ -1815,6 +1870,90 @@ def delete_shop_item(server_id, item_id):
     except Exception as e:
         return safe_error_response(e)
 
+# ========== EXPORTS ==========
+def _export_response(chunks, filename, export_format):
+    """
+    Stream export chunks. The first chunk is produced before the response starts
+    (json_chunks/csv_chunks read the first page first), so query errors there
+    still return an error status.
+    """
+    from core.export_stream import EXPORT_MIMETYPES
+
+    first = next(chunks, '')
+
+    def stream():
+        yield first
+        try:
+            yield from chunks
+        except Exception as e:
+            # Headers are already sent; log and abort so the client sees an
+            # incomplete transfer instead of a cleanly ended, truncated file
+            logger.error(f"Export {filename}.{export_format} failed mid-stream: {e}")
+            raise
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}.{export_format}"',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+def _export_format():
+    export_format = request.args.get('format', 'json').lower()
+    return export_format if export_format in ('json', 'csv') else None
+
+@app.route('/api/servers/<server_id>/shop/inventory/export', methods=['GET'])
+@require_guild_access
+def export_inventory(server_id):
+    export_format = _export_format()
+    if not export_format:
+        return jsonify({'error': 'format must be json or csv'}), 400
+    try:
+        user_id = request.args.get('user_id')
+        chunks = shop_manager.iter_inventory_export(server_id, user_id, export_format)
+        return _export_response(chunks, f"inventory_{server_id}", export_format)
+    except Exception as e:
+        return safe_error_response(e)
+
+@app.route('/api/servers/<server_id>/audit/export', methods=['GET'])
+@require_guild_access
+def export_audit_logs(server_id):
+    export_format = _export_format()
+    if not export_format:
+        return jsonify({'error': 'format must be json or csv'}), 400
+    try:
+        filters = {key: request.args[key] for key in ('event_type', 'user_id', 'moderator_id', 'start_date', 'end_date')
+                   if request.args.get(key)}
+        chunks = audit_manager.iter_audit_log_export(server_id, filters, export_format)
+        return _export_response(chunks, f"audit_logs_{server_id}", export_format)
+    except Exception as e:
+        return safe_error_response(e)
+
+@app.route('/api/servers/<server_id>/moderation/export', methods=['GET'])
+@require_guild_access
+def export_moderation_logs(server_id):
+    from core.moderation.logger import iter_moderation_log_export
+
+    export_format = _export_format()
+    if not export_format:
+        return jsonify({'error': 'format must be json or csv'}), 400
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        chunks = iter_moderation_log_export(
+            data_manager.admin_client, server_id,
+            datetime.fromisoformat(start_date) if start_date else None,
+            datetime.fromisoformat(end_date) if end_date else None,
+            export_format
+        )
+        return _export_response(chunks, f"moderation_logs_{server_id}", export_format)
+    except ValueError:
+        return jsonify({'error': 'Invalid date; use ISO 8601'}), 400
+    except Exception as e:
+        return safe_error_response(e)
+
 # ========== TRANSACTIONS ==========
 @app.route('/api/servers/<server_id>/transactions', methods=['GET'])
 @require_guild_access
@@ -1838,6 +1977,13 @@ def get_announcements(server_id):
     except Exception as e:
         return safe_error_response(e)
 
+def _notify_announcement_scheduled():
+    """Wake the bot's scheduled announcement runner when it shares this process"""
+    if _bot_instance:
+        cog = _bot_instance.get_cog('Announcements')
+        if cog:
+            cog.notify_scheduled()
+
 @app.route('/api/servers/<server_id>/announcements', methods=['POST'])
 @csrf.exempt
 @require_guild_access
@@ -1914,18 +2060,12 @@ def create_announcement(server_id):
                     'type': 'announcement' # Explicitly mark as simple announcement
                 }
                 
-                # Load existing data
-                announcements_data = data_manager.load_guild_data(str(server_id), 'announcements') or {'scheduled': []}
-                
-                # Add to scheduled list
-                if 'scheduled' not in announcements_data or not isinstance(announcements_data['scheduled'], list):
-                    announcements_data['scheduled'] = []
-                announcements_data['scheduled'].append(schedule_data)
+                # Save just this announcement
+                success = data_manager.save_scheduled_announcement(str(server_id), schedule_data)
                 
-                # Save back
-                success = data_manager.save_guild_data(str(server_id), 'announcements', announcements_data)
-                
-                if not success:
+                if success:
+                    _notify_announcement_scheduled()
+                else:
                      logger.error(f"❌ Failed to save scheduled announcement to Supabase for guild {server_id}")
                      return jsonify({'success': False, 'error': 'Failed to save announcement to database. Please check logs.'}), 500
                 
@@ -2216,16 +2356,10 @@ def send_embed_to_channel(server_id, embed_id):
                     'status': 'scheduled'
                 }
                 
-                # Load existing data
-                announcements_data = data_manager.load_guild_data(str(server_id), 'announcements') or {'scheduled': []}
-                
-                # Add to scheduled list
-                if 'scheduled' not in announcements_data or not isinstance(announcements_data['scheduled'], list):
-                    announcements_data['scheduled'] = []
-                announcements_data['scheduled'].append(schedule_data)
-                
-                # Save back
-                data_manager.save_guild_data(str(server_id), 'announcements', announcements_data)
+                # Save just this announcement
+                if not data_manager.save_scheduled_announcement(str(server_id), schedule_data):
+                    return jsonify({'success': False, 'error': 'Failed to save scheduled embed to database.'}), 500
+                _notify_announcement_scheduled()
                 
                 return jsonify({
                     'success': True, 
@@ -2369,6 +2503,7 @@ def update_bot_status(server_id):
                 'bot_status_message': status_message,
                 'bot_status_type': status_type
             }).eq('guild_id', server_id).execute()
+            data_manager.refresh_guild_config(server_id)
             logger.info(f"Saved bot status to Supabase for guild {server_id}")
         except Exception as e:
             logger.error(f"Failed to save bot status to Supabase: {e}")
@@ -19,6 +19,12 @@ from core.shop_manager import ShopManager
 from core.cache_manager import CacheManager
 from core.giveaway_manager import GiveawayManager
 from core.initializer import GuildInitializer
+from core.guild_purge import GuildPurgeWorker
+from core.member_sweep import MemberActivitySweeper
+from core.guild_backup import GuildBackupStore
+from core.search_index import search_index
+from core.discord_scheduler import discord_scheduler, Priority
+from core.delayed_actions import delayed_actions, register_discord_actions
 from config import config
 
 # Setup logging first
@@ -77,11 +83,20 @@ def create_bot():
     else:
         logger.warning("message_content intent not available - some features may not work")
 
+    # Bot-initiated REST writes go through the priority scheduler; the trace hook
+    # feeds it Discord's rate-limit headers from every response
     bot = commands.Bot(
         command_prefix=commands.when_mentioned,
         intents=intents,
-        help_command=None
+        help_command=None,
+        http_trace=discord_scheduler.trace_config()
     )
+    bot.discord_scheduler = discord_scheduler
+    bot.add_listener(discord_scheduler.on_interaction, 'on_interaction')
+
+    # Timer wheel for delayed message deletes/unpins (replaces per-item sleeping tasks)
+    bot.delayed_actions = delayed_actions
+    register_discord_actions(bot, delayed_actions)
 
     # Add CommandTree for slash commands
     tree = bot.tree
@@ -111,6 +126,21 @@ async def run_bot():
         bot.shop_manager = ShopManager(data_manager, bot.transaction_manager)
         bot.giveaway_manager = GiveawayManager(data_manager, bot.transaction_manager, bot.shop_manager)
         bot.giveaway_manager.set_cache_manager(bot.cache_manager)
+        bot.backup_store = GuildBackupStore()
+        bot.guild_purge_worker = GuildPurgeWorker(data_manager, backup_store=bot.backup_store)
+        bot.member_sweeper = MemberActivitySweeper(data_manager)
+
+        # Load every guild's config snapshot in one pass so hot-path reads skip the database
+        try:
+            data_manager.guild_configs.hydrate()
+        except Exception as e:
+            logger.error(f"✗ Failed to hydrate guild config snapshots: {e}")
+
+        # Build the autocomplete name index; managers keep it current for this process's writes
+        try:
+            search_index.hydrate(data_manager.admin_client)
+        except Exception as e:
+            logger.error(f"✗ Failed to hydrate autocomplete index: {e}")
         
         # Initialize ad claim manager
         try:
@@ -118,6 +148,11 @@ async def run_bot():
             shared_secret = os.getenv('JWT_SECRET_KEY', os.getenv('SECRET_KEY', 'dev-secret-key-change-me'))
             bot.ad_claim_manager = AdClaimManager(data_manager, bot.transaction_manager, secret_key=shared_secret)
             logger.info("✓ Ad claim manager initialized")
+            try:
+                tracked = bot.ad_claim_manager.reconcile_limits()
+                logger.info(f"✓ Ad claim limiter warmed ({tracked} users)")
+            except Exception as e:
+                logger.error(f"✗ Failed to warm ad claim limiter: {e}")
         except Exception as e:
             logger.error(f"✗ Failed to initialize ad claim manager: {e}")
             bot.ad_claim_manager = None
@@ -148,6 +183,11 @@ async def run_bot():
         # CRITICAL: Link bot instance to data manager for sync
         data_manager.set_bot_instance(bot)
 
+        # Publish channels/roles/member counts for the separate web process
+        if data_manager.guild_metadata:
+            from core.guild_metadata import register_publisher
+            register_publisher(bot, data_manager.guild_metadata)
+
         # Initialize SSE manager with event loop
         from core.sse_manager import sse_manager
         sse_manager.set_event_loop(asyncio.get_event_loop())
@@ -434,6 +474,9 @@ async def run_bot():
         async def on_guild_join(guild):
             logger.info(f"Joined new guild: {guild.name} (ID: {guild.id})")
 
+            # Re-added before an earlier purge finished: keep what is left
+            await asyncio.to_thread(bot.guild_purge_worker.cancel, guild.id)
+
             # Initialize new guild
             await initializer.initialize_guild(guild)
 
@@ -449,49 +492,9 @@ async def run_bot():
         async def on_guild_remove(guild):
             logger.info(f"Removed from guild: {guild.name} (ID: {guild.id})")
             
-            # Clean up all guild data from database
-            try:
-                guild_id = str(guild.id)
-                
-                # Delete from all tables
-                tables_to_clean = [
-                    'guilds',
-                    'user_balances',
-                    'transactions',
-                    'shop_items',
-                    'user_inventory',
-                    'tasks',
-                    'user_tasks',
-                    'announcements',
-                    'embeds',
-                    'moderation_audit_logs',
-                    'scheduled_jobs',
-                    'ad_sessions',
-                    'guild_roles',
-                    'user_roles'
-                ]
-                
-                for table in tables_to_clean:
-                    try:
-                        data_manager.admin_client.table(table).delete().eq('guild_id', guild_id).execute()
-                        logger.info(f"Deleted {table} data for guild {guild_id}")
-                    except Exception as table_error:
-                        logger.warning(f"Failed to delete {table} data for guild {guild_id}: {table_error}")
-                
-                # Delete file-based data
-                try:
-                    import shutil
-                    guild_data_path = f"data/guilds/{guild_id}"
-                    if os.path.exists(guild_data_path):
-                        shutil.rmtree(guild_data_path)
-                        logger.info(f"Deleted file data for guild {guild_id}")
-                except Exception as file_error:
-                    logger.warning(f"Failed to delete file data for guild {guild_id}: {file_error}")
-                
-                logger.info(f"Successfully cleaned up all data for guild {guild.name} ({guild_id})")
-                
-            except Exception as e:
-                logger.error(f"Error cleaning up guild data for {guild.id}: {e}")
+            # Queue the guild's data for purging; the rows are deleted in batches off the event loop
+            if await asyncio.to_thread(bot.guild_purge_worker.request, guild.id):
+                asyncio.create_task(asyncio.to_thread(bot.guild_purge_worker.run_pending))
 
             # Update bot status
             await bot.change_presence(
@@ -508,9 +511,9 @@ async def run_bot():
                 return
 
             try:
-                # Create user record
-                data_manager.ensure_user_exists(member.guild.id, member.id)
-                logger.info(f"✅ Created user record for {member.name} in {member.guild.name}")
+                # Create user record (inserted in bulk by flush_user_creations)
+                if data_manager.queue_user_creation(member.guild.id, member.id):
+                    logger.debug(f"Queued user record for {member.name} in {member.guild.name}")
 
                 # Send welcome message if configured
                 config = data_manager.load_guild_data(member.guild.id, "config")
@@ -657,6 +660,10 @@ async def run_bot():
         @bot.event
         async def on_member_update(before, after):
             """Sync member role changes to database"""
+            if before.name != after.name or before.display_name != after.display_name:
+                # Written by flush_member_profile_updates, not per event
+                data_manager.queue_member_profile_update(after.guild.id, after.id, after.name, after.display_name)
+
             try:
                 if before.roles != after.roles:
                     # Get added/removed roles
@@ -666,24 +673,12 @@ async def run_bot():
                     guild_id = str(after.guild.id)
                     user_id = str(after.id)
 
-                    # Add new roles to database
-                    for role in added_roles:
-                        if role.name != "@everyone":
-                            data_manager.supabase.table('user_roles').upsert({
-                                'guild_id': guild_id,
-                                'user_id': user_id,
-                                'role_id': str(role.id),
-                                'assigned_at': datetime.now(timezone.utc).isoformat()
-                            }, on_conflict='guild_id,user_id,role_id').execute()
-
-                    # Remove old roles from database
-                    for role in removed_roles:
-                        if role.name != "@everyone":
-                            data_manager.supabase.table('user_roles').delete().match({
-                                'guild_id': guild_id,
-                                'user_id': user_id,
-                                'role_id': str(role.id)
-                            }).execute()
+                    # Written by flush_member_role_updates, coalesced per member
+                    data_manager.queue_member_role_update(
+                        guild_id, user_id,
+                        [r.id for r in before.roles if not r.is_default()],
+                        [r.id for r in after.roles if not r.is_default()]
+                    )
 
                     # Broadcast update
                     from backend import sse_manager
@@ -694,7 +689,7 @@ async def run_bot():
                         'removed': [str(r.id) for r in removed_roles if r.name != "@everyone"]
                     })
 
-                    logger.info(f"Synced role changes for user {after.display_name} in guild {guild_id}")
+                    logger.debug(f"Queued role changes for user {after.display_name} in guild {guild_id}")
             except Exception as e:
                 logger.error(f"Error syncing member roles: {e}")
 
@@ -774,6 +769,146 @@ async def run_bot():
         async def process_channel_lock_schedules_error(error):
             logger.exception(f"Channel lock schedule processor failed: {error}")
 
+        @tasks.loop(seconds=30)
+        async def flush_member_profile_updates():
+            """Write queued username/display name changes in one batched call"""
+            try:
+                updated = await asyncio.to_thread(data_manager.flush_member_profile_updates)
+                if updated:
+                    logger.debug(f"Synced {updated} member profiles")
+            except Exception as e:
+                logger.error(f"Error flushing member profile updates: {e}")
+
+        @flush_member_profile_updates.before_loop
+        async def before_flush_member_profile_updates():
+            await bot.wait_until_ready()
+
+        flush_member_profile_updates.start()
+
+        @tasks.loop(seconds=2)
+        async def flush_user_creations():
+            """Insert users queued by on_member_join in batched on-conflict-do-nothing writes"""
+            try:
+                created = await asyncio.to_thread(data_manager.flush_user_creations)
+                if created:
+                    logger.info(f"✅ Created {created} queued user records")
+            except Exception as e:
+                logger.error(f"Error flushing queued user records: {e}")
+
+        @flush_user_creations.before_loop
+        async def before_flush_user_creations():
+            await bot.wait_until_ready()
+
+        flush_user_creations.start()
+
+        @tasks.loop(seconds=2)
+        async def flush_member_role_updates():
+            """Write role changes coalesced over the last window as one bulk upsert/delete"""
+            try:
+                synced = await asyncio.to_thread(data_manager.flush_member_role_updates)
+                if synced['added'] or synced['removed']:
+                    logger.debug(f"Synced member roles: {synced['added']} added, {synced['removed']} removed")
+            except Exception as e:
+                logger.error(f"Error flushing member role updates: {e}")
+
+        @flush_member_role_updates.before_loop
+        async def before_flush_member_role_updates():
+            await bot.wait_until_ready()
+
+        flush_member_role_updates.start()
+
+        @tasks.loop(minutes=5)
+        async def drain_guild_purges():
+            """Resume guild data purges left unfinished by a crash or restart"""
+            try:
+                totals = await asyncio.to_thread(bot.guild_purge_worker.run_pending)
+                if any(totals.values()):
+                    logger.info(
+                        f"Guild purges: {totals['purged']} purged, {totals['skipped']} skipped, "
+                        f"{totals['failed']} failed"
+                    )
+            except Exception as e:
+                logger.error(f"Error draining guild purges: {e}")
+
+        @drain_guild_purges.before_loop
+        async def before_drain_guild_purges():
+            await bot.wait_until_ready()
+
+        drain_guild_purges.start()
+
+        @tasks.loop(minutes=10)
+        async def rehydrate_guild_configs():
+            """Reload config snapshots in full; also drops guilds rows deleted outside this process"""
+            try:
+                await asyncio.to_thread(data_manager.guild_configs.hydrate)
+            except Exception as e:
+                logger.error(f"Error rehydrating guild config snapshots: {e}")
+
+        @rehydrate_guild_configs.before_loop
+        async def before_rehydrate_guild_configs():
+            await bot.wait_until_ready()
+
+        rehydrate_guild_configs.start()
+
+        @tasks.loop(seconds=15)
+        async def sync_guild_configs():
+            """Apply guilds rows changed by the dashboard (roles, features, prefix) between rehydrates"""
+            try:
+                await asyncio.to_thread(data_manager.guild_configs.sync_changes)
+            except Exception as e:
+                logger.error(f"Error syncing guild config snapshots: {e}")
+
+        @sync_guild_configs.before_loop
+        async def before_sync_guild_configs():
+            await bot.wait_until_ready()
+
+        sync_guild_configs.start()
+
+        @tasks.loop(seconds=30)
+        async def sync_search_index():
+            """Index shop items, tasks and embeds created or edited from the dashboard"""
+            try:
+                await asyncio.to_thread(search_index.sync_changes, data_manager.admin_client)
+            except Exception as e:
+                logger.error(f"Error syncing autocomplete index: {e}")
+
+        @sync_search_index.before_loop
+        async def before_sync_search_index():
+            await bot.wait_until_ready()
+
+        sync_search_index.start()
+
+        @tasks.loop(minutes=10)
+        async def rehydrate_search_index():
+            """Rebuild the autocomplete index in full, dropping rows deleted from the dashboard"""
+            try:
+                await asyncio.to_thread(search_index.hydrate, data_manager.admin_client)
+            except Exception as e:
+                logger.error(f"Error rehydrating autocomplete index: {e}")
+
+        @rehydrate_search_index.before_loop
+        async def before_rehydrate_search_index():
+            await bot.wait_until_ready()
+            await asyncio.sleep(600)  # Hydrated at startup
+
+        rehydrate_search_index.start()
+
+        @tasks.loop(minutes=5)
+        async def reconcile_ad_limits():
+            """Merge ad sessions created by other processes into the in-memory limiter"""
+            if not bot.ad_claim_manager:
+                return
+            try:
+                await asyncio.to_thread(bot.ad_claim_manager.reconcile_limits)
+            except Exception as e:
+                logger.error(f"Error reconciling ad claim limits: {e}")
+
+        @reconcile_ad_limits.before_loop
+        async def before_reconcile_ad_limits():
+            await bot.wait_until_ready()
+
+        reconcile_ad_limits.start()
+
         @tasks.loop(minutes=10)
         async def sync_pending_discord_messages():
             """
@@ -796,7 +931,10 @@ async def run_bot():
                             try:
                                 channel = guild.get_channel(int(task['channel_id']))
                                 if channel:
-                                    await channel.fetch_message(int(task['message_id']))
+                                    await discord_scheduler.submit(
+                                        lambda: channel.fetch_message(int(task['message_id'])),
+                                        Priority.BACKGROUND, bucket=f"channel:{channel.id}"
+                                    )
                                 # Message exists, continue
                             except discord.NotFound:
                                 # Message deleted, clear message_id
@@ -833,7 +971,10 @@ async def run_bot():
                                 if shop_channel_id:
                                     channel = guild.get_channel(int(shop_channel_id))
                                     if channel:
-                                        await channel.fetch_message(int(item['message_id']))
+                                        await discord_scheduler.submit(
+                                            lambda: channel.fetch_message(int(item['message_id'])),
+                                            Priority.BACKGROUND, bucket=f"channel:{channel.id}"
+                                        )
                                 # Message exists, continue
                             except discord.NotFound:
                                 # Message deleted, clear message_id
@@ -869,7 +1010,10 @@ async def run_bot():
                                 try:
                                     channel = guild.get_channel(int(announcement['channel_id']))
                                     if channel:
-                                        await channel.fetch_message(int(announcement['message_id']))
+                                        await discord_scheduler.submit(
+                                            lambda: channel.fetch_message(int(announcement['message_id'])),
+                                            Priority.BACKGROUND, bucket=f"channel:{channel.id}"
+                                        )
                                     # Message exists, continue
                                 except discord.NotFound:
                                     # Message deleted, mark as orphaned
@@ -976,60 +1120,29 @@ async def run_bot():
             """Daily check that balances match transaction history."""
             logger.info("Running transaction integrity validation...")
 
-            integrity_issues = []
-
-            for guild in bot.guilds:
-                guild_id = str(guild.id)
-
-                try:
-                    # Create TransactionManager instance
-                    from core.transaction_manager import TransactionManager
-                    tm = TransactionManager(data_manager)
-
-                    # Get all transactions for this guild
-                    result = tm.get_transactions(guild_id, limit=10000)  # Get all transactions
-                    transactions = result['transactions']
-
-                    # Load currency data
-                    currency_data = data_manager.load_guild_data(guild_id, 'currency')
-                    users = currency_data.get('users', {})
-
-                    # Check each user's balance against transaction history
-                    for user_id, user_data in users.items():
-                        if not user_data.get('is_active', True):
-                            continue  # Skip inactive users
-
-                        current_balance = user_data.get('balance', 0)
-
-                        # Calculate balance from transactions
-                        calculated_balance = 0
-                        user_transactions = [t for t in transactions if t.get('user_id') == user_id]
-
-                        for txn in user_transactions:
-                            calculated_balance += txn.get('amount', 0)
-
-                        # Check for discrepancy
-                        if abs(current_balance - calculated_balance) > 0.01:  # Allow small floating point differences
-                            integrity_issues.append({
-                                'guild_id': guild_id,
-                                'user_id': user_id,
-                                'current_balance': current_balance,
-                                'calculated_balance': calculated_balance,
-                                'discrepancy': current_balance - calculated_balance,
-                                'transaction_count': len(user_transactions)
-                            })
-
-                            logger.warning(f"Balance discrepancy for user {user_id} in guild {guild_id}: "
-                                         f"current={current_balance}, calculated={calculated_balance}")
+            # Reconcile balances against the transaction rollups in one server-side pass
+            try:
+                integrity_issues = bot.transaction_manager.find_balance_discrepancies()
+            except Exception as e:
+                logger.error(f"Error validating transactions: {e}")
+                return
 
-                except Exception as e:
-                    logger.error(f"Error validating transactions for guild {guild_id}: {e}")
+            # Only report on guilds this bot is still in
+            issues_by_guild = {}
+            for issue in integrity_issues:
+                issues_by_guild.setdefault(issue['guild_id'], []).append(issue)
+                logger.warning(f"Balance discrepancy for user {issue['user_id']} in guild {issue['guild_id']}: "
+                             f"current={issue['current_balance']}, calculated={issue['calculated_balance']}")
 
             if integrity_issues:
                 logger.warning(f"Found {len(integrity_issues)} transaction integrity issues")
 
                 # Send alert to log channel if configured
                 for guild in bot.guilds:
+                    guild_issues = issues_by_guild.get(str(guild.id))
+                    if not guild_issues:
+                        continue
+
                     try:
                         config = data_manager.load_guild_data(str(guild.id), 'config')
                         log_channel_id = config.get('log_channel_id')
@@ -1039,20 +1152,20 @@ async def run_bot():
                             if log_channel:
                                 embed = discord.Embed(
                                     title="⚠️ Transaction Integrity Issues",
-                                    description=f"Found {len(integrity_issues)} balance discrepancies during daily validation.",
+                                    description=f"Found {len(guild_issues)} balance discrepancies during daily validation.",
                                     color=discord.Color.orange()
                                 )
 
                                 # Show summary (first 5 issues)
-                                for i, issue in enumerate(integrity_issues[:5]):
+                                for i, issue in enumerate(guild_issues[:5]):
                                     embed.add_field(
                                         name=f"User {issue['user_id'][:8]}...",
-                                        value=f"Discrepancy: {issue['discrepancy']:+.2f}",
+                                        value=f"Discrepancy: {float(issue['discrepancy']):+.2f}",
                                         inline=True
                                     )
 
-                                if len(integrity_issues) > 5:
-                                    embed.set_footer(text=f"And {len(integrity_issues) - 5} more issues...")
+                                if len(guild_issues) > 5:
+                                    embed.set_footer(text=f"And {len(guild_issues) - 5} more issues...")
 
                                 await log_channel.send(embed=embed)
 
@@ -1078,76 +1191,25 @@ async def run_bot():
             """Mark users who left server as inactive."""
             logger.info("Running inactive user cleanup job...")
 
-            total_marked_inactive = 0
-
-            for guild in bot.guilds:
-                guild_id = str(guild.id)
-
-                try:
-                    # Get config to check inactive user settings
-                    config = data_manager.load_guild_data(guild_id, 'config')
-                    days_threshold = config.get('inactive_user_days', 30)
-
-                    # Load currency data
-                    currency_data = data_manager.load_guild_data(guild_id, 'currency')
-                    users = currency_data.get('users', {})
-
-                    # Find users who are marked as active but not in the guild
-                    marked_inactive = []
-
-                    for user_id, user_data in users.items():
-                        if not user_data.get('is_active', True):
-                            continue  # Already inactive
-
-                        # Check if user is still in guild
-                        try:
-                            member = guild.get_member(int(user_id))
-                            if member is None:
-                                # User not in guild, mark as inactive
-                                user_data['is_active'] = False
-                                user_data['left_at'] = datetime.now().isoformat()
-                                marked_inactive.append(user_id)
-
-                                # Cancel any in-progress tasks
-                                tasks_data = data_manager.load_guild_data(guild_id, 'tasks')
-                                user_tasks = tasks_data.get('user_tasks', {}).get(user_id, {})
-
-                                cancelled_tasks = []
-                                for task_id, task_info in user_tasks.items():
-                                    if task_info.get('status') in ['claimed', 'in_progress', 'submitted']:
-                                        task_info['status'] = 'cancelled'
-                                        task_info['cancelled_at'] = datetime.now().isoformat()
-                                        task_info['cancel_reason'] = 'user_left_server'
-                                        cancelled_tasks.append(task_id)
-
-                                # Save tasks data if any were cancelled
-                                if cancelled_tasks:
-                                    data_manager.save_guild_data(guild_id, 'tasks', tasks_data)
-
-                                total_marked_inactive += 1
-
-                                logger.info(f"Marked user {user_id} as inactive in guild {guild_id} "
-                                          f"(cancelled {len(cancelled_tasks)} tasks)")
-
-                        except Exception as e:
-                            logger.error(f"Error checking member {user_id} in guild {guild_id}: {e}")
-
-                    # Save currency data if any users were marked inactive
-                    if marked_inactive:
-                        data_manager.save_guild_data(guild_id, 'currency', currency_data)
+            try:
+                # Reading the member cache is cheap; the diff and updates run in the database
+                members = bot.member_sweeper.snapshot(bot.guilds)
+                summary = await asyncio.to_thread(bot.member_sweeper.sync_presence, members)
 
-                        # Broadcast SSE event
-                        from backend import sse_manager
-                        sse_manager.broadcast_event('inactive_users_cleaned', {
-                            'guild_id': guild_id,
-                            'marked_inactive': len(marked_inactive),
-                            'days_threshold': days_threshold
-                        })
+                from backend import sse_manager
+                for guild_id, marked in summary['guilds'].items():
+                    sse_manager.broadcast_event('inactive_users_cleaned', {
+                        'guild_id': guild_id,
+                        'marked_inactive': marked
+                    })
 
-                except Exception as e:
-                    logger.error(f"Error during inactive user cleanup for guild {guild_id}: {e}")
+                logger.info(f"Inactive user cleanup completed across {len(members)} guilds. "
+                            f"Marked {summary['marked_inactive']} users as inactive, "
+                            f"reactivated {summary['reactivated']}, "
+                            f"cancelled {summary['tasks_cancelled']} tasks")
 
-            logger.info(f"Inactive user cleanup completed. Marked {total_marked_inactive} users as inactive.")
+            except Exception as e:
+                logger.error(f"Error during inactive user cleanup: {e}")
 
         @mark_inactive_users.before_loop
         async def before_mark_inactive_users():
@@ -1159,88 +1221,21 @@ async def run_bot():
 
         @tasks.loop(hours=6)
         async def create_data_backups():
-            """Create timestamped backups of all guild data."""
+            """Write incremental, deduplicated snapshots of changed guild data."""
             logger.info("Running data backup job...")
 
-            import os
-            from pathlib import Path
-
-            backup_count = 0
-            error_count = 0
-
-            for guild in bot.guilds:
-                guild_id = str(guild.id)
-
-                try:
-                    # Create backup directory
-                    backup_dir = Path(f"data/guilds/{guild_id}/backups")
-                    backup_dir.mkdir(parents=True, exist_ok=True)
-
-                    # Get config for backup settings
-                    config = data_manager.load_guild_data(guild_id, 'config')
-                    max_backups = config.get('max_backup_files', 28)
-
-                    # Files to backup
-                    files_to_backup = [
-                        ('currency', 'currency.json'),
-                        ('tasks', 'tasks.json'),
-                        ('config', 'config.json'),
-                        ('transactions', 'transactions.json'),
-                        ('announcements', 'announcements.json'),
-                        ('embeds', 'embeds.json')
-                    ]
-
-                    # Create timestamp
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-                    for data_type, filename in files_to_backup:
-                        try:
-                            # Load data
-                            data = data_manager.load_guild_data(guild_id, data_type)
-                            if data is None:
-                                continue  # Skip if no data
-
-                            # Create backup file
-                            backup_file = backup_dir / f"{data_type}_{timestamp}.json"
-
-                            # Write backup
-                            import json
-                            with open(backup_file, 'w') as f:
-                                json.dump(data, f, indent=2)
-
-                            backup_count += 1
-
-                        except Exception as e:
-                            logger.error(f"Error backing up {data_type} for guild {guild_id}: {e}")
-                            error_count += 1
-
-                    # Clean up old backups
-                    try:
-                        backup_files = {}
-                        for file_path in backup_dir.glob("*.json"):
-                            if "_" in file_path.name:
-                                data_type = file_path.name.split("_")[0]
-                                if data_type not in backup_files:
-                                    backup_files[data_type] = []
-                                backup_files[data_type].append(file_path)
-
-                        # Sort by modification time (newest first) and keep only max_backups
-                        for data_type, files in backup_files.items():
-                            files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-                            files_to_delete = files[max_backups:]
-
-                            for old_file in files_to_delete:
-                                old_file.unlink()
-                                logger.debug(f"Deleted old backup: {old_file.name}")
-
-                    except Exception as e:
-                        logger.error(f"Error cleaning up old backups for guild {guild_id}: {e}")
-
-                except Exception as e:
-                    logger.error(f"Error during backup for guild {guild_id}: {e}")
-                    error_count += 1
-
-            logger.info(f"Data backup completed. Created {backup_count} backups with {error_count} errors.")
+            try:
+                summary = await asyncio.to_thread(
+                    bot.backup_store.run, data_manager, [str(guild.id) for guild in bot.guilds]
+                )
+                logger.info(
+                    f"Data backup completed. {summary['snapshots']} snapshots "
+                    f"({summary['objects_written']} new objects, {summary['bytes_written']} bytes), "
+                    f"{summary['unchanged']} unchanged, {summary['errors']} errors, "
+                    f"{summary['pruned']} pruned, {summary['objects_collected']} objects collected."
+                )
+            except Exception as e:
+                logger.error(f"Error during data backup: {e}")
 
         @create_data_backups.before_loop
         async def before_create_data_backups():
@@ -1260,37 +1255,12 @@ async def run_bot():
             try:
                 logger.info("🔍 Starting daily inactive user check")
 
-                for guild in bot.guilds:
-                    try:
-                        # Get guild's inactivity threshold from database
-                        guild_config = data_manager.supabase.table('guilds').select('inactivity_days').eq('guild_id', str(guild.id)).execute()
-
-                        if not guild_config.data:
-                            continue
-
-                        inactivity_days = guild_config.data[0].get('inactivity_days', 30)
-
-                        # Calculate cutoff date
-                        from datetime import datetime, timedelta
-                        cutoff_date = datetime.utcnow() - timedelta(days=inactivity_days)
+                # One set-based pass using each guild's inactivity_days
+                guild_ids = [str(guild.id) for guild in bot.guilds]
+                marked = await asyncio.to_thread(bot.member_sweeper.mark_idle, guild_ids)
 
-                        # Mark users as inactive via stored procedure (atomic operation)
-                        result = data_manager.supabase.rpc(
-                            'mark_inactive_users',
-                            {
-                                'p_guild_id': str(guild.id),
-                                'p_cutoff_date': cutoff_date.isoformat()
-                            }
-                        ).execute()
-
-                        marked_count = result.data if result.data else 0
-
-                        if marked_count > 0:
-                            logger.info(f"✓ Marked {marked_count} users as inactive in {guild.name}")
-
-                    except Exception as e:
-                        logger.error(f"❌ Failed to check inactive users for guild {guild.id}: {e}")
-                        continue
+                for guild_id, marked_count in marked.items():
+                    logger.info(f"✓ Marked {marked_count} users as inactive in guild {guild_id}")
 
                 logger.info("✅ Daily inactive user check complete")
 
@@ -1311,15 +1281,15 @@ async def run_bot():
 
         @tasks.loop(minutes=5)
         async def execute_scheduled_database_jobs():
-            """Execute pending scheduled jobs from database (every 5 minutes)"""
+            """Keep the lease-based scheduled jobs executor running (watchdog, every 5 minutes)"""
             try:
                 # Get the moderation scheduler
                 moderation_cog = bot.get_cog('Moderation')
                 if moderation_cog and hasattr(moderation_cog, 'scheduler'):
-                    scheduler = moderation_cog.scheduler
-
-                    # Execute database jobs
-                    await scheduler.execute_database_jobs(data_manager, bot)
+                    # No-op while the executor is alive; restarts it if it died
+                    moderation_cog.scheduler.start_database_executor(data_manager)
+                    # Jobs that used up their attempts are marked failed and logged
+                    await asyncio.to_thread(moderation_cog.scheduler.fail_exhausted_jobs)
 
             except Exception as e:
                 logger.error(f"Error executing scheduled database jobs: {e}")
@@ -1498,6 +1468,11 @@ async def main():
         # CRITICAL: Link bot instance to data manager for sync
         data_manager.set_bot_instance(bot)
 
+        # Publish channels/roles/member counts for the separate web process
+        if data_manager.guild_metadata:
+            from core.guild_metadata import register_publisher
+            register_publisher(bot, data_manager.guild_metadata)
+
         # Load cogs
         logger.info("Loading cogs...")
         try:
@@ -1601,9 +1576,9 @@ async def main():
                 return
 
             try:
-                # Create user record
-                data_manager.ensure_user_exists(member.guild.id, member.id)
-                logger.info(f"✅ Created user record for {member.name} in {member.guild.name}")
+                # Create user record (inserted in bulk by flush_user_creations)
+                if data_manager.queue_user_creation(member.guild.id, member.id):
+                    logger.debug(f"Queued user record for {member.name} in {member.guild.name}")
 
                 # Send welcome message if configured
                 config = data_manager.load_guild_data(member.guild.id, "config")
@@ -1617,6 +1592,20 @@ async def main():
             except Exception as e:
                 logger.error(f"Error handling member join for {member.name}: {e}")
 
+        @tasks.loop(seconds=2)
+        async def flush_user_creations():
+            """Insert users queued by on_member_join in batched on-conflict-do-nothing writes"""
+            try:
+                await asyncio.to_thread(data_manager.flush_user_creations)
+            except Exception as e:
+                logger.error(f"Error flushing queued user records: {e}")
+
+        @flush_user_creations.before_loop
+        async def before_flush_user_creations():
+            await bot.wait_until_ready()
+
+        flush_user_creations.start()
+
         @bot.event
         async def on_member_remove(member):
             """Handle user leaving server - mark as inactive"""
@@ -3,22 +3,39 @@ Discord slash commands for announcements
 """
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from core.announcement_manager import AnnouncementManager
 import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Announcements(commands.Cog):
+    # Upper bound on sleep so items scheduled from the dashboard process are picked up
+    SCHEDULE_POLL_SECONDS = 60
+    # Floor on the sleep while an overdue item is left over, so it never spins the loop
+    SCHEDULE_MIN_SLEEP_SECONDS = 5
+    DUE_BATCH_SIZE = 50
+
     def __init__(self, bot):
         self.bot = bot
         # Use global data_manager instead of self.bot.data_manager to avoid timing issues
         from core import data_manager
         self.announcement_manager = AnnouncementManager(data_manager, bot)
-        self.check_scheduled_announcements.start()
+        self._schedule_wakeup = asyncio.Event()
+        self._schedule_runner = None
+        # Items already sent (or given up on) whose status write failed: never re-sent,
+        # only the status write is retried
+        self._unsaved_status = {}
+
+    async def cog_load(self):
+        self._schedule_runner = asyncio.create_task(self._run_scheduled_announcements())
 
     def cog_unload(self):
-        self.check_scheduled_announcements.cancel()
+        if self._schedule_runner:
+            self._schedule_runner.cancel()
 
     @app_commands.command(name="announce", description="Create an announcement")
     @app_commands.describe(
@@ -179,7 +196,7 @@ class Announcements(commands.Cog):
 
         target_channel = channel or interaction.channel
         guild_id = str(interaction.guild_id)
-        schedule_time = datetime.now() + timedelta(minutes=delay_minutes)
+        schedule_time = datetime.now(timezone.utc) + timedelta(minutes=delay_minutes)
 
         try:
             # Store the scheduled announcement in data
@@ -198,16 +215,10 @@ class Announcements(commands.Cog):
                 'status': 'scheduled'
             }
 
-            # Load existing scheduled announcements
-            announcements_data = self.bot.data_manager.load_guild_data(guild_id, 'announcements') or {'scheduled': []}
-
-            # Add to scheduled list
-            if 'scheduled' not in announcements_data or not isinstance(announcements_data['scheduled'], list):
-                announcements_data['scheduled'] = []
-            announcements_data['scheduled'].append(schedule_data)
-
-            # Save back
-            self.bot.data_manager.save_guild_data(guild_id, 'announcements', announcements_data)
+            # Store just this announcement and wake the runner if it is now the earliest
+            if not self.bot.data_manager.save_scheduled_announcement(guild_id, schedule_data):
+                raise RuntimeError("Failed to save scheduled announcement")
+            self.notify_scheduled()
 
             embed = discord.Embed(
                 title="⏰ Announcement Scheduled",
@@ -467,7 +478,7 @@ class Announcements(commands.Cog):
             return
 
         target_channel = channel or interaction.channel
-        schedule_time = datetime.now() + timedelta(minutes=delay_minutes)
+        schedule_time = datetime.now(timezone.utc) + timedelta(minutes=delay_minutes)
 
         try:
             # Prepare embed data
@@ -510,12 +521,9 @@ class Announcements(commands.Cog):
                 'status': 'scheduled'
             }
 
-            announcements_data = self.bot.data_manager.load_guild_data(guild_id, 'announcements') or {'scheduled': []}
-            if 'scheduled' not in announcements_data or not isinstance(announcements_data['scheduled'], list):
-                announcements_data['scheduled'] = []
-            announcements_data['scheduled'].append(schedule_data)
-            
-            self.bot.data_manager.save_guild_data(guild_id, 'announcements', announcements_data)
+            if not self.bot.data_manager.save_scheduled_announcement(guild_id, schedule_data):
+                raise RuntimeError("Failed to save scheduled embed")
+            self.notify_scheduled()
 
             await interaction.followup.send(
                 f"✅ Embed scheduled for <t:{int(schedule_time.timestamp())}:R> in {target_channel.mention}",
@@ -525,102 +533,154 @@ class Announcements(commands.Cog):
         except Exception as e:
             await interaction.followup.send(f"❌ Failed to schedule embed: {str(e)}", ephemeral=True)
 
-    @tasks.loop(minutes=1)
-    async def check_scheduled_announcements(self):
-        """Background loop to check and send scheduled announcements"""
+    def notify_scheduled(self):
+        """Wake the scheduled announcement runner early (safe to call from any thread)"""
+        try:
+            self.bot.loop.call_soon_threadsafe(self._schedule_wakeup.set)
+        except Exception:
+            pass  # Runner not started yet; it queries the due index on start
+
+    async def _run_scheduled_announcements(self):
+        """
+        Sleep until the earliest scheduled announcement across all guilds is due.
+        One indexed query finds due items; each sent item gets a targeted status update.
+        Sleeps are capped so items scheduled from another process are still picked up.
+        """
         await self.bot.wait_until_ready()
-        
-        for guild in self.bot.guilds:
+
+        while True:
+            self._schedule_wakeup.clear()
             try:
-                guild_id = str(guild.id)
-                # Load data without cache to ensure freshness, if possible, but load_guild_data uses cache usually. 
-                # Assuming simple load is fine.
-                data = self.bot.data_manager.load_guild_data(guild_id, 'announcements')
-                
-                if not data or 'scheduled' not in data or not data['scheduled']:
+                await self.check_scheduled_announcements()
+                next_due = await asyncio.to_thread(self.bot.data_manager.get_next_announcement_time)
+            except Exception as e:
+                logger.error(f"Error in scheduled announcements runner: {e}")
+                next_due = None
+
+            timeout = self.SCHEDULE_POLL_SECONDS
+            if next_due is not None:
+                remaining = (next_due - datetime.now(timezone.utc)).total_seconds()
+                # Still overdue after a pass means an item could not be cleared; back off
+                timeout = min(timeout, remaining) if remaining > 0 else self.SCHEDULE_MIN_SLEEP_SECONDS
+
+            try:
+                await asyncio.wait_for(self._schedule_wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def check_scheduled_announcements(self):
+        """Send every scheduled announcement that is due, across all guilds"""
+        await self._retry_unsaved_status()
+
+        while True:
+            now = datetime.now(timezone.utc)
+            due_items = await asyncio.to_thread(self.bot.data_manager.get_due_announcements, now, self.DUE_BATCH_SIZE)
+            fresh_items = [item for item in due_items if item['id'] not in self._unsaved_status]
+
+            for item in fresh_items:
+                guild = self.bot.get_guild(int(item['guild_id']))
+                if not guild:
+                    # The bot has left this guild; nothing can ever post it
+                    logger.warning(f"Scheduled item {item['id']} belongs to unavailable guild {item['guild_id']}, marking failed")
+                    await self._set_announcement_status(item['id'], 'failed')
                     continue
-                
-                new_scheduled = []
-                changed = False
-                now = datetime.now()
-                
-                for item in data['scheduled']:
-                    try:
-                        scheduled_time = datetime.fromisoformat(item['scheduled_for'])
-                        
-                        if now >= scheduled_time:
-                            # Time to send!
-                            delay_seconds = (now - scheduled_time).total_seconds()
-                            is_delayed = delay_seconds > 300  # 5 minutes late implies missed/downtime
-                            
-                            channel = guild.get_channel(int(item['channel_id']))
-                            if channel:
-                                sent_msg = None
-                                if item.get('type') == 'embed':
-                                    embed_dict = item.get('embed_dict')
-                                    embed = discord.Embed.from_dict(embed_dict)
-                                    
-                                    if is_delayed:
-                                        embed.description = f"⚠️ *Note: This scheduled announcement was delayed by {int(delay_seconds//60)} minutes due to system maintenance.*\n\n" + str(embed.description or "")
-                                        
-                                    sent_msg = await channel.send(embed=embed)
-                                else:
-                                    # Regular announcement
-                                    content = item.get('content', '')
-                                    title = item.get('title', 'Announcement')
-                                    use_embed = item.get('use_embed', False) if 'type' not in item else False # Backwards compat
-                                    
-                                    if use_embed:
-                                        embed = discord.Embed(
-                                            title=title,
-                                            description=content,
-                                            color=discord.Color.blue(),
-                                            timestamp=datetime.now()
-                                        )
-                                        embed.set_footer(text=f"Authored by {item.get('author_name', 'Unknown')}")
-                                        
-                                        if is_delayed:
-                                            embed.description = f"⚠️ *Note: This scheduled announcement was delayed by {int(delay_seconds//60)} minutes.*\n\n" + str(embed.description)
-                                            
-                                        # Mentions
-                                        mention_str = "@everyone " if item.get('mention_everyone') else ""
-                                        sent_msg = await channel.send(content=mention_str, embed=embed)
-                                    else:
-                                        if is_delayed:
-                                            msg_content = f"**{title}**\n⚠️ *Delayed transmission ({int(delay_seconds//60)}m)*\n{content}"
-                                        else:
-                                            msg_content = f"**{title}**\n{content}"
-                                        
-                                        # Mentions - cleaned up spacing
-                                        if item.get('mention_everyone'):
-                                            msg_content = "@everyone " + msg_content
-                                            
-                                        sent_msg = await channel.send(msg_content)
-
-                                if sent_msg and item.get('auto_pin'):
-                                    try:
-                                        await sent_msg.pin()
-                                    except:
-                                        pass
-                            
-                            changed = True
-                        else:
-                            # Not time yet
-                            new_scheduled.append(item)
-                    except Exception as e:
-                        print(f"Error processing scheduled item {item.get('id')}: {e}")
-                        # If error, remove it so we don't loop forever on a broken item? 
-                        # Or keep it? If we keep it, it blocks. Better to remove if critical error.
-                        changed = True 
-
-                if changed:
-                    # Successfully sent items should be in 'announcements' dict with status 'published'
-                    # so that save_guild_data updates their status in the database.
-                    data['scheduled'] = new_scheduled
-                    self.bot.data_manager.save_guild_data(guild_id, 'announcements', data)
 
-            except Exception as e:
-                print(f"Error in check_scheduled_announcements for guild {guild.id}: {e}")
+                try:
+                    sent_msg = await self._send_scheduled_item(guild, item, now)
+                except Exception as e:
+                    logger.error(f"Error processing scheduled item {item.get('id')}: {e}")
+                    sent_msg = None
+
+                if sent_msg:
+                    await self._set_announcement_status(
+                        item['id'], 'published', message_id=sent_msg.id, is_pinned=bool(item.get('auto_pin'))
+                    )
+                else:
+                    # Mark it so a broken item is not retried forever
+                    await self._set_announcement_status(item['id'], 'failed')
+
+            # A full batch of items that are all awaiting a status write makes no progress
+            if len(due_items) < self.DUE_BATCH_SIZE or not fresh_items:
+                return
+
+    async def _set_announcement_status(self, announcement_id: str, status: str, **fields) -> bool:
+        """Record an item's outcome; if the write fails, remember it so the item is not sent again"""
+        saved = await asyncio.to_thread(
+            self.bot.data_manager.update_announcement_status, announcement_id, status, **fields
+        )
+        if saved:
+            self._unsaved_status.pop(announcement_id, None)
+        else:
+            self._unsaved_status[announcement_id] = (status, fields)
+        return saved
+
+    async def _retry_unsaved_status(self):
+        """Retry status writes that failed on an earlier pass"""
+        for announcement_id, (status, fields) in list(self._unsaved_status.items()):
+            await self._set_announcement_status(announcement_id, status, **fields)
+
+    async def _send_scheduled_item(self, guild: discord.Guild, item: dict, now: datetime) -> Optional[discord.Message]:
+        """Post one scheduled announcement; returns the sent message, or None if its channel is gone"""
+        scheduled_time = datetime.fromisoformat(str(item['scheduled_for']).replace('Z', '+00:00'))
+        if scheduled_time.tzinfo is None:
+            scheduled_time = scheduled_time.replace(tzinfo=timezone.utc)
+
+        delay_seconds = (now - scheduled_time).total_seconds()
+        is_delayed = delay_seconds > 300  # 5 minutes late implies missed/downtime
+
+        channel = guild.get_channel(int(item['channel_id']))
+        if not channel:
+            return None
+
+        sent_msg = None
+        if item.get('type') == 'embed':
+            embed_dict = item.get('embed_dict')
+            embed = discord.Embed.from_dict(embed_dict)
+
+            if is_delayed:
+                embed.description = f"⚠️ *Note: This scheduled announcement was delayed by {int(delay_seconds//60)} minutes due to system maintenance.*\n\n" + str(embed.description or "")
+
+            sent_msg = await channel.send(embed=embed)
+        else:
+            # Regular announcement
+            content = item.get('content', '')
+            title = item.get('title', 'Announcement')
+            use_embed = item.get('use_embed', False)
+
+            if use_embed:
+                embed = discord.Embed(
+                    title=title,
+                    description=content,
+                    color=discord.Color.blue(),
+                    timestamp=datetime.now(timezone.utc)
+                )
+                embed.set_footer(text=f"Authored by {item.get('author_name', 'Unknown')}")
+
+                if is_delayed:
+                    embed.description = f"⚠️ *Note: This scheduled announcement was delayed by {int(delay_seconds//60)} minutes.*\n\n" + str(embed.description)
+
+                # Mentions
+                mention_str = "@everyone " if item.get('mention_everyone') else ""
+                sent_msg = await channel.send(content=mention_str, embed=embed)
+            else:
+                if is_delayed:
+                    msg_content = f"**{title}**\n⚠️ *Delayed transmission ({int(delay_seconds//60)}m)*\n{content}"
+                else:
+                    msg_content = f"**{title}**\n{content}"
+
+                # Mentions - cleaned up spacing
+                if item.get('mention_everyone'):
+                    msg_content = "@everyone " + msg_content
+
+                sent_msg = await channel.send(msg_content)
+
+        if sent_msg and item.get('auto_pin'):
+            try:
+                await sent_msg.pin()
+            except:
+                pass
+
+        return sent_msg
 
 async def setup(bot):
     await bot.add_cog(Announcements(bot))
@@ -13,6 +13,7 @@ from core.permissions import feature_enabled, is_moderator
 from core.utils import format_currency, create_embed, add_embed_footer
 from core.transaction_manager import TransactionManager
 from core.shop_manager import ShopManager
+from core.search_index import search_index
 
 logger = logging.getLogger(__name__)
 
@@ -289,8 +290,7 @@ class Currency(commands.Cog):
 
     def _get_currency_symbol(self, guild_id: int) -> str:
         """Get currency symbol for this guild"""
-        config = self.data_manager.load_guild_data(guild_id, "config")
-        return config.get("currency_symbol", "$")
+        return self.data_manager.get_config_snapshot(guild_id).currency_symbol
 
     def _initialize_user(self, data: dict, user_id_str: str):
         """Initialize a new user in the currency data"""
@@ -844,22 +844,19 @@ class Currency(commands.Cog):
 
     @buy.autocomplete('item')
     async def buy_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
-        """Autocomplete shop items (active only)"""
-        items = self.shop_manager.get_shop_items(
-            interaction.guild.id,
-            active_only=True,
-            include_out_of_stock=False
+        """Autocomplete shop items (active, in stock) from the in-memory index"""
+        matches = search_index.search(
+            interaction.guild.id, 'shop', current, limit=25,
+            predicate=lambda item: item['is_active'] and item['stock'] != 0
         )
-        choices = []
-        for item_id, item_data in items.items():
-            if current.lower() in item_data['name'].lower():
-                emoji = item_data.get('emoji', '🛍️')
-                # Embed the price-at-time-of-view into the value string
-                choices.append(app_commands.Choice(
-                    name=f"{emoji} {item_data['name']} - {item_data['price']}💰",
-                    value=f"{item_id}::{item_data['price']}"
-                ))
-        return choices[:25]
+        # Embed the price-at-time-of-view into the value string
+        return [
+            app_commands.Choice(
+                name=f"{item['emoji']} {name} - {item['price']}💰"[:100],
+                value=f"{item_id}::{item['price']}"
+            )
+            for item_id, name, item in matches
+        ]
 
     @app_commands.command(name="transfer", description="Send coins to another user")
     @app_commands.describe(
@@ -1154,7 +1151,7 @@ class Currency(commands.Cog):
             return
 
         # Check channel filtering unless global
-        config = self.data_manager.load_guild_data(guild_id, "config")
+        config = self.data_manager.get_config_snapshot(guild_id)
         global_tasks = config.get("global_tasks", False)
         if not global_tasks and task.get("channel_id") != channel_id:
             await interaction.response.send_message("❌ This task is not available in this channel!", ephemeral=True)
@@ -1181,7 +1178,7 @@ class Currency(commands.Cog):
 
         self.data_manager.save_guild_data(guild_id, "tasks", tasks_data)
 
-        config = self.data_manager.load_guild_data(guild_id, "config")
+        config = self.data_manager.get_config_snapshot(guild_id)
         symbol = config.get('currency_symbol', '$')
 
         embed = discord.Embed(
@@ -1215,7 +1212,7 @@ class Currency(commands.Cog):
             return
 
         tasks = tasks_data.get('tasks', {})
-        config = self.data_manager.load_guild_data(guild_id, "config")
+        config = self.data_manager.get_config_snapshot(guild_id)
         symbol = config.get('currency_symbol', '$')
 
         embed = discord.Embed(
@@ -1282,7 +1279,7 @@ class Currency(commands.Cog):
             await interaction.response.send_message(f"{target.mention} has no transaction history!", ephemeral=True)
             return
 
-        config = self.data_manager.load_guild_data(guild_id, "config")
+        config = self.data_manager.get_config_snapshot(guild_id)
         symbol = config.get('currency_symbol', '$')
 
         embed = discord.Embed(
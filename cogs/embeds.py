@@ -5,6 +5,7 @@ from typing import Optional, Literal
 import asyncio
 from datetime import datetime
 from core.embed_builder import EmbedBuilder
+from core.search_index import search_index
 
 class EmbedsCog(commands.Cog):
     def __init__(self, bot):
@@ -89,6 +90,13 @@ class EmbedsCog(commands.Cog):
             ephemeral=True
         )
 
+    def _embed_choices(self, guild_id: int, current: str):
+        """Embed ID choices from the in-memory autocomplete index"""
+        return [
+            app_commands.Choice(name=f"{name} ({embed_id})"[:100], value=embed_id)
+            for embed_id, name, _ in search_index.search(guild_id, 'embeds', current, limit=25)
+        ]
+
     @app_commands.command(name="embed_edit", description="Edit an existing embed")
     @app_commands.describe(
         embed_id="Embed ID to edit",
@@ -171,6 +179,10 @@ class EmbedsCog(commands.Cog):
                 ephemeral=True
             )
 
+    @edit_embed.autocomplete('embed_id')
+    async def edit_embed_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self._embed_choices(interaction.guild_id, current)
+
     @app_commands.command(name="embed_delete", description="Delete an embed")
     @app_commands.describe(embed_id="Embed ID to delete")
     async def delete_embed(
@@ -209,6 +221,10 @@ class EmbedsCog(commands.Cog):
 
         await interaction.followup.send("✅ Embed deleted", ephemeral=True)
 
+    @delete_embed.autocomplete('embed_id')
+    async def delete_embed_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self._embed_choices(interaction.guild_id, current)
+
     @app_commands.command(name="embed_list", description="List all embeds")
     async def list_embeds(self, interaction: discord.Interaction):
         """List all embeds in the server"""
@@ -4,15 +4,15 @@ General utility commands that work across all servers
 
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 import platform
 import psutil
 import logging
 import asyncio
-import json
-import os
 from datetime import datetime, timedelta
 from core.utils import create_embed, add_embed_footer, format_number
+from core.reminder_scheduler import ReminderScheduler
+from core.discord_scheduler import discord_scheduler, Priority
 
 logger = logging.getLogger(__name__)
 
@@ -22,67 +22,33 @@ class General(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.start_time = datetime.now()
-        self.reminders_file = 'data/reminders.json'
-        self.reminders = self.load_reminders()
+        self.reminders = ReminderScheduler('data/reminders.json', self._deliver_reminder)
+        self.reminders.load()
 
     async def cog_load(self):
-        self.check_reminders.start()
+        self._reminder_starter = asyncio.create_task(self._start_reminders())
 
     def cog_unload(self):
-        self.check_reminders.cancel()
+        self._reminder_starter.cancel()
+        self.reminders.stop()
 
-    def load_reminders(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
-        if not os.path.exists(self.reminders_file):
-            return []
-        try:
-            with open(self.reminders_file, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading reminders: {e}")
-            return []
+    async def _start_reminders(self):
+        await self.bot.wait_until_ready()
+        self.reminders.start()
 
-    def save_reminders(self):
-        try:
-            with open(self.reminders_file, 'w') as f:
-                json.dump(self.reminders, f, indent=4)
-        except Exception as e:
-            logger.error(f"Error saving reminders: {e}")
-
-    @tasks.loop(seconds=30)
-    async def check_reminders(self):
-        now = datetime.now().timestamp()
-        to_remove = []
-
-        for reminder in self.reminders:
-            if reminder['time'] <= now:
-                try:
-                    user = self.bot.get_user(reminder['user_id'])
-                    if not user:
-                        user = await self.bot.fetch_user(reminder['user_id'])
-                    
-                    if user:
-                        embed = discord.Embed(
-                            title="⏰ Reminder!",
-                            description=reminder['message'],
-                            color=0xf39c12,
-                            timestamp=datetime.fromtimestamp(reminder['time'])
-                        )
-                        await user.send(embed=embed)
-                except Exception as e:
-                    logger.error(f"Error sending reminder to {reminder['user_id']}: {e}")
-                
-                to_remove.append(reminder)
-        
-        if to_remove:
-            for reminder in to_remove:
-                self.reminders.remove(reminder)
-            self.save_reminders()
+    async def _deliver_reminder(self, reminder):
+        user = self.bot.get_user(reminder['user_id'])
+        if not user:
+            user = await self.bot.fetch_user(reminder['user_id'])
 
-    @check_reminders.before_loop
-    async def before_check_reminders(self):
-        await self.bot.wait_until_ready()
+        if user:
+            embed = discord.Embed(
+                title="⏰ Reminder!",
+                description=reminder['message'],
+                color=0xf39c12,
+                timestamp=datetime.fromtimestamp(reminder['time'])
+            )
+            await discord_scheduler.send_dm(user, Priority.NOTIFICATION, embed=embed)
 
     @commands.command(name="help")
     async def help_command(self, ctx):
@@ -741,12 +707,7 @@ class General(commands.Cog):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
         # Store reminder
-        self.reminders.append({
-            'user_id': interaction.user.id,
-            'message': message,
-            'time': reminder_time.timestamp()
-        })
-        self.save_reminders()
+        self.reminders.add(interaction.user.id, message, reminder_time.timestamp())
         
         logger.info(f"Reminder set for {interaction.user.id}: '{message}' at {reminder_time}")
 
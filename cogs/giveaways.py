@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
+import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Optional
@@ -33,13 +34,14 @@ class RaffleTicketModal(discord.ui.Modal):
         await interaction.response.defer(ephemeral=True)
         try:
             tickets = int(self.tickets_input.value)
-            res = self.giveaway_manager.enter_giveaway(
+            # One RPC off the event loop; the live embed refresh is batched by the manager
+            res = await asyncio.to_thread(
+                self.giveaway_manager.enter_giveaway,
                 self.giveaway_id,
                 str(interaction.guild_id),
                 str(interaction.user.id),
                 tickets=tickets
             )
-            await self.giveaway_manager.refresh_giveaway_embed(self.giveaway_id)
             await interaction.followup.send(f"✅ You've purchased {tickets} tickets! Total spent: {tickets * self.giveaway.get('raffle_cost', 0)}.", ephemeral=True)
         except ValueError as ve:
             await interaction.followup.send(f"❌ Cannot enter: {ve}", ephemeral=True)
@@ -69,29 +71,28 @@ class GiveawayEntryView(discord.ui.View):
             return await interaction.response.send_message("❌ System unavailable.", ephemeral=True)
             
         try:
-            giveaway = manager.get_giveaway(self.giveaway_id, str(interaction.guild_id))
-            if not giveaway or giveaway['status'] != 'active':
+            # Cached snapshot: no database round trip before answering the interaction
+            giveaway = manager.get_giveaway_snapshot(self.giveaway_id, str(interaction.guild_id))
+            if not giveaway or giveaway.status != 'active':
                 return await interaction.response.send_message("❌ This giveaway is not active.", ephemeral=True)
                 
-            ends_at = datetime.fromisoformat(giveaway['ends_at'].replace('Z', '+00:00'))
-            if ends_at <= datetime.now(timezone.utc):
+            if giveaway.ends_at <= datetime.now(timezone.utc):
                 return await interaction.response.send_message("❌ This giveaway has ended.", ephemeral=True)
 
-            mode = giveaway['entry_mode']
+            mode = giveaway.entry_mode
             
             if mode == 'raffle':
                 modal = RaffleTicketModal(self.giveaway_id, giveaway, manager)
                 await interaction.response.send_modal(modal)
             else:
                 await interaction.response.defer(ephemeral=True)
-                if mode == 'role_restricted':
-                    required_roles = giveaway.get('required_role_ids', [])
-                    user_roles = [str(r.id) for r in interaction.user.roles]
-                    if not any(r in user_roles for r in required_roles):
-                        return await interaction.followup.send("❌ You do not have the required roles to enter.", ephemeral=True)
-                        
-                res = manager.enter_giveaway(self.giveaway_id, str(interaction.guild_id), str(interaction.user.id))
-                await manager.refresh_giveaway_embed(self.giveaway_id)
+                res = await asyncio.to_thread(
+                    manager.enter_giveaway,
+                    self.giveaway_id,
+                    str(interaction.guild_id),
+                    str(interaction.user.id),
+                    member_role_ids=[r.id for r in interaction.user.roles]
+                )
                 await interaction.followup.send("✅ You've entered the giveaway!", ephemeral=True)
                 
         except ValueError as ve:
@@ -113,8 +114,7 @@ class GiveawayEntryView(discord.ui.View):
             return await interaction.followup.send("❌ System unavailable.", ephemeral=True)
             
         try:
-            manager.withdraw_entry(self.giveaway_id, str(interaction.guild_id), str(interaction.user.id))
-            await manager.refresh_giveaway_embed(self.giveaway_id)
+            await asyncio.to_thread(manager.withdraw_entry, self.giveaway_id, str(interaction.guild_id), str(interaction.user.id))
             await interaction.followup.send("✅ You've withdrawn from the giveaway.", ephemeral=True)
         except ValueError as ve:
             await interaction.followup.send(f"❌ Cannot withdraw: {ve}", ephemeral=True)
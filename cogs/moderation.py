@@ -11,6 +11,7 @@ from core.moderation.actions import ModerationActions
 from core.moderation.scheduler import ModerationScheduler
 from core.moderation.logger import ModerationLogger
 from core.moderation.health import ModerationHealthChecker
+from core.moderation.antispam import AntiSpamEngine
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,7 @@ class Moderation(commands.Cog):
         # Initialize moderation components with None data_manager initially
         self.protection_manager = ProtectionManager(None)
         self.scanner = MessageScanner(self.protection_manager)
+        self.antispam = AntiSpamEngine()
         self.enforcer = ProtectionEnforcer(self.protection_manager, self.scanner, bot)
         self.actions = ModerationActions(self.protection_manager, bot)
         self.scheduler = ModerationScheduler(bot)
@@ -38,6 +40,10 @@ class Moderation(commands.Cog):
         """Set data manager reference"""
         self.data_manager = data_manager
         self.protection_manager.data_manager = data_manager
+        self.scheduler.data_manager = data_manager
+
+    def cog_unload(self):
+        self.scheduler.stop_database_executor()
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -45,19 +51,25 @@ class Moderation(commands.Cog):
         if message.author.bot or not message.guild:
             return
 
-        config = self.protection_manager.load_protection_config(message.guild.id)
-        if not config.get('enabled', True):
+        # Compiled once per config change; exemption checks are set lookups
+        policy = self.protection_manager.get_policy(message.guild.id)
+        if not policy.enabled:
             return
 
-        if self.protection_manager.is_exempt_from_protection(
-            message.guild.id, message.author.id, message.channel.id, message.author.roles
-        ):
+        if policy.is_exempt(message.channel.id, message.author.roles):
             return
 
         try:
+            # Rate/duplicate tracking is in memory and runs ahead of the content scanners
+            spam_violations = []
+            if policy.spam_filter:
+                violation = self.antispam.check(message.guild.id, message.author.id, message.content, policy)
+                if violation:
+                    spam_violations.append(violation)
+
             profanity_matches = self.scanner.scan_message_for_profanity(message.guild.id, message.content)
-            is_link_exempt = self.protection_manager.is_exempt_from_link_protection(message.guild.id, message.author)
-            is_file_exempt = self.protection_manager.is_exempt_from_file_protection(message.guild.id, message.author)
+            is_link_exempt = policy.is_link_exempt(message.author)
+            is_file_exempt = policy.is_file_exempt(message.author)
 
             link_violations = []
             file_violations = []
@@ -76,16 +88,16 @@ class Moderation(commands.Cog):
                         if embed.type in ['image', 'video', 'gifv']:
                             file_violations.append({'type': 'file_violation', 'url': embed.url, 'reason': 'unauthorized_media_embed'})
 
-            if not profanity_matches and not link_violations and not file_violations:
+            if not profanity_matches and not link_violations and not file_violations and not spam_violations:
                 return
 
-            action_plan = self.enforcer.evaluate_protection_action(message.guild.id, message, profanity_matches, link_violations, file_violations)
+            action_plan = self.enforcer.evaluate_protection_action(message.guild.id, message, profanity_matches, link_violations, file_violations, spam_violations)
             result = await self.enforcer.apply_protection_action(action_plan, message)
 
             if result['success'] and result['action_taken'] != 'ignore':
                 self.logger.create_moderation_audit_log(
                     message.guild.id, result['action_taken'], message.author.id, self.bot.user.id, message.id,
-                    {'reason': result['reason'], 'severity': action_plan.get('severity', 'low'), 'profanity_matches': len(profanity_matches), 'link_violations': len(link_violations), 'file_violations': len(file_violations)}
+                    {'reason': result['reason'], 'severity': action_plan.get('severity', 'low'), 'profanity_matches': len(profanity_matches), 'link_violations': len(link_violations), 'file_violations': len(file_violations), 'spam_violations': len(spam_violations)}
                 )
         except Exception as e:
             logger.error(f"Error in message moderation: {e}")
@@ -152,6 +152,7 @@ class PremiumSync(commands.Cog):
                     if is_premium and current_tier not in ('growth_insider', 'premium'):
                         # Upgrade
                         self.bot.data_manager.supabase.table('guilds').update({'subscription_tier': 'growth_insider'}).eq('guild_id', str(guild.id)).execute()
+                        self.bot.data_manager.refresh_guild_config(guild.id)
                         logger.info(f"💎 Upgraded guild {guild.name} (Owner: {user_id}) to Growth Insider")
                         
                         # Optional: Send DM
@@ -165,6 +166,7 @@ class PremiumSync(commands.Cog):
                     elif not is_premium and current_tier in ('growth_insider', 'premium'):
                         # Downgrade (expired)
                         self.bot.data_manager.supabase.table('guilds').update({'subscription_tier': 'free'}).eq('guild_id', str(guild.id)).execute()
+                        self.bot.data_manager.refresh_guild_config(guild.id)
                         logger.info(f"📉 Downgraded guild {guild.name} (Owner: {user_id}) to Free")
                 except Exception as ex:
                     logger.error(f"Error syncing guild {guild.id}: {ex}")
@@ -11,6 +11,8 @@ import logging
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 
+from core.discord_scheduler import discord_scheduler, Priority
+
 logger = logging.getLogger(__name__)
 
 
@@ -134,7 +136,7 @@ class ServerBoost(commands.Cog):
                     embed.set_thumbnail(url=member.display_avatar.url)
                     embed.set_footer(text=f"New Balance: {result['new_balance']:,} coins")
                     
-                    await member.send(embed=embed)
+                    await discord_scheduler.send_dm(member, Priority.NOTIFICATION, embed=embed)
                     logger.info(f"Sent boost reward DM to {member.name}")
                 except discord.Forbidden:
                     logger.warning(f"Could not DM {member.name} - DMs disabled")
@@ -164,7 +166,10 @@ class ServerBoost(commands.Cog):
                             )
                             log_embed.set_thumbnail(url=member.display_avatar.url)
                             
-                            await log_channel.send(embed=log_embed)
+                            await discord_scheduler.submit(
+                                lambda: log_channel.send(embed=log_embed), Priority.BACKGROUND,
+                                bucket=f"channel:{log_channel.id}"
+                            )
                     except Exception as log_error:
                         logger.error(f"Error logging boost to channel: {log_error}")
                 
@@ -322,7 +327,7 @@ class ServerBoost(commands.Cog):
                             )
                             embed.add_field(name="💰 Reward", value=f"**{reward_amount:,}** coins", inline=True)
                             embed.set_footer(text=f"New Balance: {int(data['new_balance']):,} coins")
-                            await member.send(embed=embed)
+                            await discord_scheduler.send_dm(member, Priority.NOTIFICATION, embed=embed)
                         except:
                             pass # DMs blocked
                         
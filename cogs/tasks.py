@@ -14,6 +14,8 @@ try:
     from core.task_manager import TaskManager
     from core.embed_builder import EmbedBuilder
     from core.utils import create_embed
+    from core.discord_scheduler import discord_scheduler, Priority
+    from core.search_index import search_index
 except ImportError as e:
     print(f"Import error in tasks.py: {e}")
     data_manager = None
@@ -21,6 +23,7 @@ except ImportError as e:
     TaskManager = None
     EmbedBuilder = None
     create_embed = None
+    search_index = None
 
 logger = logging.getLogger(__name__)
 
@@ -891,6 +894,17 @@ class Tasks(commands.Cog):
         except AttributeError:
             pass  # SSE manager not available yet
 
+    def _task_choices(self, guild_id, current: str, active_only: bool) -> list:
+        """Task ID choices from the in-memory autocomplete index"""
+        if search_index is None:
+            return []
+        predicate = (lambda task: task['status'] == 'active') if active_only else None
+        return [
+            app_commands.Choice(name=f"#{task_id} {name} ({task['reward']} coins)"[:100], value=int(task_id))
+            for task_id, name, task in search_index.search(guild_id, 'tasks', current, limit=25, predicate=predicate)
+            if task_id.isdigit()
+        ]
+
     @app_commands.command(name="task_claim_proof", description="Claim and submit proof for a General task")
     @app_commands.describe(
         task_id="The ID of the task to claim and submit",
@@ -990,6 +1004,10 @@ class Tasks(commands.Cog):
                 ephemeral=True
             )
 
+    @task_claim_proof.autocomplete('task_id')
+    async def task_claim_proof_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self._task_choices(interaction.guild.id, current, active_only=True)
+
     @app_commands.command(name="task_submit", description="Submit proof for a claimed task")
     @app_commands.describe(
         task_id="The ID of the task to submit",
@@ -1080,6 +1098,10 @@ class Tasks(commands.Cog):
                 ephemeral=True
             )
 
+    @submit_task.autocomplete('task_id')
+    async def submit_task_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self._task_choices(interaction.guild.id, current, active_only=False)
+
 
 
 class TaskReviewView(discord.ui.View):
@@ -1368,7 +1390,9 @@ class TaskReviewView(discord.ui.View):
                         if channel:
                             try:
                                 message = await channel.fetch_message(int(task['message_id']))
-                                await message.delete()
+                                await discord_scheduler.submit(
+                                    message.delete, Priority.BACKGROUND, bucket=f"channel:{channel.id}"
+                                )
                             except discord.NotFound:
                                 pass
                     except Exception as e:
@@ -1850,7 +1874,7 @@ class TaskReviewView(discord.ui.View):
         """Post a task message to Discord and return message info."""
         try:
             # Get task channel from config
-            config = data_manager.load_guild_data(guild_id, 'config')
+            config = data_manager.get_config_snapshot(guild_id)
             task_channel_id = config.get('task_channel_id')
 
             if not task_channel_id:
@@ -8,6 +8,7 @@ from discord import app_commands
 import logging
 import os
 import aiohttp
+import time
 from datetime import datetime, timezone, timedelta
 
 logger = logging.getLogger(__name__)
@@ -21,6 +22,10 @@ class VoteCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.data_manager = bot.data_manager
+
+        # /votetop leaderboard: (expires_at, rows); every caller shares one RPC per TTL
+        self._top_voters_cache = None
+        self._top_voters_ttl = int(os.getenv('VOTETOP_CACHE_TTL', '60'))
         # Bot logic removed as requested
         self.bot_id = "1155751362764742676"  # EVLBot ID (fallback)
         
@@ -136,14 +141,16 @@ class VoteCog(commands.Cog):
         """Show user's voting statistics"""
         
         try:
-            # Get all votes for this user
-            result = self.data_manager.admin_client.table('vote_logs').select('*').eq(
-                'user_id', str(interaction.user.id)
-            ).order('created_at', desc=True).execute()
-            
-            votes = result.data if result.data else []
-            total_votes = len(votes)
-            total_coins = sum(v.get('reward', 100) for v in votes)
+            # Totals and recent votes are aggregated server-side in one call
+            result = self.data_manager.admin_client.rpc(
+                'get_vote_stats',
+                {'p_user_id': str(interaction.user.id), 'p_recent': 5}
+            ).execute()
+
+            stats = result.data or {}
+            votes = stats.get('recent', [])
+            total_votes = stats.get('total_votes', 0)
+            total_coins = stats.get('total_coins', 0)
             
             embed = discord.Embed(
                 title=f"📊 Vote Stats for {interaction.user.display_name}",
@@ -178,7 +185,7 @@ class VoteCog(commands.Cog):
                 )
                 
                 # Last vote time
-                last_vote = datetime.fromisoformat(votes[0]['created_at'].replace('Z', '+00:00'))
+                last_vote = datetime.fromisoformat((stats.get('last_vote_at') or votes[0]['created_at']).replace('Z', '+00:00'))
                 next_vote = last_vote + timedelta(hours=12)
                 now = datetime.now(timezone.utc)
                 
@@ -219,32 +226,15 @@ class VoteCog(commands.Cog):
         """Show top voters leaderboard"""
         
         try:
-            # Get votes from the last 30 days
-            thirty_days_ago = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-            
-            result = self.data_manager.admin_client.table('vote_logs').select(
-                'user_id, reward'
-            ).gte('created_at', thirty_days_ago).execute()
+            sorted_users = self._get_top_voters()
             
-            if not result.data:
+            if not sorted_users:
                 await interaction.response.send_message(
                     "📊 No votes recorded in the last 30 days!",
                     ephemeral=True
                 )
                 return
             
-            # Aggregate votes by user
-            user_votes = {}
-            for vote in result.data:
-                uid = vote['user_id']
-                if uid not in user_votes:
-                    user_votes[uid] = {'count': 0, 'coins': 0}
-                user_votes[uid]['count'] += 1
-                user_votes[uid]['coins'] += vote.get('reward', 100)
-            
-            # Sort by vote count
-            sorted_users = sorted(user_votes.items(), key=lambda x: x[1]['count'], reverse=True)[:10]
-            
             embed = discord.Embed(
                 title="🏆 Top Voters (Last 30 Days)",
                 color=discord.Color.gold()
@@ -253,17 +243,18 @@ class VoteCog(commands.Cog):
             leaderboard = ""
             medals = ["🥇", "🥈", "🥉"]
             
-            for i, (user_id, stats) in enumerate(sorted_users):
+            for i, row in enumerate(sorted_users):
                 medal = medals[i] if i < 3 else f"**{i+1}.**"
+                user_id = row['user_id']
                 
-                # Try to get username
+                # Try to get username (cache first, API only on a miss)
                 try:
-                    user = await self.bot.fetch_user(int(user_id))
+                    user = self.bot.get_user(int(user_id)) or await self.bot.fetch_user(int(user_id))
                     username = user.display_name
                 except:
                     username = f"User {user_id[:8]}..."
                 
-                leaderboard += f"{medal} **{username}** - {stats['count']} votes ({stats['coins']:,} coins)\n"
+                leaderboard += f"{medal} **{username}** - {row['vote_count']} votes ({row['coins']:,} coins)\n"
             
             embed.description = leaderboard or "No voters to display"
             embed.set_footer(text="Vote with /vote to appear on this leaderboard!")
@@ -278,6 +269,21 @@ class VoteCog(commands.Cog):
             )
 
 
+    def _get_top_voters(self, days: int = 30, limit: int = 10) -> list:
+        """Top voters from the get_top_voters RPC, cached briefly per bot"""
+        now = time.time()
+        if self._top_voters_cache and self._top_voters_cache[0] > now:
+            return self._top_voters_cache[1]
+
+        result = self.data_manager.admin_client.rpc(
+            'get_top_voters',
+            {'p_days': days, 'p_limit': limit}
+        ).execute()
+        rows = result.data or []
+        self._top_voters_cache = (now + self._top_voters_ttl, rows)
+        return rows
+
+
 class VoteView(discord.ui.View):
     """Button view for voting links"""
     
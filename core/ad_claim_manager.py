@@ -8,7 +8,10 @@ import secrets
 import hashlib
 import random
 import hmac
+import threading
+import time
 from core.evolved_lotus_api import evolved_lotus_api
+from core.ad_rate_limiter import ad_rate_limiter
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional
 
@@ -17,11 +20,19 @@ logger = logging.getLogger(__name__)
 
 class AdClaimManager:
     """Manages ad viewing sessions and reward distribution"""
-    
-    def __init__(self, data_manager, transaction_manager, secret_key: str = "dev-secret"):
+
+    # Sessions created by other processes are merged into the limiter at least this often
+    RECONCILE_INTERVAL_SECONDS = 300
+
+    def __init__(self, data_manager, transaction_manager, secret_key: str = "dev-secret", rate_limiter=None,
+                 reconcile_interval: float = RECONCILE_INTERVAL_SECONDS):
         self.data_manager = data_manager
         self.transaction_manager = transaction_manager
         self.secret_key = secret_key
+        self.rate_limiter = rate_limiter or ad_rate_limiter
+        self.reconcile_interval = reconcile_interval
+        self._reconciled_at: Optional[float] = None
+        self._reconcile_lock = threading.Lock()
         logger.info("✅ AdClaimManager initialized with security signatures")
     
     def create_ad_session(self, user_id: str, guild_id: str, ip_address: str = None, user_agent: str = None) -> Dict:
@@ -37,10 +48,10 @@ class AdClaimManager:
         Returns:
             Dict with session_id and viewer_url
         """
-        try:
-            # Enforce limits (rate limit, daily limit)
-            self._check_ad_limits(user_id)
+        # Enforce limits (rate limit, daily limit); raises before anything is written
+        previous_session_ts = self._check_ad_limits(user_id)
 
+        try:
             # Generate unique session ID
             session_id = self._generate_session_id(user_id, guild_id)
             
@@ -103,6 +114,8 @@ class AdClaimManager:
             }
             
         except Exception as e:
+            # No session was recorded, so give the reserved slot back
+            self.rate_limiter.release(user_id, previous_session_ts)
             logger.error(f"Error creating ad session: {e}")
             raise
     
@@ -131,73 +144,30 @@ class AdClaimManager:
                     logger.warning(f"Signature mismatch for ad verification: Session {session_id}")
                     return {'success': False, 'error': 'Invalid request signature'}
 
-            # Get ad view record
-            result = self.data_manager.admin_client.table('ad_views') \
-                .select('*') \
-                .eq('ad_session_id', session_id) \
-                .execute()
-            
-            if not result.data or len(result.data) == 0:
-                return {
-                    'success': False,
-                    'error': 'Invalid session ID'
-                }
-            
-            ad_view = result.data[0]
-            now = datetime.now(timezone.utc)
-            
-            # 2. EXPIRY VALIDATION (Exploit 2)
-            expires_at_str = ad_view.get('expires_at')
-            if expires_at_str:
-                expires_at = datetime.fromisoformat(expires_at_str.replace('Z', '+00:00'))
-                if now > expires_at:
-                    return {'success': False, 'error': 'Ad session has expired (15min timeout)'}
-            
-            if not result.data or len(result.data) == 0:
-                return {
-                    'success': False,
-                    'error': 'Invalid session ID'
-                }
-            
-            ad_view = result.data[0]
-            
-            # Check if already verified
-            if ad_view['is_verified']:
-                return {
-                    'success': False,
-                    'error': 'Ad already verified',
-                    'already_rewarded': True
-                }
-            
-            # Mark as verified
-            self.data_manager.admin_client.table('ad_views') \
-                .update({
-                    'is_verified': True,
-                    'verified_at': datetime.now(timezone.utc).isoformat(),
-                    'metadata': {
-                        **ad_view.get('metadata', {}),
-                        'verification_data': verification_data or {},
-                        'verified_timestamp': datetime.now(timezone.utc).isoformat()
-                    }
-                }) \
-                .eq('ad_session_id', session_id) \
-                .execute()
-            
-            # Grant reward
-            reward_result = self._grant_reward(
-                ad_view['user_id'],
-                ad_view['guild_id'],
-                session_id,
-                ad_view['reward_amount']
-            )
-            
+            # Validate, credit and mark the session in one transaction
+            result = self.data_manager.admin_client.rpc('verify_ad_view_and_reward', {
+                'p_session_id': session_id,
+                'p_verification': verification_data or {},
+                'p_daily_limit': self.rate_limiter.daily_limit
+            }).execute()
+            outcome = result.data or {}
+
+            if not outcome.get('success'):
+                response = {'success': False, 'error': outcome.get('error', 'Verification failed')}
+                if outcome.get('already_rewarded'):
+                    response['already_rewarded'] = True
+                return response
+
+            self._invalidate_balance_cache(outcome['guild_id'], outcome['user_id'])
+            logger.info(f"Granted {outcome['reward_amount']} currency to user {outcome['user_id']} for ad view {session_id}")
+
             return {
                 'success': True,
                 'verified': True,
-                'reward_granted': reward_result['success'],
-                'reward_amount': ad_view['reward_amount'],
-                'new_balance': reward_result.get('new_balance'),
-                'transaction_id': reward_result.get('transaction_id')
+                'reward_granted': True,
+                'reward_amount': outcome['reward_amount'],
+                'new_balance': outcome.get('new_balance'),
+                'transaction_id': outcome.get('transaction_id')
             }
             
         except Exception as e:
@@ -206,69 +176,13 @@ class AdClaimManager:
                 'success': False,
                 'error': str(e)
             }
-    
-    def _grant_reward(self, user_id: str, guild_id: str, session_id: str, amount: int) -> Dict:
-        """
-        Grant currency reward to user for watching ad
-        
-        Args:
-            user_id: Discord user ID
-            guild_id: Discord guild ID
-            session_id: Ad session ID
-            amount: Reward amount
-        
-        Returns:
-            Dict with reward status
-        """
-        try:
-            # Use transaction manager to adjust balance
-            transaction = self.transaction_manager.adjust_balance(
-                user_id=int(user_id),
-                guild_id=int(guild_id),
-                amount=amount,
-                reason=f"Watched ad - Session {session_id[:8]}"
-            )
-            
-            # Check if transaction was created successfully (has an 'transaction_id' field)
-            if transaction and transaction.get('transaction_id'):
-                # Update ad_views record
-                self.data_manager.admin_client.table('ad_views') \
-                    .update({
-                        'reward_granted': True,
-                        'transaction_id': transaction.get('transaction_id')
-                    }) \
-                    .eq('ad_session_id', session_id) \
-                    .execute()
-                
-                # Update global_task_claims record
-                self.data_manager.admin_client.table('global_task_claims') \
-                    .update({
-                        'reward_granted': True,
-                        'completed_at': datetime.now(timezone.utc).isoformat()
-                    }) \
-                    .eq('ad_session_id', session_id) \
-                    .execute()
-                
-                logger.info(f"Granted {amount} currency to user {user_id} for ad view {session_id}")
-                
-                return {
-                    'success': True,
-                    'new_balance': transaction.get('balance_after'),
-                    'transaction_id': transaction.get('id')
-                }
-            else:
-                logger.error(f"Transaction failed for ad reward: {transaction}")
-                return {
-                    'success': False,
-                    'error': 'Failed to create transaction'
-                }
-            
-        except Exception as e:
-            logger.error(f"Error granting reward: {e}", exc_info=True)
-            return {
-                'success': False,
-                'error': str(e)
-            }
+
+    def _invalidate_balance_cache(self, guild_id: str, user_id: str):
+        """Drop cached balance/transactions the reward RPC just changed"""
+        cache_manager = getattr(self.transaction_manager, 'cache_manager', None)
+        if cache_manager:
+            cache_manager.invalidate(f"balance:{guild_id}:{user_id}")
+            cache_manager.invalidate_pattern(f"transactions:{guild_id}:{user_id}:*")
     
     def get_user_ad_stats(self, user_id: str, guild_id: str = None) -> Dict:
         """
@@ -359,64 +273,44 @@ class AdClaimManager:
             logger.error(f"Error getting global tasks: {e}")
             return []
     
-    def _check_ad_limits(self, user_id: str):
+    def _check_ad_limits(self, user_id: str) -> Optional[float]:
         """
-        Check daily limits and cooldowns for ad viewing
+        Check daily limits and cooldowns for ad viewing against the in-memory limiter.
+        Reserves the slot and returns the previous session time for release().
         """
-        DAILY_LIMIT = 50
-        COOLDOWN_SECONDS = 60
-        
+        self._reconcile_if_stale()
+        return self.rate_limiter.acquire(user_id)
+
+    def reconcile_limits(self) -> int:
+        """Merge today's per-user session counts from ad_views into the limiter"""
         now = datetime.now(timezone.utc)
-        
-        try:
-            # 1. Check daily limit
-            start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-            
-            # Use count='exact' and head=True to get count without fetching data
-            result = self.data_manager.admin_client.table('ad_views') \
-                .select('ad_session_id', count='exact') \
-                .eq('user_id', user_id) \
-                .gte('created_at', start_of_day) \
-                .execute()
-                
-            # supabase-py v2 returns count in the result object
-            current_count = result.count if result.count is not None else len(result.data)
-            
-            if current_count >= DAILY_LIMIT:
-                logger.info(f"User {user_id} reached daily limit: {current_count}/{DAILY_LIMIT}")
-                raise Exception(f"Daily ad limit reached ({DAILY_LIMIT}). Please come back tomorrow!")
+        result = self.data_manager.admin_client.rpc('get_ad_limit_state', {
+            'p_day_start': self.rate_limiter.day_start(now.timestamp()).isoformat(),
+            'p_since': (now - timedelta(seconds=self.rate_limiter.cooldown_seconds)).isoformat()
+        }).execute()
+        self._reconciled_at = time.monotonic()
+        return self.rate_limiter.merge(result.data or [], now.timestamp())
 
-            # 2. Check cooldown (time since last created session)
-            result = self.data_manager.admin_client.table('ad_views') \
-                .select('created_at') \
-                .eq('user_id', user_id) \
-                .order('created_at', desc=True) \
-                .limit(1) \
-                .execute()
-                
-            if result.data and len(result.data) > 0:
-                last_created_str = result.data[0]['created_at']
-                # Handle potentially missing timezone info or different formats
-                try:
-                    # Basic ISO parsing
-                    last_created = datetime.fromisoformat(last_created_str.replace('Z', '+00:00'))
-                except ValueError:
-                     # Fallback if format is weird
-                     last_created = now - timedelta(seconds=COOLDOWN_SECONDS + 1)
+    def _reconcile_if_stale(self):
+        """
+        Reconcile before a limit check when the last merge is older than the interval.
 
-                time_since = (now - last_created).total_seconds()
-                
-                if time_since < COOLDOWN_SECONDS:
-                    wait_time = int(COOLDOWN_SECONDS - time_since)
-                    raise Exception(f"Please wait {wait_time}s before watching another ad.")
-                    
+        Processes without a background loop (the web worker) stay in step this
+        way, and a limiter that was never warmed is warmed by its first check.
+        """
+        reconciled_at = self._reconciled_at
+        if reconciled_at is not None and time.monotonic() - reconciled_at < self.reconcile_interval:
+            return
+        if not self._reconcile_lock.acquire(blocking=False):
+            return  # Another request is already reconciling
+        try:
+            self.reconcile_limits()
         except Exception as e:
-            # Re-raise explicit limit exceptions, log others
-            if "limit reached" in str(e) or "Please wait" in str(e):
-                raise
-            logger.error(f"Error checking ad limits: {e}")
-            # Fail open or closed? Closed for safety.
-            raise Exception("Service momentarily unavailable, please try again.")
+            logger.error(f"Failed to reconcile ad claim limits: {e}")
+            # Back off for an interval rather than retrying on every request
+            self._reconciled_at = time.monotonic()
+        finally:
+            self._reconcile_lock.release()
 
     def _generate_session_id(self, user_id: str, guild_id: str) -> str:
         """
@@ -469,7 +363,7 @@ class AdClaimManager:
                 }
             
             # Verify the ad view
-            result = self.verify_ad_view(session_id, postback_data)
+            result = self.verify_ad_view(session_id, verification_data=postback_data)
             
             logger.info(f"Processed Monetag postback for session {session_id}: {result}")
             
@@ -0,0 +1,118 @@
+"""
+In-memory limiter for ad-claim sessions
+Enforces the per-user daily cap and cooldown without querying ad_views on every request
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DAILY_LIMIT = 50
+COOLDOWN_SECONDS = 60
+
+
+class AdLimitExceeded(Exception):
+    """Raised when a user is over the daily cap or still cooling down"""
+
+
+def _day_key(ts: float) -> int:
+    """UTC calendar day for a timestamp; the daily cap resets at midnight UTC"""
+    return int(ts // 86400)
+
+
+class AdRateLimiter:
+    """
+    Per-user daily counter plus last-session timestamp.
+
+    Checks are a dict lookup under a lock. The counters are warmed from
+    ad_views at startup and merged with the database on a timer, so other
+    processes' sessions are picked up within one reconcile interval.
+    """
+
+    def __init__(self, daily_limit: int = DAILY_LIMIT, cooldown_seconds: int = COOLDOWN_SECONDS):
+        self.daily_limit = daily_limit
+        self.cooldown_seconds = cooldown_seconds
+        self._users: Dict[str, list] = {}  # user_id -> [day, count, last_ts]
+        self._lock = threading.Lock()
+
+    def acquire(self, user_id: str, now: Optional[float] = None) -> Optional[float]:
+        """
+        Reserve one session for the user or raise AdLimitExceeded.
+        Returns the previous session timestamp, to hand back to release().
+        """
+        now = time.time() if now is None else now
+        today = _day_key(now)
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = self._users[user_id] = [today, 0, None]
+            elif entry[0] != today:
+                entry[0], entry[1] = today, 0
+
+            if entry[1] >= self.daily_limit:
+                logger.info(f"User {user_id} reached daily limit: {entry[1]}/{self.daily_limit}")
+                raise AdLimitExceeded(f"Daily ad limit reached ({self.daily_limit}). Please come back tomorrow!")
+
+            previous = entry[2]
+            if previous is not None and now - previous < self.cooldown_seconds:
+                wait_time = int(self.cooldown_seconds - (now - previous))
+                raise AdLimitExceeded(f"Please wait {wait_time}s before watching another ad.")
+
+            entry[1] += 1
+            entry[2] = now
+            return previous
+
+    def release(self, user_id: str, previous: Optional[float]):
+        """Undo an acquire() whose session was never created"""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[1] > 0:
+                entry[1] -= 1
+                entry[2] = previous
+
+    def merge(self, rows: Iterable[Dict], now: Optional[float] = None) -> int:
+        """
+        Fold database counts into memory, keeping the higher count and later timestamp
+        so sessions created by other processes are respected. Also drops idle users.
+        """
+        now = time.time() if now is None else now
+        today = _day_key(now)
+        with self._lock:
+            for row in rows:
+                user_id = str(row['user_id'])
+                last_ts = row.get('last_created_at')
+                if isinstance(last_ts, str):
+                    last_ts = datetime.fromisoformat(last_ts.replace('Z', '+00:00')).timestamp()
+                count = int(row.get('view_count') or 0)
+
+                entry = self._users.get(user_id)
+                if entry is None or entry[0] != today:
+                    self._users[user_id] = [today, count, last_ts]
+                else:
+                    entry[1] = max(entry[1], count)
+                    if last_ts is not None and (entry[2] is None or last_ts > entry[2]):
+                        entry[2] = last_ts
+
+            # Entries from earlier days that are past their cooldown carry no information
+            idle = [
+                user_id for user_id, (day, _, last_ts) in self._users.items()
+                if day != today and (last_ts is None or now - last_ts >= self.cooldown_seconds)
+            ]
+            for user_id in idle:
+                del self._users[user_id]
+            return len(self._users)
+
+    def day_start(self, now: Optional[float] = None) -> datetime:
+        now = time.time() if now is None else now
+        return datetime.fromtimestamp(_day_key(now) * 86400, timezone.utc)
+
+    def __len__(self):
+        return len(self._users)
+
+
+# Shared by the bot's and the web backend's AdClaimManager in this process
+ad_rate_limiter = AdRateLimiter()
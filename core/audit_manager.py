@@ -6,9 +6,11 @@ Tracks all moderation actions, system events, and user activities with detailed
 import logging
 import json
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional
 from enum import Enum
 
+from core.export_stream import keyset_rows, csv_chunks, json_chunks
+
 logger = logging.getLogger(__name__)
 
 class AuditEventType(Enum):
@@ -478,29 +480,60 @@ class AuditManager:
             logger.error(f"Failed to flush audit buffer: {e}")
             # Keep buffer for retry on next flush
 
+    AUDIT_EXPORT_FIELDS = ['audit_id', 'event_type', 'user_id', 'moderator_id', 'message_id',
+                           'details', 'can_undo', 'created_at']
+
+    def _audit_query(self, guild_id: int, filters: Dict[str, Any] = None):
+        query = self.data_manager.admin_client.table('moderation_audit_logs').select('*').eq('guild_id', str(guild_id))
+        if filters:
+            if 'event_type' in filters:
+                query = query.eq('event_type', filters['event_type'])
+            if 'user_id' in filters:
+                query = query.eq('user_id', str(filters['user_id']))
+            if 'moderator_id' in filters:
+                query = query.eq('moderator_id', str(filters['moderator_id']))
+            if 'start_date' in filters:
+                query = query.gte('created_at', filters['start_date'])
+            if 'end_date' in filters:
+                query = query.lte('created_at', filters['end_date'])
+        return query
+
+    def iter_audit_logs(self, guild_id: int, filters: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """Every matching audit log, newest first, paged with a (created_at, audit_id) cursor"""
+        for log in keyset_rows(lambda: self._audit_query(guild_id, filters), ['created_at', 'audit_id'], descending=True):
+            yield {
+                'audit_id': log['audit_id'],
+                'event_type': log['event_type'],
+                'user_id': log['user_id'],
+                'moderator_id': log['moderator_id'],
+                'message_id': log['message_id'],
+                'details': json.loads(log['details']) if log['details'] else {},
+                'can_undo': log['can_undo'],
+                'created_at': log['created_at']
+            }
+
+    def iter_audit_log_export(self, guild_id: int, filters: Dict[str, Any] = None,
+                              format_type: str = 'json') -> Iterator[str]:
+        """Stream audit logs as CSV or JSON text chunks"""
+        logs = self.iter_audit_logs(guild_id, filters)
+        if format_type == 'json':
+            return json_chunks(logs)
+        if format_type == 'csv':
+            return csv_chunks(
+                self.AUDIT_EXPORT_FIELDS,
+                ([json.dumps(log[f], default=str) if f == 'details' else log[f] for f in self.AUDIT_EXPORT_FIELDS]
+                 for log in logs)
+            )
+        raise ValueError(f"Unsupported export format: {format_type}")
+
     def export_audit_logs(self, guild_id: int, filters: Dict[str, Any] = None,
                          format_type: str = 'json') -> Optional[str]:
-        """Export audit logs in various formats"""
+        """Export audit logs in various formats (whole document; use iter_audit_log_export to stream)"""
         try:
-            logs_data = self.get_audit_logs(guild_id, filters, limit=10000)  # Large limit for export
-
-            if format_type == 'json':
-                return json.dumps(logs_data['logs'], indent=2)
-            elif format_type == 'csv':
-                import csv
-                import io
-
-                output = io.StringIO()
-                if logs_data['logs']:
-                    writer = csv.DictWriter(output, fieldnames=logs_data['logs'][0].keys())
-                    writer.writeheader()
-                    writer.writerows(logs_data['logs'])
-
-                return output.getvalue()
-            else:
-                logger.warning(f"Unsupported export format: {format_type}")
-                return None
-
+            return ''.join(self.iter_audit_log_export(guild_id, filters, format_type))
+        except ValueError:
+            logger.warning(f"Unsupported export format: {format_type}")
+            return None
         except Exception as e:
             logger.error(f"Failed to export audit logs: {e}")
             return None
@@ -68,9 +68,7 @@ class ChannelLockManager:
             bool: True if guild has premium tier
         """
         try:
-            config = self.data_manager.load_guild_data(guild_id, 'config')
-            tier = config.get('subscription_tier', 'free')
-            return tier == 'premium'
+            return self.data_manager.get_config_snapshot(guild_id).is_premium
         except Exception as e:
             logger.error(f"Error checking premium status for guild {guild_id}: {e}")
             return False
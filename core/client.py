@@ -47,8 +47,7 @@ async def get_prefix(bot, message):
         return "!"  # Default for DMs
 
     try:
-        config = data_manager.load_guild_data(message.guild.id, "config")
-        return config.get("prefix", "!")
+        return data_manager.get_config_snapshot(message.guild.id).prefix
     except Exception:
         return "!"  # Fallback
 
@@ -7,7 +7,9 @@ import os
 from datetime import datetime, timezone
 import time
 import random
-from typing import Any, Dict, List, Callable, Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Callable, Optional, Tuple
 import supabase
 from supabase import create_client, Client
 
@@ -16,6 +18,9 @@ logger = logging.getLogger(__name__)
 class DataManager:
     """Supabase-based data management with enhanced connection management"""
 
+    # Most (guild_id, user_id) pairs remembered as having a row; least recently used are evicted
+    KNOWN_USERS_LIMIT = 100_000
+
     def __init__(self):
         # Supabase configuration
         self.supabase_url = os.getenv('SUPABASE_URL')
@@ -39,6 +44,18 @@ class DataManager:
         # ✅ CRITICAL: Store the supabase client for backward compatibility
         self.supabase = self.client
 
+        # Immutable per-guild config snapshots for hot-path reads (hydrated at startup)
+        from core.guild_config import GuildConfigStore
+        self.guild_configs = GuildConfigStore(self.admin_client)
+
+        # Channels/roles/member counts published by the bot process for the web process
+        from core.guild_metadata import GuildMetadataStore
+        self.guild_metadata = GuildMetadataStore.from_env()
+
+        # Direct pooled Postgres for atomic transactions (None -> Supabase emulation)
+        from core.postgres_pool import PostgresPool
+        self.pg_pool = PostgresPool.from_env()
+
         # Connection health monitoring
         self._connection_healthy = True
         self._last_health_check = 0
@@ -51,6 +68,23 @@ class DataManager:
         self._cache_ttl = int(os.getenv('CACHE_TTL', '0'))  # DISABLED - 0 seconds
         self._balance_cache_ttl = int(os.getenv('BALANCE_CACHE_TTL', '0'))  # DISABLED - 0 seconds
 
+        # Dashboard member counts: guild_id -> (count, fetched_at)
+        self._user_count_cache: Dict[str, tuple] = {}
+        self._user_count_cache_ttl = int(os.getenv('USER_COUNT_CACHE_TTL', '300'))
+
+        # Username/display name changes awaiting a batched sync: (guild_id, user_id) -> row
+        self._pending_profile_updates: Dict[tuple, Dict] = {}
+        self._profile_updates_lock = threading.Lock()
+
+        # Role changes awaiting a batched sync: (guild_id, user_id) -> {'base': roles, 'roles': roles}
+        self._pending_role_updates: Dict[tuple, Dict] = {}
+        self._role_updates_lock = threading.Lock()
+
+        # Users confirmed to have a row (LRU, bounded) and new members awaiting a batched insert
+        self._known_users: 'OrderedDict[Tuple[str, str], None]' = OrderedDict()
+        self._pending_user_inserts: Dict[tuple, Dict] = {}
+        self._user_inserts_lock = threading.Lock()
+
         # Event listener system
         self._listeners: List[Callable] = []
 
@@ -208,6 +242,17 @@ class DataManager:
             except Exception as e:
                 logger.error(f"Error in listener {listener.__name__}: {e}")
 
+    def get_config_snapshot(self, guild_id):
+        """
+        Read-only config for a guild with no I/O once hydrated.
+        Use load_guild_data(guild_id, 'config') when you need a mutable dict to save back.
+        """
+        return self.guild_configs.get(guild_id)
+
+    def refresh_guild_config(self, guild_id):
+        """Re-read a guild's config snapshot after writing the guilds row directly"""
+        return self.guild_configs.refresh(guild_id)
+
     def load_guild_data(self, guild_id: int, data_type: str, force_reload: bool = False) -> Dict:
         """Load guild data from Supabase with caching"""
         cache_key = f"{guild_id}_{data_type}"
@@ -412,26 +457,7 @@ class DataManager:
                 scheduled = []
                 
                 for ann in announcements_result.data:
-                    item = {
-                        'id': ann['announcement_id'],
-                        'announcement_id': ann['announcement_id'],
-                        'title': ann['title'],
-                        'content': ann['content'],
-                        'embed_data': ann.get('embed_data', {}),
-                        'channel_id': ann['channel_id'],
-                        'message_id': ann['message_id'],
-                        'is_pinned': ann['is_pinned'],
-                        'status': ann.get('status', 'published'),
-                        'created_at': self._serialize_datetime_field(ann.get('created_at')),
-                        'created_by': ann['created_by']
-                    }
-                    
-                    # Store use_embed from embed_data if present
-                    if item['embed_data'] and isinstance(item['embed_data'], dict):
-                        if 'use_embed' in item['embed_data']:
-                            item['use_embed'] = item['embed_data']['use_embed']
-                        if 'scheduled_for' in item['embed_data']:
-                            item['scheduled_for'] = item['embed_data']['scheduled_for']
+                    item = self._announcement_item_from_row(ann)
 
                     if item['status'] == 'scheduled':
                         scheduled.append(item)
@@ -489,6 +515,7 @@ class DataManager:
             # Update cache
             self._cache[cache_key] = data.copy()
             self._cache_timestamps[cache_key] = time.time()
+            self._sync_search_index(guild_id, data_type, data)
 
             return data
 
@@ -612,6 +639,7 @@ class DataManager:
 
                     # Save guild data
                     self.admin_client.table('guilds').upsert(guild_data, on_conflict='guild_id').execute()
+                    self.guild_configs.put_row(guild_data)
 
                     # Handle embeds data - store in embeds table
                     embeds_data = save_data.get('embeds', {})
@@ -807,27 +835,8 @@ class DataManager:
 
                     # 2. Save scheduled announcements
                     for sched in scheduled_list:
-                        s_id = sched.get('id') or sched.get('announcement_id')
-                        if not s_id: continue
-                        
-                        # Prepare embed data with scheduling info
-                        embed_data = sched.get('embed_data', {})
-                        if not isinstance(embed_data, dict): embed_data = {}
-                        if 'use_embed' in sched: embed_data['use_embed'] = sched['use_embed']
-                        if 'scheduled_for' in sched: embed_data['scheduled_for'] = sched['scheduled_for']
-
-                        data_to_upsert = {
-                            'announcement_id': s_id,
-                            'guild_id': guild_id_str,
-                            'title': sched.get('title', 'Untitled'),
-                            'content': sched.get('content', ''),
-                            'embed_data': embed_data,
-                            'channel_id': sched.get('channel_id'),
-                            'message_id': None,
-                            'is_pinned': sched.get('is_pinned', False),
-                            'status': 'scheduled',
-                            'created_by': sched.get('author_id') or sched.get('created_by')
-                        }
+                        data_to_upsert = self._scheduled_announcement_row(guild_id_str, sched)
+                        if not data_to_upsert: continue
 
                         try:
                             self.admin_client.table('announcements').upsert(data_to_upsert, on_conflict='announcement_id').execute()
@@ -856,15 +865,30 @@ class DataManager:
                 data_type,
                 data
             )
+            if success:
+                self._sync_search_index(guild_id, data_type, data)
             return success
         except Exception as e:
             logger.error(f"save_guild_data failed for {data_type}: {e}")
             return False
 
+    def _sync_search_index(self, guild_id, data_type: str, data: Dict):
+        """Diff freshly loaded/saved shop items, tasks or embeds into the autocomplete index"""
+        source = {'currency': ('shop', 'shop_items'), 'tasks': ('tasks', 'tasks'), 'embeds': ('embeds', 'embeds')}.get(data_type)
+        if not source or not isinstance(data, dict) or not isinstance(data.get(source[1]), dict):
+            return
+        try:
+            from core.search_index import search_index
+            search_index.sync(guild_id, source[0], data[source[1]])
+        except Exception as e:
+            logger.warning(f"Failed to update search index for guild {guild_id} ({data_type}): {e}")
+
     def delete_shop_item(self, guild_id: int, item_id: str) -> bool:
         """Delete a shop item directly from the database"""
         try:
             self.admin_client.table('shop_items').delete().eq('guild_id', str(guild_id)).eq('item_id', item_id).execute()
+            from core.search_index import search_index
+            search_index.remove(guild_id, 'shop', item_id)
             return True
         except Exception as e:
             logger.error(f"Failed to delete shop item {item_id} for guild {guild_id}: {e}")
@@ -1311,7 +1335,8 @@ class DataManager:
             'size': cache_size,
             'max_size': getattr(self, '_cache_max_size', 1000),
             'hit_rate': self._calculate_hit_rate() if hasattr(self, '_cache_hits') else 0.0,
-            'keys': list(self._cache.keys())[:10] if hasattr(self, '_cache') else []  # Show first 10 keys
+            'keys': list(self._cache.keys())[:10] if hasattr(self, '_cache') else [],  # Show first 10 keys
+            'guild_configs': self.guild_configs.memory_footprint()
         }
 
     def _calculate_hit_rate(self):
@@ -1342,6 +1367,10 @@ class DataManager:
 
     async def ensure_user_exists(self, guild_id: int, user_id: int) -> bool:
         """Ensure user exists in database with default values"""
+        if self.is_known_user(guild_id, user_id):
+            # Row confirmed earlier; no round trip needed
+            return True
+
         try:
             # First check if user exists to avoid unnecessary conflicts
             existing = self.supabase.table("users").select("user_id").eq(
@@ -1353,18 +1382,14 @@ class DataManager:
             if existing.data and len(existing.data) > 0:
                 # User already exists
                 logger.debug(f"User {user_id} already exists in guild {guild_id}")
+                self._remember_user(guild_id, user_id)
                 return True
 
             # User doesn't exist, try to create
-            result = self.supabase.table("users").insert({
-                "user_id": str(user_id),
-                "guild_id": str(guild_id),
-                "balance": 0,
-                "total_earned": 0,
-                "total_spent": 0,
-                "is_active": True
-            }).execute()
+            result = self.supabase.table("users").insert(self._new_user_row(guild_id, user_id)).execute()
 
+            self._remember_user(guild_id, user_id)
+            self._user_count_cache.pop(str(guild_id), None)
             logger.info(f"✅ Created user {user_id} in guild {guild_id}")
             return True
 
@@ -1374,11 +1399,91 @@ class DataManager:
             # Handle 409 Conflict or duplicate key errors
             if "409" in error_msg or "duplicate" in error_msg.lower() or "unique" in error_msg.lower():
                 logger.debug(f"User {user_id} already exists in guild {guild_id} (handled conflict)")
+                self._remember_user(guild_id, user_id)
                 return True
 
             logger.error(f"Failed to create user {user_id} in guild {guild_id}: {e}")
             return False
 
+    @staticmethod
+    def _new_user_row(guild_id, user_id) -> Dict:
+        return {
+            "user_id": str(user_id),
+            "guild_id": str(guild_id),
+            "balance": 0,
+            "total_earned": 0,
+            "total_spent": 0,
+            "is_active": True
+        }
+
+    def _remember_user(self, guild_id, user_id):
+        key = (str(guild_id), str(user_id))
+        with self._user_inserts_lock:
+            self._known_users[key] = None
+            self._known_users.move_to_end(key)
+            while len(self._known_users) > self.KNOWN_USERS_LIMIT:
+                self._known_users.popitem(last=False)
+
+    def is_known_user(self, guild_id, user_id) -> bool:
+        """True if the user's row is confirmed to exist (queued inserts do not count)"""
+        key = (str(guild_id), str(user_id))
+        with self._user_inserts_lock:
+            if key not in self._known_users:
+                return False
+            self._known_users.move_to_end(key)
+            return True
+
+    def forget_guild_users(self, guild_id):
+        """Drop known and queued users for a guild whose rows were deleted"""
+        guild_id = str(guild_id)
+        with self._user_inserts_lock:
+            for key in [k for k in self._known_users if k[0] == guild_id]:
+                del self._known_users[key]
+            for key in [k for k in self._pending_user_inserts if k[0] == guild_id]:
+                del self._pending_user_inserts[key]
+
+    def queue_user_creation(self, guild_id, user_id) -> bool:
+        """
+        Queue a user row for the next batched insert (e.g. from on_member_join).
+        Returns False if the user is already known or queued, so a raid costs
+        dict lookups rather than a select and insert per member. A queued user
+        only counts as known once the flush has written the row.
+        """
+        key = (str(guild_id), str(user_id))
+        with self._user_inserts_lock:
+            if key in self._known_users or key in self._pending_user_inserts:
+                return False
+            self._pending_user_inserts[key] = self._new_user_row(*key)
+        return True
+
+    def flush_user_creations(self, batch_size: int = 500) -> int:
+        """Insert queued users with one insert ... on conflict do nothing per batch"""
+        with self._user_inserts_lock:
+            if not self._pending_user_inserts:
+                return 0
+            pending, self._pending_user_inserts = self._pending_user_inserts, {}
+
+        rows = list(pending.values())
+        written = 0
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            try:
+                self.admin_client.table('users').upsert(
+                    batch, on_conflict='guild_id,user_id', ignore_duplicates=True
+                ).execute()
+                written += len(batch)
+                for row in batch:
+                    self._remember_user(row['guild_id'], row['user_id'])
+                for guild_id in {row['guild_id'] for row in batch}:
+                    self._user_count_cache.pop(guild_id, None)
+            except Exception as e:
+                logger.error(f"Failed to create {len(batch)} queued users: {e}")
+                with self._user_inserts_lock:
+                    for row in batch:
+                        self._pending_user_inserts.setdefault((row['guild_id'], row['user_id']), row)
+
+        return written
+
     def load_user_data(self, guild_id: int, user_id: int) -> dict:
         """Load user data from database"""
         try:
@@ -1401,7 +1506,11 @@ class DataManager:
         """
         Context manager for atomic database transactions with proper error handling.
         Provides row-level locking and rollback capabilities.
+        Uses a real pooled Postgres transaction when DATABASE_URL is configured,
+        otherwise emulates one over Supabase.
         """
+        if self.pg_pool:
+            return self.pg_pool.transaction(guild_id)
         return AtomicTransactionContext(self.admin_client, guild_id)
 
     def get_user_guilds(self, user_id: str) -> List[Dict]:
@@ -1434,55 +1543,152 @@ class DataManager:
             logger.error(f"Error getting user guilds for {user_id}: {e}")
             return []
 
-    def get_guild_users(self, guild_id: str, page: int = 1, limit: int = 50) -> Dict:
+    # Scheduling fields that only live inside announcements.embed_data
+    _SCHEDULE_EXTRA_FIELDS = ('use_embed', 'scheduled_for', 'type', 'embed_dict', 'mention_everyone', 'auto_pin', 'author_name')
+
+    def _announcement_item_from_row(self, ann: Dict) -> Dict:
+        """Convert an announcements row into the dict shape used by the announcements data type"""
+        item = {
+            'id': ann['announcement_id'],
+            'announcement_id': ann['announcement_id'],
+            'guild_id': ann.get('guild_id'),
+            'title': ann['title'],
+            'content': ann['content'],
+            'embed_data': ann.get('embed_data', {}),
+            'channel_id': ann['channel_id'],
+            'message_id': ann['message_id'],
+            'is_pinned': ann['is_pinned'],
+            'status': ann.get('status', 'published'),
+            'created_at': self._serialize_datetime_field(ann.get('created_at')),
+            'created_by': ann['created_by']
+        }
+
+        # Restore scheduling info stored in embed_data
+        if item['embed_data'] and isinstance(item['embed_data'], dict):
+            for key in self._SCHEDULE_EXTRA_FIELDS:
+                if key in item['embed_data']:
+                    item[key] = item['embed_data'][key]
+        if ann.get('scheduled_for'):
+            item['scheduled_for'] = self._serialize_datetime_field(ann['scheduled_for'])
+
+        return item
+
+    def _scheduled_announcement_row(self, guild_id_str: str, sched: Dict) -> Optional[Dict]:
+        """Build the announcements row for a scheduled item (None if it has no id)"""
+        s_id = sched.get('id') or sched.get('announcement_id')
+        if not s_id:
+            return None
+
+        embed_data = sched.get('embed_data', {})
+        if not isinstance(embed_data, dict): embed_data = {}
+        for key in self._SCHEDULE_EXTRA_FIELDS:
+            if key in sched:
+                embed_data[key] = sched[key]
+
+        scheduled_for = None
+        if sched.get('scheduled_for'):
+            due = datetime.fromisoformat(str(sched['scheduled_for']).replace('Z', '+00:00'))
+            if due.tzinfo is None:
+                due = due.replace(tzinfo=timezone.utc)
+            scheduled_for = due.isoformat()
+
+        return {
+            'announcement_id': s_id,
+            'guild_id': guild_id_str,
+            'title': sched.get('title') or (sched.get('embed_dict') or {}).get('title') or 'Untitled',
+            'content': sched.get('content', ''),
+            'embed_data': embed_data,
+            'channel_id': sched.get('channel_id'),
+            'message_id': None,
+            'is_pinned': sched.get('is_pinned', False),
+            'status': 'scheduled',
+            'scheduled_for': scheduled_for,
+            'created_by': sched.get('author_id') or sched.get('created_by')
+        }
+
+    def save_scheduled_announcement(self, guild_id, sched: Dict) -> bool:
+        """Upsert a single scheduled announcement without rewriting the guild's other announcements"""
+        try:
+            row = self._scheduled_announcement_row(str(guild_id), sched)
+            if not row:
+                return False
+            self.admin_client.table('announcements').upsert(row, on_conflict='announcement_id').execute()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save scheduled announcement for guild {guild_id}: {e}")
+            return False
+
+    def get_due_announcements(self, until: datetime, limit: int = 50) -> List[Dict]:
+        """Scheduled announcements across all guilds that are due by ``until``, earliest first"""
+        result = self.admin_client.table('announcements').select('*').eq(
+            'status', 'scheduled'
+        ).lte('scheduled_for', until.isoformat()).order('scheduled_for').limit(limit).execute()
+        return [self._announcement_item_from_row(ann) for ann in result.data or []]
+
+    def get_next_announcement_time(self) -> Optional[datetime]:
+        """Due time of the earliest pending scheduled announcement across all guilds"""
+        result = self.admin_client.table('announcements').select('scheduled_for').eq(
+            'status', 'scheduled'
+        ).not_.is_('scheduled_for', 'null').order('scheduled_for').limit(1).execute()
+        if not result.data:
+            return None
+        return datetime.fromisoformat(result.data[0]['scheduled_for'].replace('Z', '+00:00'))
+
+    def update_announcement_status(self, announcement_id: str, status: str, message_id: str = None, is_pinned: bool = None) -> bool:
+        """Targeted status update for one announcement (e.g. scheduled -> published)"""
+        try:
+            update = {'status': status}
+            if message_id is not None:
+                update['message_id'] = str(message_id)
+            if is_pinned is not None:
+                update['is_pinned'] = is_pinned
+            self.admin_client.table('announcements').update(update).eq('announcement_id', announcement_id).execute()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to update announcement {announcement_id} to {status}: {e}")
+            return False
+
+    def get_guild_users(self, guild_id: str, page: int = 1, limit: int = 50, after: Optional[str] = None) -> Dict:
         """
         Get paginated list of users for a specific guild.
-        Returns dict with 'users' list and 'total' count.
-        Fetches Discord usernames from bot instance.
+        Returns dict with 'users' list, 'total' count and 'next_cursor'.
+
+        Pages are keyset-paginated on user_id: pass the previous page's
+        'next_cursor' as ``after`` to avoid OFFSET scans. The total is cached
+        for a few minutes. Usernames are overlaid from the Discord cache but
+        never written back here; see queue_member_profile_update.
         """
         try:
             guild_id_str = str(guild_id)
-            
-            # Calculate offset for pagination
-            offset = (page - 1) * limit
-            
-            # Get total count
-            count_result = self.admin_client.table('users').select('user_id', count='exact').eq('guild_id', guild_id_str).execute()
-            total_count = count_result.count if hasattr(count_result, 'count') else len(count_result.data)
-            
-            # Get paginated users
-            users_result = self.admin_client.table('users').select('*').eq('guild_id', guild_id_str).range(offset, offset + limit - 1).execute()
-            
+
+            query = self.admin_client.table('users').select('*').eq('guild_id', guild_id_str).order('user_id')
+            if after:
+                users_result = query.gt('user_id', str(after)).limit(limit).execute()
+            else:
+                # First page, or a client that only knows page numbers
+                offset = (page - 1) * limit
+                users_result = query.range(offset, offset + limit - 1).execute()
+
+            total_count = self._get_cached_user_count(guild_id_str)
+
             # Get Discord guild if bot instance is available
             guild = None
             if self.bot_instance:
                 guild = self.bot_instance.get_guild(int(guild_id))
-            
+
             users = []
             for user in users_result.data:
                 user_id = user['user_id']
-                username = user.get('username', 'Unknown')
-                display_name = user.get('display_name', 'Unknown')
-                
-                # Try to fetch from Discord if available
+                username = user.get('username') or 'Unknown'
+                display_name = user.get('display_name') or 'Unknown'
+
+                # Prefer live names from the Discord cache when the member is known
                 if guild:
-                    try:
-                        member = guild.get_member(int(user_id))
-                        if member:
-                            username = member.name
-                            display_name = member.display_name
-                            
-                            # Update database with fetched info
-                            try:
-                                self.admin_client.table('users').update({
-                                    'username': username,
-                                    'display_name': display_name
-                                }).eq('guild_id', guild_id_str).eq('user_id', user_id).execute()
-                            except:
-                                pass  # Ignore update errors
-                    except:
-                        pass  # If member not found, use database values
-                
+                    member = guild.get_member(int(user_id))
+                    if member:
+                        username = member.name
+                        display_name = member.display_name
+
                 users.append({
                     'user_id': user_id,
                     'username': username,
@@ -1497,15 +1703,18 @@ class DataManager:
                     'created_at': self._serialize_datetime_field(user.get('created_at')),
                     'updated_at': self._serialize_datetime_field(user.get('updated_at'))
                 })
-            
+
+            next_cursor = users[-1]['user_id'] if len(users) == limit else None
+
             return {
                 'users': users,
                 'total': total_count,
                 'page': page,
                 'limit': limit,
-                'pages': (total_count + limit - 1) // limit  # Ceiling division
+                'pages': (total_count + limit - 1) // limit,  # Ceiling division
+                'next_cursor': next_cursor
             }
-            
+
         except Exception as e:
             logger.error(f"Error getting guild users for {guild_id}: {e}")
             return {
@@ -1513,9 +1722,114 @@ class DataManager:
                 'total': 0,
                 'page': page,
                 'limit': limit,
-                'pages': 0
+                'pages': 0,
+                'next_cursor': None
             }
 
+    def _get_cached_user_count(self, guild_id: str) -> int:
+        """Member count for a guild, refreshed at most every USER_COUNT_CACHE_TTL seconds"""
+        cached = self._user_count_cache.get(guild_id)
+        if cached and time.time() - cached[1] < self._user_count_cache_ttl:
+            return cached[0]
+
+        count_result = self.admin_client.table('users').select('user_id', count='exact', head=True).eq('guild_id', guild_id).execute()
+        total_count = count_result.count or 0
+        self._user_count_cache[guild_id] = (total_count, time.time())
+        return total_count
+
+    def queue_member_profile_update(self, guild_id, user_id, username: str, display_name: str):
+        """
+        Queue a username/display name change for the next batched profile sync.
+        Repeated changes for the same member collapse into one pending row.
+        """
+        row = {
+            'guild_id': str(guild_id),
+            'user_id': str(user_id),
+            'username': username,
+            'display_name': display_name
+        }
+        with self._profile_updates_lock:
+            self._pending_profile_updates[(row['guild_id'], row['user_id'])] = row
+
+    def flush_member_profile_updates(self, batch_size: int = 500) -> int:
+        """Write queued profile changes with one sync_member_profiles call per batch"""
+        if not self._pending_profile_updates:
+            return 0
+
+        # Called from a worker thread while events keep queueing on the loop
+        with self._profile_updates_lock:
+            pending, self._pending_profile_updates = self._pending_profile_updates, {}
+        rows = list(pending.values())
+        updated = 0
+
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            try:
+                result = self.admin_client.rpc('sync_member_profiles', {'p_profiles': batch}).execute()
+                updated += result.data or 0
+            except Exception as e:
+                logger.error(f"Failed to sync {len(batch)} member profiles: {e}")
+                # Requeue unless a newer change arrived meanwhile
+                with self._profile_updates_lock:
+                    for row in batch:
+                        self._pending_profile_updates.setdefault((row['guild_id'], row['user_id']), row)
+
+        return updated
+
+    def queue_member_role_update(self, guild_id, user_id, before_roles, after_roles):
+        """
+        Queue a member's role change for the next batched role sync.
+        Repeated updates for the same member keep the first known state as the
+        base and only the latest state, so a role added and removed within one
+        window costs no writes.
+        """
+        key = (str(guild_id), str(user_id))
+        roles = frozenset(str(r) for r in after_roles)
+        with self._role_updates_lock:
+            pending = self._pending_role_updates.get(key)
+            base = pending['base'] if pending else frozenset(str(r) for r in before_roles)
+            self._pending_role_updates[key] = {'base': base, 'roles': roles}
+
+    def flush_member_role_updates(self, batch_size: int = 1000) -> Dict[str, int]:
+        """Write queued role changes with one sync_member_roles call per batch of members"""
+        totals = {'added': 0, 'removed': 0}
+        if not self._pending_role_updates:
+            return totals
+
+        # Called from a worker thread while events keep queueing on the loop
+        with self._role_updates_lock:
+            pending, self._pending_role_updates = self._pending_role_updates, {}
+        items = list(pending.items())
+
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            added, removed = [], []
+            for (guild_id, user_id), state in batch:
+                added.extend({'guild_id': guild_id, 'user_id': user_id, 'role_id': role_id}
+                             for role_id in state['roles'] - state['base'])
+                removed.extend({'guild_id': guild_id, 'user_id': user_id, 'role_id': role_id}
+                               for role_id in state['base'] - state['roles'])
+            if not added and not removed:
+                continue
+
+            try:
+                result = self.admin_client.rpc('sync_member_roles', {'p_added': added, 'p_removed': removed}).execute()
+                data = result.data or {}
+                totals['added'] += data.get('added') or 0
+                totals['removed'] += data.get('removed') or 0
+            except Exception as e:
+                logger.error(f"Failed to sync roles for {len(batch)} members: {e}")
+                # Requeue; a newer change keeps its roles but diffs from the unsynced base
+                with self._role_updates_lock:
+                    for key, state in batch:
+                        newer = self._pending_role_updates.get(key)
+                        self._pending_role_updates[key] = {
+                            'base': state['base'],
+                            'roles': newer['roles'] if newer else state['roles']
+                        }
+
+        return totals
+
     def get_guild_config(self, guild_id: str) -> Dict:
         """Get guild configuration with live Discord data"""
         try:
@@ -1540,6 +1854,13 @@ class DataManager:
                         }).eq('guild_id', str(guild_id)).execute()
                     except:
                         pass  # Ignore update errors
+            elif self.guild_metadata:
+                # Separate web process: use the bot's published snapshot
+                meta = self.guild_metadata.get_meta(guild_id)
+                if meta:
+                    config_data['server_name'] = meta['server_name']
+                    config_data['member_count'] = meta['member_count']
+                    config_data['icon_url'] = meta['icon_url']
             
             return config_data
         except Exception as e:
@@ -1565,6 +1886,8 @@ class DataManager:
         """Get list of channels for a guild from Discord bot"""
         try:
             if not self.bot_instance:
+                if self.guild_metadata:
+                    return self.guild_metadata.get_channels(guild_id)
                 logger.warning("Bot instance not set, cannot get channels")
                 return []
             
@@ -1594,6 +1917,8 @@ class DataManager:
         """Get list of roles for a guild from Discord bot"""
         try:
             if not self.bot_instance:
+                if self.guild_metadata:
+                    return self.guild_metadata.get_roles(guild_id)
                 logger.warning("Bot instance not set, cannot get roles")
                 return []
             
@@ -1737,7 +2062,26 @@ class AtomicTransactionContext:
             import re
             query_normalized = re.sub(r'\s+', ' ', query.strip()).upper()
             
-            if 'UPDATE TASK_SETTINGS' in query_normalized and 'RETURNING' in query_normalized:
+            if 'INSERT INTO TASK_SETTINGS' in query_normalized and 'RETURNING NEXT_TASK_ID' in query_normalized:
+                # Handle: INSERT INTO task_settings ... ON CONFLICT (guild_id) DO UPDATE SET next_task_id = next_task_id + 1 RETURNING next_task_id
+                guild_id = str(args[0])
+                result = self.client.table('task_settings').select('next_task_id').eq('guild_id', guild_id).execute()
+
+                if result.data and len(result.data) > 0:
+                    new_id = result.data[0]['next_task_id'] + 1
+                    self.client.table('task_settings').update({
+                        'next_task_id': new_id
+                    }).eq('guild_id', guild_id).execute()
+                else:
+                    new_id = 1
+                    self.client.table('task_settings').upsert({
+                        'guild_id': guild_id,
+                        'next_task_id': new_id
+                    }, on_conflict='guild_id').execute()
+
+                return {'next_task_id': new_id}
+
+            elif 'UPDATE TASK_SETTINGS' in query_normalized and 'RETURNING' in query_normalized:
                 # Handle: UPDATE task_settings SET next_task_id = next_task_id + 1 WHERE guild_id = $1 RETURNING next_task_id
                 guild_id = str(args[0])
                 result = self.client.table('task_settings').select('next_task_id').eq('guild_id', guild_id).execute()
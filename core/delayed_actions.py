@@ -0,0 +1,316 @@
+"""
+Delayed action service
+One hashed timer wheel for "do X at time T" work (delete a notice, unpin, refresh)
+instead of a sleeping coroutine per item
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_PATH = 'data/delayed_actions.journal'
+
+
+class _Action:
+    __slots__ = ('id', 'kind', 'run_at', 'payload', 'rounds', 'slot', 'persist')
+
+    def __init__(self, action_id, kind, run_at, payload, persist):
+        self.id = action_id
+        self.kind = kind
+        self.run_at = run_at
+        self.payload = payload
+        self.persist = persist
+        self.rounds = 0
+        self.slot = 0
+
+    def to_dict(self) -> Dict:
+        return {'id': self.id, 'kind': self.kind, 'run_at': self.run_at, 'payload': self.payload}
+
+
+class DelayedActionService:
+    """
+    Timer wheel of ``slots`` buckets, each ``tick`` seconds wide.
+
+    Scheduling and cancelling are dict operations on one slot, so a burst of
+    thousands of actions costs a small record each rather than a parked
+    coroutine and its closure. Actions further out than one revolution carry
+    a round counter. Payloads are plain data (ids, not discord objects) so
+    persistent actions can be journaled and replayed after a restart.
+    """
+
+    def __init__(
+        self,
+        journal_path: Optional[str] = None,
+        tick: float = 1.0,
+        slots: int = 512,
+        max_concurrency: int = 10,
+        compact_threshold: int = 1000
+    ):
+        self.journal_path = journal_path
+        self.tick = tick
+        self.slots = slots
+        self.compact_threshold = compact_threshold
+
+        self._wheel: List[Dict[str, _Action]] = [dict() for _ in range(slots)]
+        self._index: Dict[str, _Action] = {}
+        self._handlers: Dict[str, Callable[[Dict], Awaitable[None]]] = {}
+        self._current_tick = self._tick_of(time.time())
+        self._journal_buffer: List[Dict] = []
+        self._journal_entries = 0
+        self._counters = {'scheduled': 0, 'fired': 0, 'cancelled': 0, 'failed': 0}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> 'DelayedActionService':
+        return cls(os.getenv('DELAYED_ACTIONS_JOURNAL', DEFAULT_JOURNAL_PATH))
+
+    def _tick_of(self, ts: float) -> int:
+        return int(ts // self.tick)
+
+    # ---- scheduling ----
+
+    def register(self, kind: str, handler: Callable[[Dict], Awaitable[None]]):
+        """Handler is awaited with the action's payload when it comes due"""
+        self._handlers[kind] = handler
+
+    def schedule(self, kind: str, delay: float, payload: Optional[Dict] = None,
+                 persist: bool = False, action_id: Optional[str] = None) -> str:
+        """Run ``kind`` with ``payload`` after ``delay`` seconds; returns the action id"""
+        action = _Action(action_id or uuid.uuid4().hex, kind, time.time() + max(0.0, delay), payload or {}, persist)
+        was_idle = not self._index
+        self._insert(action)
+        self._counters['scheduled'] += 1
+        if persist:
+            self._journal_buffer.append({'op': 'add', 'action': action.to_dict()})
+        if was_idle:
+            # A running wheel picks the action up on its next tick
+            self._wakeup.set()
+        return action.id
+
+    def cancel(self, action_id: str) -> bool:
+        action = self._index.pop(action_id, None)
+        if action is None:
+            return False
+        self._wheel[action.slot].pop(action_id, None)
+        self._counters['cancelled'] += 1
+        if action.persist:
+            self._journal_buffer.append({'op': 'done', 'id': action_id})
+        return True
+
+    def _insert(self, action: _Action):
+        existing = self._index.pop(action.id, None)
+        if existing is not None:
+            self._wheel[existing.slot].pop(existing.id, None)
+
+        if not self._index:
+            # Nothing pending: skip the idle slots rather than walking them later
+            self._current_tick = max(self._current_tick, self._tick_of(time.time()))
+
+        target = max(math.ceil(action.run_at / self.tick), self._current_tick)
+        action.rounds = (target - self._current_tick) // self.slots
+        action.slot = target % self.slots
+        self._wheel[action.slot][action.id] = action
+        self._index[action.id] = action
+
+    def pending_count(self) -> int:
+        return len(self._index)
+
+    def stats(self) -> Dict:
+        by_kind: Dict[str, int] = {}
+        persistent = 0
+        for action in self._index.values():
+            by_kind[action.kind] = by_kind.get(action.kind, 0) + 1
+            persistent += action.persist
+        return {
+            'pending': len(self._index),
+            'pending_persistent': persistent,
+            'pending_by_kind': by_kind,
+            **self._counters
+        }
+
+    async def collect_stats(self) -> Dict:
+        """stats() run on the bot loop, for callers on other threads (run_coroutine_threadsafe)"""
+        return self.stats()
+
+    # ---- running ----
+
+    def pop_due(self, now: Optional[float] = None) -> List[_Action]:
+        """Advance the wheel to ``now`` and return the actions that came due"""
+        now_tick = self._tick_of(time.time() if now is None else now)
+        due = []
+        while self._current_tick <= now_tick and self._index:
+            slot = self._wheel[self._current_tick % self.slots]
+            for action in list(slot.values()):
+                if action.rounds > 0:
+                    action.rounds -= 1
+                else:
+                    del slot[action.id]
+                    del self._index[action.id]
+                    due.append(action)
+            self._current_tick += 1
+        if not self._index:
+            self._current_tick = max(self._current_tick, now_tick + 1)
+        return due
+
+    async def _fire(self, action: _Action):
+        handler = self._handlers.get(action.kind)
+        async with self._semaphore:
+            try:
+                if handler is None:
+                    raise LookupError(f"No handler registered for {action.kind}")
+                await handler(action.payload)
+                self._counters['fired'] += 1
+            except Exception as e:
+                self._counters['failed'] += 1
+                logger.warning(f"Delayed action {action.kind} ({action.id}) failed: {e}")
+        if action.persist:
+            self._journal_buffer.append({'op': 'done', 'id': action.id})
+
+    async def run_due(self, now: Optional[float] = None) -> int:
+        due = self.pop_due(now)
+        if due:
+            await asyncio.gather(*(self._fire(action) for action in due))
+        self.flush_journal()
+        return len(due)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.run_due()
+            except Exception as e:
+                logger.exception(f"Error running delayed actions: {e}")
+
+            timeout = None
+            if self._index:
+                timeout = max(0.0, self._current_tick * self.tick - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.flush_journal()
+
+    # ---- persistence ----
+
+    def load(self) -> int:
+        """Replay the journal; actions that fell due while offline run on the first tick"""
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return 0
+
+        actions: Dict[str, Dict] = {}
+        try:
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning("Skipping malformed delayed action journal entry")
+                        continue
+                    if entry.get('op') == 'add':
+                        actions[entry['action']['id']] = entry['action']
+                    elif entry.get('op') == 'done':
+                        actions.pop(entry['id'], None)
+        except Exception as e:
+            logger.error(f"Error replaying delayed action journal: {e}")
+            return 0
+
+        for data in actions.values():
+            self._insert(_Action(data['id'], data['kind'], data['run_at'], data.get('payload') or {}, True))
+        self.compact()
+        logger.info(f"Loaded {len(actions)} pending delayed actions")
+        return len(actions)
+
+    def flush_journal(self):
+        """Append buffered journal entries in one write (once per tick, not per action)"""
+        if not self.journal_path or not self._journal_buffer:
+            self._journal_buffer.clear()
+            return
+        entries, self._journal_buffer = self._journal_buffer, []
+        try:
+            directory = os.path.dirname(self.journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.journal_path, 'a') as f:
+                f.write(''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries))
+            self._journal_entries += len(entries)
+        except Exception as e:
+            logger.error(f"Error appending to delayed action journal: {e}")
+
+        if self._journal_entries >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the journal as one 'add' per pending persistent action"""
+        if not self.journal_path:
+            return
+        tmp_path = f"{self.journal_path}.tmp"
+        pending = [a for a in self._index.values() if a.persist]
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(''.join(
+                    json.dumps({'op': 'add', 'action': a.to_dict()}, separators=(',', ':')) + '\n' for a in pending
+                ))
+            os.replace(tmp_path, self.journal_path)
+            self._journal_entries = len(pending)
+        except Exception as e:
+            logger.error(f"Error compacting delayed action journal: {e}")
+
+
+def register_discord_actions(bot, service: DelayedActionService):
+    """Message actions keyed by ids, sent through the outbound scheduler as background work"""
+    from core.discord_scheduler import discord_scheduler, Priority
+
+    def partial_message(payload):
+        channel = bot.get_partial_messageable(int(payload['channel_id']))
+        return channel.get_partial_message(int(payload['message_id']))
+
+    async def delete_message(payload):
+        message = partial_message(payload)
+        try:
+            await discord_scheduler.submit(message.delete, Priority.BACKGROUND, bucket=f"channel:{payload['channel_id']}")
+        except discord.NotFound:
+            pass
+
+    async def unpin_message(payload):
+        message = partial_message(payload)
+        try:
+            await discord_scheduler.submit(message.unpin, Priority.BACKGROUND, bucket=f"channel:{payload['channel_id']}")
+        except discord.NotFound:
+            pass
+
+    service.register('delete_message', delete_message)
+    service.register('unpin_message', unpin_message)
+    service.load()
+
+    async def on_ready():
+        service.start()
+
+    bot.add_listener(on_ready)
+
+
+# Shared by the bot, its cogs and managers
+delayed_actions = DelayedActionService.from_env()
@@ -0,0 +1,457 @@
+"""
+Priority scheduler for bot-initiated Discord REST calls
+Background writes (sync jobs, reminders, task posts) queue behind moderation
+and notifications, and hold off briefly after interactions so slash-command
+replies keep their share of the rate limits.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    INTERACTION = 0
+    MODERATION = 1
+    NOTIFICATION = 2
+    BACKGROUND = 3
+
+
+# Discord's per-channel message bucket is 5 requests / 5s; unknown buckets start there
+DEFAULT_BUCKET_CAPACITY = 5
+DEFAULT_BUCKET_PERIOD = 5.0
+
+# Discord's global limit is 50 requests/s per bot
+GLOBAL_BUCKET_CAPACITY = 50
+GLOBAL_BUCKET_PERIOD = 1.0
+
+# Rate-limit buckets are scoped by their major parameter
+_MAJOR_PARAM = re.compile(r'/(channels|guilds|webhooks)/(\d+)')
+
+
+def bucket_for_path(path: str) -> str:
+    """Scheduler bucket key for a REST path, e.g. /channels/123/messages -> channel:123"""
+    match = _MAJOR_PARAM.search(path)
+    if not match:
+        return 'global'
+    return f"{match.group(1)[:-1]}:{match.group(2)}"
+
+
+class TokenBucket:
+    """
+    Refilling token bucket that adopts Discord's reported limits.
+
+    learn() takes the X-RateLimit headers from a response so local estimates
+    track the real bucket; block() parks it for a 429's retry-after.
+    """
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, capacity: int = DEFAULT_BUCKET_CAPACITY, period: float = DEFAULT_BUCKET_PERIOD,
+                 now: Optional[float] = None):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float, reserve: float = 0) -> float:
+        """Seconds until a token is available while leaving `reserve` tokens untouched"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        needed = 1 + reserve
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, retry_after: float, now: float):
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        self.tokens = 0.0
+        self.updated = max(self.updated, now)
+
+    def learn(self, limit: Optional[int], remaining: Optional[int], reset_after: Optional[float], now: float):
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self._refill(now)
+            self.tokens = min(self.tokens, float(remaining))
+            if remaining == 0 and reset_after:
+                self.blocked_until = max(self.blocked_until, now + reset_after)
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return now >= self.blocked_until and self.tokens >= self.capacity
+
+
+class _Job:
+    __slots__ = ('priority', 'seq', 'operation', 'bucket', 'future', 'queued_at')
+
+    def __init__(self, priority, seq, operation, bucket, future, queued_at):
+        self.priority = priority
+        self.seq = seq
+        self.operation = operation
+        self.bucket = bucket
+        self.future = future
+        self.queued_at = queued_at
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _ClassStats:
+    __slots__ = ('submitted', 'completed', 'failed', 'in_flight', 'waits', 'runs')
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.waits = deque(maxlen=500)
+        self.runs = deque(maxlen=500)
+
+
+def _latency(samples) -> Dict:
+    if not samples:
+        return {'avg_ms': 0.0, 'p95_ms': 0.0}
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {'avg_ms': round(sum(ordered) / len(ordered) * 1000, 1), 'p95_ms': round(p95 * 1000, 1)}
+
+
+class DiscordRequestScheduler:
+    """
+    Orders outbound REST calls by Priority and paces them per bucket.
+
+    Callers hand over a zero-argument callable returning the coroutine, the
+    same shape discord_operation_with_retry takes:
+
+        await discord_scheduler.submit(lambda: channel.send(embed=embed),
+                                       Priority.BACKGROUND, bucket=f"channel:{channel.id}")
+
+    Interaction responses are not queued (they must answer within 3s); the
+    scheduler only keeps headroom for them by reserving bucket tokens from
+    background work and pausing it right after an interaction.
+    """
+
+    def __init__(self, max_in_flight: int = 8, background_in_flight: int = 2,
+                 background_reserve: int = 1, interaction_holdoff: float = 0.5,
+                 max_background_delay: float = 10.0):
+        self.max_in_flight = max_in_flight
+        self.background_in_flight = background_in_flight
+        self.background_reserve = background_reserve
+        self.interaction_holdoff = interaction_holdoff
+        self.max_background_delay = max_background_delay
+
+        self._lanes: Dict[str, list] = {}   # bucket -> heap of its queued jobs
+        self._ready = []                    # heap of (priority, seq, bucket) lane heads to try
+        self._parked = []                   # heap of (wake_at, bucket) lanes waiting for tokens
+        self._parked_at: Dict[str, float] = {}
+        self._queued = 0
+        self._seq = itertools.count()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats = {p: _ClassStats() for p in Priority}
+        self._in_flight = 0
+        self._last_interaction = 0.0
+        self._last_prune = time.monotonic()
+        self._rate_limit_hits = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    # ---- public API ----
+
+    async def submit(self, operation: Callable[[], Awaitable], priority: Priority = Priority.BACKGROUND,
+                     bucket: Optional[str] = None):
+        """Queue `operation` and return its result once it has run"""
+        loop = asyncio.get_running_loop()
+        self._ensure_dispatcher(loop)
+        job = _Job(Priority(priority), next(self._seq), operation, bucket or 'global',
+                   loop.create_future(), time.monotonic())
+        lane = self._lanes.setdefault(job.bucket, [])
+        heapq.heappush(lane, job)
+        if lane[0] is job:
+            heapq.heappush(self._ready, (job.priority, job.seq, job.bucket))
+        self._queued += 1
+        self._stats[job.priority].submitted += 1
+        self._wakeup.set()
+        return await job.future
+
+    async def send_dm(self, user, priority: Priority = Priority.NOTIFICATION, **kwargs):
+        """
+        DM `user` through the queue. The job is keyed by the DM channel's own
+        channel:<id> bucket, which is where observe() records the limits Discord
+        reports for it.
+        """
+        channel = user.dm_channel or await user.create_dm()
+        return await self.submit(lambda: channel.send(**kwargs), priority, bucket=f"channel:{channel.id}")
+
+    def note_interaction(self, interaction=None):
+        """Called for every incoming interaction; background work yields for a moment"""
+        self._last_interaction = time.monotonic()
+
+    async def on_interaction(self, interaction):
+        self.note_interaction(interaction)
+
+    def observe(self, path: str, status: int, headers, now: Optional[float] = None):
+        """Update the bucket for `path` from a response's rate-limit headers"""
+        now = time.monotonic() if now is None else now
+        key = bucket_for_path(path)
+        bucket = self._bucket(key, now)
+
+        def number(name, cast=float):
+            value = headers.get(name)
+            try:
+                return cast(value) if value is not None else None
+            except (TypeError, ValueError):
+                return None
+
+        # Routes without a major parameter report their own limits, not the global one
+        if key != 'global':
+            bucket.learn(
+                number('X-RateLimit-Limit', int), number('X-RateLimit-Remaining', int),
+                number('X-RateLimit-Reset-After'), now
+            )
+        if status == 429:
+            self._rate_limit_hits += 1
+            retry_after = number('Retry-After') or number('X-RateLimit-Reset-After') or 1.0
+            if headers.get('X-RateLimit-Global'):
+                self._bucket('global', now).block(retry_after, now)
+            elif key != 'global':
+                bucket.block(retry_after, now)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    def trace_config(self):
+        """aiohttp TraceConfig for commands.Bot(http_trace=...) so every REST response feeds observe()"""
+        import aiohttp
+
+        async def on_request_end(session, context, params):
+            try:
+                self.observe(params.url.path, params.response.status, params.response.headers)
+            except Exception as e:
+                logger.debug(f"Could not read rate-limit headers: {e}")
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_end.append(on_request_end)
+        return trace
+
+    def stats(self) -> Dict:
+        """Queue depth and latency per priority class plus bucket state, for the admin dashboard"""
+        now = time.monotonic()
+        queued = {p: 0 for p in Priority}
+        for lane in self._lanes.values():
+            for job in lane:
+                queued[job.priority] += 1
+
+        classes = {}
+        for priority, s in self._stats.items():
+            classes[priority.name.lower()] = {
+                'queued': queued[priority],
+                'in_flight': s.in_flight,
+                'submitted': s.submitted,
+                'completed': s.completed,
+                'failed': s.failed,
+                'wait': _latency(s.waits),
+                'run': _latency(s.runs),
+            }
+
+        blocked = sorted(
+            ((key, b.blocked_until - now) for key, b in self._buckets.items() if b.blocked_until > now),
+            key=lambda item: -item[1]
+        )
+        return {
+            'in_flight': self._in_flight,
+            'queued': self._queued,
+            'classes': classes,
+            'buckets': len(self._buckets),
+            'blocked_buckets': [{'bucket': k, 'retry_in_s': round(v, 2)} for k, v in blocked[:20]],
+            'rate_limit_hits': self._rate_limit_hits,
+        }
+
+    async def collect_stats(self) -> Dict:
+        """stats() run on the bot loop, for callers on other threads (run_coroutine_threadsafe)"""
+        return self.stats()
+
+    # ---- dispatch ----
+
+    def _bucket(self, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if key == 'global':
+                bucket = TokenBucket(GLOBAL_BUCKET_CAPACITY, GLOBAL_BUCKET_PERIOD, now=now)
+            else:
+                bucket = TokenBucket(now=now)
+            self._buckets[key] = bucket
+        return bucket
+
+    def _ensure_dispatcher(self, loop):
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch_loop())
+
+    def _background_gate(self, job: _Job, now: float) -> float:
+        """Seconds a background job must yield (in-flight cap, interaction holdoff); 0 once overdue"""
+        if job.priority != Priority.BACKGROUND or now - job.queued_at >= self.max_background_delay:
+            return 0.0
+        if self._stats[Priority.BACKGROUND].in_flight >= self.background_in_flight:
+            return float('inf')
+        return max(0.0, self._last_interaction + self.interaction_holdoff - now)
+
+    def _bucket_delay(self, job: _Job, now: float) -> float:
+        if job.bucket == 'global':
+            return 0.0
+        reserve = 0
+        if job.priority == Priority.BACKGROUND and now - job.queued_at < self.max_background_delay:
+            reserve = self.background_reserve
+        return self._bucket(job.bucket, now).delay(now, reserve)
+
+    def _push_head(self, key: str):
+        lane = self._lanes.get(key)
+        if lane:
+            heapq.heappush(self._ready, (lane[0].priority, lane[0].seq, key))
+
+    def _park(self, key: str, wake_at: float):
+        parked_at = self._parked_at.get(key)
+        if parked_at is not None and parked_at <= wake_at:
+            return  # Already parked, and wakes no later
+        self._parked_at[key] = wake_at
+        heapq.heappush(self._parked, (wake_at, key))
+
+    def _soonest(self, delay: Optional[float], now: float) -> Optional[float]:
+        if self._parked:
+            wake = max(0.0, self._parked[0][0] - now)
+            delay = wake if delay is None else min(delay, wake)
+        return delay
+
+    def _next_ready(self, now: float):
+        """
+        Highest-priority job whose buckets allow it, or the time until one might.
+
+        Only the head of each bucket's lane is considered, and a lane whose
+        bucket is out of tokens is parked until it refills, so a deep backlog
+        costs O(log n) per dispatch instead of a scan of the whole queue.
+        """
+        while self._parked and self._parked[0][0] <= now:
+            wake_at, key = heapq.heappop(self._parked)
+            if self._parked_at.get(key) == wake_at:
+                del self._parked_at[key]
+                self._push_head(key)
+
+        global_delay = self._bucket('global', now).delay(now)
+        if global_delay > 0:
+            return None, global_delay
+
+        while self._ready:
+            priority, seq, key = self._ready[0]
+            lane = self._lanes.get(key)
+            if not lane or lane[0].seq != seq:
+                # Dispatched, or superseded by a higher-priority job in the same lane
+                heapq.heappop(self._ready)
+                continue
+            job = lane[0]
+            gate = self._background_gate(job, now)
+            if gate > 0:
+                # The remaining heads are background jobs queued later, so they are gated too
+                return None, self._soonest(gate, now)
+            heapq.heappop(self._ready)
+            delay = self._bucket_delay(job, now)
+            if delay > 0:
+                self._park(key, now + delay)
+                continue
+            return job, None
+        return None, self._soonest(None, now)
+
+    async def _dispatch_loop(self):
+        while True:
+            now = time.monotonic()
+            job, delay = (None, None)
+            if self._in_flight < self.max_in_flight and self._queued:
+                job, delay = self._next_ready(now)
+
+            if job is not None:
+                lane = self._lanes[job.bucket]
+                heapq.heappop(lane)
+                if lane:
+                    self._push_head(job.bucket)
+                else:
+                    del self._lanes[job.bucket]
+                self._queued -= 1
+                self._bucket('global', now).consume(now)
+                if job.bucket != 'global':
+                    self._bucket(job.bucket, now).consume(now)
+                self._in_flight += 1
+                self._stats[job.priority].in_flight += 1
+                self._stats[job.priority].waits.append(now - job.queued_at)
+                asyncio.ensure_future(self._run(job))
+                continue
+
+            if now - self._last_prune > 60:
+                self._prune(now)
+
+            self._wakeup.clear()
+            timeout = None if delay is None or delay == float('inf') else delay
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, job: _Job):
+        started = time.monotonic()
+        stats = self._stats[job.priority]
+        try:
+            result = await job.operation()
+        except Exception as e:
+            stats.failed += 1
+            self._learn_from_error(job, e)
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            stats.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            stats.runs.append(time.monotonic() - started)
+            stats.in_flight -= 1
+            self._in_flight -= 1
+            self._wakeup.set()
+
+    def _learn_from_error(self, job: _Job, error: Exception):
+        # discord.py retries 429s itself; one that surfaces here means the bucket is exhausted
+        if getattr(error, 'status', None) != 429:
+            return
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        now = time.monotonic()
+        self._rate_limit_hits += 1
+        retry_after = headers.get('Retry-After') or headers.get('X-RateLimit-Reset-After') or 1.0
+        try:
+            retry_after = float(retry_after)
+        except (TypeError, ValueError):
+            retry_after = 1.0
+        self._bucket(job.bucket, now).block(retry_after, now)
+
+    def _prune(self, now: float):
+        self._last_prune = now
+        for key in [k for k, b in self._buckets.items() if k != 'global' and k not in self._lanes and b.idle(now)]:
+            del self._buckets[key]
+
+
+# Shared by the bot, its cogs and managers
+discord_scheduler = DiscordRequestScheduler()
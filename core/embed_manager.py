@@ -3,6 +3,8 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone
 import uuid
 
+from core.search_index import search_index
+
 logger = logging.getLogger(__name__)
 
 class EmbedManager:
@@ -101,6 +103,7 @@ class EmbedManager:
             
             # Save data
             self.data_manager.save_guild_data(guild_id, 'config', {'embeds': data['embeds']})
+            search_index.upsert(guild_id, 'embeds', embed_id, new_embed)
             
             return new_embed
         except Exception as e:
@@ -137,6 +140,7 @@ class EmbedManager:
             
             # Save data
             self.data_manager.save_guild_data(guild_id, 'config', {'embeds': embeds})
+            search_index.upsert(guild_id, 'embeds', embed_id, embed)
             
             return embed
         except Exception as e:
@@ -164,6 +168,7 @@ class EmbedManager:
                 
             # Remove embed from database directly as save_guild_data only upserts
             self.data_manager.admin_client.table('embeds').delete().eq('embed_id', embed_id).eq('guild_id', str(guild_id)).execute()
+            search_index.remove(guild_id, 'embeds', embed_id)
             
             return True
         except Exception as e:
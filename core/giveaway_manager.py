@@ -1,13 +1,85 @@
 import logging
 import random
 import asyncio
+import time
 from datetime import datetime, timezone, timedelta
+from types import MappingProxyType
+from typing import Dict, Optional
 import discord
 
 from core.audit_manager import AuditEventType
+from core.discord_scheduler import discord_scheduler, Priority
+from core.delayed_actions import delayed_actions
 
 logger = logging.getLogger(__name__)
 
+# How long a cached giveaway snapshot is trusted; enter_giveaway() re-validates server-side
+SNAPSHOT_TTL_SECONDS = 30
+
+# enter_giveaway() RPC error codes -> user-facing messages
+ENTRY_ERRORS = {
+    'not_found': "Giveaway not found",
+    'not_active': "Giveaway is not active",
+    'ended': "This giveaway has ended",
+    'own_giveaway': "You cannot enter your own giveaway",
+    'invalid_tickets': "Must purchase at least 1 ticket",
+    'already_entered': "You have already entered this giveaway",
+}
+
+
+class GiveawaySnapshot:
+    """
+    Frozen view of the giveaway fields that decide who may enter.
+
+    Entry counts are deliberately left out so entries never invalidate it;
+    ``get`` reads the original row for display code.
+    """
+
+    __slots__ = ('id', 'guild_id', 'created_by', 'status', 'entry_mode', 'ends_at',
+                 'required_role_ids', 'raffle_cost', 'raffle_max_tickets_per_user', 'row', 'loaded_at')
+
+    def __init__(self, row: Dict, loaded_at: Optional[float] = None):
+        values = {
+            'id': str(row['id']),
+            'guild_id': str(row['guild_id']),
+            'created_by': str(row.get('created_by')),
+            'status': row.get('status'),
+            'entry_mode': row.get('entry_mode'),
+            'ends_at': datetime.fromisoformat(row['ends_at'].replace('Z', '+00:00')),
+            'required_role_ids': frozenset(str(r) for r in (row.get('required_role_ids') or ())),
+            'raffle_cost': row.get('raffle_cost') or 0,
+            'raffle_max_tickets_per_user': row.get('raffle_max_tickets_per_user') or 10,
+            'row': MappingProxyType(dict(row)),
+            'loaded_at': time.monotonic() if loaded_at is None else loaded_at,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GiveawaySnapshot is immutable; update the giveaway and drop the snapshot")
+
+    __delattr__ = __setattr__
+
+    def get(self, key: str, default=None):
+        value = self.row.get(key)
+        return default if value is None else value
+
+    def check_entry(self, user_id: str, tickets: int = 1, member_role_ids=None):
+        """Raise ValueError if the user clearly cannot enter; the RPC has the final say"""
+        if self.status != 'active':
+            raise ValueError(ENTRY_ERRORS['not_active'])
+        if self.ends_at <= datetime.now(timezone.utc):
+            raise ValueError(ENTRY_ERRORS['ended'])
+        if self.created_by == str(user_id):
+            raise ValueError(ENTRY_ERRORS['own_giveaway'])
+        if tickets < 1:
+            raise ValueError(ENTRY_ERRORS['invalid_tickets'])
+        if self.entry_mode == 'raffle' and tickets > self.raffle_max_tickets_per_user:
+            raise ValueError("Exceeds maximum allowed tickets")
+        if self.entry_mode == 'role_restricted' and member_role_ids is not None and self.required_role_ids:
+            if self.required_role_ids.isdisjoint(str(r) for r in member_role_ids):
+                raise ValueError("You do not have the required roles to enter.")
+
 class GiveawayManager:
     """Manages the full lifecycle of giveaways."""
 
@@ -20,6 +92,10 @@ class GiveawayManager:
         self.cache_manager = None
         self.bot = None
 
+        # giveaway_id -> GiveawaySnapshot, and giveaways with an embed refresh already queued
+        self._snapshots: Dict[str, GiveawaySnapshot] = {}
+        self._refresh_pending = set()
+
     def set_data_manager(self, dm):
         self.data_manager = dm
     def set_transaction_manager(self, tm):
@@ -230,120 +306,98 @@ class GiveawayManager:
                
             return None, None
 
-    def enter_giveaway(self, giveaway_id: str, guild_id: str, user_id: str, tickets: int = 1) -> dict:
-        """User enters a giveaway."""
-        try:
+    def get_giveaway_snapshot(self, giveaway_id: str, guild_id: str = None) -> Optional[GiveawaySnapshot]:
+        """Cached entry-rule snapshot; loads the giveaway at most once per SNAPSHOT_TTL_SECONDS"""
+        snapshot = self._snapshots.get(giveaway_id)
+        if snapshot is None or time.monotonic() - snapshot.loaded_at > SNAPSHOT_TTL_SECONDS:
             giveaway = self.get_giveaway(giveaway_id, guild_id)
             if not giveaway:
-                raise ValueError("Giveaway not found")
-                
-            if giveaway['status'] != 'active':
-                raise ValueError("Giveaway is not active")
-                
-            if giveaway['created_by'] == user_id:
-                raise ValueError("You cannot enter your own giveaway")
+                self._snapshots.pop(giveaway_id, None)
+                return None
+            snapshot = self._snapshots[giveaway_id] = GiveawaySnapshot(giveaway)
 
-            ends_at = datetime.fromisoformat(giveaway['ends_at'].replace('Z', '+00:00'))
-            if ends_at <= datetime.now(timezone.utc):
-                raise ValueError("This giveaway has ended")
+        if guild_id and snapshot.guild_id != str(guild_id):
+            return None
+        return snapshot
 
-            entry_mode = giveaway['entry_mode']
-            
-            existing_entry = self.get_user_entry(giveaway_id, user_id)
-            
-            amount_spent = 0
-            
-            if entry_mode == 'role_restricted':
-                # Role validation happens in discord UI view (member.roles)
-                # But as a fallback check, handled outside or strictly trusted calling layer
-                pass
-                
-            elif entry_mode == 'raffle':
-                if tickets < 1:
-                    raise ValueError("Must purchase at least 1 ticket")
-                
-                # Use atomic Postgres RPC to deduct balance and insert tickets in one locked transaction
-                rpc_res = self.data_manager.admin_client.rpc('enter_raffle_giveaway', {
-                    'p_giveaway_id': giveaway_id,
-                    'p_guild_id': str(guild_id),
-                    'p_user_id': str(user_id),
-                    'p_tickets': tickets,
-                    'p_raffle_cost': giveaway.get('raffle_cost', 0),
-                    'p_max_tickets': giveaway.get('raffle_max_tickets_per_user', 10)
-                }).execute()
-                
-                if not rpc_res.data or not rpc_res.data.get('success'):
-                    err_msg = rpc_res.data.get('error', 'Unknown database error') if rpc_res.data else 'Database failure'
-                    raise ValueError(f"Transaction failed: {err_msg}")
-                    
-                amount_spent = tickets * giveaway.get('raffle_cost', 0)
-                upsert_data = rpc_res.data
+    def drop_giveaway_snapshot(self, giveaway_id: str):
+        self._snapshots.pop(giveaway_id, None)
 
-            elif entry_mode == 'open':
-                if existing_entry:
-                    raise ValueError("You have already entered this giveaway")
-                    
-            # Upsert entry manually only if not raffle (raffle does it in RPC)
-            if entry_mode != 'raffle':
-                upsert_data = {
-                    'giveaway_id': giveaway_id,
-                    'guild_id': str(guild_id),
-                    'user_id': str(user_id),
-                    'tickets': tickets + (existing_entry['tickets'] if existing_entry else 0),
-                    'amount_spent': amount_spent + (existing_entry['amount_spent'] if existing_entry else 0),
-                }
-                
-                if existing_entry:
-                    res = self.data_manager.admin_client.table('giveaway_entries').update({
-                        'tickets': upsert_data['tickets'],
-                        'amount_spent': upsert_data['amount_spent']
-                    }).eq('id', existing_entry['id']).execute()
-                else:
-                    res = self.data_manager.admin_client.table('giveaway_entries').insert({
-                        'giveaway_id': giveaway_id,
-                        'guild_id': str(guild_id),
-                        'user_id': str(user_id),
-                        'tickets': tickets,
-                        'amount_spent': amount_spent
-                    }).execute()
-                
-                    if res.data:
-                        upsert_data = res.data[0]
-    
-                # Increment denormalized count (raffle does this inside RPC)
-                try:
-                    self.data_manager.admin_client.rpc('increment_giveaway_entries', {'g_id': giveaway_id, 't_count': tickets}).execute()
-                except Exception as rpc_err:
-                    logger.warning(f"increment_giveaway_entries RPC failed (non-fatal): {rpc_err}")
-            
-            if self.cache_manager:
-                self.cache_manager.invalidate(f"giveaway:{giveaway_id}")
+    def enter_giveaway(self, giveaway_id: str, guild_id: str, user_id: str, tickets: int = 1,
+                       member_role_ids=None) -> dict:
+        """
+        User enters a giveaway.
+
+        Eligibility is checked against the cached snapshot, then the entry is
+        written by a single enter_giveaway() call that re-validates the
+        giveaway and returns the new total_entries.
+        """
+        try:
+            snapshot = self.get_giveaway_snapshot(giveaway_id, guild_id)
+            if not snapshot:
+                raise ValueError("Giveaway not found")
+
+            snapshot.check_entry(user_id, tickets, member_role_ids)
+
+            rpc_res = self.data_manager.admin_client.rpc('enter_giveaway', {
+                'p_giveaway_id': giveaway_id,
+                'p_guild_id': str(guild_id),
+                'p_user_id': str(user_id),
+                'p_tickets': tickets
+            }).execute()
+
+            result = rpc_res.data or {}
+            if not result.get('success'):
+                error = result.get('error') or 'Database failure'
+                if error in ('not_found', 'not_active', 'ended'):
+                    # The snapshot is stale; reload it on the next press
+                    self.drop_giveaway_snapshot(giveaway_id)
+                raise ValueError(ENTRY_ERRORS.get(error, f"Transaction failed: {error}"))
+
+            entry = dict(result.get('entry') or {})
+            entry['total_entries'] = result.get('total_entries')
+            for key in ('new_balance', 'tickets_added', 'total_tickets'):
+                if key in result:
+                    entry[key] = result[key]
 
             if self.sse_manager:
                 self.sse_manager.broadcast_event('giveaway_entry', {
                     'giveaway_id': giveaway_id,
                     'guild_id': str(guild_id),
-                    'total_entries': giveaway['total_entries'] + tickets,
+                    'total_entries': entry['total_entries'],
                     'user_id': str(user_id)
                 }, target_guild=str(guild_id))
 
-            if self.bot and self.bot.loop:
-                self.bot.loop.create_task(self.refresh_giveaway_embed(giveaway_id))
+            self.schedule_embed_refresh(giveaway_id)
 
-            return upsert_data
+            return entry
 
         except Exception as e:
             logger.error(f"Error entering giveaway: {e}")
             raise e
 
+    def schedule_embed_refresh(self, giveaway_id: str, delay: float = 2.0):
+        """Refresh the live embed once per burst of entries instead of once per entry"""
+        if not (self.bot and self.bot.loop) or giveaway_id in self._refresh_pending:
+            return
+        self._refresh_pending.add(giveaway_id)
+
+        async def _refresh():
+            await asyncio.sleep(delay)
+            self._refresh_pending.discard(giveaway_id)
+            await self.refresh_giveaway_embed(giveaway_id)
+
+        # Safe from the event loop and from worker threads
+        asyncio.run_coroutine_threadsafe(_refresh(), self.bot.loop)
+
     def withdraw_entry(self, giveaway_id: str, guild_id: str, user_id: str) -> dict:
         """Withdraws from a non-raffle giveaway."""
         try:
-            giveaway = self.get_giveaway(giveaway_id, guild_id)
+            giveaway = self.get_giveaway_snapshot(giveaway_id, guild_id)
             if not giveaway:
                 raise ValueError("Giveaway not found")
                 
-            if giveaway['entry_mode'] == 'raffle':
+            if giveaway.entry_mode == 'raffle':
                 raise ValueError("Raffle entries are non-refundable")
                 
             entry = self.get_user_entry(giveaway_id, user_id)
@@ -358,8 +412,7 @@ class GiveawayManager:
             if self.cache_manager:
                 self.cache_manager.invalidate(f"giveaway:{giveaway_id}")
 
-            if self.bot and self.bot.loop:
-                self.bot.loop.create_task(self.refresh_giveaway_embed(giveaway_id))
+            self.schedule_embed_refresh(giveaway_id)
 
             return {'success': True}
 
@@ -383,9 +436,13 @@ class GiveawayManager:
                 return
                 
             try:
-                message = await channel.fetch_message(int(giveaway['message_id']))
+                # Entry-count refreshes are cosmetic; let interactions and moderation go first
+                bucket = f"channel:{channel.id}"
+                message = await discord_scheduler.submit(
+                    lambda: channel.fetch_message(int(giveaway['message_id'])), Priority.BACKGROUND, bucket=bucket
+                )
                 embed = self._build_live_embed(giveaway)
-                await message.edit(embed=embed)
+                await discord_scheduler.submit(lambda: message.edit(embed=embed), Priority.BACKGROUND, bucket=bucket)
             except discord.NotFound:
                 # Message was deleted, mark null so background loop posts it again
                 self.data_manager.admin_client.table('giveaways').update({'message_id': None}).eq('id', giveaway_id).execute()
@@ -441,6 +498,7 @@ class GiveawayManager:
             self.data_manager.admin_client.table('giveaways').update(upd).eq('id', giveaway_id).execute()
             giveaway.update(upd)
             
+            self.drop_giveaway_snapshot(giveaway_id)
             if self.cache_manager:
                 self.cache_manager.invalidate(f"giveaway:{giveaway_id}")
 
@@ -463,7 +521,11 @@ class GiveawayManager:
                             # Schedule deletion using config or fallback
                             from config import config
                             delay = getattr(config, 'giveaway_embed_delete_delay', 30)
-                            self.bot.loop.create_task(self._delete_embed_after_delay(channel, msg, delay))
+                            delayed_actions.schedule(
+                                'delete_message', delay,
+                                {'channel_id': channel.id, 'message_id': msg.id},
+                                persist=True
+                            )
                     except Exception as e:
                         logger.warning(f"Failed to edit/schedule delete for ended embed {giveaway_id}: {e}")
 
@@ -520,6 +582,7 @@ class GiveawayManager:
                 'ended_at': datetime.now(timezone.utc).isoformat()
             }).eq('id', giveaway_id).execute()
             
+            self.drop_giveaway_snapshot(giveaway_id)
             if self.cache_manager:
                 self.cache_manager.invalidate(f"giveaway:{giveaway_id}")
                 
@@ -588,6 +651,7 @@ class GiveawayManager:
             
         res = self.data_manager.admin_client.table('giveaways').update(data).eq('id', giveaway_id).eq('guild_id', str(guild_id)).execute()
         
+        self.drop_giveaway_snapshot(giveaway_id)
         if self.cache_manager:
             self.cache_manager.invalidate(f"giveaway:{giveaway_id}")
             
@@ -677,7 +741,9 @@ class GiveawayManager:
                 msg = f"Giveaway for **{giveaway['prize_name']}** has ended. Unfortunately, there were no entries — no winner drawn."
                 if is_delayed:
                     msg = "⚠️ *Note: This drawing was delayed due to system maintenance.*\n" + msg
-                await channel.send(msg)
+                await discord_scheduler.submit(
+                    lambda: channel.send(msg), Priority.NOTIFICATION, bucket=f"channel:{channel.id}"
+                )
                 return
                 
             winners_str = ", ".join([f"<@{w}>" for w in winners])
@@ -688,21 +754,14 @@ class GiveawayManager:
             if is_delayed:
                 content = "⚠️ *Note: This giveaway drawing was delayed due to system maintenance.*\n" + content
                 
-            await channel.send(content, view=view)
+            await discord_scheduler.submit(
+                lambda: channel.send(content, view=view), Priority.NOTIFICATION, bucket=f"channel:{channel.id}"
+            )
         except discord.Forbidden:
             logger.warning(f"Forbidden to post winner announcement in {giveaway['channel_id']}")
         except Exception as e:
             logger.error(f"Error posting winner announcement: {e}")
 
-    async def _delete_embed_after_delay(self, channel, message, delay_seconds: int):
-        try:
-            await asyncio.sleep(delay_seconds)
-            await message.delete()
-        except discord.NotFound:
-            pass
-        except Exception as e:
-            logger.error(f"Failed to delete ended embed: {e}")
-            
     async def _delete_cancelled_message(self, channel, message_id):
         try:
             msg = await channel.fetch_message(int(message_id))
@@ -0,0 +1,431 @@
+"""
+Incremental guild backups
+Content-addressed, gzip-compressed snapshots: a run writes only the entities
+that changed since the guild's previous snapshot, identical entities are
+stored once across runs and guilds, and only data types whose database
+fingerprint moved are reloaded (see migrations/029_backup_fingerprints.sql)
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_TYPES = ('currency', 'tasks', 'config', 'transactions', 'announcements', 'embeds')
+
+MANIFEST_SUFFIX = '.json.gz'
+BASE_SUFFIX = '-base'
+
+
+def _canonical(value) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _digest(payload: bytes) -> str:
+    return hashlib.blake2b(payload, digest_size=20).hexdigest()
+
+
+def split_entities(data: Dict, list_chunk: int = 256) -> Dict[str, Any]:
+    """
+    Flatten one data type into {path: value} entities.
+
+    Each member of a dict (a user, shop item, task...) is its own entity.
+    Lists are cut into chunks counted from the end, so prepending new
+    transactions leaves the older chunks byte-identical.
+    """
+    entities = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            entities[f"v:{key}"] = {}
+            for sub, item in value.items():
+                entities[f"d:{key}:{sub}"] = item
+        elif isinstance(value, list):
+            entities[f"v:{key}"] = []
+            oldest_first = value[::-1]
+            for i in range(0, len(oldest_first), list_chunk):
+                entities[f"l:{key}:{i // list_chunk:08d}"] = oldest_first[i:i + list_chunk]
+        else:
+            entities[f"v:{key}"] = value
+    return entities
+
+
+def join_entities(entities: Iterable[Tuple[str, Any]]) -> Dict:
+    """Inverse of split_entities; accepts entities in any order"""
+    data: Dict[str, Any] = {}
+    chunks: Dict[str, List[Tuple[str, list]]] = {}
+    for path, value in entities:
+        kind, _, rest = path.partition(':')
+        if kind == 'd':
+            key, _, sub = rest.partition(':')
+            data.setdefault(key, {})[sub] = value
+        elif kind == 'l':
+            key, _, index = rest.partition(':')
+            chunks.setdefault(key, []).append((index, value))
+        elif isinstance(value, (dict, list)):
+            data.setdefault(rest, value)
+        else:
+            data[rest] = value
+    for key, parts in chunks.items():
+        data[key] = [row for _, chunk in sorted(parts) for row in chunk][::-1]
+    return data
+
+
+class GuildBackupStore:
+    """
+    Snapshot store under ``root``::
+
+        objects/ab/<hash>.json.gz       one compressed entity, shared by every snapshot
+        guilds/<guild_id>/<name>.json.gz manifest: entity paths -> hashes
+                                         (<sequence>-<utc time>[-base])
+
+    A manifest is either a base (every entity) or an increment holding only
+    the entities set or removed since its parent. A new base is written every
+    ``full_every`` snapshots so restore chains stay short and pruning can drop
+    whole chains. Methods block on disk/Supabase; call them from a thread.
+    """
+
+    def __init__(self, root='data/backups', full_every: int = 28, list_chunk: int = 256, compresslevel: int = 6):
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.full_every = full_every
+        self.list_chunk = list_chunk
+        self.compresslevel = compresslevel
+        self._heads: Dict[str, Dict] = {}
+        self._known_objects = set()
+        self._lock = threading.RLock()
+
+    # ----- objects -----
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.json.gz"
+
+    def _write_atomic(self, path: Path, payload: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(gzip.compress(payload, compresslevel=self.compresslevel, mtime=0))
+        os.replace(tmp, path)
+        return path.stat().st_size
+
+    def put_object(self, digest: str, payload: bytes) -> int:
+        """Store an entity unless an identical one exists; returns bytes written"""
+        if digest in self._known_objects:
+            return 0
+        path = self._object_path(digest)
+        written = 0 if path.exists() else self._write_atomic(path, payload)
+        self._known_objects.add(digest)
+        return written
+
+    def get_object(self, digest: str):
+        with gzip.open(self._object_path(digest), 'rb') as f:
+            return json.loads(f.read())
+
+    # ----- manifests -----
+
+    def _guild_dir(self, guild_id) -> Path:
+        return self.root / 'guilds' / str(guild_id)
+
+    def list_snapshots(self, guild_id) -> List[str]:
+        guild_dir = self._guild_dir(guild_id)
+        if not guild_dir.exists():
+            return []
+        return sorted(p.name[:-len(MANIFEST_SUFFIX)] for p in guild_dir.glob(f"*{MANIFEST_SUFFIX}"))
+
+    def read_manifest(self, guild_id, name: str) -> Dict:
+        with gzip.open(self._guild_dir(guild_id) / f"{name}{MANIFEST_SUFFIX}", 'rb') as f:
+            return json.loads(f.read())
+
+    def _chain(self, guild_id, name: str) -> List[Dict]:
+        """Manifests from the base up to ``name``"""
+        chain = []
+        while name:
+            manifest = self.read_manifest(guild_id, name)
+            chain.append(manifest)
+            if manifest.get('base'):
+                return chain[::-1]
+            name = manifest.get('parent')
+        raise ValueError(f"Backup chain for guild {guild_id} has no base snapshot")
+
+    def _fold(self, guild_id, name: str) -> Dict:
+        """Entity hashes and fingerprints as of snapshot ``name``"""
+        chain = self._chain(guild_id, name)
+        entities: Dict[str, Dict[str, str]] = {}
+        fingerprints: Dict[str, Optional[str]] = {}
+        for manifest in chain:
+            for data_type, change in manifest['data_types'].items():
+                current = entities.setdefault(data_type, {})
+                for path in change.get('removed', ()):
+                    current.pop(path, None)
+                current.update(change.get('set', {}))
+            fingerprints.update(manifest.get('fingerprints') or {})
+        return {'name': name, 'chain_length': len(chain), 'entities': entities, 'fingerprints': fingerprints}
+
+    def _head(self, guild_id) -> Optional[Dict]:
+        guild_id = str(guild_id)
+        if guild_id not in self._heads:
+            names = self.list_snapshots(guild_id)
+            self._heads[guild_id] = self._fold(guild_id, names[-1]) if names else None
+        return self._heads[guild_id]
+
+    def _next_name(self, guild_id, base: bool) -> str:
+        """Sequence-prefixed so names sort in write order whatever the clock does"""
+        head = self._heads.get(str(guild_id))
+        sequence = int(head['name'].split('-')[0]) + 1 if head else 1
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        return f"{sequence:08d}-{stamp}{BASE_SUFFIX if base else ''}"
+
+    # ----- snapshots -----
+
+    def data_types_to_load(self, guild_id, fingerprints: Optional[Dict[str, str]] = None) -> List[str]:
+        """Data types whose fingerprint moved (all of them when a base is due or fingerprints are unknown)"""
+        with self._lock:
+            head = self._head(guild_id)
+        if fingerprints is None or head is None or head['chain_length'] >= self.full_every:
+            return list(DATA_TYPES)
+        known = head['fingerprints']
+        return [dt for dt in DATA_TYPES if dt not in known or known[dt] != fingerprints.get(dt)]
+
+    def snapshot(self, guild_id, loaded: Dict[str, Dict], fingerprints: Optional[Dict[str, str]] = None,
+                 force_base: bool = False) -> Optional[Dict]:
+        """
+        Record ``loaded`` data types for a guild.
+
+        Returns write statistics, or None when nothing changed (no manifest is
+        written). Data types missing from ``loaded`` keep their previous
+        entities, also in a new base.
+        """
+        guild_id = str(guild_id)
+        with self._lock:
+            head = self._head(guild_id)
+            base = force_base or head is None or head['chain_length'] >= self.full_every
+            previous = head['entities'] if head else {}
+            entities = {dt: dict(paths) for dt, paths in previous.items()}
+            changes: Dict[str, Dict] = {}
+            stats = {'entities_written': 0, 'objects_written': 0, 'bytes_written': 0}
+
+            for data_type, data in loaded.items():
+                old = previous.get(data_type, {})
+                current: Dict[str, str] = {}
+                changed: Dict[str, str] = {}
+                for path, value in split_entities(data, self.list_chunk).items():
+                    payload = _canonical(value)
+                    digest = _digest(payload)
+                    current[path] = digest
+                    if old.get(path) == digest:
+                        continue
+                    changed[path] = digest
+                    written = self.put_object(digest, payload)
+                    if written:
+                        stats['objects_written'] += 1
+                        stats['bytes_written'] += written
+                removed = [path for path in old if path not in current]
+                entities[data_type] = current
+                if changed or removed:
+                    changes[data_type] = {'set': changed, 'removed': removed}
+                    stats['entities_written'] += len(changed)
+
+            new_fingerprints = dict(head['fingerprints']) if head else {}
+            if fingerprints is not None:
+                new_fingerprints.update({dt: fingerprints.get(dt) for dt in loaded})
+
+            if not base and not changes:
+                # Nothing moved; remember fingerprints so the next run can skip the loads
+                head['fingerprints'] = new_fingerprints
+                return None
+
+            if base:
+                changes = {dt: {'set': paths, 'removed': []} for dt, paths in entities.items()}
+
+            name = self._next_name(guild_id, base)
+            manifest = {
+                'version': 1,
+                'guild_id': guild_id,
+                'name': name,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'base': base,
+                'parent': None if base else head['name'],
+                'fingerprints': new_fingerprints,
+                'data_types': changes,
+            }
+            stats['bytes_written'] += self._write_atomic(
+                self._guild_dir(guild_id) / f"{name}{MANIFEST_SUFFIX}", _canonical(manifest)
+            )
+            self._heads[guild_id] = {
+                'name': name,
+                'chain_length': 1 if base else head['chain_length'] + 1,
+                'entities': entities,
+                'fingerprints': new_fingerprints,
+            }
+            return {'name': name, 'base': base, 'data_types': sorted(changes), **stats}
+
+    def fetch_fingerprints(self, client, guild_ids: List[str], batch_size: int = 1000) -> Optional[Dict[str, Dict[str, str]]]:
+        """Fingerprints for many guilds in a few RPCs; None if they are unavailable"""
+        fingerprints: Dict[str, Dict[str, str]] = {}
+        for start in range(0, len(guild_ids), batch_size):
+            chunk = [str(gid) for gid in guild_ids[start:start + batch_size]]
+            try:
+                result = client.rpc('backup_fingerprints', {'p_guild_ids': chunk}).execute()
+                fingerprints.update(result.data or {})
+            except Exception as e:
+                logger.warning(f"Backup fingerprints unavailable, reloading every data type: {e}")
+                return None
+        return {gid: fingerprints.get(gid, {}) for gid in map(str, guild_ids)}
+
+    def backup_guild(self, data_manager, guild_id, fingerprints: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """Load the data types that changed and snapshot them"""
+        loaded = {}
+        for data_type in self.data_types_to_load(guild_id, fingerprints):
+            try:
+                data = data_manager.load_guild_data(guild_id, data_type)
+                if data is not None:
+                    loaded[data_type] = data
+            except Exception as e:
+                logger.error(f"Error loading {data_type} for backup of guild {guild_id}: {e}")
+        return self.snapshot(guild_id, loaded, fingerprints)
+
+    # ----- restore -----
+
+    def restore(self, guild_id, name: Optional[str] = None,
+                data_types: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Rebuild a guild from its snapshot chain, yielding (data_type, data)
+        one data type at a time. Only manifests are folded up front; entity
+        objects are read as each data type is rebuilt.
+        """
+        names = self.list_snapshots(guild_id)
+        if not names:
+            raise FileNotFoundError(f"No backups for guild {guild_id}")
+        target = name or names[-1]
+        if target not in names:
+            raise FileNotFoundError(f"Backup {target} not found for guild {guild_id}")
+
+        wanted = set(data_types) if data_types else None
+        for data_type, paths in self._fold(guild_id, target)['entities'].items():
+            if wanted is not None and data_type not in wanted:
+                continue
+            yield data_type, join_entities((path, self.get_object(digest)) for path, digest in paths.items())
+
+    # ----- retention -----
+
+    def prune(self, guild_id, keep: int) -> int:
+        """Drop snapshots beyond the newest ``keep``, never breaking a kept chain; returns manifests removed"""
+        with self._lock:
+            names = self.list_snapshots(guild_id)
+            cut = len(names) - max(keep, 1)
+            # Move the cut back to a base so every kept increment still has its parents
+            while cut > 0 and not names[cut].endswith(BASE_SUFFIX):
+                cut -= 1
+            for name in names[:max(cut, 0)]:
+                (self._guild_dir(guild_id) / f"{name}{MANIFEST_SUFFIX}").unlink()
+            return max(cut, 0)
+
+    def drop_guild(self, guild_id):
+        """Forget a guild's snapshots (objects are reclaimed by collect_garbage)"""
+        with self._lock:
+            guild_dir = self._guild_dir(guild_id)
+            if guild_dir.exists():
+                for path in guild_dir.glob(f"*{MANIFEST_SUFFIX}"):
+                    path.unlink()
+                guild_dir.rmdir()
+            self._heads.pop(str(guild_id), None)
+
+    def collect_garbage(self) -> int:
+        """Delete objects no manifest references; returns objects removed"""
+        with self._lock:
+            referenced = set()
+            guilds_dir = self.root / 'guilds'
+            for manifest_path in guilds_dir.glob(f"*/*{MANIFEST_SUFFIX}") if guilds_dir.exists() else ():
+                with gzip.open(manifest_path, 'rb') as f:
+                    manifest = json.loads(f.read())
+                for change in manifest['data_types'].values():
+                    referenced.update(change.get('set', {}).values())
+
+            removed = 0
+            for object_path in self.objects_dir.glob(f"*/*.json.gz") if self.objects_dir.exists() else ():
+                digest = object_path.name[:-len('.json.gz')]
+                if digest not in referenced:
+                    object_path.unlink()
+                    self._known_objects.discard(digest)
+                    removed += 1
+            return removed
+
+    def run(self, data_manager, guild_ids: List[str], default_keep: int = 28) -> Dict:
+        """One backup pass over many guilds; returns a summary for the job log"""
+        summary = {'snapshots': 0, 'unchanged': 0, 'errors': 0, 'objects_written': 0,
+                   'bytes_written': 0, 'pruned': 0, 'objects_collected': 0}
+        fingerprints = self.fetch_fingerprints(data_manager.admin_client, guild_ids)
+
+        for guild_id in map(str, guild_ids):
+            try:
+                stats = self.backup_guild(data_manager, guild_id, None if fingerprints is None else fingerprints[guild_id])
+                if stats is None:
+                    summary['unchanged'] += 1
+                else:
+                    summary['snapshots'] += 1
+                    summary['objects_written'] += stats['objects_written']
+                    summary['bytes_written'] += stats['bytes_written']
+
+                keep = default_keep
+                guild_configs = getattr(data_manager, 'guild_configs', None)
+                if guild_configs is not None:
+                    keep = guild_configs.get(guild_id).get('max_backup_files', default_keep) or default_keep
+                summary['pruned'] += self.prune(guild_id, keep)
+            except Exception as e:
+                logger.error(f"Error during backup for guild {guild_id}: {e}")
+                summary['errors'] += 1
+
+        if summary['pruned']:
+            summary['objects_collected'] = self.collect_garbage()
+        return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    """``python -m core.guild_backup {list,restore} GUILD_ID ...``"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and restore incremental guild backups")
+    parser.add_argument('--root', default='data/backups', help="Backup store directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="List a guild's snapshots")
+    list_parser.add_argument('guild_id')
+
+    restore_parser = commands.add_parser('restore', help="Rebuild a guild from its snapshot chain")
+    restore_parser.add_argument('guild_id')
+    restore_parser.add_argument('--snapshot', help="Snapshot name (default: latest)")
+    restore_parser.add_argument('--data-type', action='append', choices=DATA_TYPES, dest='data_types')
+    restore_parser.add_argument('--out', default='restored', help="Directory for <data_type>.json files")
+    restore_parser.add_argument('--apply', action='store_true', help="Write the data back through DataManager")
+
+    args = parser.parse_args(argv)
+    store = GuildBackupStore(args.root)
+
+    if args.command == 'list':
+        for name in store.list_snapshots(args.guild_id):
+            print(name)
+        return
+
+    data_manager = None
+    if args.apply:
+        from core.data_manager import DataManager
+        data_manager = DataManager()
+
+    out_dir = Path(args.out) / str(args.guild_id)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for data_type, data in store.restore(args.guild_id, args.snapshot, args.data_types):
+        with open(out_dir / f"{data_type}.json", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        if data_manager is not None:
+            data_manager.save_guild_data(args.guild_id, data_type, data)
+        print(f"Restored {data_type} -> {out_dir / f'{data_type}.json'}")
+
+
+if __name__ == '__main__':
+    main()
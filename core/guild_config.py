@@ -0,0 +1,272 @@
+"""
+Immutable per-guild config snapshots
+Hot paths (prefix lookup, feature checks, currency symbol, premium checks)
+read from an in-memory store instead of querying the guilds table per call
+"""
+
+import logging
+import sys
+import threading
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# guilds columns -> snapshot attributes, with the defaults load_guild_data(..., 'config') uses
+_CONFIG_DEFAULTS = {
+    'prefix': '!',
+    'currency_name': 'coins',
+    'currency_symbol': '$',
+    'admin_roles': (),
+    'moderator_roles': (),
+    'log_channel_id': None,
+    'welcome_channel_id': None,
+    'task_channel_id': None,
+    'shop_channel_id': None,
+    'global_shop': False,
+    'global_tasks': False,
+    'bot_status_message': None,
+    'bot_status_type': 'playing',
+    'subscription_tier': 'free',
+}
+
+_FEATURES = ('currency', 'tasks', 'shop', 'announcements', 'moderation')
+
+GUILD_CONFIG_COLUMNS = ','.join(['guild_id', *_CONFIG_DEFAULTS, *(f'feature_{f}' for f in _FEATURES)])
+
+# Config columns plus the change marker sync_changes() follows
+_SYNC_COLUMNS = GUILD_CONFIG_COLUMNS + ',updated_at'
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+class GuildConfig:
+    """
+    Frozen snapshot of one guild's config row.
+
+    Supports ``config.get('prefix', '!')`` and ``config['features']`` so existing
+    read-only call sites that used the load_guild_data dict keep working.
+    """
+
+    __slots__ = ('guild_id', *_CONFIG_DEFAULTS, 'features')
+
+    def __init__(self, guild_id: str, **values):
+        for name, default in _CONFIG_DEFAULTS.items():
+            value = values.get(name)
+            if value is None:
+                value = default
+            elif isinstance(value, list):
+                value = tuple(value)
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, 'guild_id', str(guild_id))
+        object.__setattr__(self, 'features', MappingProxyType(dict(values.get('features') or {})))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GuildConfig snapshots are immutable; write the guild row and refresh the store")
+
+    __delattr__ = __setattr__
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'GuildConfig':
+        features = {}
+        for feature in _FEATURES:
+            enabled = row.get(f'feature_{feature}')
+            features[feature] = True if enabled is None else bool(enabled)
+        return cls(row['guild_id'], features=features, **{k: row.get(k) for k in _CONFIG_DEFAULTS})
+
+    @classmethod
+    def default(cls, guild_id) -> 'GuildConfig':
+        return cls(guild_id, features={f: True for f in _FEATURES})
+
+    def get(self, key: str, default=None):
+        if key in self.__slots__ and key != 'guild_id':
+            value = getattr(self, key)
+            return value if value is not None else default
+        return default
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def feature_enabled(self, feature: str) -> bool:
+        return self.features.get(feature, True)
+
+    @property
+    def is_premium(self) -> bool:
+        return self.subscription_tier == 'premium'
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Mutable copy in the load_guild_data(..., 'config') shape"""
+        data = {name: getattr(self, name) for name in _CONFIG_DEFAULTS}
+        data['admin_roles'] = list(self.admin_roles)
+        data['moderator_roles'] = list(self.moderator_roles)
+        data['features'] = dict(self.features)
+        return data
+
+    def __repr__(self):
+        return f"<GuildConfig guild_id={self.guild_id} tier={self.subscription_tier}>"
+
+
+class GuildConfigStore:
+    """
+    guild_id -> GuildConfig map for the whole bot.
+
+    Readers get a plain dict lookup. Writers build a new snapshot and replace the
+    map reference in one assignment, so readers never see a half-applied update.
+    Rows written by another process (the dashboard) are picked up by
+    sync_changes(), which follows guilds.updated_at.
+    """
+
+    # Re-read rows this far behind the newest change seen, so a write whose
+    # transaction started earlier but committed after the last sync is not missed
+    SYNC_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, client, page_size: int = 1000):
+        self.client = client
+        self.page_size = page_size
+        self._snapshots: Dict[str, GuildConfig] = {}
+        self._write_lock = threading.Lock()
+        self._synced_through: Optional[datetime] = None
+
+    def hydrate(self) -> int:
+        """Load every guild's config in bulk (paged past the PostgREST row cap)"""
+        snapshots = {}
+        newest = None
+        offset = 0
+        while True:
+            result = self.client.table('guilds').select(_SYNC_COLUMNS).order('guild_id').range(
+                offset, offset + self.page_size - 1
+            ).execute()
+            rows = result.data or []
+            for row in rows:
+                snapshots[str(row['guild_id'])] = GuildConfig.from_row(row)
+                changed_at = _parse_timestamp(row.get('updated_at'))
+                if changed_at and (newest is None or changed_at > newest):
+                    newest = changed_at
+            if len(rows) < self.page_size:
+                break
+            offset += self.page_size
+
+        with self._write_lock:
+            self._snapshots = snapshots
+            self._synced_through = newest
+        logger.info(f"✅ Hydrated config snapshots for {len(snapshots)} guilds")
+        return len(snapshots)
+
+    def sync_changes(self) -> int:
+        """
+        Swap in snapshots for guilds rows updated since the last hydrate or sync.
+
+        One indexed range read on guilds.updated_at, cheap enough to run every
+        few seconds, so role and feature changes made from the dashboard
+        reach permission checks quickly. Returns the number of rows applied.
+        """
+        since = self._synced_through
+        if since is None:
+            return self.hydrate()
+
+        result = self.client.table('guilds').select(_SYNC_COLUMNS).gte(
+            'updated_at', (since - self.SYNC_OVERLAP).isoformat()
+        ).order('updated_at').limit(self.page_size).execute()
+        rows = result.data or []
+        if len(rows) >= self.page_size:
+            # A bulk update; paging by timestamp could stall on equal values
+            return self.hydrate()
+
+        newest = since
+        with self._write_lock:
+            snapshots = dict(self._snapshots)
+            for row in rows:
+                snapshots[str(row['guild_id'])] = GuildConfig.from_row(row)
+                changed_at = _parse_timestamp(row.get('updated_at'))
+                if changed_at and changed_at > newest:
+                    newest = changed_at
+            self._snapshots = snapshots
+            self._synced_through = newest
+        return len(rows)
+
+    def get(self, guild_id) -> GuildConfig:
+        """Snapshot for a guild; unknown guilds are loaded once, then served from memory"""
+        key = str(guild_id)
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            snapshot = self.refresh(key)
+            if snapshot is None:
+                # Not in the guilds table yet; cache defaults until a write refreshes it
+                snapshot = GuildConfig.default(key)
+                self.put(snapshot)
+        return snapshot
+
+    def refresh(self, guild_id) -> Optional[GuildConfig]:
+        """Re-read one guild's row and swap in a new snapshot"""
+        key = str(guild_id)
+        try:
+            result = self.client.table('guilds').select(GUILD_CONFIG_COLUMNS).eq('guild_id', key).execute()
+        except Exception as e:
+            logger.error(f"Failed to refresh config snapshot for guild {key}: {e}")
+            return self._snapshots.get(key)
+
+        if not result.data:
+            self.discard(key)
+            return None
+        snapshot = GuildConfig.from_row(result.data[0])
+        self.put(snapshot)
+        return snapshot
+
+    def put(self, snapshot: GuildConfig):
+        with self._write_lock:
+            snapshots = dict(self._snapshots)
+            snapshots[snapshot.guild_id] = snapshot
+            self._snapshots = snapshots
+
+    def put_row(self, row: Dict[str, Any]):
+        self.put(GuildConfig.from_row(row))
+
+    def discard(self, guild_id):
+        key = str(guild_id)
+        with self._write_lock:
+            if key in self._snapshots:
+                snapshots = dict(self._snapshots)
+                del snapshots[key]
+                self._snapshots = snapshots
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """Approximate bytes held by the store (snapshots, their values and the map)"""
+        snapshots = self._snapshots
+        seen = set()
+
+        def size(obj) -> int:
+            if id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            total = sys.getsizeof(obj)
+            if isinstance(obj, (tuple, list)):
+                total += sum(size(v) for v in obj)
+            elif isinstance(obj, (dict, MappingProxyType)):
+                total += sum(size(k) + size(v) for k, v in obj.items())
+            return total
+
+        per_snapshot = 0
+        for snapshot in snapshots.values():
+            per_snapshot += size(snapshot)
+            per_snapshot += sum(size(getattr(snapshot, name)) for name in GuildConfig.__slots__)
+
+        map_bytes = sys.getsizeof(snapshots) + sum(sys.getsizeof(k) for k in snapshots)
+        return {
+            'guilds': len(snapshots),
+            'snapshot_bytes': per_snapshot,
+            'map_bytes': map_bytes,
+            'total_bytes': per_snapshot + map_bytes
+        }
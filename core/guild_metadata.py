@@ -0,0 +1,304 @@
+"""
+Shared guild metadata snapshot
+The bot process publishes each guild's channels, roles and member count to a
+local SQLite file; the separate web process reads them without a bot instance.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = 'data/guild_snapshot.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_meta (
+    guild_id     TEXT PRIMARY KEY,
+    name         TEXT,
+    icon_url     TEXT,
+    member_count INTEGER,
+    version      INTEGER NOT NULL DEFAULT 1,
+    updated_at   REAL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS guild_channels (
+    guild_id   TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    name       TEXT,
+    type       TEXT,
+    position   INTEGER,
+    PRIMARY KEY (guild_id, channel_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS guild_roles (
+    guild_id    TEXT NOT NULL,
+    role_id     TEXT NOT NULL,
+    name        TEXT,
+    color       INTEGER,
+    position    INTEGER,
+    permissions INTEGER,
+    mentionable INTEGER,
+    PRIMARY KEY (guild_id, role_id)
+) WITHOUT ROWID;
+"""
+
+
+def channel_row(channel) -> Tuple:
+    return (
+        str(channel.guild.id), str(channel.id), channel.name, str(channel.type),
+        getattr(channel, 'position', 0) or 0
+    )
+
+
+def role_row(role) -> Tuple:
+    return (
+        str(role.guild.id), str(role.id), role.name, role.color.value, role.position,
+        role.permissions.value, int(role.mentionable)
+    )
+
+
+def guild_rows(guild) -> Dict:
+    """Plain-data copy of a guild, built on the event loop before handing it to a writer thread"""
+    return {
+        'meta': (str(guild.id), guild.name, str(guild.icon.url) if guild.icon else None, guild.member_count),
+        'channels': [channel_row(c) for c in guild.channels],
+        'roles': [role_row(r) for r in guild.roles],
+    }
+
+
+class GuildMetadataStore:
+    """
+    SQLite snapshot of guild channels, roles and member counts.
+
+    Every write bumps the guild's version. Readers keep decoded lists per guild
+    and only re-query when the version has moved, so repeat reads are a single
+    primary-key lookup.
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._read_cache: Dict[Tuple[str, str], Tuple[int, List[Dict]]] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional['GuildMetadataStore']:
+        try:
+            return cls(os.getenv('GUILD_SNAPSHOT_PATH', DEFAULT_SNAPSHOT_PATH))
+        except Exception as e:
+            logger.error(f"Failed to open guild metadata snapshot: {e}")
+            return None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit; writers open explicit transactions so readers never see half a guild
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn, guild_id: str):
+        # New rows start from a clock-based version so a re-added guild never reuses a cached one
+        now = time.time()
+        conn.execute(
+            "INSERT INTO guild_meta (guild_id, version, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(guild_id) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at",
+            (guild_id, int(now * 1000), now)
+        )
+
+    # ---- writers (bot process) ----
+
+    def publish(self, snapshots: Iterable[Dict]):
+        """Replace whole guilds (startup, guild join)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for snapshot in snapshots:
+                guild_id, name, icon_url, member_count = snapshot['meta']
+                conn.execute("DELETE FROM guild_channels WHERE guild_id = ?", (guild_id,))
+                conn.execute("DELETE FROM guild_roles WHERE guild_id = ?", (guild_id,))
+                conn.executemany("INSERT INTO guild_channels VALUES (?, ?, ?, ?, ?)", snapshot['channels'])
+                conn.executemany("INSERT INTO guild_roles VALUES (?, ?, ?, ?, ?, ?, ?)", snapshot['roles'])
+                self._bump(conn, guild_id)
+                conn.execute(
+                    "UPDATE guild_meta SET name = ?, icon_url = ?, member_count = ? WHERE guild_id = ?",
+                    (name, icon_url, member_count, guild_id)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _apply(self, guild_id: str, sql: str, params: Tuple):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(sql, params)
+            self._bump(conn, guild_id)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def upsert_channel(self, channel):
+        row = channel_row(channel)
+        self._apply(row[0], "INSERT OR REPLACE INTO guild_channels VALUES (?, ?, ?, ?, ?)", row)
+
+    def remove_channel(self, guild_id, channel_id):
+        self._apply(
+            str(guild_id), "DELETE FROM guild_channels WHERE guild_id = ? AND channel_id = ?",
+            (str(guild_id), str(channel_id))
+        )
+
+    def upsert_role(self, role):
+        row = role_row(role)
+        self._apply(row[0], "INSERT OR REPLACE INTO guild_roles VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+
+    def remove_role(self, guild_id, role_id):
+        self._apply(
+            str(guild_id), "DELETE FROM guild_roles WHERE guild_id = ? AND role_id = ?",
+            (str(guild_id), str(role_id))
+        )
+
+    def set_member_count(self, guild_id, member_count: int):
+        self._apply(
+            str(guild_id), "UPDATE guild_meta SET member_count = ? WHERE guild_id = ?",
+            (member_count, str(guild_id))
+        )
+
+    def remove_guild(self, guild_id):
+        guild_id = str(guild_id)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ('guild_channels', 'guild_roles', 'guild_meta'):
+                conn.execute(f"DELETE FROM {table} WHERE guild_id = ?", (guild_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---- readers (web process) ----
+
+    def get_meta(self, guild_id) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT name, icon_url, member_count, version FROM guild_meta WHERE guild_id = ?", (str(guild_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'server_name': row[0], 'icon_url': row[1], 'member_count': row[2], 'version': row[3]}
+
+    def _cached(self, guild_id: str, kind: str, load) -> List[Dict]:
+        row = self._conn().execute("SELECT version FROM guild_meta WHERE guild_id = ?", (guild_id,)).fetchone()
+        if row is None:
+            return []
+        cached = self._read_cache.get((guild_id, kind))
+        if cached is not None and cached[0] == row[0]:
+            return cached[1]
+        items = load()
+        self._read_cache[(guild_id, kind)] = (row[0], items)
+        return items
+
+    def get_channels(self, guild_id) -> List[Dict]:
+        """Channels sorted by position, in the get_guild_channels shape"""
+        guild_id = str(guild_id)
+
+        def load():
+            rows = self._conn().execute(
+                "SELECT channel_id, name, type, position FROM guild_channels WHERE guild_id = ? ORDER BY position",
+                (guild_id,)
+            ).fetchall()
+            return [{'id': r[0], 'name': r[1], 'type': r[2], 'position': r[3]} for r in rows]
+
+        return self._cached(guild_id, 'channels', load)
+
+    def get_roles(self, guild_id) -> List[Dict]:
+        """Roles sorted by position (highest first), in the get_guild_roles shape"""
+        guild_id = str(guild_id)
+
+        def load():
+            rows = self._conn().execute(
+                "SELECT role_id, name, color, position, permissions, mentionable FROM guild_roles "
+                "WHERE guild_id = ? ORDER BY position DESC",
+                (guild_id,)
+            ).fetchall()
+            return [
+                {'id': r[0], 'name': r[1], 'color': r[2], 'position': r[3], 'permissions': r[4], 'mentionable': bool(r[5])}
+                for r in rows
+            ]
+
+        return self._cached(guild_id, 'roles', load)
+
+
+def register_publisher(bot, store: GuildMetadataStore):
+    """Keep the snapshot current from gateway events (listeners run alongside any @bot.event handlers)"""
+
+    def safely(action, *args):
+        try:
+            action(*args)
+        except Exception as e:
+            logger.error(f"Error updating guild metadata snapshot: {e}")
+
+    async def publish_guilds(guilds):
+        try:
+            snapshots = [guild_rows(g) for g in guilds]
+            await asyncio.to_thread(store.publish, snapshots)
+            logger.info(f"✅ Published metadata snapshot for {len(snapshots)} guilds")
+        except Exception as e:
+            logger.error(f"Error publishing guild metadata snapshot: {e}")
+
+    async def on_ready():
+        await publish_guilds(bot.guilds)
+
+    async def on_guild_join(guild):
+        await publish_guilds([guild])
+
+    async def on_guild_update(before, after):
+        if before.name != after.name or before.icon != after.icon:
+            await publish_guilds([after])
+
+    async def on_guild_remove(guild):
+        safely(store.remove_guild, guild.id)
+
+    async def on_member_join(member):
+        safely(store.set_member_count, member.guild.id, member.guild.member_count)
+
+    async def on_member_remove(member):
+        safely(store.set_member_count, member.guild.id, member.guild.member_count)
+
+    async def on_guild_channel_create(channel):
+        safely(store.upsert_channel, channel)
+
+    async def on_guild_channel_update(before, after):
+        safely(store.upsert_channel, after)
+
+    async def on_guild_channel_delete(channel):
+        safely(store.remove_channel, channel.guild.id, channel.id)
+
+    async def on_guild_role_create(role):
+        safely(store.upsert_role, role)
+
+    async def on_guild_role_update(before, after):
+        safely(store.upsert_role, after)
+
+    async def on_guild_role_delete(role):
+        safely(store.remove_role, role.guild.id, role.id)
+
+    for listener in (
+        on_ready, on_guild_join, on_guild_update, on_guild_remove, on_member_join, on_member_remove,
+        on_guild_channel_create, on_guild_channel_update, on_guild_channel_delete,
+        on_guild_role_create, on_guild_role_update, on_guild_role_delete
+    ):
+        bot.add_listener(listener)
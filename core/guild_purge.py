@@ -0,0 +1,164 @@
+"""
+Background guild data purge
+Queues a guild for deletion when the bot leaves it and drains the queue in
+bounded server-side batches (see migrations/024_guild_purge.sql)
+"""
+
+import logging
+import os
+import shutil
+import threading
+from typing import Dict, Optional
+
+from core.search_index import search_index
+
+logger = logging.getLogger(__name__)
+
+
+class GuildPurgeWorker:
+    """
+    Drives purge_guild_data() for every open job in guild_purge_jobs.
+
+    Each RPC deletes at most ``batch_size`` rows in its own transaction and
+    records progress, so the event loop only pays for one quick call when
+    leaving a guild, and a crash resumes from the job table. All methods are
+    blocking; call them through asyncio.to_thread.
+    """
+
+    def __init__(self, data_manager, batch_size: int = 5000, max_attempts: int = 5,
+                 data_dir: str = 'data/guilds', backup_store=None):
+        self.data_manager = data_manager
+        self.backup_store = backup_store
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+        self._rerun = False
+
+    def request(self, guild_id) -> bool:
+        try:
+            self.data_manager.admin_client.rpc('request_guild_purge', {'p_guild_id': str(guild_id)}).execute()
+            logger.info(f"Queued data purge for guild {guild_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to queue data purge for guild {guild_id}: {e}")
+            return False
+
+    def cancel(self, guild_id) -> bool:
+        """Drop an unfinished purge, e.g. when the bot is re-added to the guild"""
+        try:
+            result = self.data_manager.admin_client.rpc('cancel_guild_purge', {'p_guild_id': str(guild_id)}).execute()
+            cancelled = bool(result.data)
+            if cancelled:
+                logger.info(f"Cancelled pending data purge for guild {guild_id}")
+            return cancelled
+        except Exception as e:
+            logger.error(f"Failed to cancel data purge for guild {guild_id}: {e}")
+            return False
+
+    def purge_guild(self, guild_id: str) -> Optional[Dict[str, int]]:
+        """
+        Run purge_guild_data until the guild is empty; returns rows deleted per table,
+        or None if the purge was skipped and the guild's data is still there
+        """
+        deleted: Dict[str, int] = {}
+        while True:
+            result = self.data_manager.admin_client.rpc(
+                'purge_guild_data', {'p_guild_id': guild_id, 'p_batch_size': self.batch_size}
+            ).execute()
+            step = result.data or {}
+            if step.get('skipped'):
+                # Cancelled (guild re-added) or held by another instance
+                if deleted:
+                    logger.info(f"Purge of guild {guild_id} skipped after {sum(deleted.values())} rows")
+                return None
+            if step.get('done', True):
+                break
+            deleted[step['table']] = deleted.get(step['table'], 0) + int(step.get('deleted') or 0)
+
+        self._cleanup_local(guild_id)
+        return deleted
+
+    def _cleanup_local(self, guild_id: str):
+        path = os.path.join(self.data_dir, guild_id)
+        try:
+            if os.path.exists(path):
+                shutil.rmtree(path)
+                logger.info(f"Deleted file data for guild {guild_id}")
+        except Exception as e:
+            logger.warning(f"Failed to delete file data for guild {guild_id}: {e}")
+
+        if self.backup_store is not None:
+            try:
+                self.backup_store.drop_guild(guild_id)
+                collected = self.backup_store.collect_garbage()
+                logger.info(f"Deleted backups for guild {guild_id} ({collected} objects reclaimed)")
+            except Exception as e:
+                logger.warning(f"Failed to delete backups for guild {guild_id}: {e}")
+
+        try:
+            guild_configs = getattr(self.data_manager, 'guild_configs', None)
+            if guild_configs is not None:
+                guild_configs.discard(guild_id)
+        except Exception as e:
+            logger.warning(f"Failed to drop config snapshot for guild {guild_id}: {e}")
+
+        try:
+            self.data_manager.forget_guild_users(guild_id)
+        except Exception as e:
+            logger.warning(f"Failed to drop known users for guild {guild_id}: {e}")
+
+        try:
+            search_index.drop_guild(guild_id)
+        except Exception as e:
+            logger.warning(f"Failed to drop autocomplete index for guild {guild_id}: {e}")
+
+    def _record_failure(self, job: Dict, error: Exception):
+        attempts = int(job.get('attempts') or 0) + 1
+        try:
+            self.data_manager.admin_client.table('guild_purge_jobs').update({
+                'attempts': attempts,
+                'last_error': str(error)[:500],
+                'status': 'failed' if attempts >= self.max_attempts else job.get('status', 'pending')
+            }).eq('guild_id', job['guild_id']).execute()
+        except Exception as e:
+            logger.error(f"Failed to record purge failure for guild {job['guild_id']}: {e}")
+
+    def run_pending(self, limit: int = 50) -> Dict[str, int]:
+        """
+        Purge every open job; concurrent callers fold into the run already in progress.
+        Returns how many guilds were purged, skipped (cancelled or held elsewhere) and failed.
+        """
+        totals = {'purged': 0, 'skipped': 0, 'failed': 0}
+        if not self._lock.acquire(blocking=False):
+            self._rerun = True
+            return totals
+
+        try:
+            while True:
+                self._rerun = False
+                result = self.data_manager.admin_client.rpc('get_pending_guild_purges', {'p_limit': limit}).execute()
+                jobs = result.data or []
+                before = totals['purged']
+                for job in jobs:
+                    guild_id = str(job['guild_id'])
+                    try:
+                        deleted = self.purge_guild(guild_id)
+                        if deleted is None:
+                            totals['skipped'] += 1
+                            continue
+                        totals['purged'] += 1
+                        logger.info(f"Purged data for guild {guild_id}: {sum(deleted.values())} rows")
+                    except Exception as e:
+                        logger.error(f"Error purging data for guild {guild_id}: {e}")
+                        totals['failed'] += 1
+                        self._record_failure(job, e)
+
+                # Another page only if this one made progress; skips and failures wait for the next run
+                if not self._rerun and (len(jobs) < limit or totals['purged'] == before):
+                    return totals
+        except Exception as e:
+            logger.error(f"Error loading pending guild purges: {e}")
+            return totals
+        finally:
+            self._lock.release()
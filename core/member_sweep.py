@@ -0,0 +1,96 @@
+"""
+Set-based inactive member sweep
+Diffs the bot's cached member ID sets against stored users for many guilds
+per call (see migrations/025_member_activity_sweep.sql)
+"""
+
+import logging
+from typing import Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+
+class MemberActivitySweeper:
+    """
+    Replaces the per-guild inactive-user loops with a handful of RPCs.
+
+    ``snapshot`` runs on the event loop and only reads the member cache; the
+    other methods block on Supabase and should be called through
+    asyncio.to_thread. Guilds are packed into payloads of roughly
+    ``max_ids_per_call`` member IDs, so a sweep over thousands of guilds is a
+    few calls rather than thousands.
+    """
+
+    def __init__(self, data_manager, max_ids_per_call: int = 50000, max_guilds_per_call: int = 1000):
+        self.data_manager = data_manager
+        self.max_ids_per_call = max_ids_per_call
+        self.max_guilds_per_call = max_guilds_per_call
+
+    @staticmethod
+    def snapshot(guilds: Iterable) -> Dict[str, List[str]]:
+        """Member IDs per guild, skipping guilds whose member cache is incomplete"""
+        members: Dict[str, List[str]] = {}
+        for guild in guilds:
+            # An unchunked guild would make everyone not yet cached look like a leaver
+            if not getattr(guild, 'chunked', False):
+                logger.debug(f"Skipping member sweep for unchunked guild {guild.id}")
+                continue
+            members[str(guild.id)] = [str(member.id) for member in guild.members]
+        return members
+
+    def batches(self, members: Dict[str, List[str]]) -> List[Dict[str, List[str]]]:
+        """Pack whole guilds into payloads; a guild larger than the cap goes alone"""
+        batches: List[Dict[str, List[str]]] = []
+        current: Dict[str, List[str]] = {}
+        size = 0
+        for guild_id, ids in members.items():
+            if current and (size + len(ids) > self.max_ids_per_call or len(current) >= self.max_guilds_per_call):
+                batches.append(current)
+                current, size = {}, 0
+            current[guild_id] = ids
+            size += len(ids)
+        if current:
+            batches.append(current)
+        return batches
+
+    def sync_presence(self, members: Dict[str, List[str]]) -> Dict:
+        """Flag leavers inactive, reactivate returners and cancel leavers' open tasks"""
+        totals = {'marked_inactive': 0, 'reactivated': 0, 'tasks_cancelled': 0, 'guilds': {}, 'failed_batches': 0}
+        for batch in self.batches(members):
+            try:
+                result = self.data_manager.admin_client.rpc('sync_member_presence', {'p_members': batch}).execute()
+                data = result.data or {}
+            except Exception as e:
+                totals['failed_batches'] += 1
+                logger.error(f"Member presence sync failed for {len(batch)} guilds: {e}")
+                continue
+
+            for key in ('marked_inactive', 'reactivated', 'tasks_cancelled'):
+                totals[key] += int(data.get(key) or 0)
+            totals['guilds'].update({gid: int(n) for gid, n in (data.get('guilds') or {}).items()})
+
+        self._invalidate(totals['guilds'])
+        return totals
+
+    def mark_idle(self, guild_ids: List[str], default_days: int = 30) -> Dict[str, int]:
+        """Mark users without recent transactions inactive, per guild threshold"""
+        marked: Dict[str, int] = {}
+        for start in range(0, len(guild_ids), self.max_guilds_per_call):
+            chunk = [str(gid) for gid in guild_ids[start:start + self.max_guilds_per_call]]
+            try:
+                result = self.data_manager.admin_client.rpc(
+                    'mark_idle_users', {'p_guild_ids': chunk, 'p_default_days': default_days}
+                ).execute()
+                marked.update({gid: int(n) for gid, n in (result.data or {}).items()})
+            except Exception as e:
+                logger.error(f"Idle user sweep failed for {len(chunk)} guilds: {e}")
+
+        self._invalidate(marked)
+        return marked
+
+    def _invalidate(self, guild_counts: Dict[str, int]):
+        for guild_id in guild_counts:
+            try:
+                self.data_manager.invalidate_cache(guild_id, 'currency')
+            except Exception as e:
+                logger.warning(f"Failed to invalidate currency cache for guild {guild_id}: {e}")
@@ -10,6 +10,7 @@ from .actions import ModerationActions
 from .scheduler import ModerationScheduler
 from .logger import ModerationLogger
 from .health import ModerationHealthChecker
+from .policy import ModerationPolicy
 
 __all__ = [
     'ProtectionManager',
@@ -18,5 +19,6 @@ __all__ = [
     'ModerationActions',
     'ModerationScheduler',
     'ModerationLogger',
-    'ModerationHealthChecker'
+    'ModerationHealthChecker',
+    'ModerationPolicy'
 ]
@@ -0,0 +1,135 @@
+"""
+Anti-spam stage for the moderation pipeline
+Tracks per-(guild, user) message rates and repeated content in fixed-size rings,
+entirely in memory, before the profanity/link scanner runs
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Thresholds can be tuned per guild up to one less than the ring size
+RING_SIZE = 16
+MAX_TRACKED_USERS = 50000
+IDLE_SECONDS = 300
+
+
+def fingerprint(content: str) -> int:
+    """Case/whitespace-insensitive hash so trivially varied copies still match"""
+    return hash(' '.join(content.lower().split()))
+
+
+class _UserWindow:
+    __slots__ = ('times', 'prints', 'count', 'last_seen', 'flagged_until')
+
+    def __init__(self):
+        self.times = [0.0] * RING_SIZE
+        self.prints = [0] * RING_SIZE
+        self.count = 0
+        self.last_seen = 0.0
+        self.flagged_until = 0.0
+
+
+class AntiSpamEngine:
+    """
+    Per-user ring buffers of the last RING_SIZE message timestamps and
+    content fingerprints.
+
+    A message costs one dict move plus a constant-size scan of the ring, with
+    no I/O. Users are kept in LRU order and dropped once idle for
+    ``idle_seconds`` or when more than ``max_tracked`` are active, so memory is
+    bounded no matter how large the guild is.
+    """
+
+    def __init__(self, max_tracked: int = MAX_TRACKED_USERS, idle_seconds: float = IDLE_SECONDS):
+        self.max_tracked = max_tracked
+        self.idle_seconds = idle_seconds
+        self._windows: 'OrderedDict[Tuple[int, int], _UserWindow]' = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._windows)
+
+    def check(self, guild_id: int, user_id: int, content: str, policy, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Record a message and return a spam violation for it, or None.
+
+        ``policy`` supplies spam_max_messages / spam_window / spam_max_duplicates /
+        spam_duplicate_window (see ModerationPolicy).
+        """
+        now = time.monotonic() if now is None else now
+        key = (guild_id, user_id)
+
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _UserWindow()
+            window.last_seen = now
+            self._evict(now)
+        else:
+            self._windows.move_to_end(key)
+
+        slot = window.count % RING_SIZE
+        window.times[slot] = now
+        window.prints[slot] = fingerprint(content) if content else 0
+        window.count += 1
+        window.last_seen = now
+
+        violation = self._evaluate(window, slot, now, policy)
+        if violation is None:
+            return None
+
+        if now < window.flagged_until:
+            # Already acted on this burst; remaining messages are just removed
+            violation['followup'] = True
+        window.flagged_until = now + max(policy.spam_window, policy.spam_duplicate_window)
+        return violation
+
+    def _evaluate(self, window: _UserWindow, slot: int, now: float, policy) -> Optional[Dict]:
+        # Thresholds are messages allowed per window, so the one after the limit is the flood
+        limit = min(policy.spam_max_messages, RING_SIZE - 1)
+        if window.count > limit:
+            oldest = window.times[(slot - limit) % RING_SIZE]
+            if now - oldest < policy.spam_window:
+                # Twice the limit inside the window (or a full ring) is treated as a raid-style flood
+                doubled = min(limit * 2, RING_SIZE - 1)
+                severe = window.count > doubled and now - window.times[(slot - doubled) % RING_SIZE] < policy.spam_window
+                return {
+                    'violation_type': 'spam',
+                    'reason': 'message_flood',
+                    'severity': 'high' if severe else 'medium',
+                    'count': limit + 1
+                }
+
+        current = window.prints[slot]
+        if current:
+            duplicates = 0
+            for i in range(min(window.count, RING_SIZE)):
+                if window.prints[i] == current and now - window.times[i] < policy.spam_duplicate_window:
+                    duplicates += 1
+            if duplicates > policy.spam_max_duplicates:
+                return {
+                    'violation_type': 'spam',
+                    'reason': 'duplicate_messages',
+                    'severity': 'medium',
+                    'count': duplicates
+                }
+        return None
+
+    def _evict(self, now: float):
+        windows = self._windows
+        while len(windows) > self.max_tracked:
+            windows.popitem(last=False)
+            self.evicted += 1
+        # Oldest-first order means idle entries sit at the front; stop at the first active one
+        while windows:
+            key, window = next(iter(windows.items()))
+            if now - window.last_seen < self.idle_seconds:
+                break
+            del windows[key]
+            self.evicted += 1
+
+    def stats(self) -> Dict:
+        return {'tracked_users': len(self._windows), 'max_tracked': self.max_tracked, 'evicted': self.evicted}
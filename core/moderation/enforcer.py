@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from .protection_manager import ProtectionManager
 from .scanner import MessageScanner
+from core.discord_scheduler import discord_scheduler, Priority
+from core.delayed_actions import delayed_actions
 
 logger = logging.getLogger(__name__)
 
@@ -15,11 +17,12 @@ class ProtectionEnforcer:
         self.scanner = scanner
         self.bot = bot
 
-    def evaluate_protection_action(self, guild_id: int, message: discord.Message, matches: List[Dict], links: List[Dict], file_violations: List[Dict] = None) -> Dict:
+    def evaluate_protection_action(self, guild_id: int, message: discord.Message, matches: List[Dict], links: List[Dict], file_violations: List[Dict] = None, spam_violations: List[Dict] = None) -> Dict:
         """Decides action based on guild protection config and severity"""
         config = self.protection_manager.load_protection_config(guild_id)
         
         file_violations = file_violations or []
+        spam_violations = spam_violations or []
 
         if not config.get('enabled', True):
             return {'action': 'ignore', 'reason': 'protection_disabled'}
@@ -49,6 +52,17 @@ class ProtectionEnforcer:
         if matches and config.get('profanity_filter', True):
             self._apply_violation_action(action_plan, 'profanity', max_severity, config)
 
+        # Spam actions: the first flagged message of a burst escalates via auto_actions
+        # (never past a timeout), the rest of that burst is only deleted
+        if spam_violations:
+            if all(v.get('followup') for v in spam_violations):
+                if self._get_action_weight(action_plan['action']) < self._get_action_weight('delete'):
+                    action_plan.update({'action': 'delete', 'reason': 'spam_detected', 'severity': 'low', 'notify': False})
+            else:
+                spam_severity = 'high' if any(v['severity'] == 'high' for v in spam_violations) else 'medium'
+                self._apply_violation_action(action_plan, 'spam', spam_severity, config, max_action='mute')
+                action_plan['spam_reason'] = spam_violations[0]['reason']
+
         # Link violation actions (override profanity if more severe or if strict)
         if has_links and config.get('link_filter', True):
              # Hard rule: unauthorized links -> delete/warn usually, but could be strict
@@ -95,9 +109,14 @@ class ProtectionEnforcer:
 
         return action_plan
 
-    def _apply_violation_action(self, plan: Dict, type: str, severity: str, config: Dict):
-        """Helper to apply auto-actions based on config"""
+    def _apply_violation_action(self, plan: Dict, type: str, severity: str, config: Dict, max_action: str = None):
+        """Helper to apply auto-actions based on config, optionally capped at max_action"""
         auto_actions = config.get('auto_actions', {})
+        if max_action:
+            auto_actions = {
+                action: enabled for action, enabled in auto_actions.items()
+                if self._get_action_weight(action) <= self._get_action_weight(max_action)
+            }
         
         # Calculate proposed action based on severity and config
         proposed_action = 'delete' # Default minimum
@@ -333,15 +352,17 @@ class ProtectionEnforcer:
             )
             embed.set_footer(text="This message will auto-delete in 30 seconds")
 
-            notification = await message.channel.send(embed=embed)
+            notification = await discord_scheduler.submit(
+                lambda: message.channel.send(embed=embed), Priority.MODERATION,
+                bucket=f"channel:{message.channel.id}"
+            )
 
-            # Auto-delete after 30 seconds
-            import asyncio
-            await asyncio.sleep(30)
-            try:
-                await notification.delete()
-            except:
-                pass
+            # Auto-delete after 30 seconds via the shared timer wheel
+            delayed_actions.schedule(
+                'delete_message', 30,
+                {'channel_id': notification.channel.id, 'message_id': notification.id},
+                persist=True
+            )
 
         except discord.Forbidden:
             # Cannot send in channel
@@ -47,7 +47,7 @@ class ModerationHealthChecker:
             # Check for overdue jobs
             overdue_jobs = []
             for job in scheduled_jobs:
-                if job['unmute_timestamp'].timestamp() < current_time:
+                if job['execute_ts'] < current_time:
                     overdue_jobs.append(job['job_id'])
 
             if overdue_jobs:
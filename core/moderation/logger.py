@@ -1,10 +1,37 @@
 import logging
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List
 import discord
 
+from core.export_stream import keyset_rows, csv_chunks, json_chunks
+
 logger = logging.getLogger(__name__)
 
+MODERATION_EXPORT_FIELDS = ['action_id', 'user_id', 'action_type', 'moderator_id', 'reason',
+                            'duration_seconds', 'expires_at', 'is_active', 'created_at']
+
+
+def iter_moderation_log_export(client, guild_id, start_date: datetime = None, end_date: datetime = None,
+                               format: str = 'json') -> Iterator[str]:
+    """Stream a guild's moderation_actions as CSV or JSON text chunks, paged by id"""
+    if format not in ('json', 'csv'):
+        raise ValueError(f"Unsupported export format: {format}")
+
+    def make_query():
+        query = client.table('moderation_actions').select(','.join(['id'] + MODERATION_EXPORT_FIELDS)) \
+            .eq('guild_id', str(guild_id))
+        if start_date:
+            query = query.gte('created_at', start_date.isoformat())
+        if end_date:
+            query = query.lte('created_at', end_date.isoformat())
+        return query
+
+    logs = ({field: row.get(field) for field in MODERATION_EXPORT_FIELDS} for row in keyset_rows(make_query, ['id']))
+    if format == 'json':
+        return json_chunks(logs)
+    return csv_chunks(MODERATION_EXPORT_FIELDS, ([log[f] for f in MODERATION_EXPORT_FIELDS] for log in logs))
+
+
 class ModerationLogger:
     """Handles logging and auditing of moderation actions"""
 
@@ -180,31 +207,8 @@ class ModerationLogger:
     def export_moderation_logs(self, guild_id: int, start_date: datetime = None,
                               end_date: datetime = None, format: str = 'json') -> str:
         """Exports moderation/audit logs for compliance or review"""
-        logs = [log for log in self._audit_log if log['guild_id'] == guild_id]
-
-        # Filter by date range
-        if start_date or end_date:
-            filtered_logs = []
-            for log in logs:
-                log_date = datetime.fromisoformat(log['timestamp'])
-                if start_date and log_date < start_date:
-                    continue
-                if end_date and log_date > end_date:
-                    continue
-                filtered_logs.append(log)
-            logs = filtered_logs
-
-        if format == 'json':
-            import json
-            return json.dumps(logs, indent=2, ensure_ascii=False)
-        elif format == 'csv':
-            import csv
-            from io import StringIO
-            output = StringIO()
-            if logs:
-                writer = csv.DictWriter(output, fieldnames=logs[0].keys())
-                writer.writeheader()
-                writer.writerows(logs)
-            return output.getvalue()
-        else:
+        try:
+            client = self.protection_manager.data_manager.supabase
+            return ''.join(iter_moderation_log_export(client, guild_id, start_date, end_date, format))
+        except ValueError:
             return "Unsupported format"
@@ -0,0 +1,166 @@
+"""
+Compiled per-guild moderation policy
+Built once from the protection config and reused for every message until the config changes
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+# One extractor shared by every guild; group 1 is the netloc (host plus optional port)
+URL_PATTERN = re.compile(
+    r'https?://((?:[-\w.])+(?:[:\d]+)?)(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:\w*))?)?',
+    re.IGNORECASE
+)
+
+DEFAULT_ANTI_SPAM = {
+    'enabled': False,           # opt-in per guild
+    'max_messages': 7,          # messages allowed per window before it counts as a flood
+    'window_seconds': 5,
+    'max_duplicates': 4,        # identical messages allowed per duplicate window
+    'duplicate_window_seconds': 30
+}
+
+MOD_PERMISSIONS = ('kick_members', 'ban_members', 'manage_messages', 'manage_channels', 'manage_roles')
+
+
+def may_contain_links(text: Optional[str]) -> bool:
+    """Cheap pre-filter: every URL the extractor accepts contains '://'"""
+    return bool(text) and '://' in text
+
+
+def extract_urls(text: str) -> List[tuple]:
+    """(url, netloc) pairs in order of appearance"""
+    if not may_contain_links(text):
+        return []
+    return [(m.group(0), m.group(1).lower()) for m in URL_PATTERN.finditer(text)]
+
+
+class DomainTrie:
+    """
+    Domain patterns indexed by reversed labels (com -> example -> www).
+
+    "example.com" matches only that host. "*.example.com" matches its
+    subdomains, and "*example.com" matches the host and its subdomains.
+    A lookup walks at most one node per label of the host.
+    """
+
+    _EXACT = '$exact'
+    _SUBDOMAINS = '$sub'
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self._root: Dict = {}
+        self.size = 0
+        for pattern in patterns:
+            self.add(pattern)
+
+    @staticmethod
+    def _labels(domain: str) -> List[str]:
+        return [label for label in domain.lower().strip().strip('.').split('.') if label][::-1]
+
+    def add(self, pattern: str):
+        pattern = (pattern or '').strip().lower()
+        if not pattern:
+            return
+        exact, subdomains = True, False
+        if pattern.startswith('*.'):
+            pattern, exact, subdomains = pattern[2:], False, True
+        elif pattern.startswith('*'):
+            pattern, subdomains = pattern[1:], True
+
+        node = self._root
+        for label in self._labels(pattern):
+            node = node.setdefault(label, {})
+        if exact:
+            node[self._EXACT] = True
+        if subdomains:
+            node[self._SUBDOMAINS] = True
+        self.size += 1
+
+    def matches(self, host: str) -> bool:
+        labels = self._labels(host.split(':', 1)[0])
+        node = self._root
+        for label in labels:
+            # A wildcard on this node covers anything with more labels below it
+            if node.get(self._SUBDOMAINS):
+                return True
+            node = node.get(label)
+            if node is None:
+                return False
+        return bool(node.get(self._EXACT))
+
+    def __len__(self):
+        return self.size
+
+
+def _id_set(values) -> frozenset:
+    # The dashboard stores ids as strings and slash commands as ints; compare as strings
+    return frozenset(str(v) for v in (values or []))
+
+
+class ModerationPolicy:
+    """Immutable view of one guild's protection config, with sets and tries in place of lists"""
+
+    __slots__ = (
+        'enabled', 'profanity_filter', 'link_filter', 'file_filter',
+        'exempt_roles', 'exempt_roles_links', 'exempt_roles_files', 'exempt_channels', 'staff_roles',
+        'whitelist', 'blacklist',
+        'spam_filter', 'spam_max_messages', 'spam_window', 'spam_max_duplicates', 'spam_duplicate_window'
+    )
+
+    def __init__(self, config: Dict, staff_roles: Iterable = ()):
+        config = config or {}
+        self.enabled = config.get('enabled', True)
+        self.profanity_filter = config.get('profanity_filter', True)
+        self.link_filter = config.get('link_filter', True)
+        self.file_filter = config.get('file_filter', False)
+        self.exempt_roles = _id_set(config.get('exempt_roles'))
+        self.exempt_roles_links = _id_set(config.get('exempt_roles_links'))
+        self.exempt_roles_files = _id_set(config.get('exempt_roles_files'))
+        self.exempt_channels = _id_set(config.get('exempt_channels'))
+        self.staff_roles = _id_set(staff_roles)
+        self.whitelist = DomainTrie(config.get('whitelist_domains', []))
+        self.blacklist = DomainTrie(config.get('blacklist_domains', []))
+
+        anti_spam = {**DEFAULT_ANTI_SPAM, **(config.get('anti_spam') or {})}
+        self.spam_filter = bool(anti_spam['enabled'])
+        self.spam_max_messages = max(2, int(anti_spam['max_messages']))
+        self.spam_window = float(anti_spam['window_seconds'])
+        self.spam_max_duplicates = max(2, int(anti_spam['max_duplicates']))
+        self.spam_duplicate_window = float(anti_spam['duplicate_window_seconds'])
+
+    @staticmethod
+    def _role_ids(roles) -> frozenset:
+        return frozenset(str(role.id) for role in roles)
+
+    def is_exempt(self, channel_id, roles) -> bool:
+        if str(channel_id) in self.exempt_channels:
+            return True
+        return bool(self.exempt_roles) and not self.exempt_roles.isdisjoint(self._role_ids(roles))
+
+    def is_link_exempt(self, member) -> bool:
+        permissions = member.guild_permissions
+        if permissions.administrator:
+            return True
+        role_ids = self._role_ids(member.roles)
+        if not self.exempt_roles_links.isdisjoint(role_ids):
+            return True
+        if any(getattr(permissions, perm) for perm in MOD_PERMISSIONS):
+            return True
+        return not self.staff_roles.isdisjoint(role_ids)
+
+    def is_file_exempt(self, member) -> bool:
+        if member.guild_permissions.administrator:
+            return True
+        return not self.exempt_roles_files.isdisjoint(self._role_ids(member.roles))
+
+    def classify_links(self, text: str) -> List[Dict]:
+        """Every URL in the text with its whitelist/blacklist status"""
+        links = []
+        for url, domain in extract_urls(text):
+            links.append({
+                'url': url,
+                'domain': domain,
+                'is_whitelisted': self.whitelist.matches(domain),
+                'is_blacklisted': self.blacklist.matches(domain)
+            })
+        return links
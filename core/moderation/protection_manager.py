@@ -2,6 +2,7 @@ import logging
 from typing import Dict, List, Optional
 import discord
 from core.data_manager import DataManager
+from .policy import ModerationPolicy, DEFAULT_ANTI_SPAM
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +13,7 @@ class ProtectionManager:
         self.data_manager = data_manager
         self._cache = {}  # guild_id -> (config, timestamp)
         self._cache_ttl = 300  # 5 minutes in seconds
+        self._policies = {}  # guild_id -> (config, guild_config, ModerationPolicy)
 
     def load_protection_config(self, guild_id: int) -> dict:
         """Loads profanity/link protection settings for a guild"""
@@ -47,6 +49,7 @@ class ProtectionManager:
                 'exempt_roles_links': [], # New: Exempt from link checks
                 'exempt_roles_files': [], # New: Exempt from file/image checks
                 'exempt_channels': [],
+                'anti_spam': dict(DEFAULT_ANTI_SPAM),
                 'log_channel': None
             }
 
@@ -164,76 +167,42 @@ class ProtectionManager:
 
         return success
 
-    def is_exempt_from_link_protection(self, guild_id: int, member: discord.Member) -> bool:
-        """Determines if a user is exempt from link protection (admin/mod check OR role config)"""
-        # Check if user has Discord admin permission
-        if member.guild_permissions.administrator:
-            return True
-
+    def get_policy(self, guild_id: int) -> ModerationPolicy:
+        """Compiled policy for the guild, rebuilt only when its protection config or guild config changes"""
         config = self.load_protection_config(guild_id)
-        
-        # Check specifically configured exempt roles for links
-        exempt_link_roles = config.get('exempt_roles_links', [])
-        user_role_ids = [role.id for role in member.roles]
-        if any(role_id in exempt_link_roles for role_id in user_role_ids):
-            return True
-
-        # Check Discord moderator permissions
-        mod_permissions = [
-            'kick_members', 'ban_members', 'manage_messages',
-            'manage_channels', 'manage_roles'
-        ]
-        if any(getattr(member.guild_permissions, perm) for perm in mod_permissions):
-            return True
-
-        # Check custom admin/moderator roles from config
+        guild_config = None
         try:
-            guild_config = self.data_manager.load_guild_data(guild_id, 'config')
-            admin_roles = guild_config.get("admin_roles", [])
-            moderator_roles = guild_config.get("moderator_roles", [])
-
-            if any(role_id in (admin_roles + moderator_roles) for role_id in user_role_ids):
-                return True
+            guild_config = self.data_manager.get_config_snapshot(guild_id)
         except Exception:
             pass
 
-        return False
-        
+        cached = self._policies.get(guild_id)
+        # Both configs are replaced, never mutated, when they change, so identity is enough
+        if cached is not None and cached[0] is config and cached[1] is guild_config:
+            return cached[2]
+
+        staff_roles = []
+        if guild_config is not None:
+            staff_roles = list(guild_config.get("admin_roles", []) or []) + list(guild_config.get("moderator_roles", []) or [])
+        policy = ModerationPolicy(config, staff_roles)
+        self._policies[guild_id] = (config, guild_config, policy)
+        return policy
+
+    def is_exempt_from_link_protection(self, guild_id: int, member: discord.Member) -> bool:
+        """Determines if a user is exempt from link protection (admin/mod check OR role config)"""
+        return self.get_policy(guild_id).is_link_exempt(member)
+
     def is_exempt_from_file_protection(self, guild_id: int, member: discord.Member) -> bool:
         """Determines if a user is exempt from file/image protection"""
-        # Check if user has Discord admin permission
-        if member.guild_permissions.administrator:
-            return True
-            
-        config = self.load_protection_config(guild_id)
-        
-        # Check specifically configured exempt roles for files
-        exempt_file_roles = config.get('exempt_roles_files', [])
-        user_role_ids = [role.id for role in member.roles]
-        if any(role_id in exempt_file_roles for role_id in user_role_ids):
-            return True
-            
-        return False
+        return self.get_policy(guild_id).is_file_exempt(member)
 
     def is_exempt_from_protection(self, guild_id: int, user_id: int, channel_id: int, roles: List[discord.Role]) -> bool:
         """Determines if a message author or channel is exempt from all protection"""
-        config = self.load_protection_config(guild_id)
-
-        # Check exempt roles
-        exempt_role_ids = config.get('exempt_roles', [])
-        user_role_ids = [role.id for role in roles]
-        if any(role_id in exempt_role_ids for role_id in user_role_ids):
-            return True
-
-        # Check exempt channels
-        exempt_channel_ids = config.get('exempt_channels', [])
-        if channel_id in exempt_channel_ids:
-            return True
-
-        return False
+        return self.get_policy(guild_id).is_exempt(channel_id, roles)
 
     def on_guild_config_reload(self, guild_id: int):
         """Handler that reloads and re-applies protection config"""
         # Clear cache to force reload
         self._cache.pop(guild_id, None)
+        self._policies.pop(guild_id, None)
         logger.info(f"Reloaded protection config for guild {guild_id}")
@@ -3,6 +3,7 @@ import logging
 from typing import Dict, List, Tuple, Optional
 import discord
 from .protection_manager import ProtectionManager
+from .policy import may_contain_links
 
 logger = logging.getLogger(__name__)
 
@@ -52,32 +53,15 @@ class MessageScanner:
 
     def scan_message_for_links(self, guild_id: int, message_content: str) -> List[Dict]:
         """Extracts URLs from text and classifies them"""
-        config = self.protection_manager.load_protection_config(guild_id)
-
-        if not config.get('link_filter', True):
+        # Most messages carry no URL at all; skip config and regex work for them
+        if not may_contain_links(message_content):
             return []
 
-        # URL regex pattern
-        url_pattern = r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:\w*))?)?'
-        urls = re.findall(url_pattern, message_content, re.IGNORECASE)
-
-        whitelist = self.protection_manager.get_link_whitelist(guild_id)
-        blacklist = config.get('blacklist_domains', [])
-
-        links = []
-        for url in urls:
-            domain = self._extract_domain(url)
-            is_whitelisted = self._check_whitelist(domain, whitelist)
-            is_blacklisted = self._check_blacklist(domain, blacklist)
-
-            links.append({
-                'url': url,
-                'domain': domain,
-                'is_whitelisted': is_whitelisted,
-                'is_blacklisted': is_blacklisted
-            })
+        policy = self.protection_manager.get_policy(guild_id)
+        if not policy.link_filter:
+            return []
 
-        return links
+        return policy.classify_links(message_content)
 
     def scan_attachments_and_embeds(self, guild_id: int, message: discord.Message) -> List[Dict]:
         """Inspects attachments and embed URLs for links and forbidden content"""
@@ -93,9 +77,13 @@ class MessageScanner:
                 })
 
         # Check embed URLs
+        policy = self.protection_manager.get_policy(guild_id) if message.embeds else None
+        if policy is not None and not policy.link_filter:
+            return violations
+
         for embed in message.embeds:
             if embed.url:
-                links = self.scan_message_for_links(guild_id, embed.url)
+                links = policy.classify_links(embed.url)
                 for link in links:
                     if link['is_blacklisted']:
                         violations.append({
@@ -107,7 +95,7 @@ class MessageScanner:
 
             # Check embed description for links
             if embed.description:
-                links = self.scan_message_for_links(guild_id, embed.description)
+                links = policy.classify_links(embed.description)
                 for link in links:
                     if link['is_blacklisted']:
                         violations.append({
@@ -146,34 +134,3 @@ class MessageScanner:
             return 'medium'
         else:
             return 'low'
-
-    def _extract_domain(self, url: str) -> str:
-        """Extract domain from URL"""
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-            return parsed.netloc.lower()
-        except:
-            return url.lower()
-
-    def _check_whitelist(self, domain: str, whitelist: List[str]) -> bool:
-        """Check if domain matches whitelist patterns"""
-        for pattern in whitelist:
-            if pattern.startswith('*'):
-                # Wildcard pattern
-                if domain.endswith(pattern[1:]):
-                    return True
-            elif pattern == domain:
-                return True
-        return False
-
-    def _check_blacklist(self, domain: str, blacklist: List[str]) -> bool:
-        """Check if domain matches blacklist patterns"""
-        for pattern in blacklist:
-            if pattern.startswith('*'):
-                # Wildcard pattern
-                if domain.endswith(pattern[1:]):
-                    return True
-            elif pattern == domain:
-                return True
-        return False
@@ -1,270 +1,350 @@
 import logging
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Callable
+import heapq
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 import discord
 
 logger = logging.getLogger(__name__)
 
 class ModerationScheduler:
-    """Handles scheduling of moderation-related jobs like unmute timers"""
-
-    def __init__(self, bot):
+    """
+    Durable executor for the scheduled_jobs table (unmute, unban, remove_role, expire_strike).
+
+    Due jobs are claimed under a lease (see migrations/018_scheduled_job_leases.sql) so
+    several bot instances can share the work. Each claim prefetches the next window into
+    a local timer heap; jobs run concurrently under a limit and completions are
+    acknowledged in batches. A job that fails is left unacknowledged and is retried by
+    whichever instance reclaims it once the lease expires, up to MAX_ATTEMPTS times;
+    after that fail_exhausted_jobs marks it failed (migrations/034) and logs it.
+    """
+
+    MAX_ATTEMPTS = 5
+
+    def __init__(
+        self,
+        bot,
+        data_manager=None,
+        max_concurrency: int = 10,
+        prefetch_interval: int = 30,
+        prefetch_window: int = 60,
+        lease_seconds: int = 180,
+        claim_limit: int = 500
+    ):
         self.bot = bot
-        self._scheduled_jobs = {}  # job_id -> job_info
-        self._running = False
-
-    def schedule_unmute_job(self, guild_id: int, user_id: int, unmute_timestamp: datetime) -> str:
-        """Schedules an unmute job for a user"""
-        job_id = f"unmute_{guild_id}_{user_id}_{int(unmute_timestamp.timestamp())}"
-
-        job_info = {
-            'job_id': job_id,
-            'guild_id': guild_id,
-            'user_id': user_id,
-            'unmute_timestamp': unmute_timestamp,
-            'job_type': 'unmute',
-            'created_at': datetime.now()
+        self.data_manager = data_manager
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self.max_concurrency = max_concurrency
+        self.prefetch_interval = prefetch_interval
+        self.prefetch_window = prefetch_window
+        self.lease_seconds = lease_seconds
+        self.claim_limit = claim_limit
+
+        self._scheduled_jobs = {}  # job_id -> job claimed by this instance
+        self._heap = []  # (execute_ts, job_id)
+        self._pending_acks = []
+        self._next_prefetch = 0.0
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._task = None
+
+        self._handlers = {
+            'unmute': self._execute_database_unmute,
+            'unban': self._execute_database_unban,
+            'remove_role': self._execute_remove_role,
+            'expire_strike': self._execute_expire_strike
         }
 
-        self._scheduled_jobs[job_id] = job_info
+    # ---- scheduling ----
 
-        # Schedule the actual task
-        delay = (unmute_timestamp - datetime.now()).total_seconds()
-        if delay > 0:
-            asyncio.create_task(self._schedule_unmute_task(job_id, delay))
+    def schedule_job(self, guild_id: int, user_id: int, job_type: str, execute_at: datetime, job_data: Dict = None) -> Optional[str]:
+        """Persist a job to scheduled_jobs so it survives restarts"""
+        if not self.data_manager:
+            logger.error(f"Cannot schedule {job_type} job without a data manager")
+            return None
 
-        logger.info(f"Unmute job scheduled: {job_info}")
-        return job_id
+        if execute_at.tzinfo is None:
+            execute_at = execute_at.astimezone(timezone.utc)
 
-    async def _schedule_unmute_task(self, job_id: str, delay: float):
-        """Schedules the actual unmute task with delay"""
+        job_id = f"{job_type}_{guild_id}_{user_id}_{uuid.uuid4().hex[:8]}"
         try:
-            await asyncio.sleep(delay)
-
-            # Check if job still exists (might have been cancelled)
-            if job_id not in self._scheduled_jobs:
-                return
-
-            job_info = self._scheduled_jobs[job_id]
-            await self._execute_unmute_job(job_info)
-
-            # Remove completed job
-            del self._scheduled_jobs[job_id]
-
+            self.data_manager.admin_client.table('scheduled_jobs').insert({
+                'job_id': job_id,
+                'guild_id': str(guild_id),
+                'user_id': str(user_id),
+                'job_type': job_type,
+                'execute_at': execute_at.isoformat(),
+                'job_data': job_data or {},
+                'is_executed': False
+            }).execute()
         except Exception as e:
-            logger.error(f"Failed to execute unmute job {job_id}: {e}")
+            logger.error(f"Failed to schedule {job_type} job for user {user_id} in guild {guild_id}: {e}")
+            return None
 
-    async def _execute_unmute_job(self, job_info: Dict):
-        """Executes the unmute job"""
-        try:
-            guild_id = job_info['guild_id']
-            user_id = job_info['user_id']
-
-            guild = self.bot.get_guild(guild_id)
-            if not guild:
-                logger.warning(f"Guild {guild_id} not found for unmute job")
-                return
-
-            user = guild.get_member(user_id)
-            if not user:
-                logger.warning(f"User {user_id} not found in guild {guild_id} for unmute job")
-                return
-
-            # Check if user is still timed out
-            if user.is_timed_out():
-                # Remove timeout
-                await user.timeout(None, reason="Automatic unmute - timeout expired")
-                logger.info(f"Automatically unmuted user {user_id} in guild {guild_id}")
-            else:
-                logger.debug(f"User {user_id} in guild {guild_id} is no longer timed out")
+        self.notify_job_scheduled(execute_at)
+        logger.info(f"Scheduled {job_type} job {job_id} for {execute_at.isoformat()}")
+        return job_id
 
-        except Exception as e:
-            logger.error(f"Failed to execute unmute for user {job_info['user_id']}: {e}")
+    def schedule_unmute_job(self, guild_id: int, user_id: int, unmute_timestamp: datetime) -> Optional[str]:
+        """Schedules an unmute job for a user"""
+        return self.schedule_job(guild_id, user_id, 'unmute', unmute_timestamp)
+
+    def notify_job_scheduled(self, execute_at: datetime):
+        """Pull a newly inserted job into the local heap early if it falls before the next prefetch"""
+        if execute_at.timestamp() < self._next_prefetch + self.prefetch_window:
+            self._next_prefetch = 0.0
+            self._wakeup.set()
 
     def cancel_job(self, job_id: str) -> bool:
         """Cancels a scheduled job"""
-        if job_id in self._scheduled_jobs:
-            del self._scheduled_jobs[job_id]
+        self._scheduled_jobs.pop(job_id, None)  # heap entry is skipped lazily
+        if not self.data_manager:
+            return False
+        try:
+            self.data_manager.admin_client.table('scheduled_jobs').delete().eq('job_id', job_id).eq('is_executed', False).execute()
             logger.info(f"Job cancelled: {job_id}")
             return True
-        return False
+        except Exception as e:
+            logger.error(f"Failed to cancel job {job_id}: {e}")
+            return False
 
     def get_scheduled_jobs(self) -> List[Dict]:
-        """Returns list of all scheduled jobs"""
+        """Returns the jobs currently leased to this instance"""
         return list(self._scheduled_jobs.values())
 
     def get_job_info(self, job_id: str) -> Dict:
         """Returns information about a specific job"""
         return self._scheduled_jobs.get(job_id)
 
-    async def cleanup_expired_jobs(self):
-        """Removes jobs that have already executed"""
-        current_time = datetime.now()
-        expired_jobs = []
-
-        for job_id, job_info in self._scheduled_jobs.items():
-            if job_info['unmute_timestamp'] < current_time:
-                expired_jobs.append(job_id)
-
-        for job_id in expired_jobs:
-            del self._scheduled_jobs[job_id]
-            logger.debug(f"Cleaned up expired job: {job_id}")
-
-        if expired_jobs:
-            logger.info(f"Cleaned up {len(expired_jobs)} expired moderation jobs")
-
-    async def execute_scheduled_jobs(self):
-        """Execute all pending scheduled jobs"""
+    # ---- lease / prefetch / ack ----
 
+    @staticmethod
+    def _parse_execute_at(value) -> float:
+        if isinstance(value, datetime):
+            dt = value
+        else:
+            dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+
+    def _claim_jobs(self, horizon_seconds: int) -> int:
+        """Lease due jobs from the database into the local timer heap"""
+        return self._enqueue_claimed(self._fetch_claimed(horizon_seconds))
+
+    def _fetch_claimed(self, horizon_seconds: int) -> List[Dict]:
+        """The claim RPC alone, so the executor can run it in a worker thread"""
+        result = self.data_manager.admin_client.rpc(
+            'claim_scheduled_jobs',
+            {
+                'p_owner': self.instance_id,
+                'p_horizon_seconds': horizon_seconds,
+                'p_lease_seconds': self.lease_seconds,
+                'p_limit': self.claim_limit,
+                'p_max_attempts': self.MAX_ATTEMPTS
+            }
+        ).execute()
+        return result.data or []
+
+    def _enqueue_claimed(self, jobs: List[Dict]) -> int:
+        claimed = 0
+        for job in jobs:
+            try:
+                job['execute_ts'] = self._parse_execute_at(job['execute_at'])
+            except Exception:
+                job['execute_ts'] = time.time()
+            if job['job_id'] not in self._scheduled_jobs:
+                heapq.heappush(self._heap, (job['execute_ts'], job['job_id']))
+            self._scheduled_jobs[job['job_id']] = job
+            claimed += 1
+        return claimed
+
+    def _flush_acks(self):
+        """Acknowledge completed jobs in one call"""
+        self._send_acks(self._take_acks())
+
+    async def _flush_acks_async(self):
+        """_flush_acks with the RPC in a worker thread; the batch is taken on the loop"""
+        job_ids = self._take_acks()
+        if job_ids:
+            await asyncio.to_thread(self._send_acks, job_ids)
+
+    def _take_acks(self) -> List[str]:
+        job_ids, self._pending_acks = self._pending_acks, []
+        return job_ids
+
+    def _send_acks(self, job_ids: List[str]):
+        if not job_ids:
+            return
         try:
-            now = datetime.now()
-
-            # Get pending jobs with lock (simulated - in real implementation would use database)
-            pending_jobs = []
-            for job_id, job_info in self._scheduled_jobs.items():
-                if job_info['unmute_timestamp'] <= now:
-                    pending_jobs.append(job_info)
-
-            for job in pending_jobs:
-                try:
-                    # Execute job based on type
-                    if job['job_type'] == 'unmute':
-                        await self._execute_unmute(job)
-                    elif job['job_type'] == 'unban':
-                        await self._execute_unban(job)
-                    elif job['job_type'] == 'expire_strike':
-                        await self._execute_expire_strike(job)
-
-                    # Remove completed job
-                    del self._scheduled_jobs[job['job_id']]
-
-                    logger.info(f"Executed scheduled job: {job['job_id']} ({job['job_type']})")
-
-                except Exception as e:
-                    logger.exception(f"Failed to execute job {job['job_id']}: {e}")
-                    # Don't remove failed jobs so they can be retried
-
+            self.data_manager.admin_client.rpc(
+                'complete_scheduled_jobs',
+                {'p_owner': self.instance_id, 'p_job_ids': job_ids}
+            ).execute()
         except Exception as e:
-            logger.exception(f"Scheduled jobs execution error: {e}")
-
-    async def _execute_unmute(self, job):
-        """Execute unmute job"""
-        guild = self.bot.get_guild(job['guild_id'])
-        if not guild:
+            # Re-queue; if the lease lapses first the jobs rerun, and every handler is idempotent
+            logger.error(f"Failed to acknowledge {len(job_ids)} scheduled jobs: {e}")
+            self._pending_acks.extend(job_ids)
+
+    def fail_exhausted_jobs(self) -> List[Dict]:
+        """Mark jobs that ran out of attempts as failed and log each one"""
+        result = self.data_manager.admin_client.rpc(
+            'fail_exhausted_scheduled_jobs',
+            {'p_max_attempts': self.MAX_ATTEMPTS}
+        ).execute()
+
+        failed = result.data or []
+        for job in failed:
+            logger.error(
+                f"Scheduled job {job['job_id']} ({job['job_type']}) for user {job.get('user_id')} "
+                f"in guild {job.get('guild_id')} failed after {job.get('attempts')} attempts; giving up"
+            )
+        return failed
+
+    def _pop_due(self, now: float) -> List[Dict]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, job_id = heapq.heappop(self._heap)
+            job = self._scheduled_jobs.pop(job_id, None)
+            if job is not None:
+                due.append(job)
+        return due
+
+    def _next_due(self) -> Optional[float]:
+        while self._heap and self._heap[0][1] not in self._scheduled_jobs:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def _run_job(self, job: Dict):
+        handler = self._handlers.get(job['job_type'])
+        if not handler:
+            logger.warning(f"Unknown job type: {job['job_type']} for job {job['job_id']}")
             return
 
-        member = guild.get_member(job['user_id'])
-        if not member:
-            return
-
-        # Remove timeout
-        await member.timeout(None, reason="Scheduled unmute")
-
-        # Update moderation_actions (would need database integration)
-        logger.info(f"Executed unmute for user {job['user_id']} in guild {job['guild_id']}")
-
-    async def _execute_unban(self, job):
-        """Execute unban job"""
-        guild = self.bot.get_guild(job['guild_id'])
-        if not guild:
-            return
-
-        try:
-            user = await self.bot.fetch_user(job['user_id'])
-            await guild.unban(user, reason="Scheduled unban")
-            logger.info(f"Executed unban for user {job['user_id']} in guild {job['guild_id']}")
-        except discord.NotFound:
-            logger.warning(f"User {job['user_id']} not found for unban in guild {job['guild_id']}")
+        async with self._semaphore:
+            try:
+                await handler(job, self.bot)
+                self._pending_acks.append(job['job_id'])
+                logger.info(f"Executed database scheduled job: {job['job_id']} ({job['job_type']})")
+            except Exception as e:
+                # Left unacknowledged so it is retried after the lease expires
+                logger.exception(f"Failed to execute database job {job['job_id']}: {e}")
 
-    async def _execute_expire_strike(self, job):
-        """Execute strike expiration job"""
-        # Mark strike as expired (would need database integration)
-        logger.info(f"Executed strike expiration for strike {job.get('strike_id', 'unknown')}")
+    async def _run_due_jobs(self) -> int:
+        due = self._pop_due(time.time())
+        if due:
+            await asyncio.gather(*(self._run_job(job) for job in due))
+        return len(due)
 
     async def execute_database_jobs(self, data_manager, bot):
-        """Execute pending scheduled jobs from database"""
+        """Claim and execute every job that is due right now (one-shot)"""
+        self.data_manager = data_manager
+        self.bot = bot
         try:
-            now = datetime.now()
-
-            # Get pending jobs from database
-            pending_jobs_result = data_manager.supabase.table('scheduled_jobs').select('*').eq('is_executed', False).lte('execute_at', now.isoformat()).execute()
-
-            if not pending_jobs_result.data:
-                return  # No pending jobs
-
-            pending_jobs = pending_jobs_result.data
-
-            for job in pending_jobs:
-                try:
-                    job_id = job['job_id']
-
-                    # Execute job based on type
-                    if job['job_type'] == 'unmute':
-                        await self._execute_database_unmute(job, bot)
-                    elif job['job_type'] == 'unban':
-                        await self._execute_database_unban(job, bot)
-                    elif job['job_type'] == 'remove_role':
-                        await self._execute_remove_role(job, bot)
-                    else:
-                        logger.warning(f"Unknown job type: {job['job_type']} for job {job_id}")
-                        continue
+            self._enqueue_claimed(await asyncio.to_thread(self._fetch_claimed, 0))
+            await self._run_due_jobs()
+            await self._flush_acks_async()
+        except Exception as e:
+            logger.exception(f"Error executing database scheduled jobs: {e}")
 
-                    # Mark job as executed
-                    data_manager.supabase.table('scheduled_jobs').update({
-                        'is_executed': True,
-                        'executed_at': now.isoformat()
-                    }).eq('job_id', job_id).execute()
+    async def _executor_loop(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                if time.time() >= self._next_prefetch:
+                    # PostgREST round-trips run off the loop so the gateway never stalls on them
+                    self._enqueue_claimed(await asyncio.to_thread(self._fetch_claimed, self.prefetch_window))
+                    self._next_prefetch = time.time() + self.prefetch_interval
 
-                    logger.info(f"Executed database scheduled job: {job_id} ({job['job_type']})")
+                await self._run_due_jobs()
+                await self._flush_acks_async()
+            except Exception as e:
+                logger.exception(f"Error in scheduled jobs executor: {e}")
+                self._next_prefetch = time.time() + self.prefetch_interval
 
-                except Exception as e:
-                    logger.exception(f"Failed to execute database job {job['job_id']}: {e}")
-                    # Don't mark failed jobs as executed so they can be retried
+            wake_at = self._next_prefetch
+            next_due = self._next_due()
+            if next_due is not None:
+                wake_at = min(wake_at, next_due)
 
-        except Exception as e:
-            logger.exception(f"Error executing database scheduled jobs: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, wake_at - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    def start_database_executor(self, data_manager):
+        """Start the executor if it is not already running (safe to call repeatedly)"""
+        self.data_manager = data_manager
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._executor_loop())
+            logger.info(f"Scheduled jobs executor started as {self.instance_id}")
+
+    def stop_database_executor(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self.data_manager:
+            self._flush_acks()
+
+    # ---- job handlers ----
 
     async def _execute_database_unmute(self, job, bot):
         """Execute database-based unmute job"""
-        guild = bot.get_guild(job['guild_id'])
+        guild = bot.get_guild(int(job['guild_id']))
         if not guild:
             return
 
-        member = guild.get_member(job['user_id'])
+        member = guild.get_member(int(job['user_id']))
         if not member:
             return
 
-        # Remove timeout
-        await member.timeout(None, reason="Scheduled unmute")
-
-        logger.info(f"Executed database unmute for user {job['user_id']} in guild {job['guild_id']}")
+        # Check if user is still timed out
+        if member.is_timed_out():
+            await member.timeout(None, reason="Scheduled unmute")
+            logger.info(f"Executed database unmute for user {job['user_id']} in guild {job['guild_id']}")
+        else:
+            logger.debug(f"User {job['user_id']} in guild {job['guild_id']} is no longer timed out")
 
     async def _execute_database_unban(self, job, bot):
         """Execute database-based unban job"""
-        guild = bot.get_guild(job['guild_id'])
+        guild = bot.get_guild(int(job['guild_id']))
         if not guild:
             return
 
         try:
-            user = await bot.fetch_user(job['user_id'])
+            user = await bot.fetch_user(int(job['user_id']))
             await guild.unban(user, reason="Scheduled unban")
             logger.info(f"Executed database unban for user {job['user_id']} in guild {job['guild_id']}")
         except discord.NotFound:
             logger.warning(f"User {job['user_id']} not found for unban in guild {job['guild_id']}")
 
+    async def _execute_expire_strike(self, job, bot):
+        """Execute strike expiration job"""
+        strike_id = (job.get('job_data') or {}).get('strike_id')
+        if strike_id and self.data_manager:
+            self.data_manager.admin_client.table('strikes').update({
+                'is_active': False
+            }).eq('strike_id', strike_id).execute()
+        logger.info(f"Executed strike expiration for strike {strike_id or 'unknown'}")
+
     async def _execute_remove_role(self, job, bot):
         """Execute role removal job for redeemed items"""
-        guild = bot.get_guild(job['guild_id'])
+        guild = bot.get_guild(int(job['guild_id']))
         if not guild:
             return
 
-        member = guild.get_member(job['user_id'])
+        member = guild.get_member(int(job['user_id']))
         if not member:
             logger.warning(f"Member {job['user_id']} not found in guild {job['guild_id']} for role removal")
             return
 
-        role_id = job['job_data'].get('role_id')
+        job_data = job.get('job_data') or {}
+        role_id = job_data.get('role_id')
         if not role_id:
             logger.warning(f"No role_id in job data for job {job['job_id']}")
             return
@@ -277,11 +357,9 @@ class ModerationScheduler:
         # Check if member still has the role
         if role in member.roles:
             try:
-                await member.remove_roles(role, reason=f"Item redemption expired: {job['job_data'].get('item_name', 'Unknown item')}")
+                await member.remove_roles(role, reason=f"Item redemption expired: {job_data.get('item_name', 'Unknown item')}")
                 logger.info(f"Removed expired role {role.name} from user {job['user_id']} in guild {job['guild_id']}")
             except discord.Forbidden:
                 logger.warning(f"Cannot remove role {role.name} from user {job['user_id']} - insufficient permissions")
-            except Exception as e:
-                logger.error(f"Failed to remove role {role.name} from user {job['user_id']}: {e}")
         else:
             logger.debug(f"User {job['user_id']} no longer has role {role.name} - already removed")
@@ -17,7 +17,7 @@ def is_admin(ctx) -> bool:
 
     # Check custom admin roles from config
     try:
-        config = data_manager.load_guild_data(ctx.guild.id, "config")
+        config = data_manager.get_config_snapshot(ctx.guild.id)
         admin_roles = config.get("admin_roles", [])
 
         user_roles = [role.id for role in ctx.author.roles]
@@ -36,7 +36,7 @@ def is_admin_interaction(interaction) -> bool:
 
     # Check custom admin roles from config
     try:
-        config = data_manager.load_guild_data(interaction.guild.id, "config")
+        config = data_manager.get_config_snapshot(interaction.guild.id)
         admin_roles = config.get("admin_roles", [])
 
         user_roles = [role.id for role in interaction.user.roles]
@@ -64,7 +64,7 @@ def is_moderator(ctx) -> bool:
 
     # Check custom moderator roles from config
     try:
-        config = data_manager.load_guild_data(ctx.guild.id, "config")
+        config = data_manager.get_config_snapshot(ctx.guild.id)
         moderator_roles = config.get("moderator_roles", [])
 
         user_roles = [role.id for role in ctx.author.roles]
@@ -92,7 +92,7 @@ def is_moderator_interaction(interaction) -> bool:
 
     # Check custom moderator roles from config
     try:
-        config = data_manager.load_guild_data(interaction.guild.id, "config")
+        config = data_manager.get_config_snapshot(interaction.guild.id)
         moderator_roles = config.get("moderator_roles", [])
 
         user_roles = [role.id for role in interaction.user.roles]
@@ -106,9 +106,7 @@ def has_feature_enabled(ctx, feature: str) -> bool:
         return True  # Enable all features in DMs
 
     try:
-        config = data_manager.load_guild_data(ctx.guild.id, "config")
-        features = config.get("features", {})
-        return features.get(feature, True)  # Default to enabled
+        return data_manager.get_config_snapshot(ctx.guild.id).feature_enabled(feature)
     except Exception:
         return True  # Default to enabled if error
 
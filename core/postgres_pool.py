@@ -0,0 +1,215 @@
+"""
+Pooled PostgreSQL backend for atomic transactions
+Runs the fetchrow/fetch/execute interface used by AtomicTransactionContext
+inside real server-side transactions with per-connection prepared statements
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+from psycopg2.extras import RealDictCursor
+
+logger = logging.getLogger(__name__)
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which statements it has prepared"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: 'OrderedDict[str, str]' = OrderedDict()  # sql -> statement name
+        self.statement_counter = 0
+
+
+class PostgresPool:
+    """
+    Thread-safe connection pool for the bot's own Postgres database.
+
+    Queries use asyncpg-style ``$1`` placeholders. Each distinct query is
+    PREPAREd once per connection and then run with EXECUTE, so repeated
+    transactions skip parsing and planning.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        min_connections: int = 1,
+        max_connections: int = 10,
+        max_prepared: int = 100,
+        connection_factory=PreparedConnection
+    ):
+        self.dsn = dsn
+        self.max_connections = max_connections
+        self.max_prepared = max_prepared
+        self._pool = psycopg2.pool.ThreadedConnectionPool(
+            min_connections,
+            max_connections,
+            dsn,
+            connection_factory=connection_factory
+        )
+        # ThreadedConnectionPool raises when exhausted instead of waiting, so bound checkouts
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_env(cls) -> Optional['PostgresPool']:
+        """
+        Build a pool from DATABASE_URL, or return None when it is unset or points at a
+        database without the bot schema (DATABASE_URL may be the ad network database).
+        """
+        dsn = os.getenv('DATABASE_URL')
+        if not dsn:
+            return None
+
+        try:
+            pool = cls(
+                dsn,
+                min_connections=int(os.getenv('DATABASE_POOL_MIN', '1')),
+                max_connections=int(os.getenv('DATABASE_POOL_MAX', '10'))
+            )
+        except Exception as e:
+            logger.error(f"Failed to create PostgreSQL pool: {e}")
+            return None
+
+        if not pool.has_table('task_settings'):
+            logger.warning("DATABASE_URL has no bot schema - using Supabase for atomic transactions")
+            pool.close()
+            return None
+
+        logger.info(f"✅ PostgreSQL pool ready (max {pool.max_connections} connections)")
+        return pool
+
+    def has_table(self, table_name: str) -> bool:
+        conn = self._pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table_name,))
+                exists = cur.fetchone()[0]
+            conn.rollback()
+            return exists
+        except Exception as e:
+            logger.error(f"Failed to inspect PostgreSQL schema: {e}")
+            conn.rollback()
+            return False
+        finally:
+            self._pool.putconn(conn)
+
+    async def acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+        await self._slots.acquire()
+        try:
+            return await asyncio.to_thread(self._pool.getconn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    async def release(self, conn, discard: bool = False):
+        try:
+            await asyncio.to_thread(self._pool.putconn, conn, None, discard)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        self._pool.closeall()
+
+    def transaction(self, guild_id: int = None) -> 'PostgresTransactionContext':
+        return PostgresTransactionContext(self, guild_id)
+
+    def _statement_name(self, conn, cursor, query: str) -> str:
+        """Return the prepared statement for ``query`` on this connection, preparing it if needed"""
+        name = conn.prepared.get(query)
+        if name is not None:
+            conn.prepared.move_to_end(query)
+            return name
+
+        if len(conn.prepared) >= self.max_prepared:
+            _, oldest = conn.prepared.popitem(last=False)
+            cursor.execute(f"DEALLOCATE {oldest}")
+
+        conn.statement_counter += 1
+        name = f"evl_stmt_{conn.statement_counter}"
+        cursor.execute(f"PREPARE {name} AS {query}")
+        conn.prepared[query] = name
+        return name
+
+    def run(self, conn, query: str, args: tuple, fetch: str) -> Any:
+        """Run one prepared query on ``conn``; ``fetch`` is 'one', 'all' or 'none'"""
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            name = self._statement_name(conn, cursor, query)
+            try:
+                if args:
+                    placeholders = ', '.join(['%s'] * len(args))
+                    cursor.execute(f"EXECUTE {name} ({placeholders})", args)
+                else:
+                    cursor.execute(f"EXECUTE {name}")
+            except psycopg2.errors.InvalidSqlStatementName:
+                # Server dropped our statements (e.g. DISCARD ALL from a proxy); re-prepare next time
+                conn.prepared.clear()
+                raise
+
+            if fetch == 'one':
+                row = cursor.fetchone()
+                return dict(row) if row is not None else None
+            if fetch == 'all':
+                return [dict(row) for row in cursor.fetchall()]
+            return cursor.statusmessage
+
+
+class PostgresTransactionContext:
+    """
+    Context manager for a real server-side transaction.
+    Same interface as AtomicTransactionContext: commits on success, rolls back on error.
+    """
+
+    def __init__(self, pool: PostgresPool, guild_id: int = None):
+        self.pool = pool
+        self.guild_id = guild_id
+        self.connection = None
+        self.in_transaction = False
+
+    async def __aenter__(self):
+        self.connection = await self.pool.acquire()
+        self.in_transaction = True
+        logger.debug(f"Entered PostgreSQL transaction for guild {self.guild_id}")
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        conn, self.connection = self.connection, None
+        self.in_transaction = False
+        discard = False
+        try:
+            if exc_type is not None:
+                await asyncio.to_thread(conn.rollback)
+                logger.warning(f"Transaction rolled back due to exception: {exc_val}")
+            else:
+                await asyncio.to_thread(conn.commit)
+                logger.debug(f"Transaction committed successfully for guild {self.guild_id}")
+        except Exception as e:
+            logger.error(f"Error finishing transaction: {e}")
+            discard = True
+            raise
+        finally:
+            await self.pool.release(conn, discard=discard or bool(conn.closed))
+
+    async def _run(self, query: str, args: tuple, fetch: str):
+        if not self.in_transaction:
+            raise RuntimeError("Not in transaction context")
+        return await asyncio.to_thread(self.pool.run, self.connection, query, args, fetch)
+
+    async def fetchrow(self, query: str, *args) -> Optional[Dict]:
+        """Fetch a single row as a dict, or None"""
+        return await self._run(query, args, 'one')
+
+    async def fetch(self, query: str, *args) -> List[Dict]:
+        """Fetch all rows as dicts"""
+        return await self._run(query, args, 'all')
+
+    async def execute(self, query: str, *args) -> str:
+        """Execute a statement and return its status tag (e.g. 'UPDATE 1')"""
+        return await self._run(query, args, 'none')
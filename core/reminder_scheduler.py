@@ -0,0 +1,219 @@
+"""
+Durable reminder scheduler
+Min-heap of due times backed by an append-only journal with periodic compaction
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderScheduler:
+    """
+    Holds pending reminders in a min-heap keyed on due time and sleeps exactly
+    until the next one is due.
+
+    Persistence is a snapshot file plus an append-only journal:
+    adding or firing a reminder appends one JSON line instead of rewriting
+    every reminder, and the journal is folded back into the snapshot once it
+    grows past ``compact_threshold`` entries.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        deliver: Callable[[Dict], Awaitable[None]],
+        journal_path: Optional[str] = None,
+        max_concurrency: int = 10,
+        batch_size: int = 50,
+        compact_threshold: int = 500
+    ):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or f"{os.path.splitext(snapshot_path)[0]}.journal"
+        self.deliver = deliver
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.compact_threshold = compact_threshold
+
+        self._heap: List[tuple] = []  # (time, id)
+        self._reminders: Dict[str, Dict] = {}  # id -> reminder
+        self._journal_entries = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    # ---- persistence ----
+
+    def load(self):
+        """Rebuild state from the snapshot and replay the journal on top of it"""
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        reminders: Dict[str, Dict] = {}
+
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r') as f:
+                    for reminder in json.load(f):
+                        # Snapshots written before ids existed are plain lists of reminders
+                        reminder.setdefault('id', uuid.uuid4().hex)
+                        reminders[reminder['id']] = reminder
+            except Exception as e:
+                logger.error(f"Error loading reminder snapshot: {e}")
+
+        journal_entries = 0
+        if os.path.exists(self.journal_path):
+            try:
+                with open(self.journal_path, 'r') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            # A torn final line from a crash mid-append; everything before it is intact
+                            logger.warning("Skipping malformed reminder journal entry")
+                            continue
+                        journal_entries += 1
+                        if entry.get('op') == 'add':
+                            reminders[entry['reminder']['id']] = entry['reminder']
+                        elif entry.get('op') == 'done':
+                            reminders.pop(entry['id'], None)
+            except Exception as e:
+                logger.error(f"Error replaying reminder journal: {e}")
+
+        self._reminders = reminders
+        self._heap = [(r['time'], r['id']) for r in reminders.values()]
+        heapq.heapify(self._heap)
+        self._journal_entries = journal_entries
+
+        # Fold a long journal (or a legacy snapshot without ids) into a fresh snapshot
+        if journal_entries >= self.compact_threshold or not os.path.exists(self.journal_path):
+            self.compact()
+
+        logger.info(f"Loaded {len(self._reminders)} pending reminders")
+
+    def _append_journal(self, entries: List[Dict]):
+        if not entries:
+            return
+        try:
+            with open(self.journal_path, 'a') as f:
+                f.write(''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries))
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_entries += len(entries)
+        except Exception as e:
+            logger.error(f"Error appending to reminder journal: {e}")
+
+        if self._journal_entries >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """Write all pending reminders to the snapshot and truncate the journal"""
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(list(self._reminders.values()), f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            # Snapshot is durable; only now is it safe to drop the journal
+            open(self.journal_path, 'w').close()
+            self._journal_entries = 0
+        except Exception as e:
+            logger.error(f"Error compacting reminders: {e}")
+
+    # ---- scheduling ----
+
+    def add(self, user_id: int, message: str, due_time: float) -> Dict:
+        """Schedule a reminder and wake the runner if it is now the earliest one"""
+        reminder = {
+            'id': uuid.uuid4().hex,
+            'user_id': user_id,
+            'message': message,
+            'time': due_time
+        }
+        self._reminders[reminder['id']] = reminder
+        heapq.heappush(self._heap, (due_time, reminder['id']))
+        self._append_journal([{'op': 'add', 'reminder': reminder}])
+
+        if self._heap[0][1] == reminder['id']:
+            self._wakeup.set()
+        return reminder
+
+    def cancel(self, reminder_id: str) -> bool:
+        """Cancel a pending reminder; its heap entry is skipped lazily when popped"""
+        if self._reminders.pop(reminder_id, None) is None:
+            return False
+        self._append_journal([{'op': 'done', 'id': reminder_id}])
+        return True
+
+    def pending_count(self) -> int:
+        return len(self._reminders)
+
+    def next_due(self) -> Optional[float]:
+        """Due time of the earliest live reminder, discarding cancelled heap entries"""
+        while self._heap and self._heap[0][1] not in self._reminders:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Remove and return reminders due at or before ``now`` (earliest first)"""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(due) >= limit:
+                break
+            _, reminder_id = heapq.heappop(self._heap)
+            reminder = self._reminders.pop(reminder_id, None)
+            if reminder is not None:
+                due.append(reminder)
+        return due
+
+    async def _deliver_one(self, reminder: Dict):
+        async with self._semaphore:
+            try:
+                await self.deliver(reminder)
+            except Exception as e:
+                logger.error(f"Error sending reminder to {reminder.get('user_id')}: {e}")
+
+    async def run_due(self, now: Optional[float] = None) -> int:
+        """Deliver every reminder that is due, in batches, and journal them as done"""
+        delivered = 0
+        while True:
+            batch = self.pop_due(now, limit=self.batch_size)
+            if not batch:
+                return delivered
+            await asyncio.gather(*(self._deliver_one(r) for r in batch))
+            self._append_journal([{'op': 'done', 'id': r['id']} for r in batch])
+            delivered += len(batch)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            await self.run_due()
+
+            next_due = self.next_due()
+            timeout = None if next_due is None else max(0.0, next_due - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
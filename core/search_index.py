@@ -0,0 +1,361 @@
+"""
+In-memory autocomplete index
+Per-guild name indexes for shop items, tasks and embeds with prefix and
+trigram (fuzzy) matching, so autocomplete handlers never touch the database
+"""
+
+import heapq
+import logging
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('shop', 'tasks', 'embeds')
+
+# Share of the query's trigrams a name must contain to count as a fuzzy match
+MIN_TRIGRAM_SCORE = 0.5
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+
+
+def normalize(text: str) -> str:
+    """Casefold and drop punctuation/emoji so '🎁 Gift-Card' matches 'gift card'"""
+    return ' '.join(_NON_WORD.sub(' ', (text or '').casefold()).split())
+
+
+def trigrams(norm: str) -> set:
+    """pg_trgm-style trigrams: each word padded with two leading and one trailing space"""
+    grams = set()
+    for word in norm.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NameIndex:
+    """
+    Index over one guild's names of one kind.
+
+    Keeps a sorted list of (token, id) pairs, where tokens are the full
+    normalized name and each of its words, for prefix lookups by bisection,
+    plus trigram posting sets for fuzzy matches. Updates touch only the
+    changed entry.
+    """
+
+    __slots__ = ('entries', '_tokens', '_postings')
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[str, str, Dict]] = {}
+        self._tokens: List[Tuple[str, str]] = []
+        self._postings: Dict[str, set] = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _token_keys(norm: str, entry_id: str) -> List[Tuple[str, str]]:
+        words = norm.split()
+        return sorted({(norm, entry_id), *((w, entry_id) for w in words)})
+
+    def upsert(self, entry_id, name: str, payload: Optional[Dict] = None):
+        entry_id = str(entry_id)
+        norm = normalize(name)
+        current = self.entries.get(entry_id)
+        if current is not None:
+            if current[1] == norm:
+                # Name unchanged: only the payload (price, stock, status) moves
+                self.entries[entry_id] = (name, norm, payload or {})
+                return
+            self.remove(entry_id)
+
+        self.entries[entry_id] = (name, norm, payload or {})
+        for key in self._token_keys(norm, entry_id):
+            self._tokens.insert(bisect_left(self._tokens, key), key)
+        for gram in trigrams(norm):
+            self._postings.setdefault(gram, set()).add(entry_id)
+
+    def remove(self, entry_id):
+        entry_id = str(entry_id)
+        current = self.entries.pop(entry_id, None)
+        if current is None:
+            return
+        norm = current[1]
+        for key in self._token_keys(norm, entry_id):
+            i = bisect_left(self._tokens, key)
+            if i < len(self._tokens) and self._tokens[i] == key:
+                del self._tokens[i]
+        for gram in trigrams(norm):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(entry_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def sync(self, items: Dict[str, Tuple[str, Dict]]) -> int:
+        """Bring the index in line with {id: (name, payload)}; returns entries changed"""
+        changed = 0
+        for entry_id in [e for e in self.entries if e not in items]:
+            self.remove(entry_id)
+            changed += 1
+        for entry_id, (name, payload) in items.items():
+            current = self.entries.get(str(entry_id))
+            if current is None or current[0] != name or current[2] != payload:
+                self.upsert(entry_id, name, payload)
+                changed += 1
+        return changed
+
+    def search(self, query: str, limit: int = 25,
+               predicate: Optional[Callable[[Dict], bool]] = None) -> List[Tuple[str, str, Dict]]:
+        """(id, name, payload) matches: name prefixes first, then word prefixes, then fuzzy"""
+        norm = normalize(query)
+        results: List[Tuple[str, str, Dict]] = []
+        seen = set()
+
+        def take(entry_id) -> bool:
+            if entry_id in seen:
+                return False
+            seen.add(entry_id)
+            name, _, payload = self.entries[entry_id]
+            if predicate is None or predicate(payload):
+                results.append((entry_id, name, payload))
+            return len(results) >= limit
+
+        tokens = self._tokens
+        start = bisect_left(tokens, (norm, ''))
+        word_hits = []
+        for i in range(start, len(tokens)):
+            token, entry_id = tokens[i]
+            if not token.startswith(norm):
+                break
+            if token == self.entries[entry_id][1]:
+                if take(entry_id):
+                    return results
+            else:
+                word_hits.append(entry_id)
+        for entry_id in word_hits:
+            if take(entry_id):
+                return results
+
+        query_grams = trigrams(norm)
+        if not query_grams:
+            return results
+
+        counts = Counter()
+        for gram in query_grams:
+            counts.update(self._postings.get(gram, ()))
+        threshold = MIN_TRIGRAM_SCORE * len(query_grams)
+        candidates = [(-n, self.entries[e][1], e) for e, n in counts.items() if n >= threshold and e not in seen]
+        # Without a filter only the best few can be returned, so skip the full sort
+        if predicate is None:
+            candidates = heapq.nsmallest(limit - len(results), candidates)
+        else:
+            candidates.sort()
+        for _, _, entry_id in candidates:
+            if take(entry_id):
+                break
+        return results
+
+
+def _shop_entry(item: Dict) -> Tuple[str, Dict]:
+    return item.get('name') or '', {
+        'price': item.get('price', 0),
+        'stock': item.get('stock', -1),
+        'emoji': item.get('emoji') or '🛍️',
+        'is_active': item.get('is_active', True),
+    }
+
+
+def _task_entry(task: Dict) -> Tuple[str, Dict]:
+    return task.get('name') or '', {'status': task.get('status', 'active'), 'reward': task.get('reward', 0)}
+
+
+def _embed_entry(embed: Dict) -> Tuple[str, Dict]:
+    return embed.get('title') or embed.get('embed_id') or embed.get('id') or '', {}
+
+
+_ENTRY_BUILDERS = {'shop': _shop_entry, 'tasks': _task_entry, 'embeds': _embed_entry}
+
+# kind -> (table, id column, columns needed to build entries)
+_TABLES = {
+    'shop': ('shop_items', 'item_id', 'guild_id,item_id,name,price,stock,emoji,is_active'),
+    'tasks': ('tasks', 'task_id', 'guild_id,task_id,name,status,reward'),
+    'embeds': ('embeds', 'embed_id', 'guild_id,embed_id,title'),
+}
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+class SearchIndex:
+    """
+    Registry of NameIndex objects keyed by (guild_id, kind).
+
+    Filled by ``hydrate`` and kept current by the managers' write paths
+    (``upsert``/``remove``) and by DataManager loads/saves (``sync``). Rows
+    written by another process (the dashboard) are picked up by
+    ``sync_changes``, which follows each table's updated_at; deletions made
+    elsewhere are dropped by the next full ``hydrate``. A guild that has not
+    been loaded simply returns no suggestions.
+    """
+
+    # Re-read rows this far behind the newest change seen, so a write whose
+    # transaction started earlier but committed after the last sync is not missed
+    SYNC_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, page_size: int = 1000):
+        self.page_size = page_size
+        self._indexes: Dict[Tuple[str, str], NameIndex] = {}
+        self._lock = threading.Lock()
+        self._synced_through: Dict[str, datetime] = {}
+
+    def _index(self, guild_id, kind: str) -> NameIndex:
+        key = (str(guild_id), kind)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = NameIndex()
+        return index
+
+    def is_loaded(self, guild_id, kind: str) -> bool:
+        return (str(guild_id), kind) in self._indexes
+
+    def upsert(self, guild_id, kind: str, entry_id, record: Dict):
+        name, payload = _ENTRY_BUILDERS[kind](record)
+        with self._lock:
+            self._index(guild_id, kind).upsert(entry_id, name, payload)
+
+    def update_payload(self, guild_id, kind: str, entry_id, **changes):
+        """Patch payload fields (e.g. stock after a purchase) of an indexed entry"""
+        with self._lock:
+            index = self._indexes.get((str(guild_id), kind))
+            current = index.entries.get(str(entry_id)) if index is not None else None
+            if current is not None:
+                index.entries[str(entry_id)] = (current[0], current[1], {**current[2], **changes})
+
+    def remove(self, guild_id, kind: str, entry_id):
+        with self._lock:
+            index = self._indexes.get((str(guild_id), kind))
+            if index is not None:
+                index.remove(entry_id)
+
+    def sync(self, guild_id, kind: str, records: Dict[Any, Dict]) -> int:
+        """Diff a guild's full {id: record} mapping into its index"""
+        build = _ENTRY_BUILDERS[kind]
+        items = {str(entry_id): build(record) for entry_id, record in records.items()}
+        with self._lock:
+            return self._index(guild_id, kind).sync(items)
+
+    def drop_guild(self, guild_id):
+        with self._lock:
+            for kind in KINDS:
+                self._indexes.pop((str(guild_id), kind), None)
+
+    def search(self, guild_id, kind: str, query: str, limit: int = 25,
+               predicate: Optional[Callable[[Dict], bool]] = None) -> List[Tuple[str, str, Dict]]:
+        with self._lock:
+            index = self._indexes.get((str(guild_id), kind))
+            if index is None:
+                return []
+            return index.search(query, limit, predicate)
+
+    def hydrate(self, client, kinds: Iterable[str] = KINDS) -> Dict[str, int]:
+        """Load every guild's names in bulk (paged past the PostgREST row cap)"""
+        loaded = {}
+        for kind in kinds:
+            table, id_column, columns = _TABLES[kind]
+            columns += ',updated_at'
+            grouped: Dict[str, Dict[str, Dict]] = {}
+            newest = None
+            offset = 0
+            try:
+                while True:
+                    result = client.table(table).select(columns).order('guild_id').order(id_column).range(
+                        offset, offset + self.page_size - 1
+                    ).execute()
+                    rows = result.data or []
+                    for row in rows:
+                        grouped.setdefault(str(row['guild_id']), {})[str(row[id_column])] = row
+                        changed_at = _parse_timestamp(row.get('updated_at'))
+                        if changed_at and (newest is None or changed_at > newest):
+                            newest = changed_at
+                    if len(rows) < self.page_size:
+                        break
+                    offset += self.page_size
+            except Exception as e:
+                logger.error(f"Failed to hydrate {kind} search index: {e}")
+                continue
+
+            with self._lock:
+                emptied = [g for (g, k) in self._indexes if k == kind and g not in grouped]
+            for guild_id in emptied:
+                # Every row of this kind was deleted elsewhere
+                self.sync(guild_id, kind, {})
+            for guild_id, records in grouped.items():
+                self.sync(guild_id, kind, records)
+            if newest is not None:
+                self._synced_through[kind] = newest
+            loaded[kind] = sum(len(r) for r in grouped.values())
+
+        logger.info(f"✅ Hydrated autocomplete index: {loaded}")
+        return loaded
+
+    def sync_changes(self, client, kinds: Iterable[str] = KINDS) -> Dict[str, int]:
+        """
+        Upsert rows created or edited since the last hydrate or sync.
+
+        One indexed range read per table on updated_at, cheap enough to run
+        every few seconds. Falls back to a full hydrate of a kind that was
+        never hydrated or whose change set fills a page. Returns rows applied.
+        """
+        applied = {}
+        for kind in kinds:
+            since = self._synced_through.get(kind)
+            if since is None:
+                applied[kind] = self.hydrate(client, [kind]).get(kind, 0)
+                continue
+
+            table, id_column, columns = _TABLES[kind]
+            try:
+                result = client.table(table).select(f"{columns},updated_at").gte(
+                    'updated_at', (since - self.SYNC_OVERLAP).isoformat()
+                ).order('updated_at').limit(self.page_size).execute()
+            except Exception as e:
+                logger.error(f"Failed to sync {kind} search index changes: {e}")
+                continue
+
+            rows = result.data or []
+            if len(rows) >= self.page_size:
+                # A bulk update; paging by timestamp could stall on equal values
+                applied[kind] = self.hydrate(client, [kind]).get(kind, 0)
+                continue
+
+            newest = since
+            for row in rows:
+                self.upsert(row['guild_id'], kind, row[id_column], row)
+                changed_at = _parse_timestamp(row.get('updated_at'))
+                if changed_at and changed_at > newest:
+                    newest = changed_at
+            self._synced_through[kind] = newest
+            applied[kind] = len(rows)
+        return applied
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'indexes': len(self._indexes),
+                'entries': {kind: sum(len(i) for (g, k), i in self._indexes.items() if k == kind) for kind in KINDS}
+            }
+
+
+# Global instance
+search_index = SearchIndex()
@@ -2,10 +2,14 @@ import threading
 import time
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Literal
+from typing import Dict, Iterator, List, Optional, Literal
 from collections import defaultdict
 import discord
 
+from core.export_stream import keyset_rows, csv_chunks, json_chunks, group_pairs
+from core.search_index import search_index
+from core.utils import rollup_period_start
+
 logger = logging.getLogger(__name__)
 
 class ShopManager:
@@ -448,6 +452,9 @@ class ShopManager:
                 'quantity': quantity
             })
 
+            # Keep autocomplete's out-of-stock filter current without a reload
+            search_index.update_payload(guild_id, 'shop', item_id, stock=row.get('new_stock', -1))
+
             # Try to sync Discord message (non-blocking)
             if self.data_manager.bot_instance:
                 try:
@@ -871,8 +878,8 @@ class ShopManager:
             return {'success': False, 'error': f'Failed to assign role: {str(e)}'}
 
         # Schedule role removal using scheduled_jobs table
-        from datetime import timedelta
-        execute_at = datetime.now() + timedelta(minutes=duration_minutes)
+        from datetime import timedelta, timezone
+        execute_at = datetime.now(timezone.utc) + timedelta(minutes=duration_minutes)
 
         job_data = {
             'user_id': user_id,
@@ -890,7 +897,7 @@ class ShopManager:
                 'guild_id': guild_id,
                 'user_id': user_id,
                 'job_type': 'remove_role',
-                'execute_at': execute_at,
+                'execute_at': execute_at.isoformat(),
                 'job_data': job_data,
                 'is_executed': False
             }
@@ -898,12 +905,17 @@ class ShopManager:
             # Insert into scheduled_jobs table
             self.data_manager.supabase.table('scheduled_jobs').insert(scheduled_job).execute()
 
+            # Let the executor pick up short durations before its next prefetch
+            moderation_cog = interaction.client.get_cog('Moderation')
+            if moderation_cog and hasattr(moderation_cog, 'scheduler'):
+                moderation_cog.scheduler.notify_job_scheduled(execute_at)
+
         except Exception as e:
             logger.warning(f"Failed to schedule role removal job: {e}")
             # Don't fail the redemption if job scheduling fails, just log it
 
         # Send log message
-        config = self.data_manager.load_guild_data(guild_id, 'config')
+        config = self.data_manager.get_config_snapshot(guild_id)
         log_channel_id = config.get('log_channel_id')
         if log_channel_id:
             log_channel = interaction.guild.get_channel(int(log_channel_id))
@@ -939,7 +951,7 @@ class ShopManager:
         username = member.display_name if member else f"User {user_id}"
 
         # Get log channel from config
-        config = self.data_manager.load_guild_data(guild_id, 'config')
+        config = self.data_manager.get_config_snapshot(guild_id)
         log_channel_id = config.get('log_channel_id')
 
         if not log_channel_id:
@@ -983,7 +995,7 @@ class ShopManager:
         }
 
     def get_shop_statistics(self, guild_id: int, period: str = 'all') -> dict:
-        """Get comprehensive shop statistics"""
+        """Get shop statistics from the sales rollups (see migrations/031) in a single RPC"""
         cache_key = f"{guild_id}_{period}"
 
         # Check cache
@@ -992,65 +1004,47 @@ class ShopManager:
             if time.time() - cached['timestamp'] < self.STATS_CACHE_TTL:
                 return cached['stats'].copy()
 
-        # Calculate statistics
-        transactions = self.transaction_manager.get_transactions(guild_id, transaction_type='shop')['transactions']
-
-        # Filter by period
-        now = datetime.now()
-        if period == 'day':
-            cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif period == 'week':
-            cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=now.weekday())
-        elif period == 'month':
-            cutoff = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        else:
-            cutoff = None
-
-        if cutoff:
-            transactions = [t for t in transactions if datetime.fromisoformat(t['timestamp'].replace('Z', '+00:00')) >= cutoff]
+        start_date = rollup_period_start(period)
+        try:
+            result = self.data_manager.admin_client.rpc(
+                'get_shop_statistics',
+                {
+                    'p_guild_id': str(guild_id),
+                    'p_since': start_date.isoformat() if start_date else None,
+                    'p_top_items': 10
+                }
+            ).execute()
+            rollup = result.data or {}
+        except Exception as e:
+            logger.error(f"Failed to load shop statistics for guild {guild_id}: {e}")
+            return {
+                'total_sales': 0, 'total_revenue': 0, 'unique_buyers': 0,
+                'popular_items': {}, 'category_breakdown': {}, 'stock_value': 0
+            }
 
-        # Calculate stats
         stats = {
-            'total_sales': len(transactions),
-            'total_revenue': sum(abs(t['amount']) for t in transactions),
-            'unique_buyers': len(set(t['user_id'] for t in transactions)),
-            'popular_items': {},
-            'category_breakdown': {},
-            'stock_value': 0
-        }
-
-        # Item popularity and category breakdown
-        currency_data = self.data_manager.load_guild_data(guild_id, 'currency')
-        shop_items = currency_data.get('shop_items', {})
-
-        for item_id, item in shop_items.items():
-            sales_count = item.get('metadata', {}).get('sales_count', 0)
-            if sales_count > 0:
-                revenue = sales_count * item['price']
-                stats['popular_items'][item_id] = {
+            'total_sales': int(rollup.get('total_sales') or 0),
+            'total_quantity': int(rollup.get('total_quantity') or 0),
+            'total_revenue': rollup.get('total_revenue') or 0,
+            'unique_buyers': int(rollup.get('unique_buyers') or 0),
+            # Already ordered by sales, top 10
+            'popular_items': {
+                item['item_id']: {
                     'name': item['name'],
                     'emoji': self._get_item_emoji(item),
-                    'sales': sales_count,
-                    'revenue': revenue
+                    'sales': int(item.get('sales') or 0),
+                    'quantity': int(item.get('quantity') or 0),
+                    'revenue': item.get('revenue') or 0
                 }
-
-            # Category breakdown
-            category = item.get('category', 'general')
-            if category not in stats['category_breakdown']:
-                stats['category_breakdown'][category] = {'sales': 0, 'revenue': 0, 'items': 0}
-            stats['category_breakdown'][category]['items'] += 1
-
-            # Stock value
-            stock = item.get('stock', -1)
-            if stock > 0:
-                stats['stock_value'] += stock * item['price']
-
-        # Sort popular items
-        stats['popular_items'] = dict(sorted(
-            stats['popular_items'].items(),
-            key=lambda x: x[1]['sales'],
-            reverse=True
-        )[:10])  # Top 10
+                for item in rollup.get('popular_items') or []
+            },
+            'category_breakdown': rollup.get('category_breakdown') or {},
+            'stock_value': rollup.get('stock_value') or 0,
+            'date_range': {
+                'start': rollup.get('first_at'),
+                'end': rollup.get('last_at')
+            }
+        }
 
         # Cache result
         self._stats_cache[cache_key] = {
@@ -1155,64 +1149,88 @@ class ShopManager:
         user_id: int = None,
         format: str = 'json'
     ) -> str:
-        """Export inventory data"""
-        import json
-        import csv
-        from io import StringIO
+        """Export inventory data (whole document; use iter_inventory_export to stream)"""
+        if format not in ('json', 'csv'):
+            return "Unsupported format"
+        return ''.join(self.iter_inventory_export(guild_id, user_id, format))
+
+    def _export_item_catalog(self, guild_id: int) -> Dict[str, dict]:
+        """Shop and archived item metadata for one export, fetched once"""
+        client = self.data_manager.admin_client
+        catalog = {}
+        for table in ('archived_shop_items', 'shop_items'):
+            rows = keyset_rows(
+                lambda table=table: client.table(table).select('item_id,name,emoji,category,price').eq('guild_id', str(guild_id)),
+                ['item_id']
+            )
+            # Live items win over archived copies
+            catalog.update({row['item_id']: row for row in rows})
+        return catalog
 
-        if user_id:
-            # Single user inventory
-            inventory = self.get_inventory(guild_id, user_id, include_item_details=True)
-            data = {
-                'user_id': user_id,
-                'exported_at': datetime.now().isoformat(),
-                'inventory': inventory
-            }
-        else:
-            # All users inventory
-            currency_data = self.data_manager.load_guild_data(guild_id, 'currency')
-            all_inventory = currency_data.get('inventory', {})
-            data = {
-                'guild_id': guild_id,
-                'exported_at': datetime.now().isoformat(),
-                'inventories': all_inventory
-            }
+    def iter_inventory_export(
+        self,
+        guild_id: int,
+        user_id: int = None,
+        format: str = 'json'
+    ) -> Iterator[str]:
+        """
+        Stream inventory as CSV or JSON text chunks.
 
-        if format == 'json':
-            return json.dumps(data, indent=2, ensure_ascii=False)
-        elif format == 'csv':
-            output = StringIO()
-            writer = csv.writer(output)
-
-            if user_id:
-                writer.writerow(['Item ID', 'Name', 'Emoji', 'Category', 'Quantity', 'Value'])
-                for item_id, item_data in data['inventory'].items():
-                    item = item_data['item']
-                    writer.writerow([
-                        item_id,
-                        item['name'],
-                        self._get_item_emoji(item),
-                        item.get('category', 'general'),
-                        item_data['quantity'],
-                        item_data['quantity'] * item['price']
-                    ])
+        Inventory rows are read with a keyset cursor in (user_id, item_id)
+        order and item metadata is resolved from one catalog per export.
+        """
+        if format not in ('json', 'csv'):
+            raise ValueError(f"Unsupported export format: {format}")
+
+        client = self.data_manager.admin_client
+        catalog = self._export_item_catalog(guild_id)
+
+        def make_query():
+            query = client.table('inventory').select('user_id,item_id,quantity,acquired_at') \
+                .eq('guild_id', str(guild_id)).gt('quantity', 0)
+            return query.eq('user_id', str(user_id)) if user_id else query
+
+        rows = keyset_rows(make_query, ['user_id', 'item_id'])
+        exported_at = datetime.now().isoformat()
+
+        if user_id:
+            rows = (row for row in rows if row['item_id'] in catalog)
+            if format == 'csv':
+                yield from csv_chunks(
+                    ['Item ID', 'Name', 'Emoji', 'Category', 'Quantity', 'Value'],
+                    ([
+                        row['item_id'],
+                        catalog[row['item_id']]['name'],
+                        self._get_item_emoji(catalog[row['item_id']]),
+                        catalog[row['item_id']].get('category') or 'general',
+                        row['quantity'],
+                        row['quantity'] * catalog[row['item_id']]['price']
+                    ] for row in rows)
+                )
             else:
-                writer.writerow(['User ID', 'Item ID', 'Name', 'Emoji', 'Quantity'])
-                for user_id, user_inv in data['inventories'].items():
-                    for item_id, quantity in user_inv.items():
-                        item = self.get_item(guild_id, item_id)
-                        if item:
-                            writer.writerow([
-                                user_id,
-                                item_id,
-                                item['name'],
-                                self._get_item_emoji(item),
-                                quantity
-                            ])
-
-            return output.getvalue()
+                yield from json_chunks(
+                    ((row['item_id'], {'quantity': row['quantity'], 'item': catalog[row['item_id']]}) for row in rows),
+                    {'user_id': user_id, 'exported_at': exported_at}, 'inventory', as_object=True
+                )
+        elif format == 'csv':
+            yield from csv_chunks(
+                ['User ID', 'Item ID', 'Name', 'Emoji', 'Quantity'],
+                ([
+                    row['user_id'],
+                    row['item_id'],
+                    catalog[row['item_id']]['name'],
+                    self._get_item_emoji(catalog[row['item_id']]),
+                    row['quantity']
+                ] for row in rows if row['item_id'] in catalog)
+            )
         else:
-            return "Unsupported format"
+            inventories = group_pairs(
+                rows, 'user_id',
+                lambda row: (row['item_id'], {'quantity': row['quantity'], 'acquired_at': row.get('acquired_at')})
+            )
+            yield from json_chunks(
+                inventories, {'guild_id': guild_id, 'exported_at': exported_at}, 'inventories', as_object=True
+            )
 
     def validate_shop_integrity(self, guild_id: int) -> dict:
         """Validate shop data integrity"""
@@ -1390,7 +1408,7 @@ class RedemptionRequestView(discord.ui.View):
         
         # Check custom roles from config
         try:
-            config = self.shop_manager.data_manager.load_guild_data(self.guild_id, 'config')
+            config = self.shop_manager.data_manager.get_config_snapshot(self.guild_id)
             admin_roles = config.get('admin_roles', [])
             moderator_roles = config.get('moderator_roles', [])
             
@@ -5,7 +5,9 @@ Handles bidirectional synchronization between CMS and Discord with conflict reso
 
 import asyncio
 import logging
+import os
 import time
+import zlib
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Any, Optional, Callable
 from enum import Enum
@@ -39,6 +41,35 @@ class SyncConflictResolution(Enum):
     MANUAL = "manual"  # Require manual resolution
     LAST_MODIFIED = "last_modified"  # Use most recent change
 
+# entity -> (table, primary key column, columns a sync patch may write)
+_ENTITY_TABLES = {
+    SyncEntity.TASK: ('tasks', 'task_id', frozenset({
+        'name', 'description', 'reward', 'duration_hours', 'type', 'target', 'status', 'expires_at',
+        'channel_id', 'message_id', 'max_claims', 'current_claims', 'assigned_users', 'category',
+        'is_global', 'role_name'
+    })),
+    SyncEntity.SHOP_ITEM: ('shop_items', 'item_id', frozenset({
+        'name', 'description', 'price', 'category', 'stock', 'emoji', 'is_active', 'message_id', 'channel_id'
+    })),
+    SyncEntity.ANNOUNCEMENT: ('announcements', 'announcement_id', frozenset({
+        'title', 'content', 'embed_data', 'channel_id', 'message_id', 'is_pinned', 'status'
+    })),
+    SyncEntity.EMBED: ('embeds', 'embed_id', frozenset({
+        'title', 'description', 'color', 'fields', 'footer', 'thumbnail', 'image', 'channel_id', 'message_id'
+    })),
+}
+
+_CONFIG_PATCH_COLUMNS = frozenset({
+    'prefix', 'currency_name', 'currency_symbol', 'admin_roles', 'moderator_roles', 'log_channel_id',
+    'welcome_channel_id', 'task_channel_id', 'shop_channel_id', 'global_shop', 'global_tasks',
+    'feature_currency', 'feature_tasks', 'feature_shop', 'feature_announcements', 'feature_moderation',
+    'bot_status_message', 'bot_status_type'
+})
+
+SYNC_LOCK_STRIPES = int(os.getenv('SYNC_LOCK_STRIPES', '64'))
+SYNC_STATE_MAX_ENTRIES = int(os.getenv('SYNC_STATE_MAX_ENTRIES', '10000'))
+
+
 class SyncManager:
     """Manages real-time bidirectional synchronization"""
 
@@ -47,8 +78,9 @@ class SyncManager:
         self.audit_manager = audit_manager
         self.sse_manager = sse_manager
 
-        # Sync state tracking
+        # Sync state tracking (insertion-ordered; oldest-updated entries evicted past the cap)
         self.sync_state: Dict[str, Dict[str, Any]] = {}
+        self.max_sync_state = SYNC_STATE_MAX_ENTRIES
         self.pending_changes: Dict[str, List[Dict[str, Any]]] = {}
         self.conflict_queue: List[Dict[str, Any]] = []
 
@@ -60,8 +92,8 @@ class SyncManager:
         # Event handlers
         self.event_handlers: Dict[str, List[Callable]] = {}
 
-        # Sync locks to prevent concurrent operations
-        self.sync_locks: Dict[str, asyncio.Lock] = {}
+        # Striped sync locks: a fixed set shared by hash, so memory doesn't grow with entities touched
+        self.sync_locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(SYNC_LOCK_STRIPES)]
 
     def register_event_handler(self, event_type: str, handler: Callable):
         """Register an event handler for sync events"""
@@ -84,11 +116,7 @@ class SyncManager:
         """Synchronize an entity with conflict detection and resolution"""
         sync_key = f"{guild_id}:{entity_type.value}:{entity_id}"
 
-        # Acquire sync lock
-        if sync_key not in self.sync_locks:
-            self.sync_locks[sync_key] = asyncio.Lock()
-
-        async with self.sync_locks[sync_key]:
+        async with self._lock_for(sync_key):
             try:
                 # Check for existing sync state
                 current_state = self._get_entity_state(entity_type, entity_id, guild_id)
@@ -127,6 +155,10 @@ class SyncManager:
                 logger.error(f"Sync error for {sync_key}: {e}")
                 return {'success': False, 'error': str(e)}
 
+    def _lock_for(self, sync_key: str) -> asyncio.Lock:
+        """Stripe lock guarding an entity; unrelated entities may share one"""
+        return self.sync_locks[zlib.crc32(sync_key.encode()) % len(self.sync_locks)]
+
     async def sync_from_cms(self, entity_type: SyncEntity, entity_id: str, guild_id: int,
                            changes: Dict[str, Any]) -> Dict[str, Any]:
         """Sync changes from CMS to Discord"""
@@ -344,7 +376,7 @@ class SyncManager:
     async def _sync_task_to_discord(self, guild, task_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
         """Sync task changes to Discord message"""
         try:
-            config = self.data_manager.load_guild_data(guild.id, 'config')
+            config = self.data_manager.get_config_snapshot(guild.id)
             task_channel_id = config.get('task_channel_id')
 
             if not task_channel_id:
@@ -379,7 +411,7 @@ class SyncManager:
             task['message_id'] = str(message.id)
 
             # Update database
-            self.data_manager.save_guild_data(guild.id, 'tasks', tasks_data)
+            self._patch_entity(SyncEntity.TASK, task_id, guild.id, {'message_id': task['message_id']})
 
             return {'success': True, 'action': 'created', 'message_id': str(message.id)}
 
@@ -390,7 +422,7 @@ class SyncManager:
     async def _sync_shop_item_to_discord(self, guild, item_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
         """Sync shop item changes to Discord message"""
         try:
-            config = self.data_manager.load_guild_data(guild.id, 'config')
+            config = self.data_manager.get_config_snapshot(guild.id)
             shop_channel_id = config.get('shop_channel_id')
 
             if not shop_channel_id:
@@ -425,7 +457,7 @@ class SyncManager:
             item['message_id'] = str(message.id)
 
             # Update database
-            self.data_manager.save_guild_data(guild.id, 'currency', currency_data)
+            self._patch_entity(SyncEntity.SHOP_ITEM, item_id, guild.id, {'message_id': item['message_id']})
 
             return {'success': True, 'action': 'created', 'message_id': str(message.id)}
 
@@ -490,7 +522,9 @@ class SyncManager:
             announcement['message_id'] = str(message.id)
 
             # Update database
-            self.data_manager.save_guild_data(guild.id, 'announcements', announcements_data)
+            self._patch_entity(
+                SyncEntity.ANNOUNCEMENT, announcement_id, guild.id, {'message_id': announcement['message_id']}
+            )
 
             return {'success': True, 'action': 'created', 'message_id': str(message.id)}
 
@@ -536,7 +570,7 @@ class SyncManager:
             embed_data['message_id'] = str(message.id)
 
             # Update database
-            self.data_manager.save_guild_data(guild.id, 'embeds', embeds_data)
+            self._patch_entity(SyncEntity.EMBED, embed_id, guild.id, {'message_id': embed_data['message_id']})
 
             return {'success': True, 'action': 'created', 'message_id': str(message.id)}
 
@@ -582,40 +616,71 @@ class SyncManager:
                           changes: Dict[str, Any]) -> Dict[str, Any]:
         """Update entity in CMS database"""
         try:
-            # This is a generic update method for entities that don't need special Discord sync
-            data_type = self._get_data_type_for_entity(entity_type)
-            if not data_type:
+            if entity_type == SyncEntity.CONFIG:
+                return self._patch_config(guild_id, changes)
+            if entity_type not in _ENTITY_TABLES:
                 return {'success': False, 'reason': 'unknown_entity_type'}
 
-            # Load current data
-            data = self.data_manager.load_guild_data(guild_id, data_type)
-
-            # Apply changes
-            if entity_type == SyncEntity.CONFIG:
-                if 'config' not in data:
-                    data['config'] = {}
-                data['config'].update(changes)
-            else:
-                # For other entities, assume they're in a sub-dict
-                container_key = self._get_container_key_for_entity(entity_type)
-                if container_key not in data:
-                    data[container_key] = {}
-                if entity_id not in data[container_key]:
-                    data[container_key][entity_id] = {}
-                data[container_key][entity_id].update(changes)
+            # A 'version' in the changes is the version the editor last saw
+            result = self._patch_entity(entity_type, entity_id, guild_id, changes, changes.get('version'))
 
             # Add last modified timestamp
             changes['last_modified'] = datetime.now(timezone.utc).isoformat()
-
-            # Save data
-            self.data_manager.save_guild_data(guild_id, data_type, data)
-
-            return {'success': True, 'action': 'updated'}
+            return result
 
         except Exception as e:
             logger.error(f"Error updating CMS entity: {e}")
             return {'success': False, 'error': str(e)}
 
+    def _patch_entity(self, entity_type: SyncEntity, entity_id: str, guild_id: int,
+                      changes: Dict[str, Any], expected_version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Write only the changed columns of one entity row.
+
+        The update is conditional on the row's version, so it fails with
+        'version_conflict' instead of overwriting a write made since that version.
+        When no expected version is given, the current one is read first.
+        """
+        table, key_column, columns = _ENTITY_TABLES[entity_type]
+        patch = {k: v for k, v in changes.items() if k in columns}
+        if not patch:
+            return {'success': True, 'action': 'unchanged'}
+
+        client = self.data_manager.admin_client
+        if expected_version is None:
+            current = client.table(table).select('version').eq('guild_id', str(guild_id)).eq(
+                key_column, entity_id
+            ).execute()
+            if not current.data:
+                return {'success': False, 'reason': 'entity_not_found'}
+            expected_version = current.data[0].get('version', 1)
+
+        result = client.table(table).update(patch).eq('guild_id', str(guild_id)).eq(
+            key_column, entity_id
+        ).eq('version', int(expected_version)).execute()
+
+        if not result.data:
+            logger.warning(f"Version conflict patching {table} {entity_id} (expected v{expected_version})")
+            return {'success': False, 'reason': 'version_conflict', 'expected_version': expected_version}
+
+        self.data_manager.invalidate_cache(guild_id, self._get_data_type_for_entity(entity_type))
+        version = result.data[0].get('version')
+        state = self.sync_state.get(f"{guild_id}:{entity_type.value}:{entity_id}")
+        if state is not None:
+            state['db_version'] = version
+        return {'success': True, 'action': 'updated', 'version': version}
+
+    def _patch_config(self, guild_id: int, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Write only the changed guilds columns and refresh the config snapshot"""
+        patch = {k: v for k, v in changes.items() if k in _CONFIG_PATCH_COLUMNS}
+        if not patch:
+            return {'success': True, 'action': 'unchanged'}
+
+        self.data_manager.admin_client.table('guilds').update(patch).eq('guild_id', str(guild_id)).execute()
+        self.data_manager.invalidate_cache(guild_id, 'config')
+        self.data_manager.refresh_guild_config(guild_id)
+        return {'success': True, 'action': 'updated'}
+
     def _get_entity_state(self, entity_type: SyncEntity, entity_id: str, guild_id: int) -> Optional[Dict[str, Any]]:
         """Get current sync state for an entity"""
         state_key = f"{guild_id}:{entity_type.value}:{entity_id}"
@@ -626,15 +691,18 @@ class SyncManager:
         """Update the sync state for an entity"""
         state_key = f"{guild_id}:{entity_type.value}:{entity_id}"
 
-        if state_key not in self.sync_state:
-            self.sync_state[state_key] = {}
-
-        self.sync_state[state_key].update({
+        # Re-insert so the entry moves to the newest end, then evict the oldest past the cap
+        state = self.sync_state.pop(state_key, {})
+        state.update({
             'last_modified': datetime.now(timezone.utc).isoformat(),
             'source': source,
-            'version': self.sync_state[state_key].get('version', 0) + 1,
+            'version': state.get('version', 0) + 1,
             **changes
         })
+        self.sync_state[state_key] = state
+
+        while len(self.sync_state) > self.max_sync_state:
+            del self.sync_state[next(iter(self.sync_state))]
 
     def _get_cms_state(self, entity_type: SyncEntity, entity_id: str, guild_id: int) -> Optional[Dict[str, Any]]:
         """Get current state from CMS"""
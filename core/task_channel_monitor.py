@@ -10,6 +10,8 @@ import logging
 from datetime import datetime, timezone
 import asyncio
 
+from core.discord_scheduler import discord_scheduler, Priority
+
 logger = logging.getLogger(__name__)
 
 
@@ -401,7 +403,9 @@ class TaskChannelMonitor:
                 view = TaskClaimView(task['task_id'])
             
             # Post message
-            message = await channel.send(embed=embed, view=view)
+            message = await discord_scheduler.submit(
+                lambda: channel.send(embed=embed, view=view), Priority.BACKGROUND, bucket=f"channel:{channel.id}"
+            )
             
             # Update database with message ID
             if is_global:
@@ -503,7 +507,9 @@ class TaskChannelMonitor:
                     if channel:
                         try:
                             message = await channel.fetch_message(int(message_id))
-                            await message.delete()
+                            await discord_scheduler.submit(
+                                message.delete, Priority.BACKGROUND, bucket=f"channel:{channel.id}"
+                            )
                             logger.info(f"Successfully deleted task message {message_id} from channel {channel_id}")
                         except discord.NotFound:
                             logger.debug(f"Task message {message_id} already deleted from Discord")
@@ -567,7 +573,10 @@ class TaskChannelMonitor:
                     
                     view = TaskClaimView(self.bot, task['task_id'], task.get('category'))
                     
-                    await message.edit(embed=embed, view=view)
+                    await discord_scheduler.submit(
+                        lambda: message.edit(embed=embed, view=view), Priority.BACKGROUND,
+                        bucket=f"channel:{channel.id}"
+                    )
                     logger.info(f"Updated task message {task['message_id']} for task {task['task_id']}")
                     
                 except discord.NotFound:
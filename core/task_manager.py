@@ -1,12 +1,24 @@
 # core/task_manager.py - Task lifecycle management with Supabase integration
 
+import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 import discord
 
+from core.search_index import search_index
+
 logger = logging.getLogger(__name__)
 
+# claim_task() RPC error codes -> user-facing messages
+CLAIM_ERRORS = {
+    'not_found': "Task not found.",
+    'not_active': "Task is not active.",
+    'expired': "Task has expired.",
+    'full': "Task is full.",
+    'already_claimed': "You already claimed this task.",
+}
+
 class TaskManager:
     """
     Centralized task management with Supabase integration.
@@ -57,26 +69,16 @@ class TaskManager:
             raise ValueError("Duration must be positive or -1 for infinite")
 
         async with self.data_manager.atomic_transaction() as conn:
-            # ATOMIC INCREMENT of task_id (prevent race condition)
+            # ATOMIC INCREMENT of task_id in one statement (creates task_settings on first use)
             result = await conn.fetchrow(
-                """UPDATE task_settings
-                   SET next_task_id = next_task_id + 1
-                   WHERE guild_id = $1
+                """INSERT INTO task_settings (guild_id, next_task_id)
+                   VALUES ($1, 1)
+                   ON CONFLICT (guild_id) DO UPDATE
+                   SET next_task_id = task_settings.next_task_id + 1
                    RETURNING next_task_id""",
-                guild_id
+                str(guild_id)
             )
-
-            if not result:
-                # Initialize task_settings if not exists
-                await conn.execute(
-                    """INSERT INTO task_settings (guild_id, next_task_id)
-                       VALUES ($1, 1)
-                       ON CONFLICT (guild_id) DO NOTHING""",
-                    guild_id
-                )
-                task_id = 1
-            else:
-                task_id = result['next_task_id']
+            task_id = result['next_task_id']
 
             # Calculate expiration
             if duration_hours == -1:
@@ -111,6 +113,7 @@ class TaskManager:
             result = self.data_manager.admin_client.table('tasks').insert(task_data).execute()
             
             logger.info(f"✅ Created task {task_id} in guild {guild_id} (Global: {is_global})")
+            search_index.upsert(guild_id, 'tasks', task_id, task_data)
             
             # Invalidate cache
             if hasattr(self, 'cache_manager') and self.cache_manager:
@@ -180,6 +183,7 @@ class TaskManager:
                 return {'success': False, 'error': 'Task not found'}
 
             logger.info(f"✅ Updated task {task_id} in guild {guild_id}")
+            search_index.upsert(guild_id, 'tasks', task_id, result.data[0])
 
             # Invalidate cache
             if hasattr(self, 'cache_manager') and self.cache_manager:
@@ -273,6 +277,7 @@ class TaskManager:
                  pass
 
             logger.info(f"✅ Deleted task {task_id} from guild {guild_id}")
+            search_index.remove(guild_id, 'tasks', task_id)
 
             # Invalidate cache safely
             if hasattr(self, 'cache_manager') and self.cache_manager:
@@ -308,64 +313,28 @@ class TaskManager:
         task_id = int(task_id)  # Keep as int for Supabase query
 
         try:
-            # 1. GET TASK DATA
-            task_result = self.data_manager.supabase.table('tasks').select('*').eq('guild_id', guild_id).eq('task_id', task_id).execute()
-            
-            if not task_result.data or len(task_result.data) == 0:
-                return {'success': False, 'error': "Task not found."}
-            
-            task_data = task_result.data[0]
-
-            # VALIDATION: Task must be active
-            if task_data['status'] != 'active':
-                return {'success': False, 'error': "Task is not active."}
-
-            # VALIDATION: Task not expired
-            expires_at = task_data.get('expires_at')
-            if expires_at:
-                if isinstance(expires_at, str):
-                    expires_at = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
-                if expires_at < datetime.now(timezone.utc):
-                    return {'success': False, 'error': "Task has expired."}
-
-            # VALIDATION: Max claims not exceeded
-            max_claims = task_data.get('max_claims')
-            current_claims = task_data.get('current_claims', 0)
-            
-            # Check if max_claims is set (not None) AND not -1 (unlimited)
-            if max_claims is not None and max_claims != -1 and current_claims >= max_claims:
-                return {'success': False, 'error': "Task is full."}
-
-            # VALIDATION: User hasn't already claimed
-            existing_claim = self.data_manager.supabase.table('user_tasks').select('id').eq('user_id', user_id).eq('guild_id', guild_id).eq('task_id', task_id).execute()
-            
-            if existing_claim.data and len(existing_claim.data) > 0:
-                return {'success': False, 'error': "You already claimed this task."}
-
-            # Calculate deadline
-            if task_data['duration_hours'] == -1:
-                # Infinite duration - set to 100 years in future
-                deadline = datetime.now(timezone.utc) + timedelta(days=36500)
+            # Single atomic call: the guarded claim counter increment and the
+            # user_tasks insert commit together (see migrations/028_task_claim_rpc.sql)
+            if getattr(self.data_manager, 'pg_pool', None):
+                row = await self._claim_task_postgres(guild_id, user_id, task_id)
             else:
-                deadline = datetime.now(timezone.utc) + timedelta(hours=task_data['duration_hours'])
+                result = await asyncio.to_thread(
+                    lambda: self.data_manager.admin_client.rpc('claim_task', {
+                        'p_guild_id': guild_id,
+                        'p_user_id': user_id,
+                        'p_task_id': task_id
+                    }).execute()
+                )
+                row = result.data or {}
 
-            # CREATE USER TASK
-            user_task_data = {
-                'user_id': user_id,
-                'guild_id': guild_id,
-                'task_id': task_id,
-                'status': 'in_progress',
-                'claimed_at': datetime.now(timezone.utc).isoformat(),
-                'deadline': deadline.isoformat()
-            }
-            
-            self.data_manager.supabase.table('user_tasks').insert(user_task_data).execute()
+            if not row.get('success'):
+                return {'success': False, 'error': CLAIM_ERRORS.get(row.get('error'), "Failed to claim task.")}
 
-            # INCREMENT CURRENT_CLAIMS
-            new_claims = current_claims + 1
-            self.data_manager.supabase.table('tasks').update({
-                'current_claims': new_claims
-            }).eq('guild_id', guild_id).eq('task_id', task_id).execute()
+            task_data = row['task']
+            claim = row.get('claim') or {}
+            deadline = claim.get('deadline')
+            if isinstance(deadline, str):
+                deadline = datetime.fromisoformat(deadline.replace('Z', '+00:00'))
 
             # Invalidate cache safely
             cache_manager = getattr(self, 'cache_manager', None)
@@ -385,6 +354,7 @@ class TaskManager:
             return {
                 'success': True,
                 'task': task_data,
+                'claim': claim,
                 'deadline': deadline
             }
 
@@ -392,6 +362,15 @@ class TaskManager:
             logger.exception(f"Claim task error: {e}")
             return {'success': False, 'error': "Failed to claim task."}
 
+    async def _claim_task_postgres(self, guild_id: str, user_id: str, task_id: int) -> Dict:
+        """Run claim_task() over the pooled connection; returns the same result as the RPC"""
+        async with self.data_manager.atomic_transaction() as conn:
+            claimed = await conn.fetchrow(
+                "SELECT claim_task($1, $2, $3) AS result",
+                guild_id, user_id, task_id
+            )
+        return (claimed or {}).get('result') or {}
+
     async def submit_task(self, guild_id: int, user_id: int, task_id: int, proof: str) -> Dict:
         """Submit task with PREVENT LATE SUBMISSIONS - deadline validation"""
         user_id = str(user_id)
@@ -4,6 +4,8 @@ from typing import Dict, List, Optional
 import threading
 from collections import defaultdict
 
+from core.utils import rolling_period_start
+
 class TransactionManager:
     def __init__(self, data_manager, audit_manager=None, cache_manager=None):
         self.data_manager = data_manager
@@ -332,60 +334,49 @@ class TransactionManager:
             'has_more': has_more
         }
 
+    def _get_rollup_statistics(self, guild_id: int, user_id: int = None, period: str = 'all', top_users: int = 10) -> dict:
+        """Summarize the transaction rollups (see migrations/017) in a single RPC"""
+        start_date = rolling_period_start(period)
+        result = self.data_manager.admin_client.rpc(
+            'get_transaction_statistics',
+            {
+                'p_guild_id': str(guild_id),
+                'p_user_id': str(user_id) if user_id is not None else None,
+                'p_since': start_date.isoformat() if start_date else None,
+                'p_top_users': top_users
+            }
+        ).execute()
+        return result.data or {}
+
     def get_user_statistics(
         self,
         guild_id: int,
         user_id: int,
         period: str = 'all'
     ) -> dict:
-        transactions = self.get_transactions(guild_id, user_id=user_id)['transactions']
-
-        # Filter by period
-        now = datetime.utcnow()
-        if period == 'day':
-            start_date = now - timedelta(days=1)
-        elif period == 'week':
-            start_date = now - timedelta(weeks=1)
-        elif period == 'month':
-            start_date = now - timedelta(days=30)
-        else:
-            start_date = None
-
-        if start_date:
-            transactions = [t for t in transactions if datetime.fromisoformat(t['timestamp'].replace('Z', '+00:00')) >= start_date]
+        rollup = self._get_rollup_statistics(guild_id, user_id=user_id, period=period)
+        by_type = rollup.get('by_type') or {}
+        transaction_count = int(rollup.get('transaction_count') or 0)
+        volume = rollup.get('volume') or 0
 
         stats = {
-            'total_earned': 0,
-            'total_spent': 0,
-            'total_transferred_sent': 0,
-            'total_transferred_received': 0,
-            'transaction_count': len(transactions),
-            'transaction_count_by_type': defaultdict(int),
-            'average_transaction_size': 0,
+            'total_earned': rollup.get('total_earned') or 0,
+            'total_spent': rollup.get('total_spent') or 0,
+            'total_transferred_sent': sum(
+                by_type.get(t, {}).get('spent', 0) for t in ('transfer_send', 'transfer_sent')
+            ),
+            'total_transferred_received': sum(
+                by_type.get(t, {}).get('earned', 0) for t in ('transfer_receive', 'transfer_received')
+            ),
+            'transaction_count': transaction_count,
+            'transaction_count_by_type': defaultdict(int, {t: int(v.get('count', 0)) for t, v in by_type.items()}),
+            'average_transaction_size': volume / transaction_count if transaction_count else 0,
             'date_range': {
-                'start': transactions[-1]['timestamp'] if transactions else None,
-                'end': transactions[0]['timestamp'] if transactions else None
+                'start': rollup.get('first_at'),
+                'end': rollup.get('last_at')
             }
         }
 
-        total_amount = 0
-        for txn in transactions:
-            amount = txn['amount']
-            total_amount += abs(amount)
-            stats['transaction_count_by_type'][txn['type']] += 1
-
-            if amount > 0:
-                stats['total_earned'] += amount
-            elif amount < 0:
-                stats['total_spent'] += abs(amount)
-
-            if txn['type'] == 'transfer_send':
-                stats['total_transferred_sent'] += abs(amount)
-            elif txn['type'] == 'transfer_receive':
-                stats['total_transferred_received'] += amount
-
-        stats['average_transaction_size'] = total_amount / len(transactions) if transactions else 0
-
         return stats
 
     def get_server_statistics(
@@ -393,40 +384,48 @@ class TransactionManager:
         guild_id: int,
         period: str = 'all'
     ) -> dict:
-        transactions = self.get_transactions(guild_id)['transactions']
-
-        # Filter by period
-        now = datetime.utcnow()
-        if period == 'day':
-            start_date = now - timedelta(days=1)
-        elif period == 'week':
-            start_date = now - timedelta(weeks=1)
-        elif period == 'month':
-            start_date = now - timedelta(days=30)
-        else:
-            start_date = None
-
-        if start_date:
-            transactions = [t for t in transactions if datetime.fromisoformat(t['timestamp'].replace('Z', '+00:00')) >= start_date]
+        rollup = self._get_rollup_statistics(guild_id, period=period)
+        by_type = rollup.get('by_type') or {}
 
         stats = {
-            'total_transactions': len(transactions),
+            'total_transactions': int(rollup.get('transaction_count') or 0),
             'total_currency_in_circulation': 0,  # This would need to be calculated from currency data
-            'most_active_users': [],
-            'transaction_volume_by_type': defaultdict(int)
+            'most_active_users': [
+                {'user_id': u['user_id'], 'transaction_count': int(u['transaction_count'])}
+                for u in rollup.get('top_users') or []
+            ],
+            'transaction_volume_by_type': defaultdict(int, {t: v.get('volume', 0) for t, v in by_type.items()})
         }
 
-        user_activity = defaultdict(int)
-        for txn in transactions:
-            user_activity[txn['user_id']] += 1
-            stats['transaction_volume_by_type'][txn['type']] += abs(txn['amount'])
-
-        # Get top 10 most active users
-        sorted_users = sorted(user_activity.items(), key=lambda x: x[1], reverse=True)[:10]
-        stats['most_active_users'] = [{'user_id': uid, 'transaction_count': count} for uid, count in sorted_users]
-
         return stats
 
+    def find_balance_discrepancies(self, guild_id: int = None, tolerance: float = 0.01) -> List[dict]:
+        """
+        Reconcile active user balances against the per-user transaction rollups.
+        Runs server-side in one pass over users, so cost scales with users, not transactions.
+        """
+        result = self.data_manager.admin_client.rpc(
+            'find_balance_discrepancies',
+            {
+                'p_guild_id': str(guild_id) if guild_id is not None else None,
+                'p_tolerance': tolerance
+            }
+        ).execute()
+
+        issues = []
+        for row in result.data or []:
+            current_balance = row.get('current_balance') or 0
+            calculated_balance = row.get('calculated_balance') or 0
+            issues.append({
+                'guild_id': row['guild_id'],
+                'user_id': row['user_id'],
+                'current_balance': current_balance,
+                'calculated_balance': calculated_balance,
+                'discrepancy': current_balance - calculated_balance,
+                'transaction_count': row.get('transaction_count', 0)
+            })
+        return issues
+
     def rebuild_indexes(self, guild_id: int):
         with self._get_lock(guild_id):
             if guild_id in self.indexes:
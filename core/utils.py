@@ -3,7 +3,7 @@ Shared utility functions for the bot
 """
 
 import discord
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 import re
 
@@ -43,6 +43,30 @@ def parse_duration(duration_str: str) -> Optional[timedelta]:
 
     return timedelta(seconds=total_seconds) if total_seconds > 0 else None
 
+def rollup_period_start(period: str) -> Optional[date]:
+    """
+    First UTC bucket date of a statistics period, for the daily rollup RPCs:
+    today ('day'), since Monday ('week') or since the 1st ('month'); None for all time
+    """
+    today = datetime.now(timezone.utc).date()
+    if period == 'day':
+        return today
+    elif period == 'week':
+        return today - timedelta(days=today.weekday())
+    elif period == 'month':
+        return today.replace(day=1)
+    return None
+
+def rolling_period_start(period: str) -> Optional[date]:
+    """
+    First UTC bucket date of a rolling statistics window, for the daily rollup RPCs:
+    the last 1 ('day'), 7 ('week') or 30 ('month') bucket dates including today; None for all time
+    """
+    days = {'day': 1, 'week': 7, 'month': 30}.get(period)
+    if days is None:
+        return None
+    return datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+
 def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
     """Truncate text to max length with suffix"""
     if len(text) <= max_length:
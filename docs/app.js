@@ -851,16 +851,22 @@ async function loadDashboard() {
 
 let currentUsersPage = 1;
 const USERS_PER_PAGE = 50;
+// Keyset cursors: page number -> last user_id of the previous page
+let usersPageCursors = { 1: null };
 
 async function loadUsers(page = 1) {
     if (!currentServerId) return;
     currentUsersPage = parseInt(page);
+    if (currentUsersPage === 1) usersPageCursors = { 1: null };
     const list = document.getElementById('users-list');
     list.innerHTML = '<div class="loading">Loading users...</div>';
 
     try {
         // Pass page and limit to API for server-side pagination
-        const data = await apiCall(`/api/servers/${currentServerId}/users?page=${page}&limit=${USERS_PER_PAGE}`);
+        const cursor = usersPageCursors[currentUsersPage];
+        const afterParam = cursor ? `&after=${encodeURIComponent(cursor)}` : '';
+        const data = await apiCall(`/api/servers/${currentServerId}/users?page=${page}&limit=${USERS_PER_PAGE}${afterParam}`);
+        usersPageCursors[currentUsersPage + 1] = data.next_cursor || null;
 
         if (data.users && data.users.length > 0) {
             // Use total from API response
@@ -0,0 +1,227 @@
+-- =====================================================
+-- MIGRATION 017: Incremental Transaction Rollups
+-- Replaces full transaction scans in statistics and the daily
+-- integrity check with rollups maintained on every insert.
+-- =====================================================
+
+-- 1. PER-USER TOTALS: one row per (guild, user), used by the integrity check
+CREATE TABLE IF NOT EXISTS transaction_user_totals (
+    guild_id            TEXT NOT NULL REFERENCES guilds(guild_id) ON DELETE CASCADE,
+    user_id             TEXT NOT NULL,
+    net_amount          NUMERIC NOT NULL DEFAULT 0,
+    total_earned        NUMERIC NOT NULL DEFAULT 0,
+    total_spent         NUMERIC NOT NULL DEFAULT 0,
+    transaction_count   BIGINT NOT NULL DEFAULT 0,
+    first_at            TIMESTAMP WITH TIME ZONE,
+    last_at             TIMESTAMP WITH TIME ZONE,
+
+    PRIMARY KEY (guild_id, user_id)
+);
+
+
+-- 2. DAILY BUCKETS: one row per (guild, user, day, type), used by period statistics
+CREATE TABLE IF NOT EXISTS transaction_daily_rollups (
+    guild_id            TEXT NOT NULL REFERENCES guilds(guild_id) ON DELETE CASCADE,
+    user_id             TEXT NOT NULL,
+    bucket_date         DATE NOT NULL,
+    transaction_type    TEXT NOT NULL DEFAULT 'unknown',
+    transaction_count   BIGINT NOT NULL DEFAULT 0,
+    earned              NUMERIC NOT NULL DEFAULT 0,
+    spent               NUMERIC NOT NULL DEFAULT 0,
+    volume              NUMERIC NOT NULL DEFAULT 0,
+    first_at            TIMESTAMP WITH TIME ZONE,
+    last_at             TIMESTAMP WITH TIME ZONE,
+
+    PRIMARY KEY (guild_id, user_id, bucket_date, transaction_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_txn_daily_rollups_guild_date ON transaction_daily_rollups(guild_id, bucket_date);
+
+COMMENT ON TABLE transaction_user_totals IS 'All-time per-user transaction totals, maintained by trigger on transactions';
+COMMENT ON TABLE transaction_daily_rollups IS 'Per-user, per-day, per-type transaction buckets, maintained by trigger on transactions';
+
+
+-- 3. TRIGGER: fold every new transaction into both rollups
+--    Covers every write path (process_balance_change, process_transfer,
+--    claim_daily_reward, process_purchase, log_transaction_atomic).
+CREATE OR REPLACE FUNCTION apply_transaction_rollup()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_ts        TIMESTAMPTZ := COALESCE(NEW."timestamp", NOW());
+    v_earned    NUMERIC := GREATEST(NEW.amount, 0);
+    v_spent     NUMERIC := GREATEST(-NEW.amount, 0);
+BEGIN
+    INSERT INTO transaction_user_totals AS t
+        (guild_id, user_id, net_amount, total_earned, total_spent, transaction_count, first_at, last_at)
+    VALUES
+        (NEW.guild_id, NEW.user_id, NEW.amount, v_earned, v_spent, 1, v_ts, v_ts)
+    ON CONFLICT (guild_id, user_id) DO UPDATE SET
+        net_amount        = t.net_amount + EXCLUDED.net_amount,
+        total_earned      = t.total_earned + EXCLUDED.total_earned,
+        total_spent       = t.total_spent + EXCLUDED.total_spent,
+        transaction_count = t.transaction_count + 1,
+        first_at          = LEAST(t.first_at, EXCLUDED.first_at),
+        last_at           = GREATEST(t.last_at, EXCLUDED.last_at);
+
+    INSERT INTO transaction_daily_rollups AS r
+        (guild_id, user_id, bucket_date, transaction_type, transaction_count, earned, spent, volume, first_at, last_at)
+    VALUES
+        (NEW.guild_id, NEW.user_id, (v_ts AT TIME ZONE 'UTC')::DATE, COALESCE(NEW.transaction_type, 'unknown'),
+         1, v_earned, v_spent, ABS(NEW.amount), v_ts, v_ts)
+    ON CONFLICT (guild_id, user_id, bucket_date, transaction_type) DO UPDATE SET
+        transaction_count = r.transaction_count + 1,
+        earned            = r.earned + EXCLUDED.earned,
+        spent             = r.spent + EXCLUDED.spent,
+        volume            = r.volume + EXCLUDED.volume,
+        first_at          = LEAST(r.first_at, EXCLUDED.first_at),
+        last_at           = GREATEST(r.last_at, EXCLUDED.last_at);
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS transactions_rollup_insert ON transactions;
+CREATE TRIGGER transactions_rollup_insert
+    AFTER INSERT ON transactions
+    FOR EACH ROW EXECUTE FUNCTION apply_transaction_rollup();
+
+
+-- 4. BACKFILL: materialize rollups for transactions written before this migration
+TRUNCATE transaction_user_totals, transaction_daily_rollups;
+
+INSERT INTO transaction_user_totals (guild_id, user_id, net_amount, total_earned, total_spent, transaction_count, first_at, last_at)
+SELECT guild_id, user_id,
+       SUM(amount),
+       SUM(GREATEST(amount, 0)),
+       SUM(GREATEST(-amount, 0)),
+       COUNT(*),
+       MIN("timestamp"),
+       MAX("timestamp")
+FROM transactions
+WHERE guild_id IS NOT NULL AND user_id IS NOT NULL
+GROUP BY guild_id, user_id;
+
+INSERT INTO transaction_daily_rollups (guild_id, user_id, bucket_date, transaction_type, transaction_count, earned, spent, volume, first_at, last_at)
+SELECT guild_id, user_id,
+       ("timestamp" AT TIME ZONE 'UTC')::DATE,
+       COALESCE(transaction_type, 'unknown'),
+       COUNT(*),
+       SUM(GREATEST(amount, 0)),
+       SUM(GREATEST(-amount, 0)),
+       SUM(ABS(amount)),
+       MIN("timestamp"),
+       MAX("timestamp")
+FROM transactions
+WHERE guild_id IS NOT NULL AND user_id IS NOT NULL
+GROUP BY 1, 2, 3, 4;
+
+
+-- 5. STATISTICS RPC: aggregate rollups for a guild or a single user since a date
+--    Returns JSONB so the whole summary is a single round trip.
+CREATE OR REPLACE FUNCTION get_transaction_statistics(
+    p_guild_id  TEXT,
+    p_user_id   TEXT DEFAULT NULL,
+    p_since     DATE DEFAULT NULL,
+    p_top_users INTEGER DEFAULT 10
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_totals    JSONB;
+    v_by_type   JSONB;
+    v_top_users JSONB := '[]'::jsonb;
+BEGIN
+    SELECT jsonb_build_object(
+               'transaction_count', COALESCE(SUM(transaction_count), 0),
+               'total_earned',      COALESCE(SUM(earned), 0),
+               'total_spent',       COALESCE(SUM(spent), 0),
+               'volume',            COALESCE(SUM(volume), 0),
+               'first_at',          MIN(first_at),
+               'last_at',           MAX(last_at)
+           )
+    INTO v_totals
+    FROM transaction_daily_rollups
+    WHERE guild_id = p_guild_id
+      AND (p_user_id IS NULL OR user_id = p_user_id)
+      AND (p_since IS NULL OR bucket_date >= p_since);
+
+    SELECT COALESCE(jsonb_object_agg(transaction_type, jsonb_build_object(
+               'count', cnt, 'earned', earned, 'spent', spent, 'volume', volume
+           )), '{}'::jsonb)
+    INTO v_by_type
+    FROM (
+        SELECT transaction_type,
+               SUM(transaction_count) AS cnt,
+               SUM(earned) AS earned,
+               SUM(spent) AS spent,
+               SUM(volume) AS volume
+        FROM transaction_daily_rollups
+        WHERE guild_id = p_guild_id
+          AND (p_user_id IS NULL OR user_id = p_user_id)
+          AND (p_since IS NULL OR bucket_date >= p_since)
+        GROUP BY transaction_type
+    ) t;
+
+    IF p_user_id IS NULL THEN
+        SELECT COALESCE(jsonb_agg(jsonb_build_object('user_id', user_id, 'transaction_count', cnt) ORDER BY cnt DESC), '[]'::jsonb)
+        INTO v_top_users
+        FROM (
+            SELECT user_id, SUM(transaction_count) AS cnt
+            FROM transaction_daily_rollups
+            WHERE guild_id = p_guild_id
+              AND (p_since IS NULL OR bucket_date >= p_since)
+            GROUP BY user_id
+            ORDER BY cnt DESC
+            LIMIT p_top_users
+        ) u;
+    END IF;
+
+    RETURN v_totals || jsonb_build_object('by_type', v_by_type, 'top_users', v_top_users);
+END;
+$$;
+
+COMMENT ON FUNCTION get_transaction_statistics IS 'Summarizes transaction_daily_rollups for a guild (or one user) since an optional date in a single call.';
+
+
+-- 6. INTEGRITY RPC: active users whose balance disagrees with their rollup totals
+--    One pass over users joined to transaction_user_totals - O(users), not O(transactions).
+CREATE OR REPLACE FUNCTION find_balance_discrepancies(
+    p_guild_id  TEXT DEFAULT NULL,
+    p_tolerance NUMERIC DEFAULT 0.01
+) RETURNS TABLE (
+    guild_id            TEXT,
+    user_id             TEXT,
+    current_balance     NUMERIC,
+    calculated_balance  NUMERIC,
+    transaction_count   BIGINT
+)
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    SELECT u.guild_id,
+           u.user_id,
+           u.balance,
+           COALESCE(t.net_amount, 0),
+           COALESCE(t.transaction_count, 0)
+    FROM users u
+    LEFT JOIN transaction_user_totals t
+           ON t.guild_id = u.guild_id AND t.user_id = u.user_id
+    WHERE (p_guild_id IS NULL OR u.guild_id = p_guild_id)
+      AND COALESCE(u.is_active, true)
+      AND ABS(COALESCE(u.balance, 0) - COALESCE(t.net_amount, 0)) > p_tolerance;
+$$;
+
+COMMENT ON FUNCTION find_balance_discrepancies IS 'Reconciles active user balances against transaction_user_totals; returns only mismatched users.';
+
+
+-- 7. Permissions & RLS
+GRANT EXECUTE ON FUNCTION get_transaction_statistics TO anon;
+GRANT EXECUTE ON FUNCTION find_balance_discrepancies TO anon;
+
+ALTER TABLE transaction_user_totals ENABLE ROW LEVEL SECURITY;
+ALTER TABLE transaction_daily_rollups ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Service role full access transaction_user_totals" ON transaction_user_totals;
+CREATE POLICY "Service role full access transaction_user_totals" ON transaction_user_totals FOR ALL USING (true);
+DROP POLICY IF EXISTS "Service role full access transaction_daily_rollups" ON transaction_daily_rollups;
+CREATE POLICY "Service role full access transaction_daily_rollups" ON transaction_daily_rollups FOR ALL USING (true);
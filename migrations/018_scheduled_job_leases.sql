@@ -0,0 +1,97 @@
+-- =====================================================
+-- MIGRATION 018: Lease-based scheduled_jobs executor
+-- Lets several bot instances share timed moderation/redemption jobs.
+-- Each instance claims a window of due jobs under a lease
+-- (FOR UPDATE SKIP LOCKED), runs them locally, then acknowledges
+-- completions in batches. Unacknowledged jobs are retried once
+-- their lease expires.
+-- =====================================================
+
+-- 1. Table (created here if it predates migrations), plus lease columns
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    job_id          TEXT PRIMARY KEY,
+    guild_id        TEXT REFERENCES guilds(guild_id) ON DELETE CASCADE,
+    user_id         TEXT,
+    job_type        TEXT NOT NULL,
+    execute_at      TIMESTAMP WITH TIME ZONE NOT NULL,
+    job_data        JSONB DEFAULT '{}'::jsonb,
+    is_executed     BOOLEAN DEFAULT FALSE,
+    executed_at     TIMESTAMP WITH TIME ZONE,
+    created_at      TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE scheduled_jobs
+ADD COLUMN IF NOT EXISTS lease_owner TEXT,
+ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE,
+ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_due ON scheduled_jobs(execute_at) WHERE is_executed = FALSE;
+
+COMMENT ON COLUMN scheduled_jobs.lease_owner IS 'Bot instance currently holding the job; NULL when unclaimed';
+COMMENT ON COLUMN scheduled_jobs.lease_expires_at IS 'After this time another instance may reclaim the job';
+
+
+-- 2. CLAIM RPC: lease every unclaimed job due within the horizon
+--    SKIP LOCKED means concurrent claimers never block on or double-claim a row.
+CREATE OR REPLACE FUNCTION claim_scheduled_jobs(
+    p_owner             TEXT,
+    p_horizon_seconds   INTEGER DEFAULT 60,
+    p_lease_seconds     INTEGER DEFAULT 300,
+    p_limit             INTEGER DEFAULT 500,
+    p_max_attempts      INTEGER DEFAULT 5
+) RETURNS SETOF scheduled_jobs
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    UPDATE scheduled_jobs j
+    SET lease_owner = p_owner,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        attempts = COALESCE(j.attempts, 0) + 1
+    WHERE j.job_id IN (
+        SELECT c.job_id
+        FROM scheduled_jobs c
+        WHERE c.is_executed = FALSE
+          AND c.execute_at <= NOW() + make_interval(secs => p_horizon_seconds)
+          AND (c.lease_expires_at IS NULL OR c.lease_expires_at < NOW())
+          AND COALESCE(c.attempts, 0) < p_max_attempts
+        ORDER BY c.execute_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+$$;
+
+COMMENT ON FUNCTION claim_scheduled_jobs IS 'Leases due scheduled_jobs to one bot instance using FOR UPDATE SKIP LOCKED.';
+
+
+-- 3. ACK RPC: mark a batch of jobs executed in one call
+--    Only the current lease holder can acknowledge, so a job reclaimed
+--    after a stall is not double-acknowledged by the stale owner.
+CREATE OR REPLACE FUNCTION complete_scheduled_jobs(
+    p_owner     TEXT,
+    p_job_ids   TEXT[]
+) RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    UPDATE scheduled_jobs
+    SET is_executed = TRUE,
+        executed_at = NOW(),
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE job_id = ANY(p_job_ids)
+      AND lease_owner = p_owner;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
+
+COMMENT ON FUNCTION complete_scheduled_jobs IS 'Batch acknowledgement of executed scheduled_jobs by their lease owner.';
+
+
+GRANT EXECUTE ON FUNCTION claim_scheduled_jobs TO anon;
+GRANT EXECUTE ON FUNCTION complete_scheduled_jobs TO anon;
@@ -0,0 +1,35 @@
+-- =====================================================
+-- MIGRATION 019: Batched member profile sync
+-- Username/display name changes are queued from on_member_update
+-- and written in one call, so the dashboard member list no longer
+-- writes back on every page view.
+-- =====================================================
+
+-- 1. SYNC RPC: apply a batch of profile changes, skipping rows that are unchanged
+CREATE OR REPLACE FUNCTION sync_member_profiles(
+    p_profiles JSONB
+) RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    UPDATE users u
+    SET username = p.username,
+        display_name = p.display_name,
+        updated_at = NOW()
+    FROM jsonb_to_recordset(p_profiles) AS p(guild_id TEXT, user_id TEXT, username TEXT, display_name TEXT)
+    WHERE u.guild_id = p.guild_id
+      AND u.user_id = p.user_id
+      AND (u.username IS DISTINCT FROM p.username OR u.display_name IS DISTINCT FROM p.display_name);
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
+
+COMMENT ON FUNCTION sync_member_profiles IS 'Batch update of users.username/display_name from a JSON array of {guild_id, user_id, username, display_name}.';
+
+
+GRANT EXECUTE ON FUNCTION sync_member_profiles TO anon;
@@ -0,0 +1,148 @@
+-- =====================================================
+-- MIGRATION 020: Vote Rollups
+-- /votetop and /votestats read per-user counters maintained on
+-- every vote_logs insert (the top.gg webhook path) instead of
+-- pulling raw vote rows and aggregating them in Python.
+-- =====================================================
+
+-- 1. PER-USER TOTALS: all-time counters, used by /votestats
+CREATE TABLE IF NOT EXISTS vote_user_totals (
+    user_id         TEXT PRIMARY KEY,
+    total_votes     BIGINT NOT NULL DEFAULT 0,
+    total_coins     BIGINT NOT NULL DEFAULT 0,
+    last_vote_at    TIMESTAMP WITH TIME ZONE
+);
+
+
+-- 2. DAILY BUCKETS: one row per (user, day), used by the rolling leaderboard
+CREATE TABLE IF NOT EXISTS vote_daily_rollups (
+    user_id         TEXT NOT NULL,
+    bucket_date     DATE NOT NULL,
+    vote_count      INTEGER NOT NULL DEFAULT 0,
+    coins           BIGINT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (user_id, bucket_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_vote_daily_rollups_date ON vote_daily_rollups(bucket_date);
+
+COMMENT ON TABLE vote_user_totals IS 'All-time per-user vote counters, maintained by trigger on vote_logs';
+COMMENT ON TABLE vote_daily_rollups IS 'Per-user, per-day vote counters, maintained by trigger on vote_logs';
+
+
+-- 3. TRIGGER: fold every new vote into both rollups
+CREATE OR REPLACE FUNCTION apply_vote_rollup()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_ts TIMESTAMPTZ := COALESCE(NEW.created_at, NOW());
+BEGIN
+    INSERT INTO vote_user_totals AS t (user_id, total_votes, total_coins, last_vote_at)
+    VALUES (NEW.user_id, 1, NEW.reward, v_ts)
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_votes  = t.total_votes + 1,
+        total_coins  = t.total_coins + EXCLUDED.total_coins,
+        last_vote_at = GREATEST(t.last_vote_at, EXCLUDED.last_vote_at);
+
+    INSERT INTO vote_daily_rollups AS r (user_id, bucket_date, vote_count, coins)
+    VALUES (NEW.user_id, (v_ts AT TIME ZONE 'UTC')::DATE, 1, NEW.reward)
+    ON CONFLICT (user_id, bucket_date) DO UPDATE SET
+        vote_count = r.vote_count + 1,
+        coins      = r.coins + EXCLUDED.coins;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS vote_logs_rollup_insert ON vote_logs;
+CREATE TRIGGER vote_logs_rollup_insert
+    AFTER INSERT ON vote_logs
+    FOR EACH ROW EXECUTE FUNCTION apply_vote_rollup();
+
+
+-- 4. BACKFILL: materialize rollups for votes logged before this migration
+TRUNCATE vote_user_totals, vote_daily_rollups;
+
+INSERT INTO vote_user_totals (user_id, total_votes, total_coins, last_vote_at)
+SELECT user_id, COUNT(*), SUM(reward), MAX(created_at)
+FROM vote_logs
+GROUP BY user_id;
+
+INSERT INTO vote_daily_rollups (user_id, bucket_date, vote_count, coins)
+SELECT user_id, (created_at AT TIME ZONE 'UTC')::DATE, COUNT(*), SUM(reward)
+FROM vote_logs
+GROUP BY 1, 2;
+
+
+-- 5. LEADERBOARD RPC: top voters over the last N UTC days (today and the N-1 before), at most p_limit rows
+CREATE OR REPLACE FUNCTION get_top_voters(
+    p_days  INTEGER DEFAULT 30,
+    p_limit INTEGER DEFAULT 10
+) RETURNS TABLE (
+    user_id     TEXT,
+    vote_count  BIGINT,
+    coins       BIGINT
+)
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    SELECT r.user_id, SUM(r.vote_count)::BIGINT, SUM(r.coins)::BIGINT
+    FROM vote_daily_rollups r
+    WHERE r.bucket_date > ((NOW() AT TIME ZONE 'UTC')::DATE - p_days)
+    GROUP BY r.user_id
+    ORDER BY 2 DESC, 3 DESC
+    LIMIT p_limit;
+$$;
+
+COMMENT ON FUNCTION get_top_voters IS 'Top voters over a rolling window of days, aggregated from vote_daily_rollups.';
+
+
+-- 6. USER STATS RPC: totals plus the most recent votes in one call
+CREATE OR REPLACE FUNCTION get_vote_stats(
+    p_user_id   TEXT,
+    p_recent    INTEGER DEFAULT 5
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_totals JSONB;
+    v_recent JSONB;
+BEGIN
+    SELECT jsonb_build_object(
+               'total_votes',  COALESCE(MAX(total_votes), 0),
+               'total_coins',  COALESCE(MAX(total_coins), 0),
+               'last_vote_at', MAX(last_vote_at)
+           )
+    INTO v_totals
+    FROM vote_user_totals
+    WHERE user_id = p_user_id;
+
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+               'created_at', created_at, 'reward', reward, 'is_weekend', is_weekend
+           ) ORDER BY created_at DESC), '[]'::jsonb)
+    INTO v_recent
+    FROM (
+        SELECT created_at, reward, is_weekend
+        FROM vote_logs
+        WHERE user_id = p_user_id
+        ORDER BY created_at DESC
+        LIMIT p_recent
+    ) v;
+
+    RETURN v_totals || jsonb_build_object('recent', v_recent);
+END;
+$$;
+
+COMMENT ON FUNCTION get_vote_stats IS 'Vote totals and most recent votes for one user in a single call.';
+
+
+-- 7. Permissions & RLS
+GRANT EXECUTE ON FUNCTION get_top_voters TO anon;
+GRANT EXECUTE ON FUNCTION get_vote_stats TO anon;
+
+ALTER TABLE vote_user_totals ENABLE ROW LEVEL SECURITY;
+ALTER TABLE vote_daily_rollups ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Service role full access vote_user_totals" ON vote_user_totals;
+CREATE POLICY "Service role full access vote_user_totals" ON vote_user_totals FOR ALL USING (true);
+DROP POLICY IF EXISTS "Service role full access vote_daily_rollups" ON vote_daily_rollups;
+CREATE POLICY "Service role full access vote_daily_rollups" ON vote_daily_rollups FOR ALL USING (true);
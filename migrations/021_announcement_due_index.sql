@@ -0,0 +1,28 @@
+-- =====================================================
+-- MIGRATION 021: Scheduled announcement due index
+-- The announcements cog used to load every guild's announcements
+-- once a minute to find due items. A typed scheduled_for column
+-- with a partial index lets one cross-guild query find what is due.
+-- =====================================================
+
+-- 1. Typed due time (previously only stored inside embed_data)
+ALTER TABLE IF EXISTS announcements
+ADD COLUMN IF NOT EXISTS scheduled_for TIMESTAMP WITH TIME ZONE;
+
+-- 2. Backfill from embed_data; naive timestamps were written in server time (UTC)
+UPDATE announcements
+SET scheduled_for = CASE
+        WHEN embed_data->>'scheduled_for' ~ '([+-][0-9]{2}:[0-9]{2}|Z)$'
+            THEN (embed_data->>'scheduled_for')::TIMESTAMPTZ
+        ELSE (embed_data->>'scheduled_for')::TIMESTAMP AT TIME ZONE 'UTC'
+    END
+WHERE status = 'scheduled'
+  AND scheduled_for IS NULL
+  AND embed_data ? 'scheduled_for';
+
+-- 3. Only pending rows are indexed, so the due query stays small as history grows
+CREATE INDEX IF NOT EXISTS idx_announcements_due
+ON announcements(scheduled_for)
+WHERE status = 'scheduled';
+
+COMMENT ON COLUMN announcements.scheduled_for IS 'When a scheduled announcement is due; NULL for posted announcements';
@@ -0,0 +1,50 @@
+-- =====================================================
+-- MIGRATION 022: Entity Versions
+-- SyncManager patches a single task / shop item / announcement /
+-- embed row instead of re-saving the whole guild blob. Each row
+-- carries a version that every update bumps, so a patch guarded
+-- by "WHERE version = expected" fails instead of overwriting a
+-- concurrent edit.
+-- =====================================================
+
+-- 1. VERSION COLUMNS
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE shop_items ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE announcements ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE embeds ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+
+-- 2. TRIGGER: bump the version on every update, whichever code path wrote it
+--    (bulk save_guild_data upserts resend the old version; patches may omit it)
+CREATE OR REPLACE FUNCTION bump_entity_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_bump_version ON tasks;
+CREATE TRIGGER tasks_bump_version
+    BEFORE UPDATE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION bump_entity_version();
+
+DROP TRIGGER IF EXISTS shop_items_bump_version ON shop_items;
+CREATE TRIGGER shop_items_bump_version
+    BEFORE UPDATE ON shop_items
+    FOR EACH ROW EXECUTE FUNCTION bump_entity_version();
+
+DROP TRIGGER IF EXISTS announcements_bump_version ON announcements;
+CREATE TRIGGER announcements_bump_version
+    BEFORE UPDATE ON announcements
+    FOR EACH ROW EXECUTE FUNCTION bump_entity_version();
+
+DROP TRIGGER IF EXISTS embeds_bump_version ON embeds;
+CREATE TRIGGER embeds_bump_version
+    BEFORE UPDATE ON embeds
+    FOR EACH ROW EXECUTE FUNCTION bump_entity_version();
+
+COMMENT ON COLUMN tasks.version IS 'Optimistic concurrency version, bumped by trigger on every update';
+COMMENT ON COLUMN shop_items.version IS 'Optimistic concurrency version, bumped by trigger on every update';
+COMMENT ON COLUMN announcements.version IS 'Optimistic concurrency version, bumped by trigger on every update';
+COMMENT ON COLUMN embeds.version IS 'Optimistic concurrency version, bumped by trigger on every update';
@@ -0,0 +1,114 @@
+-- =====================================================
+-- MIGRATION 023: Ad Claim RPCs
+-- Session limits are enforced in memory by the bot; these
+-- functions warm/reconcile that limiter in one grouped query and
+-- collapse verify + reward + bookkeeping into one transaction.
+-- =====================================================
+
+-- 1. LIMITER STATE: today's session count and latest session per user
+--    p_since reaches back far enough to cover cooldowns that straddle midnight
+CREATE OR REPLACE FUNCTION get_ad_limit_state(
+    p_day_start TIMESTAMPTZ,
+    p_since     TIMESTAMPTZ
+) RETURNS TABLE (
+    user_id         TEXT,
+    view_count      BIGINT,
+    last_created_at TIMESTAMPTZ
+)
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    SELECT v.user_id,
+           COUNT(*) FILTER (WHERE v.created_at >= p_day_start),
+           MAX(v.created_at)
+    FROM ad_views v
+    WHERE v.created_at >= LEAST(p_day_start, p_since)
+    GROUP BY v.user_id;
+$$;
+
+COMMENT ON FUNCTION get_ad_limit_state IS 'Per-user ad session counts since the start of the UTC day, used to warm the in-memory limiter.';
+
+
+-- 2. VERIFY + REWARD: lock the session row, validate, pay out and mark it done
+CREATE OR REPLACE FUNCTION verify_ad_view_and_reward(
+    p_session_id    TEXT,
+    p_verification  JSONB DEFAULT '{}'::jsonb,
+    p_daily_limit   INTEGER DEFAULT 50
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_view      ad_views%ROWTYPE;
+    v_now       TIMESTAMPTZ := NOW();
+    v_rewarded  INTEGER;
+    v_res       RECORD;
+BEGIN
+    -- Row lock serializes concurrent verifies (frontend + postback) of one session
+    SELECT * INTO v_view FROM ad_views WHERE ad_session_id = p_session_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('success', false, 'error', 'Invalid session ID');
+    END IF;
+
+    IF v_view.expires_at IS NOT NULL AND v_now > v_view.expires_at THEN
+        RETURN jsonb_build_object('success', false, 'error', 'Ad session has expired (15min timeout)');
+    END IF;
+
+    IF v_view.is_verified THEN
+        RETURN jsonb_build_object('success', false, 'error', 'Ad already verified', 'already_rewarded', true);
+    END IF;
+
+    -- Backstop for the in-memory limiter when several processes create sessions
+    SELECT COUNT(*) INTO v_rewarded
+    FROM ad_views
+    WHERE user_id = v_view.user_id
+      AND reward_granted
+      AND verified_at >= date_trunc('day', v_now AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+
+    IF v_rewarded >= p_daily_limit THEN
+        RETURN jsonb_build_object('success', false, 'error', format('Daily ad limit reached (%s). Please come back tomorrow!', p_daily_limit));
+    END IF;
+
+    SELECT * INTO v_res FROM process_balance_change(
+        v_view.guild_id,
+        v_view.user_id,
+        v_view.reward_amount,
+        'ad_reward',
+        'Watched ad - Session ' || LEFT(p_session_id, 8),
+        jsonb_build_object('source', 'ad_claim', 'ad_session_id', p_session_id)
+    );
+
+    UPDATE ad_views
+    SET is_verified    = true,
+        verified_at    = v_now,
+        reward_granted = true,
+        transaction_id = v_res.transaction_id,
+        metadata       = COALESCE(metadata, '{}'::jsonb) || jsonb_build_object(
+                             'verification_data', COALESCE(p_verification, '{}'::jsonb),
+                             'verified_timestamp', v_now
+                         )
+    WHERE ad_session_id = p_session_id;
+
+    UPDATE global_task_claims
+    SET reward_granted = true,
+        completed_at   = v_now
+    WHERE ad_session_id = p_session_id;
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'user_id', v_view.user_id,
+        'guild_id', v_view.guild_id,
+        'reward_amount', v_view.reward_amount,
+        'new_balance', v_res.new_balance,
+        'transaction_id', v_res.transaction_id
+    );
+END;
+$$;
+
+COMMENT ON FUNCTION verify_ad_view_and_reward IS 'Atomic ad verification: validates the session, credits the reward and marks ad_views/global_task_claims in one transaction.';
+
+
+-- 3. Permissions
+GRANT EXECUTE ON FUNCTION get_ad_limit_state TO anon;
+GRANT EXECUTE ON FUNCTION verify_ad_view_and_reward TO anon;
@@ -0,0 +1,153 @@
+-- =====================================================
+-- MIGRATION 024: Chunked, resumable guild purge
+-- When the bot leaves a guild its data is queued in guild_purge_jobs
+-- and removed by repeated purge_guild_data() calls. Each call is one
+-- transaction that deletes at most p_batch_size rows and records its
+-- progress, so a crash mid-purge resumes where it stopped and no single
+-- statement holds locks on a huge guild's rows for long.
+-- =====================================================
+
+-- 1. Job table: one row per guild being purged
+CREATE TABLE IF NOT EXISTS guild_purge_jobs (
+    guild_id        TEXT PRIMARY KEY,
+    status          TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'done', 'failed')),
+    current_table   TEXT,
+    deleted_rows    JSONB NOT NULL DEFAULT '{}'::jsonb,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    requested_at    TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at      TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    completed_at    TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_guild_purge_jobs_open ON guild_purge_jobs(requested_at) WHERE status IN ('pending', 'running');
+
+COMMENT ON TABLE guild_purge_jobs IS 'Progress of guild data purges after the bot leaves a guild; deleted_rows holds per-table counts';
+
+
+-- 2. Tables purged per guild, largest/child tables first; guilds goes last and
+--    cascades anything not listed. Names that do not exist (or have no guild_id) are skipped.
+CREATE OR REPLACE FUNCTION guild_purge_tables() RETURNS TEXT[]
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT ARRAY[
+        'transactions', 'transaction_daily_rollups', 'transaction_user_totals',
+        'user_tasks', 'giveaway_entries', 'inventory', 'user_inventory',
+        'moderation_actions', 'moderation_audit_logs', 'strikes', 'scheduled_jobs',
+        'daily_claims', 'server_boosts', 'users', 'user_balances', 'user_roles', 'guild_roles',
+        'tasks', 'task_settings', 'shop_items', 'archived_shop_items', 'giveaways',
+        'announcements', 'embeds', 'channel_schedules', 'ad_sessions',
+        'guilds'
+    ];
+$$;
+
+
+-- 3. QUEUE / CANCEL
+CREATE OR REPLACE FUNCTION request_guild_purge(p_guild_id TEXT) RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    INSERT INTO guild_purge_jobs (guild_id, status, requested_at, updated_at)
+    VALUES (p_guild_id, 'pending', NOW(), NOW())
+    ON CONFLICT (guild_id) DO UPDATE
+    SET status = 'pending', current_table = NULL, attempts = 0, last_error = NULL,
+        completed_at = NULL, requested_at = NOW(), updated_at = NOW()
+    WHERE guild_purge_jobs.status IN ('done', 'failed');
+$$;
+
+COMMENT ON FUNCTION request_guild_purge IS 'Queues a guild for purging; an already queued or running purge is left as is.';
+
+-- Rejoining before the purge finishes keeps whatever has not been deleted yet
+CREATE OR REPLACE FUNCTION cancel_guild_purge(p_guild_id TEXT) RETURNS BOOLEAN
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    WITH removed AS (
+        DELETE FROM guild_purge_jobs WHERE guild_id = p_guild_id AND status <> 'done' RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM removed);
+$$;
+
+
+-- 4. STEP: delete up to p_batch_size rows from the first table that still has
+--    rows for the guild. Returns {done, table, deleted}; call until done.
+CREATE OR REPLACE FUNCTION purge_guild_data(
+    p_guild_id      TEXT,
+    p_batch_size    INTEGER DEFAULT 5000
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_job       guild_purge_jobs%ROWTYPE;
+    v_table     TEXT;
+    v_deleted   INTEGER;
+BEGIN
+    -- Row lock: two workers never purge the same guild concurrently
+    SELECT * INTO v_job FROM guild_purge_jobs WHERE guild_id = p_guild_id FOR UPDATE SKIP LOCKED;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('done', true, 'skipped', true);
+    END IF;
+    IF v_job.status = 'done' THEN
+        RETURN jsonb_build_object('done', true);
+    END IF;
+
+    FOREACH v_table IN ARRAY guild_purge_tables() LOOP
+        CONTINUE WHEN NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = v_table AND column_name = 'guild_id'
+        );
+
+        EXECUTE format(
+            'DELETE FROM %I WHERE ctid IN (SELECT ctid FROM %I WHERE guild_id = $1 LIMIT $2)',
+            v_table, v_table
+        ) USING p_guild_id, p_batch_size;
+        GET DIAGNOSTICS v_deleted = ROW_COUNT;
+
+        IF v_deleted > 0 THEN
+            UPDATE guild_purge_jobs
+            SET status = 'running',
+                current_table = v_table,
+                deleted_rows = jsonb_set(deleted_rows, ARRAY[v_table],
+                                         to_jsonb(COALESCE((deleted_rows->>v_table)::BIGINT, 0) + v_deleted)),
+                updated_at = NOW()
+            WHERE guild_id = p_guild_id;
+
+            RETURN jsonb_build_object('done', false, 'table', v_table, 'deleted', v_deleted);
+        END IF;
+    END LOOP;
+
+    UPDATE guild_purge_jobs
+    SET status = 'done', current_table = NULL, completed_at = NOW(), updated_at = NOW()
+    WHERE guild_id = p_guild_id;
+
+    RETURN jsonb_build_object('done', true);
+END;
+$$;
+
+COMMENT ON FUNCTION purge_guild_data IS 'Deletes one batch of a guild''s rows per call and records progress in guild_purge_jobs.';
+
+
+-- 5. WORK LIST: open purges, oldest first (resumed at startup)
+CREATE OR REPLACE FUNCTION get_pending_guild_purges(p_limit INTEGER DEFAULT 50)
+RETURNS SETOF guild_purge_jobs
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    SELECT * FROM guild_purge_jobs
+    WHERE status IN ('pending', 'running')
+    ORDER BY requested_at
+    LIMIT p_limit;
+$$;
+
+
+-- 6. Permissions
+ALTER TABLE guild_purge_jobs ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Service role full access guild_purge_jobs" ON guild_purge_jobs;
+CREATE POLICY "Service role full access guild_purge_jobs" ON guild_purge_jobs FOR ALL USING (true);
+
+GRANT EXECUTE ON FUNCTION request_guild_purge TO anon;
+GRANT EXECUTE ON FUNCTION cancel_guild_purge TO anon;
+GRANT EXECUTE ON FUNCTION purge_guild_data TO anon;
+GRANT EXECUTE ON FUNCTION get_pending_guild_purges TO anon;
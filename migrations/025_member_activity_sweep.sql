@@ -0,0 +1,124 @@
+-- =====================================================
+-- MIGRATION 025: Set-based inactive member sweep
+-- The daily inactive-user jobs used to run a guild select plus an RPC
+-- per guild, then load tasks per departed user. The bot now sends its
+-- cached member ID sets for many guilds at once and the database
+-- flags departed/returning users and cancels their open tasks in a
+-- single statement per batch.
+-- =====================================================
+
+-- 1. Columns used by the sweep (already present on most deployments)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS left_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE guilds ADD COLUMN IF NOT EXISTS inactivity_days INTEGER DEFAULT 30;
+
+CREATE INDEX IF NOT EXISTS idx_user_tasks_open_by_user ON user_tasks(guild_id, user_id)
+    WHERE status IN ('claimed', 'in_progress', 'submitted');
+
+COMMENT ON COLUMN users.left_at IS 'Set when the member left the guild; cleared when they are seen in it again';
+
+
+-- 2. MEMBERSHIP: p_members is {"<guild_id>": ["<user_id>", ...], ...} holding the
+--    complete member list of each guild. Users of those guilds missing from
+--    their list are flagged inactive and their open tasks cancelled; users
+--    that left earlier and are present again are reactivated. Users made
+--    inactive for other reasons (left_at IS NULL) are not touched.
+CREATE OR REPLACE FUNCTION sync_member_presence(
+    p_members JSONB
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_result JSONB;
+BEGIN
+    WITH present AS (
+        SELECT g.key AS guild_id, m.user_id
+        FROM jsonb_each(p_members) AS g(key, value),
+             jsonb_array_elements_text(g.value) AS m(user_id)
+    ),
+    departed AS (
+        UPDATE users u
+        SET is_active = false, left_at = NOW(), updated_at = NOW()
+        WHERE u.guild_id IN (SELECT jsonb_object_keys(p_members))
+          AND COALESCE(u.is_active, true)
+          AND NOT EXISTS (SELECT 1 FROM present p WHERE p.guild_id = u.guild_id AND p.user_id = u.user_id)
+        RETURNING u.guild_id, u.user_id
+    ),
+    returned AS (
+        UPDATE users u
+        SET is_active = true, left_at = NULL, updated_at = NOW()
+        FROM present p
+        WHERE u.guild_id = p.guild_id
+          AND u.user_id = p.user_id
+          AND u.is_active = false
+          AND u.left_at IS NOT NULL
+        RETURNING u.guild_id
+    ),
+    cancelled AS (
+        UPDATE user_tasks t
+        SET status = 'cancelled',
+            notes = 'user_left_server',
+            updated_at = NOW()
+        FROM departed d
+        WHERE t.guild_id = d.guild_id
+          AND t.user_id = d.user_id
+          AND t.status IN ('claimed', 'in_progress', 'submitted')
+        RETURNING t.guild_id
+    )
+    SELECT jsonb_build_object(
+        'marked_inactive', (SELECT COUNT(*) FROM departed),
+        'reactivated',     (SELECT COUNT(*) FROM returned),
+        'tasks_cancelled', (SELECT COUNT(*) FROM cancelled),
+        'guilds', COALESCE((
+            SELECT jsonb_object_agg(guild_id, n)
+            FROM (SELECT guild_id, COUNT(*) AS n FROM departed GROUP BY guild_id) d
+        ), '{}'::jsonb)
+    ) INTO v_result;
+
+    RETURN v_result;
+END;
+$$;
+
+COMMENT ON FUNCTION sync_member_presence IS 'Diffs a {guild_id: [user_id]} member map against users, flags leavers inactive, reactivates returners and cancels leavers'' open tasks.';
+
+
+-- 3. IDLE USERS: one pass over every listed guild using that guild''s
+--    inactivity_days and the last_at kept in transaction_user_totals (017).
+--    Returns {"<guild_id>": marked_count} for guilds where anyone was marked.
+CREATE OR REPLACE FUNCTION mark_idle_users(
+    p_guild_ids     TEXT[],
+    p_default_days  INTEGER DEFAULT 30
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_result JSONB;
+BEGIN
+    WITH marked AS (
+        UPDATE users u
+        SET is_active = false, updated_at = NOW()
+        FROM guilds g
+        WHERE g.guild_id = u.guild_id
+          AND g.guild_id = ANY(p_guild_ids)
+          AND COALESCE(u.is_active, true)
+          AND COALESCE(
+                (SELECT t.last_at FROM transaction_user_totals t
+                 WHERE t.guild_id = u.guild_id AND t.user_id = u.user_id),
+                u.created_at
+              ) < NOW() - make_interval(days => COALESCE(g.inactivity_days, p_default_days))
+        RETURNING u.guild_id
+    )
+    SELECT COALESCE(jsonb_object_agg(guild_id, n), '{}'::jsonb) INTO v_result
+    FROM (SELECT guild_id, COUNT(*) AS n FROM marked GROUP BY guild_id) m;
+
+    RETURN v_result;
+END;
+$$;
+
+COMMENT ON FUNCTION mark_idle_users IS 'Marks users with no transactions within their guild''s inactivity_days as inactive, for many guilds in one statement.';
+
+
+-- 4. Permissions
+GRANT EXECUTE ON FUNCTION sync_member_presence TO anon;
+GRANT EXECUTE ON FUNCTION mark_idle_users TO anon;
@@ -0,0 +1,42 @@
+-- =====================================================
+-- MIGRATION 026: Batched member role sync
+-- Role changes from on_member_update are coalesced per member for a
+-- short window and written as one bulk upsert plus one bulk delete,
+-- instead of a user_roles write per changed role per event.
+-- =====================================================
+
+-- 1. SYNC RPC: p_added / p_removed are JSON arrays of {guild_id, user_id, role_id}
+CREATE OR REPLACE FUNCTION sync_member_roles(
+    p_added     JSONB,
+    p_removed   JSONB
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_added     INTEGER;
+    v_removed   INTEGER;
+BEGIN
+    INSERT INTO user_roles (guild_id, user_id, role_id, assigned_at)
+    SELECT r.guild_id, r.user_id, r.role_id, NOW()
+    FROM jsonb_to_recordset(COALESCE(p_added, '[]'::jsonb)) AS r(guild_id TEXT, user_id TEXT, role_id TEXT)
+    ON CONFLICT (guild_id, user_id, role_id) DO UPDATE SET assigned_at = EXCLUDED.assigned_at;
+
+    GET DIAGNOSTICS v_added = ROW_COUNT;
+
+    DELETE FROM user_roles ur
+    USING jsonb_to_recordset(COALESCE(p_removed, '[]'::jsonb)) AS r(guild_id TEXT, user_id TEXT, role_id TEXT)
+    WHERE ur.guild_id = r.guild_id
+      AND ur.user_id = r.user_id
+      AND ur.role_id = r.role_id;
+
+    GET DIAGNOSTICS v_removed = ROW_COUNT;
+
+    RETURN jsonb_build_object('added', v_added, 'removed', v_removed);
+END;
+$$;
+
+COMMENT ON FUNCTION sync_member_roles IS 'Bulk upsert of added and bulk delete of removed user_roles rows from JSON arrays of {guild_id, user_id, role_id}.';
+
+
+GRANT EXECUTE ON FUNCTION sync_member_roles TO anon;
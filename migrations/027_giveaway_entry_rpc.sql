@@ -0,0 +1,83 @@
+-- =====================================================
+-- MIGRATION 027: Single-call giveaway entry
+-- A button press used to load the giveaway, look up the user's entry,
+-- insert/update it and bump total_entries in separate requests. The
+-- bot now pre-checks eligibility against a cached giveaway snapshot
+-- and commits with one enter_giveaway() call that re-validates the
+-- giveaway, writes the entry and returns the new entry count.
+-- =====================================================
+
+-- 1. ENTRY RPC: returns {success, entry, total_entries} or {success: false, error}
+--    Raffles also carry new_balance, tickets_added and total_tickets.
+--    error is one of not_found, not_active, ended, own_giveaway, invalid_tickets,
+--    already_entered, or the raffle RPC's message.
+CREATE OR REPLACE FUNCTION enter_giveaway(
+    p_giveaway_id   UUID,
+    p_guild_id      TEXT,
+    p_user_id       TEXT,
+    p_tickets       INTEGER DEFAULT 1
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_giveaway  giveaways%ROWTYPE;
+    v_entry     giveaway_entries%ROWTYPE;
+    v_result    JSONB;
+    v_total     INTEGER;
+BEGIN
+    SELECT * INTO v_giveaway FROM giveaways WHERE id = p_giveaway_id AND guild_id = p_guild_id;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('success', false, 'error', 'not_found');
+    END IF;
+    IF v_giveaway.status <> 'active' THEN
+        RETURN jsonb_build_object('success', false, 'error', 'not_active');
+    END IF;
+    IF v_giveaway.ends_at <= NOW() THEN
+        RETURN jsonb_build_object('success', false, 'error', 'ended');
+    END IF;
+    IF v_giveaway.created_by = p_user_id THEN
+        RETURN jsonb_build_object('success', false, 'error', 'own_giveaway');
+    END IF;
+    IF p_tickets IS NULL OR p_tickets < 1 THEN
+        RETURN jsonb_build_object('success', false, 'error', 'invalid_tickets');
+    END IF;
+
+    IF v_giveaway.entry_mode = 'raffle' THEN
+        -- Price and cap come from the row, not the caller (6-arg signature from schema.sql)
+        v_result := enter_raffle_giveaway(
+            p_giveaway_id, p_guild_id, p_user_id, p_tickets,
+            COALESCE(v_giveaway.raffle_cost, 0), COALESCE(v_giveaway.raffle_max_tickets_per_user, 10)
+        );
+        IF NOT COALESCE((v_result->>'success')::BOOLEAN, false) THEN
+            RETURN v_result;
+        END IF;
+
+        SELECT * INTO v_entry FROM giveaway_entries WHERE giveaway_id = p_giveaway_id AND user_id = p_user_id;
+        SELECT total_entries INTO v_total FROM giveaways WHERE id = p_giveaway_id;
+        RETURN v_result || jsonb_build_object('entry', to_jsonb(v_entry), 'total_entries', v_total);
+    END IF;
+
+    -- Open and role-restricted giveaways: one entry per user
+    INSERT INTO giveaway_entries (giveaway_id, guild_id, user_id, tickets, amount_spent)
+    VALUES (p_giveaway_id, p_guild_id, p_user_id, p_tickets, 0)
+    ON CONFLICT (giveaway_id, user_id) DO NOTHING
+    RETURNING * INTO v_entry;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('success', false, 'error', 'already_entered');
+    END IF;
+
+    UPDATE giveaways
+    SET total_entries = total_entries + p_tickets
+    WHERE id = p_giveaway_id
+    RETURNING total_entries INTO v_total;
+
+    RETURN jsonb_build_object('success', true, 'entry', to_jsonb(v_entry), 'total_entries', v_total);
+END;
+$$;
+
+COMMENT ON FUNCTION enter_giveaway IS 'Validates and records a giveaway entry in one call (raffles delegate to enter_raffle_giveaway); returns the new total_entries.';
+
+
+GRANT EXECUTE ON FUNCTION enter_giveaway TO anon;
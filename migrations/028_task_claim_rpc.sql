@@ -0,0 +1,75 @@
+-- =====================================================
+-- MIGRATION 028: Atomic single-call task claim
+-- The Supabase claim path read the task, checked max_claims, looked up
+-- an existing claim, inserted user_tasks and bumped current_claims in
+-- separate requests, so concurrent claims could over-fill a task.
+-- claim_task() does the guarded increment and the insert in one
+-- transaction. The pooled Postgres path calls the same function.
+-- =====================================================
+
+-- 1. CLAIM RPC: returns {success, task, claim} or {success: false, error}
+--    error is one of not_found, not_active, expired, full, already_claimed.
+CREATE OR REPLACE FUNCTION claim_task(
+    p_guild_id  TEXT,
+    p_user_id   TEXT,
+    p_task_id   BIGINT
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_task      tasks%ROWTYPE;
+    v_claim     user_tasks%ROWTYPE;
+BEGIN
+    -- The row lock taken by this UPDATE serialises concurrent claims on one task,
+    -- and the max_claims guard is re-checked against the committed counter
+    UPDATE tasks
+    SET current_claims = current_claims + 1, updated_at = NOW()
+    WHERE guild_id = p_guild_id AND task_id = p_task_id
+      AND status = 'active'
+      AND (expires_at IS NULL OR expires_at > NOW())
+      AND (max_claims IS NULL OR max_claims = -1 OR current_claims < max_claims)
+      AND NOT EXISTS (
+          SELECT 1 FROM user_tasks
+          WHERE guild_id = p_guild_id AND user_id = p_user_id AND task_id = p_task_id
+      )
+    RETURNING * INTO v_task;
+
+    IF NOT FOUND THEN
+        -- Nothing was written; report why
+        SELECT * INTO v_task FROM tasks WHERE guild_id = p_guild_id AND task_id = p_task_id;
+        IF NOT FOUND THEN
+            RETURN jsonb_build_object('success', false, 'error', 'not_found');
+        ELSIF v_task.status <> 'active' THEN
+            RETURN jsonb_build_object('success', false, 'error', 'not_active');
+        ELSIF EXISTS (SELECT 1 FROM user_tasks WHERE guild_id = p_guild_id AND user_id = p_user_id AND task_id = p_task_id) THEN
+            RETURN jsonb_build_object('success', false, 'error', 'already_claimed');
+        ELSIF v_task.expires_at IS NOT NULL AND v_task.expires_at <= NOW() THEN
+            RETURN jsonb_build_object('success', false, 'error', 'expired');
+        END IF;
+        RETURN jsonb_build_object('success', false, 'error', 'full');
+    END IF;
+
+    BEGIN
+        INSERT INTO user_tasks (guild_id, user_id, task_id, status, claimed_at, deadline)
+        VALUES (
+            p_guild_id, p_user_id, p_task_id, 'in_progress', NOW(),
+            CASE WHEN v_task.duration_hours = -1 THEN NOW() + INTERVAL '36500 days'
+                 ELSE NOW() + make_interval(hours => COALESCE(v_task.duration_hours, 24)) END
+        )
+        RETURNING * INTO v_claim;
+    EXCEPTION WHEN unique_violation THEN
+        -- Same user claiming twice at once: the other call won; undo our increment
+        UPDATE tasks SET current_claims = current_claims - 1
+        WHERE guild_id = p_guild_id AND task_id = p_task_id;
+        RETURN jsonb_build_object('success', false, 'error', 'already_claimed');
+    END;
+
+    RETURN jsonb_build_object('success', true, 'task', to_jsonb(v_task), 'claim', to_jsonb(v_claim));
+END;
+$$;
+
+COMMENT ON FUNCTION claim_task IS 'Atomically enforces status, expiry, max_claims and one claim per user, inserts user_tasks and returns the claim row.';
+
+
+GRANT EXECUTE ON FUNCTION claim_task TO anon;
@@ -0,0 +1,81 @@
+-- =====================================================
+-- MIGRATION 029: Backup change fingerprints
+-- The 6-hourly backup job reloaded every data type of every guild.
+-- backup_fingerprints() returns a cheap "row count : newest change"
+-- fingerprint per guild and data type, so the job only reloads (and
+-- the snapshot store only hashes) data types whose fingerprint moved.
+-- The (guild_id, updated_at) indexes let each aggregate run as an
+-- index-only scan instead of reading the rows.
+-- =====================================================
+
+-- 1. INDEXES
+CREATE INDEX IF NOT EXISTS idx_users_guild_updated ON users(guild_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_shop_items_guild_updated ON shop_items(guild_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_inventory_guild_updated ON inventory(guild_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_guild_updated ON tasks(guild_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_user_tasks_guild_updated ON user_tasks(guild_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_transactions_guild_timestamp ON transactions(guild_id, "timestamp");
+CREATE INDEX IF NOT EXISTS idx_announcements_guild_created ON announcements(guild_id, created_at) INCLUDE (version);
+CREATE INDEX IF NOT EXISTS idx_embeds_guild_updated ON embeds(guild_id, updated_at);
+
+
+-- 2. FINGERPRINT RPC: returns {guild_id: {data_type: 'count:versions:epoch'}}
+--    Data types match DataManager.load_guild_data. A deleted row changes the
+--    count, an edited row the newest timestamp. announcements has no
+--    updated_at; its edits move the sum of the version column that
+--    migration 022 bumps on every update.
+CREATE OR REPLACE FUNCTION backup_fingerprints(p_guild_ids TEXT[])
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+    WITH parts AS (
+        SELECT guild_id, 'config' AS data_type, COUNT(*) AS n, 0::BIGINT AS versions, MAX(updated_at) AS last_at
+        FROM guilds WHERE guild_id = ANY(p_guild_ids) GROUP BY guild_id
+        UNION ALL
+        SELECT guild_id, 'currency', COUNT(*), 0, MAX(updated_at)
+        FROM users WHERE guild_id = ANY(p_guild_ids) GROUP BY guild_id
+        UNION ALL
+        SELECT guild_id, 'currency', COUNT(*), 0, MAX(updated_at)
+        FROM shop_items WHERE guild_id = ANY(p_guild_ids) GROUP BY guild_id
+        UNION ALL
+        SELECT guild_id, 'currency', COUNT(*), 0, MAX(updated_at)
+        FROM inventory WHERE guild_id = ANY(p_guild_ids) GROUP BY guild_id
+        UNION ALL
+        SELECT guild_id, 'tasks', COUNT(*), 0, MAX(updated_at)
+        FROM tasks WHERE guild_id = ANY(p_guild_ids) GROUP BY guild_id
+        UNION ALL
+        SELECT guild_id, 'tasks', COUNT(*), 0, MAX(updated_at)
+        FROM user_tasks WHERE guild_id = ANY(p_guild_ids) GROUP BY guild_id
+        UNION ALL
+        SELECT guild_id, 'tasks', COUNT(*), 0, MAX(updated_at)
+        FROM task_settings WHERE guild_id = ANY(p_guild_ids) GROUP BY guild_id
+        UNION ALL
+        SELECT guild_id, 'transactions', COUNT(*), 0, MAX("timestamp")
+        FROM transactions WHERE guild_id = ANY(p_guild_ids) GROUP BY guild_id
+        UNION ALL
+        SELECT guild_id, 'announcements', COUNT(*), SUM(version), MAX(created_at)
+        FROM announcements WHERE guild_id = ANY(p_guild_ids) GROUP BY guild_id
+        UNION ALL
+        SELECT guild_id, 'embeds', COUNT(*), 0, MAX(updated_at)
+        FROM embeds WHERE guild_id = ANY(p_guild_ids) GROUP BY guild_id
+    ),
+    per_type AS (
+        SELECT guild_id, data_type,
+               SUM(n)::TEXT || ':' || SUM(versions)::TEXT || ':' || COALESCE(EXTRACT(EPOCH FROM MAX(last_at))::TEXT, '') AS fingerprint
+        FROM parts
+        GROUP BY guild_id, data_type
+    )
+    SELECT COALESCE(jsonb_object_agg(guild_id, data_types), '{}'::jsonb)
+    FROM (
+        SELECT guild_id, jsonb_object_agg(data_type, fingerprint) AS data_types
+        FROM per_type
+        GROUP BY guild_id
+    ) per_guild;
+$$;
+
+COMMENT ON FUNCTION backup_fingerprints IS 'Per guild and data type row count and newest change time; the backup job skips data types whose fingerprint is unchanged.';
+
+
+GRANT EXECUTE ON FUNCTION backup_fingerprints TO anon;
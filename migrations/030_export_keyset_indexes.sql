@@ -0,0 +1,24 @@
+-- =====================================================
+-- MIGRATION 030: Keyset indexes for streaming exports
+-- Inventory, audit log and moderation log exports now page with a
+-- keyset cursor ("rows after the last key") instead of loading
+-- everything at once. These indexes match each cursor's sort order so
+-- every page is a short index range scan.
+-- inventory, shop_items and archived_shop_items are already covered
+-- by their primary keys.
+-- =====================================================
+
+-- 1. MODERATION ACTIONS: exports page by id within a guild
+CREATE INDEX IF NOT EXISTS idx_moderation_actions_guild_id_id ON moderation_actions(guild_id, id);
+
+
+-- 2. AUDIT LOGS: exports page newest-first by (created_at, audit_id).
+--    moderation_audit_logs is created outside schema.sql, so only index it if present.
+DO $$
+BEGIN
+    IF to_regclass('public.moderation_audit_logs') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_moderation_audit_logs_guild_created
+            ON moderation_audit_logs(guild_id, created_at DESC, audit_id DESC);
+    END IF;
+END $$;
+
@@ -0,0 +1,196 @@
+-- =====================================================
+-- MIGRATION 031: Shop Sales Rollups
+-- Shop statistics loaded every shop transaction, filtered them by
+-- timestamp in Python and then loaded the whole currency blob for
+-- item popularity. Purchases are now folded into per-day, per-item
+-- buckets as they are logged, and get_shop_statistics() sums the
+-- buckets of the requested period in one call.
+-- =====================================================
+
+-- 1. DAILY BUCKETS: one row per (guild, day, item); category and name are
+--    captured at purchase time so breakdowns survive item deletion
+CREATE TABLE IF NOT EXISTS shop_sales_daily_rollups (
+    guild_id        TEXT NOT NULL REFERENCES guilds(guild_id) ON DELETE CASCADE,
+    bucket_date     DATE NOT NULL,
+    item_id         TEXT NOT NULL,
+    item_name       TEXT,
+    category        TEXT NOT NULL DEFAULT 'general',
+    sales_count     BIGINT NOT NULL DEFAULT 0,
+    quantity        BIGINT NOT NULL DEFAULT 0,
+    revenue         NUMERIC NOT NULL DEFAULT 0,
+    first_at        TIMESTAMP WITH TIME ZONE,
+    last_at         TIMESTAMP WITH TIME ZONE,
+
+    PRIMARY KEY (guild_id, bucket_date, item_id)
+);
+
+COMMENT ON TABLE shop_sales_daily_rollups IS 'Per-day, per-item shop sales, maintained by trigger on shop_purchase transactions';
+
+
+-- 2. TRIGGER: fold every purchase into its bucket
+--    process_purchase() logs one 'shop_purchase' transaction per purchase with
+--    item_id and quantity in metadata; this covers every purchase path.
+CREATE OR REPLACE FUNCTION apply_shop_sales_rollup()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_ts        TIMESTAMPTZ := COALESCE(NEW."timestamp", NOW());
+    v_item_id   TEXT := COALESCE(NEW.metadata->>'item_id', 'unknown');
+    v_category  TEXT;
+BEGIN
+    SELECT category INTO v_category FROM shop_items WHERE guild_id = NEW.guild_id AND item_id = v_item_id;
+    IF v_category IS NULL THEN
+        SELECT category INTO v_category FROM archived_shop_items WHERE guild_id = NEW.guild_id AND item_id = v_item_id;
+    END IF;
+
+    INSERT INTO shop_sales_daily_rollups AS r
+        (guild_id, bucket_date, item_id, item_name, category, sales_count, quantity, revenue, first_at, last_at)
+    VALUES
+        (NEW.guild_id, (v_ts AT TIME ZONE 'UTC')::DATE, v_item_id, NEW.metadata->>'item_name',
+         COALESCE(v_category, 'general'), 1, COALESCE((NEW.metadata->>'quantity')::BIGINT, 1),
+         ABS(NEW.amount), v_ts, v_ts)
+    ON CONFLICT (guild_id, bucket_date, item_id) DO UPDATE SET
+        item_name   = COALESCE(EXCLUDED.item_name, r.item_name),
+        category    = EXCLUDED.category,
+        sales_count = r.sales_count + 1,
+        quantity    = r.quantity + EXCLUDED.quantity,
+        revenue     = r.revenue + EXCLUDED.revenue,
+        first_at    = LEAST(r.first_at, EXCLUDED.first_at),
+        last_at     = GREATEST(r.last_at, EXCLUDED.last_at);
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS transactions_shop_sales_rollup ON transactions;
+CREATE TRIGGER transactions_shop_sales_rollup
+    AFTER INSERT ON transactions
+    FOR EACH ROW
+    WHEN (NEW.transaction_type = 'shop_purchase')
+    EXECUTE FUNCTION apply_shop_sales_rollup();
+
+
+-- 3. BACKFILL: materialize buckets for purchases logged before this migration
+TRUNCATE shop_sales_daily_rollups;
+
+INSERT INTO shop_sales_daily_rollups (guild_id, bucket_date, item_id, item_name, category, sales_count, quantity, revenue, first_at, last_at)
+SELECT t.guild_id,
+       (t."timestamp" AT TIME ZONE 'UTC')::DATE,
+       COALESCE(t.metadata->>'item_id', 'unknown'),
+       MAX(t.metadata->>'item_name'),
+       COALESCE(MAX(s.category), MAX(a.category), 'general'),
+       COUNT(*),
+       SUM(COALESCE((t.metadata->>'quantity')::BIGINT, 1)),
+       SUM(ABS(t.amount)),
+       MIN(t."timestamp"),
+       MAX(t."timestamp")
+FROM transactions t
+LEFT JOIN shop_items s ON s.guild_id = t.guild_id AND s.item_id = t.metadata->>'item_id'
+LEFT JOIN archived_shop_items a ON a.guild_id = t.guild_id AND a.item_id = t.metadata->>'item_id'
+WHERE t.transaction_type = 'shop_purchase' AND t.guild_id IS NOT NULL
+GROUP BY 1, 2, 3;
+
+
+-- 4. STATISTICS RPC: sum a guild's buckets since a date, plus live catalog totals
+--    Unique buyers come from transaction_daily_rollups (migration 017).
+CREATE OR REPLACE FUNCTION get_shop_statistics(
+    p_guild_id  TEXT,
+    p_since     DATE DEFAULT NULL,
+    p_top_items INTEGER DEFAULT 10
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_totals        JSONB;
+    v_popular       JSONB;
+    v_categories    JSONB;
+    v_stock_value   NUMERIC;
+    v_buyers        BIGINT;
+BEGIN
+    SELECT jsonb_build_object(
+               'total_sales',    COALESCE(SUM(sales_count), 0),
+               'total_quantity', COALESCE(SUM(quantity), 0),
+               'total_revenue',  COALESCE(SUM(revenue), 0),
+               'first_at',       MIN(first_at),
+               'last_at',        MAX(last_at)
+           )
+    INTO v_totals
+    FROM shop_sales_daily_rollups
+    WHERE guild_id = p_guild_id
+      AND (p_since IS NULL OR bucket_date >= p_since);
+
+    SELECT COUNT(DISTINCT user_id) INTO v_buyers
+    FROM transaction_daily_rollups
+    WHERE guild_id = p_guild_id
+      AND transaction_type = 'shop_purchase'
+      AND (p_since IS NULL OR bucket_date >= p_since);
+
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+               'item_id', r.item_id,
+               'name', COALESCE(s.name, r.item_name, r.item_id),
+               'emoji', s.emoji,
+               'sales', r.sales,
+               'quantity', r.quantity,
+               'revenue', r.revenue
+           ) ORDER BY r.sales DESC, r.revenue DESC), '[]'::jsonb)
+    INTO v_popular
+    FROM (
+        SELECT item_id, MAX(item_name) AS item_name, SUM(sales_count) AS sales,
+               SUM(quantity) AS quantity, SUM(revenue) AS revenue
+        FROM shop_sales_daily_rollups
+        WHERE guild_id = p_guild_id
+          AND (p_since IS NULL OR bucket_date >= p_since)
+        GROUP BY item_id
+        ORDER BY sales DESC, revenue DESC
+        LIMIT p_top_items
+    ) r
+    LEFT JOIN shop_items s ON s.guild_id = p_guild_id AND s.item_id = r.item_id;
+
+    -- Category breakdown: sales from the buckets, item counts from the live catalog
+    SELECT COALESCE(jsonb_object_agg(category, jsonb_build_object(
+               'sales', sales, 'quantity', quantity, 'revenue', revenue, 'items', items
+           )), '{}'::jsonb)
+    INTO v_categories
+    FROM (
+        SELECT COALESCE(sold.category, listed.category) AS category,
+               COALESCE(sold.sales, 0) AS sales,
+               COALESCE(sold.quantity, 0) AS quantity,
+               COALESCE(sold.revenue, 0) AS revenue,
+               COALESCE(listed.items, 0) AS items
+        FROM (
+            SELECT category, SUM(sales_count) AS sales, SUM(quantity) AS quantity, SUM(revenue) AS revenue
+            FROM shop_sales_daily_rollups
+            WHERE guild_id = p_guild_id
+              AND (p_since IS NULL OR bucket_date >= p_since)
+            GROUP BY category
+        ) sold
+        FULL OUTER JOIN (
+            SELECT COALESCE(category, 'general') AS category, COUNT(*) AS items
+            FROM shop_items
+            WHERE guild_id = p_guild_id
+            GROUP BY 1
+        ) listed ON listed.category = sold.category
+    ) c;
+
+    SELECT COALESCE(SUM(stock * price), 0) INTO v_stock_value
+    FROM shop_items
+    WHERE guild_id = p_guild_id AND stock > 0;
+
+    RETURN v_totals || jsonb_build_object(
+        'unique_buyers', v_buyers,
+        'popular_items', v_popular,
+        'category_breakdown', v_categories,
+        'stock_value', v_stock_value
+    );
+END;
+$$;
+
+COMMENT ON FUNCTION get_shop_statistics IS 'Summarizes shop_sales_daily_rollups for a guild since an optional date, with category item counts and stock value, in a single call.';
+
+
+-- 5. Permissions & RLS
+GRANT EXECUTE ON FUNCTION get_shop_statistics TO anon;
+
+ALTER TABLE shop_sales_daily_rollups ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Service role full access shop_sales_daily_rollups" ON shop_sales_daily_rollups;
+CREATE POLICY "Service role full access shop_sales_daily_rollups" ON shop_sales_daily_rollups FOR ALL USING (true);
@@ -0,0 +1,16 @@
+-- =====================================================
+-- MIGRATION 032: Guild config change sync
+-- The bot answers permission checks from in-memory guild config
+-- snapshots (admin/moderator roles, features, prefix), while the
+-- dashboard writes guilds from the web process. Every 15 seconds the
+-- bot asks for the rows changed since its watermark, less a minute of
+-- overlap:
+--   SELECT <config columns>, updated_at FROM guilds
+--   WHERE updated_at >= $since ORDER BY updated_at LIMIT $page
+-- so a role revoked on the dashboard stops granting access within
+-- seconds. An index on updated_at serves both the filter and the
+-- ordering, with no scan and sort of every guild on each tick.
+-- =====================================================
+
+-- 1. INDEX
+CREATE INDEX IF NOT EXISTS idx_guilds_updated_at ON guilds(updated_at);
@@ -0,0 +1,15 @@
+-- =====================================================
+-- MIGRATION 033: Autocomplete index change sync
+-- /buy, task and embed autocomplete read an in-memory index that was
+-- only built at startup. SearchIndex.sync_changes now polls shop_items,
+-- tasks and embeds every 30 seconds, one query per table, for rows
+-- whose updated_at is at or after that table's watermark. Unlike
+-- guilds, these tables grow with every server's catalogue, so each
+-- gets its own updated_at index. Deleted rows leave no trace for this
+-- poll; the bot's 10-minute full rehydrate drops them.
+-- =====================================================
+
+-- 1. INDEXES
+CREATE INDEX IF NOT EXISTS idx_shop_items_updated_at ON shop_items(updated_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks(updated_at);
+CREATE INDEX IF NOT EXISTS idx_embeds_updated_at ON embeds(updated_at);
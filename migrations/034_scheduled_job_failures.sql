@@ -0,0 +1,77 @@
+-- =====================================================
+-- MIGRATION 034: Fail scheduled_jobs that exhaust their attempts
+-- claim_scheduled_jobs stops leasing a job once it has been tried
+-- p_max_attempts times, which used to leave it pending forever with
+-- nothing recorded. The watchdog now calls fail_exhausted_scheduled_jobs
+-- to stamp those rows failed_at, drop them from the due index, and
+-- hand them back to the bot for logging.
+-- =====================================================
+
+-- 1. FAILURE COLUMN + DUE INDEX
+ALTER TABLE scheduled_jobs
+ADD COLUMN IF NOT EXISTS failed_at TIMESTAMP WITH TIME ZONE;
+
+COMMENT ON COLUMN scheduled_jobs.failed_at IS 'Set when the job ran out of attempts; failed jobs are never claimed again';
+
+DROP INDEX IF EXISTS idx_scheduled_jobs_due;
+CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_due ON scheduled_jobs(execute_at)
+WHERE is_executed = FALSE AND failed_at IS NULL;
+
+
+-- 2. CLAIM RPC: same as migration 018, skipping failed jobs
+CREATE OR REPLACE FUNCTION claim_scheduled_jobs(
+    p_owner             TEXT,
+    p_horizon_seconds   INTEGER DEFAULT 60,
+    p_lease_seconds     INTEGER DEFAULT 300,
+    p_limit             INTEGER DEFAULT 500,
+    p_max_attempts      INTEGER DEFAULT 5
+) RETURNS SETOF scheduled_jobs
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    UPDATE scheduled_jobs j
+    SET lease_owner = p_owner,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        attempts = COALESCE(j.attempts, 0) + 1
+    WHERE j.job_id IN (
+        SELECT c.job_id
+        FROM scheduled_jobs c
+        WHERE c.is_executed = FALSE
+          AND c.failed_at IS NULL
+          AND c.execute_at <= NOW() + make_interval(secs => p_horizon_seconds)
+          AND (c.lease_expires_at IS NULL OR c.lease_expires_at < NOW())
+          AND COALESCE(c.attempts, 0) < p_max_attempts
+        ORDER BY c.execute_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+$$;
+
+COMMENT ON FUNCTION claim_scheduled_jobs IS 'Leases due scheduled_jobs to one bot instance using FOR UPDATE SKIP LOCKED.';
+
+
+-- 3. FAIL RPC: mark exhausted jobs failed once their last lease has lapsed
+--    A job on its final attempt is left alone while that attempt may still be running.
+CREATE OR REPLACE FUNCTION fail_exhausted_scheduled_jobs(
+    p_max_attempts  INTEGER DEFAULT 5
+) RETURNS SETOF scheduled_jobs
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    UPDATE scheduled_jobs
+    SET failed_at = NOW(),
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE is_executed = FALSE
+      AND failed_at IS NULL
+      AND COALESCE(attempts, 0) >= p_max_attempts
+      AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+    RETURNING *;
+$$;
+
+COMMENT ON FUNCTION fail_exhausted_scheduled_jobs IS 'Marks scheduled_jobs that ran out of attempts as failed and returns them for logging.';
+
+
+GRANT EXECUTE ON FUNCTION claim_scheduled_jobs TO anon;
+GRANT EXECUTE ON FUNCTION fail_exhausted_scheduled_jobs TO anon;
@@ -31,6 +31,30 @@ def run_unit_tests():
     test_files = [
         'tests/test_sync_manager.py',
         'tests/test_auth_manager.py',
+        'tests/test_reminder_scheduler.py',
+        'tests/test_moderation_scheduler.py',
+        'tests/test_postgres_pool.py',
+        'tests/test_guild_config.py',
+        'tests/test_ad_rate_limiter.py',
+        'tests/test_guild_metadata.py',
+        'tests/test_discord_scheduler.py',
+        'tests/test_delayed_actions.py',
+        'tests/test_moderation_policy.py',
+        'tests/test_antispam.py',
+        'tests/test_guild_purge.py',
+        'tests/test_member_sweep.py',
+        'tests/test_member_role_sync.py',
+        'tests/test_user_ingestion.py',
+        'tests/test_giveaway_entry.py',
+        'tests/test_task_claim.py',
+        'tests/test_search_index.py',
+        'tests/test_guild_backup.py',
+        'tests/test_export_stream.py',
+        'tests/test_shop_statistics.py',
+        'tests/test_scheduled_announcements.py',
+        'tests/test_transaction_rollups.py',
+        'tests/test_member_list.py',
+        'tests/test_vote_leaderboard.py',
         # Add more test files as they are created
     ]
 
@@ -114,6 +138,8 @@ def run_performance_tests():
     """Run performance tests"""
     print("\n⚡ Running Performance Tests...")
 
+    results = {}
+
     # Basic performance test - just check import times for now
     start_time = time.time()
 
@@ -130,11 +156,37 @@ def run_performance_tests():
         import_time = end_time - start_time
 
         print(f"⚡ Import performance: {import_time:.2f}s")
-        return {'import_performance': {'status': 'PASSED', 'import_time': import_time}}
+        results['import_performance'] = {'status': 'PASSED', 'import_time': import_time}
 
     except Exception as e:
         print(f"❌ Performance test failed: {e}")
-        return {'import_performance': {'status': 'FAILED', 'error': str(e)}}
+        results['import_performance'] = {'status': 'FAILED', 'error': str(e)}
+
+    # Anti-spam stage: replay a 10k message burst from 2k users plus 10 spammers
+    try:
+        from core.moderation.antispam import AntiSpamEngine
+        from core.moderation.policy import ModerationPolicy
+
+        engine = AntiSpamEngine(max_tracked=1000)
+        policy = ModerationPolicy({})
+        start_time = time.perf_counter()
+        for i in range(10000):
+            user_id = (i // 5) % 10 if i % 5 == 0 else 100 + i % 2000
+            engine.check(1, user_id, f"message {i}", policy, now=i / 10000)
+        burst_time = time.perf_counter() - start_time
+
+        print(f"⚡ Anti-spam burst: {10000 / burst_time:,.0f} msg/s, {len(engine)} users tracked")
+        results['antispam_burst'] = {
+            'status': 'PASSED' if burst_time < 1.0 else 'FAILED',
+            'messages_per_second': 10000 / burst_time,
+            'tracked_users': len(engine)
+        }
+
+    except Exception as e:
+        print(f"❌ Anti-spam benchmark failed: {e}")
+        results['antispam_burst'] = {'status': 'FAILED', 'error': str(e)}
+
+    return results
 
 def generate_test_report(unit_results, integration_results, performance_results, total_passed, total_failed):
     """Generate comprehensive test report"""
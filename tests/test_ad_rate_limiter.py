@@ -0,0 +1,113 @@
+"""
+Tests for the in-memory ad-claim limiter and the single-RPC verification path
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from core.ad_rate_limiter import AdRateLimiter, AdLimitExceeded
+from core.ad_claim_manager import AdClaimManager
+
+DAY = 86400
+NOON = 20000 * DAY + 12 * 3600
+
+
+class TestAdRateLimiter:
+    """Test suite for AdRateLimiter"""
+
+    @pytest.fixture
+    def limiter(self):
+        return AdRateLimiter(daily_limit=3, cooldown_seconds=60)
+
+    def test_cooldown_and_daily_cap(self, limiter):
+        """Sessions need the cooldown between them and stop at the cap"""
+        limiter.acquire('1', NOON)
+        with pytest.raises(AdLimitExceeded, match="Please wait 30s"):
+            limiter.acquire('1', NOON + 30)
+
+        limiter.acquire('1', NOON + 60)
+        limiter.acquire('1', NOON + 120)
+        with pytest.raises(AdLimitExceeded, match="Daily ad limit reached"):
+            limiter.acquire('1', NOON + 180)
+
+        # Next UTC day starts a fresh count
+        limiter.acquire('1', NOON + DAY)
+
+    def test_release_returns_the_slot(self, limiter):
+        """A failed session creation does not count or start a cooldown"""
+        previous = limiter.acquire('1', NOON)
+        limiter.release('1', previous)
+
+        limiter.acquire('1', NOON + 1)
+
+    def test_merge_keeps_higher_counts(self, limiter):
+        """Counts from the database win when other processes created more sessions"""
+        limiter.acquire('1', NOON)
+        limiter.merge([
+            {'user_id': '1', 'view_count': 3, 'last_created_at': NOON - 600},
+            {'user_id': '2', 'view_count': 0, 'last_created_at': None}
+        ], NOON + 300)
+
+        with pytest.raises(AdLimitExceeded, match="Daily ad limit reached"):
+            limiter.acquire('1', NOON + 300)
+        assert len(limiter) == 2
+
+    def test_merge_drops_idle_users_from_earlier_days(self, limiter):
+        """Yesterday's entries past their cooldown are pruned"""
+        limiter.acquire('1', NOON - DAY)
+        limiter.merge([], NOON)
+
+        assert len(limiter) == 0
+
+
+class TestAdClaimVerification:
+    """Verification is one RPC call"""
+
+    @pytest.fixture
+    def manager(self):
+        data_manager = Mock()
+        return AdClaimManager(data_manager, Mock(), secret_key='test', rate_limiter=AdRateLimiter())
+
+    def test_verify_uses_single_rpc(self, manager):
+        rpc = manager.data_manager.admin_client.rpc
+        rpc.return_value.execute.return_value.data = {
+            'success': True, 'user_id': '1', 'guild_id': '2', 'reward_amount': 10,
+            'new_balance': 110, 'transaction_id': 'tx'
+        }
+
+        result = manager.verify_ad_view('ad_x', signature=manager.generate_verification_signature('ad_x'))
+
+        assert result['reward_granted'] is True
+        assert result['new_balance'] == 110
+        rpc.assert_called_once()
+        assert rpc.call_args.args[0] == 'verify_ad_view_and_reward'
+        manager.data_manager.admin_client.table.assert_not_called()
+
+    def test_verify_passes_through_rejections(self, manager):
+        rpc = manager.data_manager.admin_client.rpc
+        rpc.return_value.execute.return_value.data = {
+            'success': False, 'error': 'Ad already verified', 'already_rewarded': True
+        }
+
+        result = manager.verify_ad_view('ad_x', verification_data={'subid': 'ad_x'})
+
+        assert result == {'success': False, 'error': 'Ad already verified', 'already_rewarded': True}
+
+    def test_limit_checks_reconcile_when_stale(self, manager, monkeypatch):
+        """The first check warms the limiter; later checks reconcile once per interval"""
+        clock = [1000.0]
+        monkeypatch.setattr('core.ad_claim_manager.time.monotonic', lambda: clock[0])
+        rpc = manager.data_manager.admin_client.rpc
+        rpc.return_value.execute.return_value.data = []
+
+        manager._check_ad_limits('1')
+        clock[0] += 60
+        manager._check_ad_limits('2')
+        assert rpc.call_count == 1
+        assert rpc.call_args.args[0] == 'get_ad_limit_state'
+
+        clock[0] += manager.reconcile_interval
+        rpc.return_value.execute.side_effect = Exception("timeout")
+        manager._check_ad_limits('3')
+        manager._check_ad_limits('4')
+        assert rpc.call_count == 2
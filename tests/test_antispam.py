@@ -0,0 +1,119 @@
+"""
+Tests for the in-memory anti-spam stage
+"""
+
+import time
+import pytest
+from unittest.mock import Mock
+
+from core.moderation.antispam import AntiSpamEngine
+from core.moderation.enforcer import ProtectionEnforcer
+from core.moderation.policy import ModerationPolicy
+
+
+@pytest.fixture
+def policy():
+    return ModerationPolicy({'anti_spam': {
+        'max_messages': 5, 'window_seconds': 5, 'max_duplicates': 3, 'duplicate_window_seconds': 30
+    }})
+
+
+class TestAntiSpamEngine:
+    """Test suite for AntiSpamEngine"""
+
+    def test_flood_detected_inside_window(self, policy):
+        engine = AntiSpamEngine()
+        results = [engine.check(1, 2, f"msg {i}", policy, now=i * 0.5) for i in range(6)]
+
+        assert results[:5] == [None] * 5
+        assert results[5]['reason'] == 'message_flood'
+        assert 'followup' not in results[5]
+
+        # The rest of the burst is marked so it is deleted without re-escalating
+        assert engine.check(1, 2, "msg 6", policy, now=3.1)['followup'] is True
+
+    def test_thresholds_are_messages_allowed(self, policy):
+        """max_messages and max_duplicates messages pass; the next one inside the window is flagged"""
+        engine = AntiSpamEngine()
+        assert all(engine.check(1, 2, f"msg {i}", policy, now=i * 0.9) is None for i in range(5))
+        assert engine.check(1, 2, "msg 5", policy, now=5.0) is None  # first message has left the window
+        assert engine.check(1, 2, "msg 6", policy, now=5.1)['reason'] == 'message_flood'
+
+        assert all(engine.check(1, 3, "same", policy, now=i * 10) is None for i in range(3))
+        assert engine.check(1, 3, "same", policy, now=29)['reason'] == 'duplicate_messages'
+
+    def test_slow_senders_are_not_flagged(self, policy):
+        engine = AntiSpamEngine()
+
+        assert all(engine.check(1, 2, f"msg {i}", policy, now=i * 2.0) is None for i in range(20))
+
+    def test_duplicates_ignore_case_and_spacing(self, policy):
+        engine = AntiSpamEngine()
+        engine.check(1, 2, "FREE nitro here", policy, now=0)
+        engine.check(1, 2, "free  nitro here", policy, now=10)
+        engine.check(1, 2, "Free Nitro Here", policy, now=15)
+        result = engine.check(1, 2, "free nitro HERE", policy, now=20)
+
+        assert result['reason'] == 'duplicate_messages'
+        assert engine.check(1, 3, "free nitro here", policy, now=20) is None
+
+    def test_memory_is_bounded(self, policy):
+        """Over the cap, least recently active users are dropped; idle ones go first"""
+        engine = AntiSpamEngine(max_tracked=100, idle_seconds=60)
+        for user_id in range(1000):
+            engine.check(1, user_id, "hi", policy, now=0)
+        assert len(engine) == 100
+
+        engine.check(1, 'late', "hi", policy, now=120)
+        assert len(engine) == 1
+
+    def test_replays_10k_message_burst(self, policy):
+        """One second at 10k msg/s: 2k regular users plus 10 spammers, with a 1k-user cap"""
+        engine = AntiSpamEngine(max_tracked=1000)
+        spammers = set()
+        start = time.perf_counter()
+        for i in range(10000):
+            user_id = (i // 5) % 10 if i % 5 == 0 else 100 + i % 2000
+            if engine.check(1, user_id, f"message {i}", policy, now=i / 10000):
+                spammers.add(user_id)
+        elapsed = time.perf_counter() - start
+
+        assert len(engine) <= 1000
+        assert spammers == set(range(10))
+        assert elapsed < 2.0
+
+
+class TestSpamEnforcement:
+    """Spam violations feed evaluate_protection_action"""
+
+    @pytest.fixture
+    def enforcer(self):
+        protection_manager = Mock()
+        protection_manager.load_protection_config.return_value = {
+            'enabled': True, 'auto_actions': {'warn': True, 'mute': True}
+        }
+        return ProtectionEnforcer(protection_manager, Mock(), Mock())
+
+    def test_first_flag_escalates_followups_only_delete(self, enforcer):
+        flood = {'violation_type': 'spam', 'reason': 'message_flood', 'severity': 'high'}
+
+        plan = enforcer.evaluate_protection_action(1, Mock(), [], [], [], [flood])
+        assert plan['action'] == 'mute'
+        assert plan['reason'] == 'spam_detected'
+
+        plan = enforcer.evaluate_protection_action(1, Mock(), [], [], [], [{**flood, 'followup': True}])
+        assert plan['action'] == 'delete'
+        assert plan['notify'] is False
+
+    def test_spam_never_escalates_past_timeout(self, enforcer):
+        """Kick and ban auto_actions are for profanity; spam stops at a timeout"""
+        enforcer.protection_manager.load_protection_config.return_value = {
+            'enabled': True, 'auto_actions': {'warn': True, 'mute': True, 'kick': True, 'ban': True}
+        }
+        flood = {'violation_type': 'spam', 'reason': 'message_flood', 'severity': 'high'}
+
+        assert enforcer.evaluate_protection_action(1, Mock(), [], [], [], [flood])['action'] == 'mute'
+
+    def test_anti_spam_is_opt_in(self):
+        assert ModerationPolicy({}).spam_filter is False
+        assert ModerationPolicy({'anti_spam': {'enabled': True}}).spam_filter is True
@@ -0,0 +1,79 @@
+"""
+Tests for the timer-wheel delayed action service
+"""
+
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from core.delayed_actions import DelayedActionService
+
+T0 = 1_700_000_000.0
+
+
+class TestDelayedActionService:
+    """Test suite for DelayedActionService"""
+
+    @pytest.fixture
+    def clock(self):
+        with patch('core.delayed_actions.time.time', return_value=T0) as mocked:
+            yield mocked
+
+    def test_actions_fire_in_their_tick(self, clock):
+        service = DelayedActionService(slots=8)
+        service.schedule('delete_message', 2, {'message_id': 1})
+        service.schedule('delete_message', 5, {'message_id': 2})
+
+        assert service.pop_due(T0 + 1) == []
+        assert [a.payload['message_id'] for a in service.pop_due(T0 + 2)] == [1]
+        assert [a.payload['message_id'] for a in service.pop_due(T0 + 10)] == [2]
+        assert service.pending_count() == 0
+
+    def test_actions_beyond_one_revolution_wait_their_rounds(self, clock):
+        """A delay longer than the wheel wraps around with a round counter"""
+        service = DelayedActionService(slots=8)
+        service.schedule('unpin_message', 20)
+
+        assert service.pop_due(T0 + 12) == []
+        assert service.pop_due(T0 + 19) == []
+        assert len(service.pop_due(T0 + 20)) == 1
+
+    def test_cancel_and_stats(self, clock):
+        service = DelayedActionService(slots=8)
+        keep = service.schedule('delete_message', 3)
+        drop = service.schedule('unpin_message', 3)
+
+        assert service.cancel(drop) is True
+        assert service.cancel(drop) is False
+        stats = service.stats()
+        assert stats['pending'] == 1
+        assert stats['pending_by_kind'] == {'delete_message': 1}
+        assert stats['cancelled'] == 1
+        assert [a.id for a in service.pop_due(T0 + 3)] == [keep]
+
+    @pytest.mark.asyncio
+    async def test_run_due_calls_handler(self, clock):
+        service = DelayedActionService()
+        handler = AsyncMock(side_effect=[None, Exception("Missing Permissions")])
+        service.register('delete_message', handler)
+        service.schedule('delete_message', 0, {'message_id': 1})
+        service.schedule('delete_message', 0, {'message_id': 2})
+
+        assert await service.run_due(T0) == 2
+        assert handler.await_count == 2
+        assert service.stats()['fired'] == 1
+        assert service.stats()['failed'] == 1
+
+    def test_persistent_actions_survive_restart(self, tmp_path):
+        journal = str(tmp_path / 'actions.journal')
+        service = DelayedActionService(journal)
+        service.schedule('delete_message', 60, {'channel_id': 1, 'message_id': 2}, persist=True)
+        cancelled = service.schedule('delete_message', 60, {'channel_id': 1, 'message_id': 3}, persist=True)
+        service.schedule('delete_message', 60, {'channel_id': 1, 'message_id': 4})
+        service.cancel(cancelled)
+        service.flush_journal()
+
+        restored = DelayedActionService(journal)
+        assert restored.load() == 1
+        action = restored.pop_due(time.time() + 61)[0]
+        assert action.payload == {'channel_id': 1, 'message_id': 2}
@@ -0,0 +1,168 @@
+"""
+Tests for the priority scheduler in front of bot-initiated Discord REST calls
+"""
+
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from core.discord_scheduler import DiscordRequestScheduler, Priority, TokenBucket, bucket_for_path
+
+
+class TestTokenBucket:
+    """Test suite for TokenBucket"""
+
+    def test_refill_and_reserve(self):
+        bucket = TokenBucket(capacity=5, period=5.0, now=0)
+        for _ in range(4):
+            bucket.consume(0)
+
+        assert bucket.delay(0) == 0
+        # Background work must leave one token behind
+        assert bucket.delay(0, reserve=1) == pytest.approx(1.0)
+        assert bucket.delay(1.0, reserve=1) == 0
+
+    def test_learns_from_headers(self):
+        """An exhausted bucket reported by Discord is parked until its reset"""
+        bucket = TokenBucket(now=0)
+        bucket.learn(limit=10, remaining=0, reset_after=2.5, now=0)
+
+        assert bucket.capacity == 10
+        assert bucket.delay(1.0) == pytest.approx(1.5)
+
+
+class TestDiscordRequestScheduler:
+    """Test suite for DiscordRequestScheduler"""
+
+    def test_bucket_for_path(self):
+        assert bucket_for_path('/api/v10/channels/123/messages/456') == 'channel:123'
+        assert bucket_for_path('/api/v10/guilds/9/members/1') == 'guild:9'
+        assert bucket_for_path('/api/v10/users/@me/channels') == 'global'
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_runs_first(self):
+        scheduler = DiscordRequestScheduler(max_in_flight=1)
+        order = []
+        gate = asyncio.Event()
+
+        async def record(name):
+            if name == 'first':
+                await gate.wait()
+            order.append(name)
+
+        first = asyncio.ensure_future(scheduler.submit(lambda: record('first'), Priority.BACKGROUND))
+        await asyncio.sleep(0.01)
+        queued = [
+            asyncio.ensure_future(scheduler.submit(lambda: record('background'), Priority.BACKGROUND)),
+            asyncio.ensure_future(scheduler.submit(lambda: record('moderation'), Priority.MODERATION)),
+            asyncio.ensure_future(scheduler.submit(lambda: record('notification'), Priority.NOTIFICATION)),
+        ]
+        await asyncio.sleep(0.01)
+        gate.set()
+        await asyncio.gather(first, *queued)
+
+        assert order == ['first', 'moderation', 'notification', 'background']
+
+    @pytest.mark.asyncio
+    async def test_blocked_bucket_does_not_hold_up_others(self):
+        """A 429 parks its channel; work for other channels keeps flowing"""
+        scheduler = DiscordRequestScheduler()
+        scheduler.observe('/api/v10/channels/1/messages', 429, {'Retry-After': '5'})
+
+        async def ok():
+            return 'sent'
+
+        blocked = asyncio.ensure_future(scheduler.submit(ok, Priority.MODERATION, bucket='channel:1'))
+        result = await asyncio.wait_for(scheduler.submit(ok, Priority.BACKGROUND, bucket='channel:2'), 1)
+
+        assert result == 'sent'
+        assert not blocked.done()
+        assert scheduler.stats()['blocked_buckets'][0]['bucket'] == 'channel:1'
+        blocked.cancel()
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_and_surfaced_429_blocks_bucket(self):
+        scheduler = DiscordRequestScheduler()
+        error = Exception('Too Many Requests')
+        error.status = 429
+        error.response = Mock(headers={'Retry-After': '3'})
+
+        async def fail():
+            raise error
+
+        with pytest.raises(Exception, match='Too Many Requests'):
+            await scheduler.submit(fail, Priority.NOTIFICATION, bucket='dm:1')
+
+        stats = scheduler.stats()
+        assert stats['classes']['notification']['failed'] == 1
+        assert stats['rate_limit_hits'] == 1
+        assert stats['blocked_buckets'][0]['bucket'] == 'dm:1'
+
+    @pytest.mark.asyncio
+    async def test_dms_share_the_learned_channel_bucket(self):
+        """DMs are keyed by their DM channel, so limits observed for it pace later DMs"""
+        scheduler = DiscordRequestScheduler()
+        channel = Mock(id=55, send=AsyncMock(return_value='sent'))
+        user = Mock(dm_channel=None, create_dm=AsyncMock(return_value=channel))
+
+        assert await scheduler.send_dm(user, Priority.NOTIFICATION, content='hi') == 'sent'
+        channel.send.assert_awaited_once_with(content='hi')
+
+        scheduler.observe('/channels/55/messages', 429, {'Retry-After': '3'})
+        user.dm_channel = channel
+        queued = asyncio.ensure_future(scheduler.send_dm(user, content='again'))
+        await asyncio.sleep(0.05)
+
+        assert not queued.done()
+        assert scheduler.stats()['blocked_buckets'][0]['bucket'] == 'channel:55'
+        queued.cancel()
+
+    @pytest.mark.asyncio
+    async def test_stats_report_latency_per_class(self):
+        scheduler = DiscordRequestScheduler()
+
+        async def ok():
+            return None
+
+        await asyncio.gather(*(scheduler.submit(ok, Priority.MODERATION, bucket=f"channel:{i}") for i in range(3)))
+        stats = await scheduler.collect_stats()
+
+        moderation = stats['classes']['moderation']
+        assert moderation['completed'] == 3
+        assert moderation['queued'] == 0
+        assert set(moderation['wait']) == {'avg_ms', 'p95_ms'}
+        assert stats['in_flight'] == 0
+
+    @pytest.mark.asyncio
+    async def test_backlog_only_examines_lane_heads(self):
+        """A deep backlog behind an exhausted bucket is parked, not rescanned per dispatch"""
+        scheduler = DiscordRequestScheduler(max_in_flight=0)
+
+        async def ok():
+            return None
+
+        futures = [asyncio.ensure_future(scheduler.submit(ok, Priority.BACKGROUND, bucket='channel:1'))
+                   for _ in range(2000)]
+        futures.append(asyncio.ensure_future(scheduler.submit(ok, Priority.MODERATION, bucket='channel:1')))
+        futures.append(asyncio.ensure_future(scheduler.submit(ok, Priority.BACKGROUND, bucket='channel:2')))
+        await asyncio.sleep(0)
+        now = time.monotonic()
+        scheduler._bucket('channel:1', now).block(30, now)
+
+        checked = []
+        bucket_delay = scheduler._bucket_delay
+        scheduler._bucket_delay = lambda job, at: checked.append(job.bucket) or bucket_delay(job, at)
+
+        job, _ = scheduler._next_ready(now)
+        assert job.bucket == 'channel:2'
+        assert checked == ['channel:1', 'channel:2']
+
+        # channel:1 stays parked until its block lifts; nothing rescans it meanwhile
+        checked.clear()
+        assert scheduler._next_ready(now + 1) == (None, pytest.approx(29))
+        assert checked == []
+        assert scheduler.stats()['queued'] == 2002
+
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,192 @@
+"""
+Tests for keyset-paginated streaming exports
+"""
+
+import csv
+import io
+import json
+import re
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from core.export_stream import keyset_rows, keyset_filter, csv_chunks, json_chunks
+from core.shop_manager import ShopManager
+from core.audit_manager import AuditManager
+
+_ATOM = re.compile(r'(\w+)\.(eq|gt|lt)\."((?:[^"\\]|\\.)*)"')
+_OPS = {'eq': lambda a, b: a == b, 'gt': lambda a, b: a > b, 'lt': lambda a, b: a < b}
+
+
+def _split_terms(expr):
+    terms, depth, start = [], 0, 0
+    for i, ch in enumerate(expr):
+        depth += ch == '('
+        depth -= ch == ')'
+        if ch == ',' and depth == 0:
+            terms.append(expr[start:i])
+            start = i + 1
+    terms.append(expr[start:])
+    return terms
+
+
+def _matches(row, term):
+    if term.startswith('and('):
+        return all(_matches(row, t) for t in _split_terms(term[4:-1]))
+    column, op, literal = _ATOM.fullmatch(term).groups()
+    value = row[column]
+    return _OPS[op](value, type(value)(literal.replace('\\"', '"')))
+
+
+class FakeQuery:
+    """Just enough of the PostgREST builder for keyset paging"""
+
+    def __init__(self, table):
+        self.table = table
+        self.filters = []
+        self.orders = []
+        self.page = None
+
+    def select(self, *_):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: str(row[column]) == str(value))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row[column] >= value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row[column] <= value)
+        return self
+
+    def or_(self, expr):
+        self.filters.append(lambda row: any(_matches(row, t) for t in _split_terms(expr)))
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.page = n
+        return self
+
+    def execute(self):
+        self.table.requests += 1
+        rows = [r for r in self.table.rows if all(f(r) for f in self.filters)]
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda r: r[column], reverse=desc)
+        return SimpleNamespace(data=[dict(r) for r in rows[:self.page]])
+
+
+class FakeClient:
+    def __init__(self, **tables):
+        self.tables = {name: SimpleNamespace(rows=rows, requests=0) for name, rows in tables.items()}
+
+    def table(self, name):
+        return FakeQuery(self.tables[name])
+
+
+def _shop_manager(client):
+    data_manager = Mock()
+    data_manager.admin_client = client
+    return ShopManager(data_manager, Mock())
+
+
+class TestExportStream:
+    """Test suite for keyset paging and streaming writers"""
+
+    def test_keyset_filter_expression(self):
+        assert keyset_filter(['id'], [5]) == 'id.gt."5"'
+        assert keyset_filter(['created_at', 'audit_id'], ['2024-01-01T00:00:00+00:00', 'a1'], descending=True) == (
+            'created_at.lt."2024-01-01T00:00:00+00:00",'
+            'and(created_at.eq."2024-01-01T00:00:00+00:00",audit_id.lt."a1")'
+        )
+
+    def test_keyset_rows_visits_every_row_once(self):
+        rows = [{'user_id': f"u{u:03d}", 'item_id': f"i{i}"} for u in range(50) for i in range(7)]
+        client = FakeClient(inventory=rows)
+
+        seen = list(keyset_rows(lambda: client.table('inventory'), ['user_id', 'item_id'], page_size=40))
+
+        assert [(r['user_id'], r['item_id']) for r in seen] == sorted((r['user_id'], r['item_id']) for r in rows)
+        assert client.tables['inventory'].requests == 9
+
+    def test_writers_stream_valid_documents(self):
+        chunks = list(csv_chunks(['a', 'b'], ([n, n * 2] for n in range(1200)), rows_per_chunk=500))
+        assert len(chunks) == 3
+        assert list(csv.reader(io.StringIO(''.join(chunks))))[-1] == ['1199', '2398']
+
+        assert json.loads(''.join(json_chunks([1, 2]))) == [1, 2]
+        assert json.loads(''.join(json_chunks([('x', 1)], {'g': 1}, 'items', as_object=True))) == {'g': 1, 'items': {'x': 1}}
+
+    def test_inventory_export_resolves_items_once(self):
+        inventory = [{'guild_id': '1', 'user_id': f"{u:04d}", 'item_id': item, 'quantity': q, 'acquired_at': None}
+                     for u in range(300) for item, q in (('sword', 1), ('old', 2), ('gone', 3), ('zero', 0))]
+        client = FakeClient(
+            inventory=inventory,
+            shop_items=[{'guild_id': '1', 'item_id': 'sword', 'name': 'Sword', 'emoji': '⚔️', 'category': 'gear', 'price': 10},
+                        {'guild_id': '1', 'item_id': 'zero', 'name': 'Zero', 'emoji': None, 'category': None, 'price': 1}],
+            archived_shop_items=[{'guild_id': '1', 'item_id': 'old', 'name': 'Old', 'emoji': '🗝️', 'category': 'misc', 'price': 3}],
+        )
+        manager = _shop_manager(client)
+        manager.get_item = Mock(side_effect=AssertionError("per-row lookup"))
+
+        rows = list(csv.reader(io.StringIO(manager.export_inventory(1, format='csv'))))
+
+        assert rows[0] == ['User ID', 'Item ID', 'Name', 'Emoji', 'Quantity']
+        assert len(rows) == 1 + 600
+        assert rows[1] == ['0000', 'old', 'Old', '🗝️', '2']
+        assert client.tables['shop_items'].requests == 1
+
+    def test_inventory_json_groups_users(self):
+        client = FakeClient(
+            inventory=[{'guild_id': '1', 'user_id': u, 'item_id': 'a', 'quantity': 2, 'acquired_at': 't'} for u in ('7', '8')],
+            shop_items=[], archived_shop_items=[],
+        )
+
+        data = json.loads(_shop_manager(client).export_inventory(1))
+
+        assert data['inventories'] == {'7': {'a': {'quantity': 2, 'acquired_at': 't'}},
+                                       '8': {'a': {'quantity': 2, 'acquired_at': 't'}}}
+        assert _shop_manager(client).export_inventory(1, format='xml') == "Unsupported format"
+
+    def test_audit_export_pages_newest_first(self):
+        logs = [{'guild_id': '1', 'audit_id': f"a{n:03d}", 'event_type': 'moderation.warn', 'user_id': '2',
+                 'moderator_id': '3', 'message_id': None, 'details': json.dumps({'n': n}), 'can_undo': False,
+                 'created_at': f"2024-01-01T00:00:{n // 2:02d}+00:00"} for n in range(25)]
+        data_manager = Mock()
+        data_manager.admin_client = FakeClient(moderation_audit_logs=logs)
+        manager = AuditManager(data_manager)
+
+        exported = json.loads(''.join(manager.iter_audit_log_export(1, {'user_id': 2})))
+
+        assert [log['audit_id'] for log in exported] == sorted((l['audit_id'] for l in logs), reverse=True)
+        assert exported[0]['details'] == {'n': 24}
+        with pytest.raises(ValueError):
+            manager.iter_audit_log_export(1, format_type='xml')
+
+    def test_first_query_error_raises_before_any_chunk(self):
+        def failing_rows():
+            raise RuntimeError("PostgREST error")
+            yield
+
+        chunks = json_chunks(failing_rows(), {'guild_id': '1'}, 'items')
+        with pytest.raises(RuntimeError):
+            next(chunks)
+
+        client = FakeClient(moderation_audit_logs=[])
+        client.table = Mock(side_effect=RuntimeError("PostgREST error"))
+        data_manager = Mock()
+        data_manager.admin_client = client
+        with pytest.raises(RuntimeError):
+            next(AuditManager(data_manager).iter_audit_log_export(1))
+
+        assert ''.join(json_chunks(iter([]))) == '[]'
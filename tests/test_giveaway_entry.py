@@ -0,0 +1,102 @@
+"""
+Tests for single-call giveaway entry from a cached snapshot
+"""
+
+import pytest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import Mock
+
+from core.giveaway_manager import GiveawayManager, GiveawaySnapshot
+
+
+def _giveaway(**overrides):
+    row = {
+        'id': 'g1',
+        'guild_id': '1',
+        'created_by': '99',
+        'status': 'active',
+        'entry_mode': 'open',
+        'ends_at': (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
+        'required_role_ids': None,
+        'raffle_cost': 5,
+        'raffle_max_tickets_per_user': 3,
+        'total_entries': 0,
+    }
+    row.update(overrides)
+    return row
+
+
+class TestGiveawayEntry:
+    """Test suite for GiveawaySnapshot and GiveawayManager.enter_giveaway"""
+
+    @pytest.fixture
+    def manager(self):
+        data_manager = Mock()
+        manager = GiveawayManager(data_manager=data_manager)
+        manager.get_giveaway = Mock(return_value=_giveaway())
+        return manager
+
+    def _rpc_result(self, manager, data):
+        manager.data_manager.admin_client.rpc.return_value.execute.return_value = Mock(data=data)
+
+    def test_snapshot_is_immutable(self):
+        snapshot = GiveawaySnapshot(_giveaway())
+
+        with pytest.raises(AttributeError):
+            snapshot.status = 'ended'
+        assert snapshot.get('raffle_cost', 0) == 5
+
+    def test_burst_of_entries_loads_giveaway_once(self, manager):
+        self._rpc_result(manager, {'success': True, 'entry': {'user_id': '2'}, 'total_entries': 7})
+
+        for user_id in range(100):
+            entry = manager.enter_giveaway('g1', '1', str(user_id + 1000))
+
+        assert manager.get_giveaway.call_count == 1
+        rpc = manager.data_manager.admin_client.rpc
+        assert rpc.call_count == 100
+        assert rpc.call_args.args[0] == 'enter_giveaway'
+        assert entry['total_entries'] == 7
+
+    def test_ineligible_users_are_rejected_without_a_write(self, manager):
+        manager.get_giveaway.return_value = _giveaway(entry_mode='role_restricted', required_role_ids=['50'])
+
+        with pytest.raises(ValueError, match="own giveaway"):
+            manager.enter_giveaway('g1', '1', '99')
+        with pytest.raises(ValueError, match="required roles"):
+            manager.enter_giveaway('g1', '1', '2', member_role_ids=[10, 11])
+
+        manager.data_manager.admin_client.rpc.assert_not_called()
+
+    def test_server_rejection_drops_stale_snapshot(self, manager):
+        self._rpc_result(manager, {'success': False, 'error': 'not_active'})
+
+        with pytest.raises(ValueError, match="not active"):
+            manager.enter_giveaway('g1', '1', '2')
+        with pytest.raises(ValueError):
+            manager.enter_giveaway('g1', '1', '2')
+
+        assert manager.get_giveaway.call_count == 2
+
+    def test_duplicate_entry_message(self, manager):
+        self._rpc_result(manager, {'success': False, 'error': 'already_entered'})
+
+        with pytest.raises(ValueError, match="already entered"):
+            manager.enter_giveaway('g1', '1', '2')
+        assert manager.get_giveaway.call_count == 1
+
+    def test_raffle_entry_result_shape(self, manager):
+        """Raffle results carry the entry row plus the raffle RPC's balance and ticket counts"""
+        manager.get_giveaway.return_value = _giveaway(entry_mode='raffle')
+        self._rpc_result(manager, {
+            'success': True, 'new_balance': 85, 'tickets_added': 3, 'total_tickets': 3,
+            'entry': {'user_id': '2', 'tickets': 3, 'amount_spent': 15}, 'total_entries': 12
+        })
+
+        entry = manager.enter_giveaway('g1', '1', '2', tickets=3)
+
+        manager.data_manager.admin_client.rpc.assert_called_once_with('enter_giveaway', {
+            'p_giveaway_id': 'g1', 'p_guild_id': '1', 'p_user_id': '2', 'p_tickets': 3
+        })
+        assert entry == {'user_id': '2', 'tickets': 3, 'amount_spent': 15, 'total_entries': 12,
+                         'new_balance': 85, 'tickets_added': 3, 'total_tickets': 3}
@@ -0,0 +1,144 @@
+"""
+Tests for incremental, deduplicated guild backups
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from core.guild_backup import GuildBackupStore, split_entities, join_entities
+
+
+def _guild_data(users=3, transactions=600):
+    return {
+        'currency': {
+            'users': {str(u): {'balance': 100 + u, 'is_active': True} for u in range(users)},
+            'shop_items': {'vip': {'name': 'VIP', 'price': 500}},
+            'inventory': {},
+            'metadata': {'version': '2.0'},
+        },
+        'transactions': {
+            'transactions': [{'id': f't{n}', 'amount': n} for n in range(transactions, 0, -1)]
+        },
+        'config': {'prefix': '!', 'currency_name': 'coins', 'admin_roles': []},
+    }
+
+
+class FakeDataManager:
+    def __init__(self, data):
+        self.data = data
+        self.loads = []
+        self.admin_client = Mock()
+        self.admin_client.rpc.return_value.execute.side_effect = Exception("not migrated")
+
+    def load_guild_data(self, guild_id, data_type):
+        self.loads.append(data_type)
+        return self.data.get(data_type)
+
+
+class TestGuildBackupStore:
+    """Test suite for GuildBackupStore"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return GuildBackupStore(tmp_path, full_every=4, list_chunk=100)
+
+    def test_entities_round_trip(self):
+        data = _guild_data()['transactions']
+        data['note'] = 'x'
+        data['empty'] = {}
+
+        assert join_entities(split_entities(data, 100).items()) == data
+
+    def test_unchanged_guild_writes_nothing(self, store):
+        data = _guild_data()
+
+        first = store.snapshot(1, data)
+        second = store.snapshot(1, _guild_data())
+
+        assert first['base'] is True
+        assert second is None
+        assert len(store.list_snapshots(1)) == 1
+
+    def test_increment_holds_only_changed_entities(self, store):
+        store.snapshot(1, _guild_data())
+        data = _guild_data()
+        data['currency']['users']['1']['balance'] = 999
+        data['transactions']['transactions'].insert(0, {'id': 't601', 'amount': 601})
+
+        stats = store.snapshot(1, data)
+
+        manifest = store.read_manifest(1, stats['name'])
+        assert manifest['parent'] == store.list_snapshots(1)[0]
+        assert manifest['data_types']['currency']['set'] == {
+            'd:users:1': manifest['data_types']['currency']['set']['d:users:1']
+        }
+        # Only the newest transaction chunk changed; the five older ones are reused
+        assert list(manifest['data_types']['transactions']['set']) == ['l:transactions:00000006']
+        assert 'config' not in manifest['data_types']
+        assert stats['objects_written'] == 2
+
+    def test_identical_entities_are_stored_once_across_guilds(self, store):
+        store.snapshot(1, _guild_data())
+
+        stats = store.snapshot(2, _guild_data())
+
+        assert stats['objects_written'] == 0
+
+    def test_restore_streams_chain_with_removals(self, store):
+        store.snapshot(1, _guild_data())
+        data = _guild_data()
+        del data['currency']['users']['2']
+        data['config']['prefix'] = '?'
+        store.snapshot(1, data)
+
+        restored = dict(store.restore(1))
+
+        assert restored == data
+        assert dict(store.restore(1, store.list_snapshots(1)[0]))['config']['prefix'] == '!'
+        assert list(dict(store.restore(1, data_types=['config']))) == ['config']
+
+    def test_restore_from_a_fresh_process(self, store, tmp_path):
+        store.snapshot(1, _guild_data())
+        data = _guild_data(users=5)
+        store.snapshot(1, data)
+
+        reopened = GuildBackupStore(tmp_path, full_every=4, list_chunk=100)
+
+        assert dict(reopened.restore(1)) == data
+        assert reopened.snapshot(1, data) is None
+
+    def test_fingerprints_skip_unchanged_loads(self, store):
+        data_manager = FakeDataManager(_guild_data())
+        fingerprints = {'currency': '3:1', 'transactions': '600:1', 'config': '1:1'}
+
+        store.backup_guild(data_manager, 1, fingerprints)
+        data_manager.loads.clear()
+        store.backup_guild(data_manager, 1, dict(fingerprints, currency='3:2'))
+
+        assert data_manager.loads == ['currency', 'tasks', 'announcements', 'embeds']
+
+    def test_prune_keeps_whole_chains_and_collects_objects(self, store, tmp_path):
+        for n in range(9):
+            data = _guild_data(users=n + 1)
+            data['config']['prefix'] = f"p{n}"
+            store.snapshot(1, data)
+
+        pruned = store.prune(1, keep=3)
+        collected = store.collect_garbage()
+
+        names = store.list_snapshots(1)
+        assert pruned == 4
+        assert names[0].endswith('-base')
+        assert len(names) == 5
+        assert collected == 4
+        assert dict(store.restore(1)) == data
+
+    def test_run_summarises_a_pass(self, store):
+        data_manager = FakeDataManager(_guild_data())
+
+        summary = store.run(data_manager, ['1', '2'])
+        again = store.run(data_manager, ['1', '2'])
+
+        assert summary['snapshots'] == 2
+        assert again['snapshots'] == 0
+        assert again['unchanged'] == 2
@@ -0,0 +1,106 @@
+"""
+Tests for the immutable guild config snapshot store
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from core.guild_config import GuildConfig, GuildConfigStore
+
+
+def _row(guild_id, **overrides):
+    row = {
+        'guild_id': guild_id,
+        'prefix': '?',
+        'currency_symbol': '💎',
+        'admin_roles': ['10', '11'],
+        'subscription_tier': 'premium',
+        'feature_shop': False
+    }
+    row.update(overrides)
+    return row
+
+
+class TestGuildConfigStore:
+    """Test suite for GuildConfig and GuildConfigStore"""
+
+    def _client(self, pages):
+        client = Mock()
+        query = client.table.return_value.select.return_value
+        query.order.return_value.range.return_value.execute.side_effect = [Mock(data=page) for page in pages]
+        return client
+
+    def test_snapshot_is_immutable(self):
+        """Snapshots reject writes and expose the config dict interface"""
+        config = GuildConfig.from_row(_row('1'))
+
+        with pytest.raises(AttributeError):
+            config.prefix = '!'
+        assert config.get('prefix', '!') == '?'
+        assert config.get('missing', 'x') == 'x'
+        assert config['admin_roles'] == ('10', '11')
+        assert config.is_premium
+        assert not config.feature_enabled('shop')
+        assert config.feature_enabled('tasks')
+
+    def test_hydrate_pages_and_serves_from_memory(self):
+        """All guilds load in bulk and later reads do no I/O"""
+        client = self._client([[_row('1'), _row('2')], [_row('3')]])
+        store = GuildConfigStore(client, page_size=2)
+
+        assert store.hydrate() == 3
+        client.table.reset_mock()
+
+        assert store.get('2').prefix == '?'
+        assert store.get(3).currency_symbol == '💎'
+        client.table.assert_not_called()
+
+    def test_put_swaps_without_mutating_old_map(self):
+        """Writers replace the map; readers holding the old one are unaffected"""
+        store = GuildConfigStore(self._client([[_row('1')]]))
+        store.hydrate()
+        before = store._snapshots
+
+        store.put_row(_row('1', prefix='>'))
+
+        assert store.get('1').prefix == '>'
+        assert before['1'].prefix == '?'
+
+    def test_sync_changes_applies_rows_changed_elsewhere(self):
+        """Rows updated by another process replace their snapshots from the newest change on"""
+        client = self._client([[_row('1', updated_at='2024-01-01T00:00:00+00:00'),
+                                _row('2', updated_at='2024-01-01T00:05:00+00:00')]])
+        store = GuildConfigStore(client)
+        store.hydrate()
+        changed = client.table.return_value.select.return_value.gte.return_value.order.return_value.limit.return_value
+        changed.execute.return_value = Mock(data=[_row('1', admin_roles=[], updated_at='2024-01-01T00:07:00+00:00')])
+
+        assert store.sync_changes() == 1
+
+        since = client.table.return_value.select.return_value.gte.call_args.args
+        assert since == ('updated_at', '2024-01-01T00:04:00+00:00')
+        assert store.get('1').admin_roles == ()
+        assert store.get('2').admin_roles == ('10', '11')
+
+        store.sync_changes()
+        assert client.table.return_value.select.return_value.gte.call_args.args[1] == '2024-01-01T00:06:00+00:00'
+
+    def test_unknown_guild_gets_defaults_once(self):
+        """A guild missing from the table is cached with defaults"""
+        client = Mock()
+        client.table.return_value.select.return_value.eq.return_value.execute.return_value = Mock(data=[])
+        store = GuildConfigStore(client)
+
+        assert store.get('9').prefix == '!'
+        assert store.get('9').feature_enabled('shop')
+        assert client.table.call_count == 1
+
+    def test_memory_footprint(self):
+        """Footprint reports guild count and byte totals"""
+        store = GuildConfigStore(self._client([[_row('1'), _row('2')]]))
+        store.hydrate()
+
+        footprint = store.memory_footprint()
+        assert footprint['guilds'] == 2
+        assert footprint['total_bytes'] == footprint['snapshot_bytes'] + footprint['map_bytes']
+        assert footprint['snapshot_bytes'] > 0
@@ -0,0 +1,82 @@
+"""
+Tests for the shared guild metadata snapshot
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from core.guild_metadata import GuildMetadataStore, guild_rows
+
+
+def _guild(guild_id=1):
+    guild = Mock()
+    guild.id = guild_id
+    guild.name = 'Test Guild'
+    guild.icon = None
+    guild.member_count = 42
+    guild.channels = [_channel(guild, 10, 'general', 1), _channel(guild, 11, 'rules', 0)]
+    guild.roles = [_role(guild, 20, '@everyone', 0), _role(guild, 21, 'Admin', 5)]
+    return guild
+
+
+def _channel(guild, channel_id, name, position):
+    channel = Mock()
+    channel.guild, channel.id, channel.name, channel.position = guild, channel_id, name, position
+    channel.type = 'text'
+    return channel
+
+
+def _role(guild, role_id, name, position):
+    role = Mock()
+    role.guild, role.id, role.name, role.position = guild, role_id, name, position
+    role.color.value = 0xff0000
+    role.permissions.value = 8
+    role.mentionable = False
+    return role
+
+
+class TestGuildMetadataStore:
+    """Test suite for GuildMetadataStore"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return GuildMetadataStore(str(tmp_path / 'snapshot.db'))
+
+    def test_publish_and_read_from_another_connection(self, store, tmp_path):
+        """A second store on the same file (the web process) sees the bot's snapshot"""
+        store.publish([guild_rows(_guild())])
+        reader = GuildMetadataStore(str(tmp_path / 'snapshot.db'))
+
+        assert [c['name'] for c in reader.get_channels(1)] == ['rules', 'general']
+        assert [r['name'] for r in reader.get_roles('1')] == ['Admin', '@everyone']
+        assert reader.get_meta(1)['member_count'] == 42
+
+    def test_incremental_updates_bump_version(self, store):
+        """Event-driven writes change only their row and invalidate cached reads"""
+        guild = _guild()
+        store.publish([guild_rows(guild)])
+        version = store.get_meta(1)['version']
+        assert len(store.get_roles(1)) == 2
+
+        store.upsert_role(_role(guild, 22, 'Mod', 3))
+        store.remove_channel(1, 10)
+        store.set_member_count(1, 43)
+
+        assert store.get_meta(1)['version'] == version + 3
+        assert [r['name'] for r in store.get_roles(1)] == ['Admin', 'Mod', '@everyone']
+        assert [c['id'] for c in store.get_channels(1)] == ['11']
+        assert store.get_meta(1)['member_count'] == 43
+
+    def test_unchanged_guild_served_from_cache(self, store):
+        """Repeat reads return the cached list while the version is unchanged"""
+        store.publish([guild_rows(_guild())])
+
+        assert store.get_channels(1) is store.get_channels(1)
+
+    def test_removed_guild_is_empty(self, store):
+        store.publish([guild_rows(_guild())])
+        store.get_channels(1)
+        store.remove_guild(1)
+
+        assert store.get_channels(1) == []
+        assert store.get_meta(1) is None
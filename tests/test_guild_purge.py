@@ -0,0 +1,108 @@
+"""
+Tests for the batched background guild purge
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from core.guild_backup import GuildBackupStore
+from core.guild_purge import GuildPurgeWorker
+
+
+def _result(data):
+    result = Mock()
+    result.data = data
+    return result
+
+
+class TestGuildPurgeWorker:
+    """Test suite for GuildPurgeWorker"""
+
+    @pytest.fixture
+    def data_manager(self):
+        return Mock()
+
+    def _script(self, data_manager, responses):
+        """Route each RPC name to its queue of return values"""
+        calls = []
+
+        def rpc(name, params):
+            calls.append((name, params))
+            call = Mock()
+            call.execute.return_value = _result(responses[name].pop(0))
+            return call
+
+        data_manager.admin_client.rpc.side_effect = rpc
+        return calls
+
+    def test_purge_loops_until_done_and_cleans_up(self, data_manager, tmp_path):
+        guild_dir = tmp_path / '42'
+        guild_dir.mkdir()
+        calls = self._script(data_manager, {'purge_guild_data': [
+            {'done': False, 'table': 'transactions', 'deleted': 5000},
+            {'done': False, 'table': 'transactions', 'deleted': 12},
+            {'done': False, 'table': 'users', 'deleted': 30},
+            {'done': True},
+        ]})
+        worker = GuildPurgeWorker(data_manager, batch_size=5000, data_dir=str(tmp_path))
+
+        deleted = worker.purge_guild('42')
+
+        assert deleted == {'transactions': 5012, 'users': 30}
+        assert len(calls) == 4
+        assert calls[0][1] == {'p_guild_id': '42', 'p_batch_size': 5000}
+        assert not guild_dir.exists()
+        data_manager.guild_configs.discard.assert_called_once_with('42')
+
+    def test_cancelled_purge_keeps_local_data(self, data_manager, tmp_path):
+        guild_dir = tmp_path / '42'
+        guild_dir.mkdir()
+        self._script(data_manager, {'purge_guild_data': [{'done': True, 'skipped': True}]})
+
+        assert GuildPurgeWorker(data_manager, data_dir=str(tmp_path)).purge_guild('42') is None
+
+        assert guild_dir.exists()
+
+    def test_run_pending_counts_skipped_guilds_separately(self, data_manager, tmp_path):
+        self._script(data_manager, {
+            'get_pending_guild_purges': [[{'guild_id': '1'}, {'guild_id': '2'}]],
+            'purge_guild_data': [{'done': False, 'table': 'users', 'deleted': 3}, {'done': True, 'skipped': True},
+                                 {'done': True}],
+        })
+
+        totals = GuildPurgeWorker(data_manager, data_dir=str(tmp_path)).run_pending()
+
+        assert totals == {'purged': 1, 'skipped': 1, 'failed': 0}
+
+    def test_purge_deletes_guild_backups(self, data_manager, tmp_path):
+        store = GuildBackupStore(root=str(tmp_path / 'backups'))
+        store.snapshot('42', {'config': {'prefix': '!'}})
+        store.snapshot('7', {'config': {'prefix': '?'}})
+        self._script(data_manager, {'purge_guild_data': [{'done': True}]})
+
+        GuildPurgeWorker(data_manager, data_dir=str(tmp_path / 'guilds'), backup_store=store).purge_guild('42')
+
+        assert store.list_snapshots('42') == []
+        assert len(store.list_snapshots('7')) == 1
+        assert len(list(store.objects_dir.glob('*/*.json.gz'))) == 1
+
+    def test_run_pending_records_failures_and_continues(self, data_manager, tmp_path):
+        self._script(data_manager, {
+            'get_pending_guild_purges': [[{'guild_id': '1', 'attempts': 4, 'status': 'running'}, {'guild_id': '2'}]],
+            'purge_guild_data': [Exception, {'done': True}],
+        })
+        original = data_manager.admin_client.rpc.side_effect
+
+        def rpc(name, params):
+            call = original(name, params)
+            if call.execute.return_value.data is Exception:
+                call.execute.side_effect = Exception("statement timeout")
+            return call
+
+        data_manager.admin_client.rpc.side_effect = rpc
+        worker = GuildPurgeWorker(data_manager, max_attempts=5, data_dir=str(tmp_path))
+
+        assert worker.run_pending() == {'purged': 1, 'skipped': 0, 'failed': 1}
+        update = data_manager.admin_client.table.return_value.update.call_args.args[0]
+        assert update['attempts'] == 5
+        assert update['status'] == 'failed'
@@ -0,0 +1,111 @@
+"""
+Tests for the keyset-paginated dashboard member list and batched profile sync
+"""
+
+import threading
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from core.data_manager import DataManager
+
+
+class FakeUsersQuery:
+    """Just enough of the PostgREST builder for get_guild_users"""
+
+    def __init__(self, table):
+        self.table = table
+        self.filters = []
+        self.window = None
+        self.counting = False
+
+    def select(self, *_, count=None, head=False):
+        self.counting = count == 'exact'
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, n):
+        self.window = (0, n)
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end - start + 1)
+        return self
+
+    def execute(self):
+        rows = sorted((r for r in self.table.rows if all(f(r) for f in self.filters)), key=lambda r: r['user_id'])
+        if self.counting:
+            self.table.counts += 1
+            return SimpleNamespace(data=[], count=len(rows))
+        self.table.windows.append(self.window)
+        start, size = self.window
+        return SimpleNamespace(data=[dict(r) for r in rows[start:start + size]])
+
+
+class TestMemberList:
+    """Test suite for DataManager.get_guild_users and member profile sync"""
+
+    @pytest.fixture
+    def data_manager(self):
+        table = SimpleNamespace(
+            rows=[{'guild_id': '1', 'user_id': f"{n:03d}", 'username': f"user{n}", 'balance': n} for n in range(7)],
+            counts=0, windows=[]
+        )
+        dm = DataManager.__new__(DataManager)
+        dm.admin_client = Mock()
+        dm.admin_client.table.side_effect = lambda name: FakeUsersQuery(table)
+        dm.bot_instance = None
+        dm._user_count_cache = {}
+        dm._user_count_cache_ttl = 300
+        dm._pending_profile_updates = {}
+        dm._profile_updates_lock = threading.Lock()
+        dm.users_table = table
+        return dm
+
+    def test_cursor_pages_cross_boundaries_without_offsets(self, data_manager):
+        first = data_manager.get_guild_users(1, limit=3)
+        second = data_manager.get_guild_users(1, limit=3, after=first['next_cursor'])
+        last = data_manager.get_guild_users(1, limit=3, after=second['next_cursor'])
+
+        assert [u['user_id'] for u in first['users']] == ['000', '001', '002']
+        assert [u['user_id'] for u in second['users']] == ['003', '004', '005']
+        assert [u['user_id'] for u in last['users']] == ['006']
+        assert last['next_cursor'] is None
+        assert first['total'] == 7 and first['pages'] == 3
+        # Cursor pages never scan past an offset, and the total is counted once
+        assert data_manager.users_table.windows[1:] == [(0, 3), (0, 3)]
+        assert data_manager.users_table.counts == 1
+
+    def test_profile_updates_collapse_and_requeue_on_failure(self, data_manager):
+        rpc = data_manager.admin_client.rpc
+        sent = []
+
+        def sync(name, params):
+            sent.append([dict(p) for p in params['p_profiles']])
+            if len(sent) == 1:
+                # A newer change arrives while the failing call is in flight
+                data_manager.queue_member_profile_update(1, 6, 'newer', 'Newer')
+                raise Exception("timeout")
+            return Mock(execute=Mock(return_value=SimpleNamespace(data=len(params['p_profiles']))))
+
+        rpc.side_effect = sync
+        data_manager.queue_member_profile_update(1, 5, 'old', 'Old')
+        data_manager.queue_member_profile_update(1, 5, 'new', 'New')
+        data_manager.queue_member_profile_update(1, 6, 'six', 'Six')
+
+        assert data_manager.flush_member_profile_updates() == 0
+        assert [p['username'] for p in sent[0]] == ['new', 'six']
+
+        assert data_manager.flush_member_profile_updates() == 2
+        assert {p['user_id']: p['username'] for p in sent[1]} == {'5': 'new', '6': 'newer'}
+        assert data_manager.flush_member_profile_updates() == 0
@@ -0,0 +1,71 @@
+"""
+Tests for the coalesced member role sync
+"""
+
+import threading
+import pytest
+from unittest.mock import Mock
+
+from core.data_manager import DataManager
+
+
+class TestMemberRoleSync:
+    """Test suite for DataManager.queue/flush_member_role_updates"""
+
+    @pytest.fixture
+    def data_manager(self):
+        dm = DataManager.__new__(DataManager)
+        dm._pending_role_updates = {}
+        dm._role_updates_lock = threading.Lock()
+        dm.admin_client = Mock()
+        dm.admin_client.rpc.return_value.execute.return_value = Mock(data={'added': 0, 'removed': 0})
+        return dm
+
+    def _payload(self, dm):
+        args = dm.admin_client.rpc.call_args.args
+        assert args[0] == 'sync_member_roles'
+        added = {(r['user_id'], r['role_id']) for r in args[1]['p_added']}
+        removed = {(r['user_id'], r['role_id']) for r in args[1]['p_removed']}
+        return added, removed
+
+    def test_updates_coalesce_to_net_diff(self, data_manager):
+        data_manager.queue_member_role_update(1, 2, [10], [10, 11])
+        data_manager.queue_member_role_update(1, 2, [10, 11], [11, 12])
+        data_manager.queue_member_role_update(1, 2, [11, 12], [11, 12, 13])
+
+        data_manager.flush_member_role_updates()
+
+        added, removed = self._payload(data_manager)
+        assert added == {('2', '11'), ('2', '12'), ('2', '13')}
+        assert removed == {('2', '10')}
+
+    def test_flapping_role_costs_no_write(self, data_manager):
+        data_manager.queue_member_role_update(1, 2, [10], [10, 11])
+        data_manager.queue_member_role_update(1, 2, [10, 11], [10])
+
+        data_manager.flush_member_role_updates()
+
+        data_manager.admin_client.rpc.assert_not_called()
+
+    def test_mass_assignment_is_one_call(self, data_manager):
+        """A reaction-role flood of 3000 members flushes as a few bulk calls"""
+        for user_id in range(3000):
+            data_manager.queue_member_role_update(1, user_id, [], [99])
+
+        data_manager.flush_member_role_updates(batch_size=1000)
+
+        assert data_manager.admin_client.rpc.call_count == 3
+        assert data_manager._pending_role_updates == {}
+
+    def test_failed_flush_requeues_against_unsynced_base(self, data_manager):
+        data_manager.admin_client.rpc.return_value.execute.side_effect = Exception("timeout")
+        data_manager.queue_member_role_update(1, 2, [10], [11])
+        data_manager.flush_member_role_updates()
+
+        data_manager.admin_client.rpc.return_value.execute.side_effect = None
+        data_manager.queue_member_role_update(1, 2, [11], [12])
+        data_manager.flush_member_role_updates()
+
+        added, removed = self._payload(data_manager)
+        assert added == {('2', '12')}
+        assert removed == {('2', '10')}
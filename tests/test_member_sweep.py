@@ -0,0 +1,75 @@
+"""
+Tests for the set-based inactive member sweep
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from core.member_sweep import MemberActivitySweeper
+
+
+def _guild(guild_id, member_ids, chunked=True):
+    return SimpleNamespace(id=guild_id, chunked=chunked,
+                           members=[SimpleNamespace(id=m) for m in member_ids])
+
+
+class TestMemberActivitySweeper:
+    """Test suite for MemberActivitySweeper"""
+
+    @pytest.fixture
+    def data_manager(self):
+        return Mock()
+
+    def test_snapshot_skips_unchunked_guilds(self):
+        members = MemberActivitySweeper.snapshot([_guild(1, [10, 11]), _guild(2, [20], chunked=False)])
+
+        assert members == {'1': ['10', '11']}
+
+    def test_batches_pack_whole_guilds(self, data_manager):
+        sweeper = MemberActivitySweeper(data_manager, max_ids_per_call=5, max_guilds_per_call=2)
+        members = {'a': ['1', '2'], 'b': ['3', '4'], 'c': ['5'], 'd': ['6'] * 9, 'e': ['7']}
+
+        batches = sweeper.batches(members)
+
+        assert [list(b) for b in batches] == [['a', 'b'], ['c'], ['d'], ['e']]
+
+    def test_thousands_of_guilds_take_a_few_calls(self, data_manager):
+        data_manager.admin_client.rpc.return_value.execute.return_value = SimpleNamespace(data={
+            'marked_inactive': 2, 'reactivated': 1, 'tasks_cancelled': 3, 'guilds': {'7': 2}
+        })
+        sweeper = MemberActivitySweeper(data_manager, max_ids_per_call=50000)
+        guilds = [_guild(g, range(g * 100, g * 100 + 40)) for g in range(3000)]
+
+        summary = sweeper.sync_presence(sweeper.snapshot(guilds))
+
+        calls = data_manager.admin_client.rpc.call_args_list
+        assert len(calls) == 3
+        assert all(c.args[0] == 'sync_member_presence' for c in calls)
+        assert sum(len(c.args[1]['p_members']) for c in calls) == 3000
+        assert summary['marked_inactive'] == 6
+        assert summary['tasks_cancelled'] == 9
+        data_manager.invalidate_cache.assert_called_once_with('7', 'currency')
+
+    def test_failed_batch_does_not_stop_the_sweep(self, data_manager):
+        failing = Mock()
+        failing.execute.side_effect = Exception("statement timeout")
+        ok = Mock()
+        ok.execute.return_value = SimpleNamespace(data={'marked_inactive': 1, 'guilds': {'b': 1}})
+        data_manager.admin_client.rpc.side_effect = [failing, ok]
+        sweeper = MemberActivitySweeper(data_manager, max_guilds_per_call=1)
+
+        summary = sweeper.sync_presence({'a': ['1'], 'b': ['2']})
+
+        assert summary['failed_batches'] == 1
+        assert summary['guilds'] == {'b': 1}
+
+    def test_mark_idle_chunks_guild_ids(self, data_manager):
+        data_manager.admin_client.rpc.return_value.execute.return_value = SimpleNamespace(data={})
+        sweeper = MemberActivitySweeper(data_manager, max_guilds_per_call=1000)
+
+        sweeper.mark_idle([str(g) for g in range(2500)])
+
+        calls = data_manager.admin_client.rpc.call_args_list
+        assert [len(c.args[1]['p_guild_ids']) for c in calls] == [1000, 1000, 500]
+        assert calls[0].args[0] == 'mark_idle_users'
@@ -0,0 +1,100 @@
+"""
+Tests for the compiled per-guild moderation policy
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from core.moderation.policy import DomainTrie, ModerationPolicy, extract_urls
+from core.moderation.protection_manager import ProtectionManager
+from core.moderation.scanner import MessageScanner
+
+
+def _member(role_ids=(), administrator=False, manage_messages=False):
+    member = Mock()
+    member.roles = [Mock(id=role_id) for role_id in role_ids]
+    permissions = Mock(administrator=administrator, kick_members=False, ban_members=False,
+                       manage_messages=manage_messages, manage_channels=False, manage_roles=False)
+    member.guild_permissions = permissions
+    return member
+
+
+class TestDomainTrie:
+    """Test suite for DomainTrie"""
+
+    def test_exact_and_wildcard_patterns(self):
+        trie = DomainTrie(['example.com', '*.cdn.net', '*discord.gg'])
+
+        assert trie.matches('example.com')
+        assert trie.matches('EXAMPLE.com:8080')
+        assert not trie.matches('www.example.com')
+        assert trie.matches('img.cdn.net')
+        assert not trie.matches('cdn.net')
+        assert trie.matches('discord.gg')
+        assert trie.matches('a.b.discord.gg')
+        assert not trie.matches('notdiscord.gg')
+        assert not trie.matches('com')
+
+    def test_extract_urls(self):
+        urls = extract_urls("see https://Www.Example.com/a?b=1 and http://x.io:80/")
+
+        assert urls == [('https://Www.Example.com/a?b=1', 'www.example.com'), ('http://x.io:80/', 'x.io:80')]
+        assert extract_urls("no links here") == []
+
+
+class TestModerationPolicy:
+    """Test suite for ModerationPolicy and its cache in ProtectionManager"""
+
+    @pytest.fixture
+    def config(self):
+        return {
+            'enabled': True,
+            'link_filter': True,
+            'whitelist_domains': ['*youtube.com'],
+            'blacklist_domains': ['*.evil.io'],
+            'exempt_roles': ['10'],
+            'exempt_roles_links': [20],
+            'exempt_roles_files': ['30'],
+            'exempt_channels': ['99'],
+        }
+
+    @pytest.fixture
+    def manager(self, config):
+        data_manager = Mock()
+        data_manager.load_guild_data.return_value = {'moderation': config}
+        data_manager.get_config_snapshot.return_value = {'admin_roles': ['40'], 'moderator_roles': []}
+        return ProtectionManager(data_manager)
+
+    def test_exemptions_accept_string_or_int_ids(self, config):
+        policy = ModerationPolicy(config, staff_roles=['40'])
+
+        assert policy.is_exempt(99, [])
+        assert policy.is_exempt(1, [Mock(id=10)])
+        assert not policy.is_exempt(1, [Mock(id=11)])
+        assert policy.is_link_exempt(_member([20]))
+        assert policy.is_link_exempt(_member([40]))
+        assert policy.is_link_exempt(_member(manage_messages=True))
+        assert not policy.is_link_exempt(_member([30]))
+        assert policy.is_file_exempt(_member([30]))
+
+    def test_policy_rebuilt_only_on_config_change(self, manager):
+        policy = manager.get_policy(1)
+        assert manager.get_policy(1) is policy
+
+        manager.on_guild_config_reload(1)
+        assert manager.get_policy(1) is not policy
+
+    def test_scanner_classifies_links(self, manager):
+        scanner = MessageScanner(manager)
+
+        links = scanner.scan_message_for_links(1, "https://m.youtube.com/watch and https://x.evil.io/p")
+
+        assert [(l['domain'], l['is_whitelisted'], l['is_blacklisted']) for l in links] == [
+            ('m.youtube.com', True, False), ('x.evil.io', False, True)
+        ]
+
+    def test_messages_without_links_skip_config(self, manager):
+        scanner = MessageScanner(manager)
+
+        assert scanner.scan_message_for_links(1, "just chatting") == []
+        manager.data_manager.load_guild_data.assert_not_called()
@@ -0,0 +1,108 @@
+"""
+Tests for the lease-based ModerationScheduler executor
+"""
+
+import threading
+import time
+import pytest
+from unittest.mock import AsyncMock, Mock
+from datetime import datetime, timezone
+
+from core.moderation.scheduler import ModerationScheduler
+
+
+class TestModerationScheduler:
+    """Test suite for ModerationScheduler"""
+
+    @pytest.fixture
+    def data_manager(self):
+        dm = Mock()
+        dm.admin_client = Mock()
+        return dm
+
+    def _job(self, job_id, execute_ts, job_type='unmute'):
+        return {
+            'job_id': job_id,
+            'guild_id': '1',
+            'user_id': '2',
+            'job_type': job_type,
+            'execute_at': datetime.fromtimestamp(execute_ts, timezone.utc).isoformat(),
+            'job_data': {}
+        }
+
+    def test_claim_fills_heap_in_due_order(self, data_manager):
+        """Claimed jobs are popped earliest first and future ones stay queued"""
+        now = time.time()
+        data_manager.admin_client.rpc.return_value.execute.return_value.data = [
+            self._job('late', now + 50),
+            self._job('early', now - 10)
+        ]
+        scheduler = ModerationScheduler(Mock(), data_manager)
+
+        assert scheduler._claim_jobs(60) == 2
+        assert [j['job_id'] for j in scheduler._pop_due(now)] == ['early']
+        assert scheduler._next_due() == pytest.approx(now + 50, abs=1)
+
+    @pytest.mark.asyncio
+    async def test_only_successful_jobs_are_acknowledged(self, data_manager):
+        """Failed jobs are left leased so they retry; successes are acked in one call"""
+        now = time.time()
+        data_manager.admin_client.rpc.return_value.execute.return_value.data = [
+            self._job('ok', now - 1),
+            self._job('boom', now - 1, job_type='unban')
+        ]
+        scheduler = ModerationScheduler(Mock(), data_manager)
+        scheduler._handlers['unmute'] = AsyncMock()
+        scheduler._handlers['unban'] = AsyncMock(side_effect=Exception("Discord error"))
+
+        await scheduler.execute_database_jobs(data_manager, Mock())
+
+        ack_call = data_manager.admin_client.rpc.call_args_list[-1]
+        assert ack_call.args[0] == 'complete_scheduled_jobs'
+        assert ack_call.args[1]['p_job_ids'] == ['ok']
+        assert ack_call.args[1]['p_owner'] == scheduler.instance_id
+
+    @pytest.mark.asyncio
+    async def test_claim_and_ack_rpcs_run_off_the_event_loop(self, data_manager):
+        """Neither PostgREST round-trip blocks the loop thread"""
+        now = time.time()
+        loop_thread = threading.get_ident()
+        calls = []
+
+        def rpc(name, params):
+            calls.append((name, threading.get_ident()))
+            return Mock(execute=Mock(return_value=Mock(data=[self._job('ok', now - 1)] if name == 'claim_scheduled_jobs' else 1)))
+
+        data_manager.admin_client.rpc.side_effect = rpc
+        scheduler = ModerationScheduler(Mock(), data_manager)
+        scheduler._handlers['unmute'] = AsyncMock()
+
+        await scheduler.execute_database_jobs(data_manager, Mock())
+
+        assert [name for name, _ in calls] == ['claim_scheduled_jobs', 'complete_scheduled_jobs']
+        assert all(thread != loop_thread for _, thread in calls)
+
+    def test_cancel_drops_local_job(self, data_manager):
+        """A cancelled job is removed locally and skipped in the heap"""
+        now = time.time()
+        data_manager.admin_client.rpc.return_value.execute.return_value.data = [self._job('a', now - 1)]
+        scheduler = ModerationScheduler(Mock(), data_manager)
+        scheduler._claim_jobs(60)
+
+        assert scheduler.cancel_job('a') is True
+        assert scheduler._pop_due(now) == []
+        assert scheduler._next_due() is None
+
+    def test_exhausted_jobs_are_failed_and_logged(self, data_manager, caplog):
+        """Jobs past the attempt limit are handed back by the fail RPC and logged"""
+        exhausted = dict(self._job('stuck', time.time() - 600), attempts=ModerationScheduler.MAX_ATTEMPTS)
+        data_manager.admin_client.rpc.return_value.execute.return_value.data = [exhausted]
+        scheduler = ModerationScheduler(Mock(), data_manager)
+
+        with caplog.at_level('ERROR', logger='core.moderation.scheduler'):
+            assert scheduler.fail_exhausted_jobs() == [exhausted]
+
+        data_manager.admin_client.rpc.assert_called_once_with(
+            'fail_exhausted_scheduled_jobs', {'p_max_attempts': ModerationScheduler.MAX_ATTEMPTS}
+        )
+        assert "stuck" in caplog.text and "after 5 attempts" in caplog.text
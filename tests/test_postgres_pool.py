@@ -0,0 +1,147 @@
+"""
+Tests for the pooled PostgreSQL transaction backend
+
+Unit tests use an in-memory connection stand-in. The integration tests run
+against a real local Postgres when TEST_DATABASE_URL is set.
+"""
+
+import asyncio
+import os
+import uuid
+import pytest
+from collections import OrderedDict
+from unittest.mock import AsyncMock, Mock
+
+from core.postgres_pool import PostgresPool, PostgresTransactionContext
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.statusmessage = 'UPDATE 1'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, args=None):
+        self.conn.statements.append((sql, args))
+
+    def fetchone(self):
+        return self.conn.rows[0] if self.conn.rows else None
+
+    def fetchall(self):
+        return list(self.conn.rows)
+
+
+class FakeConnection:
+    """Records statements instead of talking to a server"""
+
+    def __init__(self, rows=None):
+        self.prepared = OrderedDict()
+        self.statement_counter = 0
+        self.statements = []
+        self.rows = rows or []
+        self.closed = 0
+        self.commit = Mock()
+        self.rollback = Mock()
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+
+class TestPostgresPool:
+    """Test suite for PostgresPool with a connection stand-in"""
+
+    @pytest.fixture
+    def pool(self):
+        # min_connections=0 keeps the pool lazy, so no server is contacted
+        return PostgresPool('postgresql://localhost/unused', min_connections=0, max_prepared=2)
+
+    def test_query_is_prepared_once_per_connection(self, pool):
+        """Repeated queries reuse the prepared statement"""
+        conn = FakeConnection(rows=[{'next_task_id': 5}])
+        query = "SELECT next_task_id FROM task_settings WHERE guild_id = $1"
+
+        assert pool.run(conn, query, ('1',), 'one') == {'next_task_id': 5}
+        pool.run(conn, query, ('2',), 'one')
+
+        prepares = [sql for sql, _ in conn.statements if sql.startswith('PREPARE')]
+        assert prepares == [f"PREPARE evl_stmt_1 AS {query}"]
+        assert conn.statements[-1] == ("EXECUTE evl_stmt_1 (%s)", ('2',))
+
+    def test_prepared_cache_evicts_least_recent(self, pool):
+        """Past max_prepared the oldest statement is deallocated"""
+        conn = FakeConnection()
+        for query in ("SELECT 1", "SELECT 2", "SELECT 3"):
+            pool.run(conn, query, (), 'none')
+
+        assert ("DEALLOCATE evl_stmt_1", None) in conn.statements
+        assert list(conn.prepared) == ["SELECT 2", "SELECT 3"]
+
+    @pytest.mark.asyncio
+    async def test_transaction_commits_or_rolls_back(self, pool):
+        """Commit on success, roll back on error, always return the connection"""
+        conn = FakeConnection()
+        pool.acquire = AsyncMock(return_value=conn)
+        pool.release = AsyncMock()
+
+        async with PostgresTransactionContext(pool) as tx:
+            await tx.execute("UPDATE tasks SET status = $1", 'active')
+        conn.commit.assert_called_once()
+
+        with pytest.raises(ValueError):
+            async with PostgresTransactionContext(pool) as tx:
+                raise ValueError("boom")
+        conn.rollback.assert_called_once()
+        assert pool.release.await_count == 2
+
+
+@pytest.mark.skipif(not os.getenv('TEST_DATABASE_URL'), reason="TEST_DATABASE_URL not set")
+class TestPostgresPoolIntegration:
+    """Runs against a local Postgres (e.g. postgresql://postgres@localhost/postgres)"""
+
+    @pytest.fixture
+    def pool(self):
+        pool = PostgresPool(os.environ['TEST_DATABASE_URL'], max_connections=5)
+        table = f"task_settings_{uuid.uuid4().hex[:8]}"
+        conn = pool._pool.getconn()
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE TABLE {table} (guild_id TEXT PRIMARY KEY, next_task_id BIGINT DEFAULT 1)")
+        conn.commit()
+        pool._pool.putconn(conn)
+        pool.table = table
+        yield pool
+        conn = pool._pool.getconn()
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE {table}")
+        conn.commit()
+        pool._pool.putconn(conn)
+        pool.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_task_ids_are_unique(self, pool):
+        """The single-statement id allocation never hands out the same id twice"""
+        query = f"""INSERT INTO {pool.table} (guild_id, next_task_id) VALUES ($1, 1)
+                    ON CONFLICT (guild_id) DO UPDATE SET next_task_id = {pool.table}.next_task_id + 1
+                    RETURNING next_task_id"""
+
+        async def allocate():
+            async with pool.transaction() as conn:
+                return (await conn.fetchrow(query, 'guild'))['next_task_id']
+
+        ids = await asyncio.gather(*(allocate() for _ in range(20)))
+        assert sorted(ids) == list(range(1, 21))
+
+    @pytest.mark.asyncio
+    async def test_rollback_discards_writes(self, pool):
+        """Writes inside a failed transaction are not visible afterwards"""
+        with pytest.raises(RuntimeError):
+            async with pool.transaction() as conn:
+                await conn.execute(f"INSERT INTO {pool.table} (guild_id) VALUES ($1)", 'rolled_back')
+                raise RuntimeError("abort")
+
+        async with pool.transaction() as conn:
+            assert await conn.fetchrow(f"SELECT * FROM {pool.table} WHERE guild_id = $1", 'rolled_back') is None
@@ -0,0 +1,106 @@
+"""
+Tests for the heap-based ReminderScheduler
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock
+
+from core.reminder_scheduler import ReminderScheduler
+
+
+class TestReminderScheduler:
+    """Test suite for ReminderScheduler"""
+
+    @pytest.fixture
+    def snapshot_path(self, tmp_path):
+        return str(tmp_path / "reminders.json")
+
+    def test_pop_due_returns_earliest_first(self, snapshot_path):
+        """Only reminders at or before now are popped, in due order"""
+        scheduler = ReminderScheduler(snapshot_path, AsyncMock())
+        scheduler.load()
+        scheduler.add(1, "late", 300)
+        scheduler.add(2, "early", 100)
+        scheduler.add(3, "middle", 200)
+
+        due = scheduler.pop_due(now=250)
+
+        assert [r['message'] for r in due] == ["early", "middle"]
+        assert scheduler.pending_count() == 1
+        assert scheduler.next_due() == 300
+
+    def test_cancel_skips_heap_entry(self, snapshot_path):
+        """Cancelled reminders are dropped lazily from the heap"""
+        scheduler = ReminderScheduler(snapshot_path, AsyncMock())
+        scheduler.load()
+        first = scheduler.add(1, "first", 100)
+        scheduler.add(2, "second", 200)
+
+        assert scheduler.cancel(first['id']) is True
+        assert scheduler.next_due() == 200
+        assert scheduler.pop_due(now=150) == []
+
+    def test_journal_replay_restores_pending(self, snapshot_path):
+        """A fresh scheduler replays add/done journal entries"""
+        scheduler = ReminderScheduler(snapshot_path, AsyncMock())
+        scheduler.load()
+        scheduler.add(1, "kept", 100)
+        dropped = scheduler.add(2, "dropped", 200)
+        scheduler.cancel(dropped['id'])
+
+        restored = ReminderScheduler(snapshot_path, AsyncMock())
+        restored.load()
+
+        assert restored.pending_count() == 1
+        assert restored.pop_due(now=1000)[0]['message'] == "kept"
+
+    def test_compaction_truncates_journal(self, snapshot_path):
+        """Crossing the threshold folds the journal into the snapshot"""
+        scheduler = ReminderScheduler(snapshot_path, AsyncMock(), compact_threshold=3)
+        scheduler.load()
+        for i in range(3):
+            scheduler.add(i, f"r{i}", 100 + i)
+
+        with open(scheduler.journal_path) as f:
+            assert f.read() == ""
+        with open(snapshot_path) as f:
+            assert len(json.load(f)) == 3
+
+    def test_legacy_snapshot_is_loaded(self, snapshot_path):
+        """Old reminders.json lists without ids still load"""
+        with open(snapshot_path, 'w') as f:
+            json.dump([{'user_id': 1, 'message': 'legacy', 'time': 100}], f)
+
+        scheduler = ReminderScheduler(snapshot_path, AsyncMock())
+        scheduler.load()
+
+        assert scheduler.pending_count() == 1
+        assert scheduler.next_due() == 100
+
+    @pytest.mark.asyncio
+    async def test_run_due_delivers_in_batches(self, snapshot_path):
+        """Due reminders are delivered and journalled as done"""
+        deliver = AsyncMock()
+        scheduler = ReminderScheduler(snapshot_path, deliver, batch_size=2)
+        scheduler.load()
+        for i in range(5):
+            scheduler.add(i, f"r{i}", 100)
+
+        delivered = await scheduler.run_due(now=100)
+
+        assert delivered == 5
+        assert deliver.await_count == 5
+        assert scheduler.pending_count() == 0
+
+    @pytest.mark.asyncio
+    async def test_delivery_failure_does_not_block_batch(self, snapshot_path):
+        """One failed DM does not stop the rest of the batch"""
+        deliver = AsyncMock(side_effect=[Exception("DMs closed"), None])
+        scheduler = ReminderScheduler(snapshot_path, deliver)
+        scheduler.load()
+        scheduler.add(1, "a", 100)
+        scheduler.add(2, "b", 100)
+
+        assert await scheduler.run_due(now=100) == 2
+        assert scheduler.pending_count() == 0
@@ -0,0 +1,102 @@
+"""
+Tests for the scheduled announcement runner
+"""
+
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock
+
+from cogs.announcements import Announcements
+
+
+def _item(n, guild_id='1'):
+    return {'id': f"a{n}", 'guild_id': guild_id, 'channel_id': '10', 'scheduled_for': '2024-01-01T00:00:00+00:00'}
+
+
+class FakeAnnouncements:
+    """Due index with the 'scheduled' filter of get_due_announcements"""
+
+    def __init__(self, items):
+        self.status = {item['id']: 'scheduled' for item in items}
+        self.items = items
+        self.fail_updates = False
+        self.update_calls = 0
+
+    def get_due_announcements(self, until, limit=50):
+        return [item for item in self.items if self.status[item['id']] == 'scheduled'][:limit]
+
+    def update_announcement_status(self, announcement_id, status, message_id=None, is_pinned=None):
+        self.update_calls += 1
+        if self.fail_updates:
+            return False
+        self.status[announcement_id] = status
+        return True
+
+
+def _cog(items, guilds=('1',)):
+    bot = Mock()
+    bot.data_manager = FakeAnnouncements(items)
+    bot.get_guild.side_effect = lambda gid: Mock() if str(gid) in guilds else None
+    cog = Announcements(bot)
+    cog._send_scheduled_item = AsyncMock(return_value=Mock(id=99))
+    return cog
+
+
+class TestScheduledAnnouncements:
+    """Test suite for Announcements.check_scheduled_announcements"""
+
+    @pytest.mark.asyncio
+    async def test_orphaned_items_are_marked_failed(self):
+        """Items for guilds the bot is not in are cleared instead of blocking the due index"""
+        items = [_item(n, guild_id='2') for n in range(60)] + [_item(100)]
+        cog = _cog(items)
+
+        await cog.check_scheduled_announcements()
+
+        store = cog.bot.data_manager
+        assert store.status['a100'] == 'published'
+        assert all(store.status[f"a{n}"] == 'failed' for n in range(60))
+        assert cog._send_scheduled_item.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_status_write_is_not_resent(self):
+        """A sent item whose status write fails is only retried as a status write"""
+        items = [_item(n) for n in range(50)]
+        cog = _cog(items)
+        store = cog.bot.data_manager
+        store.fail_updates = True
+
+        await cog.check_scheduled_announcements()
+        await cog.check_scheduled_announcements()
+
+        assert cog._send_scheduled_item.await_count == 50
+        assert len(cog._unsaved_status) == 50
+
+        store.fail_updates = False
+        await cog.check_scheduled_announcements()
+
+        assert cog._send_scheduled_item.await_count == 50
+        assert cog._unsaved_status == {}
+        assert set(store.status.values()) == {'published'}
+
+    @pytest.mark.asyncio
+    async def test_runner_backs_off_while_items_stay_overdue(self, monkeypatch):
+        """An overdue item left after a pass sleeps the floor, not zero"""
+        cog = _cog([])
+        cog.bot.wait_until_ready = AsyncMock()
+        cog.bot.data_manager.get_next_announcement_time = lambda: datetime(2024, 1, 1, tzinfo=timezone.utc)
+        timeouts = []
+
+        async def fake_wait_for(awaitable, timeout):
+            awaitable.close()
+            timeouts.append(timeout)
+            if len(timeouts) == 2:
+                raise RuntimeError("stop")
+            raise TimeoutError
+
+        monkeypatch.setattr('cogs.announcements.asyncio.wait_for', fake_wait_for)
+
+        with pytest.raises(RuntimeError):
+            await cog._run_scheduled_announcements()
+
+        assert timeouts == [cog.SCHEDULE_MIN_SLEEP_SECONDS] * 2
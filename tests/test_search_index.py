@@ -0,0 +1,125 @@
+"""
+Tests for the in-memory autocomplete index
+"""
+
+import time
+from unittest.mock import Mock
+
+from core.search_index import SearchIndex, NameIndex, normalize
+
+
+def _item(name, price=10, stock=-1, is_active=True):
+    return {'name': name, 'price': price, 'stock': stock, 'emoji': '🎁', 'is_active': is_active}
+
+
+class TestSearchIndex:
+    """Test suite for NameIndex and SearchIndex"""
+
+    def _index(self):
+        index = SearchIndex()
+        index.sync(1, 'shop', {
+            'vip': _item('VIP Role', price=500),
+            'gift': _item('🎁 Gift-Card'),
+            'sword': _item('Golden Sword', stock=0),
+            'shield': _item('Golden Shield', is_active=False),
+        })
+        return index
+
+    def test_prefix_matches_rank_before_word_matches(self):
+        index = self._index()
+        index.upsert(1, 'shop', 'gold', _item('Gold Coin Pack'))
+
+        ids = [entry_id for entry_id, _, _ in index.search(1, 'shop', 'gol')]
+
+        assert ids[0] == 'gold'
+        assert set(ids) == {'gold', 'sword', 'shield'}
+        assert [e for e, _, _ in index.search(1, 'shop', 'card')] == ['gift']
+        assert normalize('🎁 Gift-Card') == 'gift card'
+
+    def test_fuzzy_match_tolerates_typos(self):
+        index = self._index()
+
+        assert [e for e, _, _ in index.search(1, 'shop', 'golden swrod')][0] == 'sword'
+        assert index.search(1, 'shop', 'zzzz') == []
+
+    def test_predicate_filters_payload(self):
+        index = self._index()
+
+        matches = index.search(1, 'shop', 'golden',
+                               predicate=lambda item: item['is_active'] and item['stock'] != 0)
+        assert matches == []
+
+        index.update_payload(1, 'shop', 'sword', stock=3)
+        assert [e for e, _, _ in index.search(1, 'shop', 'golden',
+                                              predicate=lambda item: item['stock'] != 0)] == ['shield', 'sword']
+
+    def test_incremental_sync_rename_and_remove(self):
+        index = self._index()
+
+        changed = index.sync(1, 'shop', {
+            'vip': _item('VIP Role', price=500),
+            'gift': _item('Mystery Box'),
+            'sword': _item('Golden Sword', stock=0),
+        })
+
+        assert changed == 2
+        assert index.search(1, 'shop', 'gift') == []
+        assert [e for e, _, _ in index.search(1, 'shop', 'myst')] == ['gift']
+        assert [e for e, _, _ in index.search(1, 'shop', 'golden')] == ['sword']
+
+        index.remove(1, 'shop', 'vip')
+        index.drop_guild(2)
+        assert index.search(1, 'shop', 'vip') == []
+        assert index.search(2, 'shop', 'gift') == []
+
+    def test_hydrate_pages_and_groups_by_guild(self):
+        rows = [{'guild_id': str(g), 'item_id': f'i{n}', 'name': f'Item {n}', 'price': n,
+                 'stock': -1, 'emoji': None, 'is_active': True} for g in (1, 2) for n in range(3)]
+        client = Mock()
+        query = client.table.return_value.select.return_value.order.return_value.order.return_value
+        query.range.side_effect = lambda start, end: Mock(execute=Mock(return_value=Mock(data=rows[start:end + 1])))
+        index = SearchIndex(page_size=4)
+
+        loaded = index.hydrate(client, kinds=('shop',))
+
+        assert loaded == {'shop': 6}
+        assert query.range.call_count == 2
+        assert len(index.search(2, 'shop', 'item')) == 3
+
+    def test_sync_changes_picks_up_rows_written_elsewhere(self):
+        rows = [{'guild_id': '1', 'item_id': 'old', 'name': 'Old Hat', 'price': 1, 'stock': -1, 'emoji': None,
+                 'is_active': True, 'updated_at': '2024-01-01T00:10:00+00:00'}]
+        client = Mock()
+        query = client.table.return_value.select.return_value
+        query.order.return_value.order.return_value.range.return_value.execute.return_value = Mock(data=rows)
+        index = SearchIndex()
+        index.sync(9, 'shop', {'gone': _item('Gone Item')})
+        index.hydrate(client, kinds=('shop',))
+        assert index.search(9, 'shop', 'gone') == []
+
+        changed = query.gte.return_value.order.return_value.limit.return_value
+        changed.execute.return_value = Mock(data=[
+            {'guild_id': '1', 'item_id': 'new', 'name': 'New Cape', 'price': 5, 'stock': -1, 'emoji': None,
+             'is_active': True, 'updated_at': '2024-01-01T00:12:00+00:00'}
+        ])
+
+        assert index.sync_changes(client, kinds=('shop',)) == {'shop': 1}
+        assert query.gte.call_args.args == ('updated_at', '2024-01-01T00:09:00+00:00')
+        assert [e for e, _, _ in index.search(1, 'shop', 'cape')] == ['new']
+
+        index.sync_changes(client, kinds=('shop',))
+        assert query.gte.call_args.args[1] == '2024-01-01T00:11:00+00:00'
+
+    def test_lookup_stays_fast_on_large_catalogs(self):
+        index = NameIndex()
+        for n in range(5000):
+            index.upsert(n, f"Item {n} Deluxe Edition")
+
+        start = time.perf_counter()
+        for _ in range(100):
+            index.search('item 49', limit=25)
+            index.search('delux editon', limit=25)
+        elapsed = time.perf_counter() - start
+
+        assert index.search('item 4999')[0][0] == '4999'
+        assert elapsed < 2.0
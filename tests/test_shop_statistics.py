@@ -0,0 +1,76 @@
+"""
+Tests for rollup-backed shop statistics
+"""
+
+import pytest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from core.shop_manager import ShopManager
+
+
+ROLLUP = {
+    'total_sales': 12,
+    'total_quantity': 20,
+    'total_revenue': 950,
+    'unique_buyers': 4,
+    'first_at': '2026-10-01T10:00:00+00:00',
+    'last_at': '2026-10-14T18:30:00+00:00',
+    'popular_items': [
+        {'item_id': 'vip', 'name': 'VIP', 'emoji': '👑', 'sales': 8, 'quantity': 8, 'revenue': 800},
+        {'item_id': 'old', 'name': 'Old Key', 'emoji': None, 'sales': 4, 'quantity': 12, 'revenue': 150},
+    ],
+    'category_breakdown': {'roles': {'sales': 8, 'quantity': 8, 'revenue': 800, 'items': 1}},
+    'stock_value': 300,
+}
+
+
+class TestShopStatistics:
+    """Test suite for ShopManager.get_shop_statistics"""
+
+    @pytest.fixture
+    def manager(self):
+        data_manager = Mock()
+        data_manager.admin_client.rpc.return_value.execute.return_value = SimpleNamespace(data=ROLLUP)
+        transaction_manager = Mock()
+        transaction_manager.get_transactions.side_effect = AssertionError("transaction scan")
+        data_manager.load_guild_data.side_effect = AssertionError("currency blob load")
+        return ShopManager(data_manager, transaction_manager)
+
+    def test_statistics_are_one_rpc(self, manager):
+        stats = manager.get_shop_statistics(1, 'all')
+
+        rpc = manager.data_manager.admin_client.rpc
+        rpc.assert_called_once_with('get_shop_statistics', {'p_guild_id': '1', 'p_since': None, 'p_top_items': 10})
+        assert stats['total_sales'] == 12
+        assert stats['unique_buyers'] == 4
+        assert list(stats['popular_items']) == ['vip', 'old']
+        assert stats['popular_items']['old']['emoji'] == '🛍️'
+        assert stats['category_breakdown']['roles']['items'] == 1
+        assert stats['stock_value'] == 300
+
+    @pytest.mark.parametrize('period, since', [('day', '2026-10-15'), ('week', '2026-10-12'), ('month', '2026-10-01')])
+    def test_periods_map_to_calendar_bucket_dates(self, manager, period, since):
+        with patch('core.utils.datetime') as fake_datetime:
+            fake_datetime.now.return_value = SimpleNamespace(date=lambda: date(2026, 10, 15))
+            manager.get_shop_statistics(1, period)
+
+        params = manager.data_manager.admin_client.rpc.call_args.args[1]
+        assert params['p_since'] == since
+
+    def test_results_are_cached_per_period(self, manager):
+        manager.get_shop_statistics(1, 'all')
+        manager.get_shop_statistics(1, 'all')
+        manager.get_shop_statistics(2, 'all')
+
+        assert manager.data_manager.admin_client.rpc.call_count == 2
+
+    def test_rpc_failure_returns_empty_stats_uncached(self, manager):
+        manager.data_manager.admin_client.rpc.return_value.execute.side_effect = Exception("timeout")
+
+        stats = manager.get_shop_statistics(1, 'week')
+
+        assert stats['total_sales'] == 0
+        assert stats['popular_items'] == {}
+        assert manager._stats_cache == {}
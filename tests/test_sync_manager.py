@@ -424,3 +424,51 @@ class TestSyncManager:
         assert sync_manager._get_container_key_for_entity(SyncEntity.ANNOUNCEMENT) == 'announcements'
         assert sync_manager._get_container_key_for_entity(SyncEntity.EMBED) == 'embeds'
         assert sync_manager._get_container_key_for_entity(SyncEntity.USER_BALANCE) == 'users'
+
+    def test_patch_entity_writes_only_changed_columns(self, sync_manager):
+        """Patches update one row, guarded by the expected version"""
+        table = sync_manager.data_manager.admin_client.table
+        query = table.return_value.update.return_value.eq.return_value.eq.return_value.eq.return_value
+        query.execute.return_value = Mock(data=[{'version': 4}])
+
+        result = sync_manager._patch_entity(
+            SyncEntity.SHOP_ITEM, 'item_1', 123, {'price': 75, 'last_modified': 'x'}, expected_version=3
+        )
+
+        assert result == {'success': True, 'action': 'updated', 'version': 4}
+        table.assert_called_with('shop_items')
+        table.return_value.update.assert_called_once_with({'price': 75})
+        query_chain = table.return_value.update.return_value.eq.return_value.eq.return_value.eq
+        query_chain.assert_called_once_with('version', 3)
+        sync_manager.data_manager.invalidate_cache.assert_called_once_with(123, 'currency')
+
+    def test_patch_entity_version_conflict(self, sync_manager):
+        """A row changed since the expected version is not overwritten"""
+        table = sync_manager.data_manager.admin_client.table
+        query = table.return_value.update.return_value.eq.return_value.eq.return_value.eq.return_value
+        query.execute.return_value = Mock(data=[])
+
+        result = sync_manager._patch_entity(SyncEntity.TASK, '7', 123, {'name': 'New'}, expected_version=1)
+
+        assert result['success'] is False
+        assert result['reason'] == 'version_conflict'
+        sync_manager.data_manager.invalidate_cache.assert_not_called()
+
+    def test_sync_locks_are_striped(self, sync_manager):
+        """Lock count stays fixed no matter how many entities are synced"""
+        stripes = len(sync_manager.sync_locks)
+        locks = {id(sync_manager._lock_for(f"1:task:{i}")) for i in range(stripes * 10)}
+
+        assert len(sync_manager.sync_locks) == stripes
+        assert len(locks) <= stripes
+        assert sync_manager._lock_for("1:task:5") is sync_manager._lock_for("1:task:5")
+
+    def test_sync_state_is_capped(self, sync_manager):
+        """Oldest-updated entries are evicted past the cap"""
+        sync_manager.max_sync_state = 3
+        for i in range(5):
+            sync_manager._update_sync_state(SyncEntity.TASK, str(i), 1, {}, 'cms')
+        sync_manager._update_sync_state(SyncEntity.TASK, '2', 1, {}, 'cms')
+
+        assert list(sync_manager.sync_state) == ['1:task:3', '1:task:4', '1:task:2']
+        assert sync_manager.sync_state['1:task:2']['version'] == 2
@@ -0,0 +1,129 @@
+"""
+Tests for the single-call task claim
+
+LocalClaimRpc stands in for the claim_task() function in
+migrations/028_task_claim_rpc.sql with the same guards and result shape;
+the SQL itself needs a Postgres database and is not run here.
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import AsyncMock, Mock
+
+from core.task_manager import TaskManager
+
+
+class LocalClaimRpc:
+    """In-memory claim_task() with the same guards and result shape"""
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.user_tasks = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def rpc(self, name, params):
+        assert name == 'claim_task'
+        self.calls += 1
+        call = Mock()
+        call.execute.side_effect = lambda: Mock(data=self._claim(params['p_guild_id'], params['p_user_id'], params['p_task_id']))
+        return call
+
+    def _claim(self, guild_id, user_id, task_id):
+        with self._lock:
+            task = self.tasks.get((guild_id, task_id))
+            if task is None:
+                return {'success': False, 'error': 'not_found'}
+            if task['status'] != 'active':
+                return {'success': False, 'error': 'not_active'}
+            if (guild_id, user_id, task_id) in self.user_tasks:
+                return {'success': False, 'error': 'already_claimed'}
+            if task.get('expires_at') and task['expires_at'] <= datetime.now(timezone.utc):
+                return {'success': False, 'error': 'expired'}
+            if task['max_claims'] not in (None, -1) and task['current_claims'] >= task['max_claims']:
+                return {'success': False, 'error': 'full'}
+
+            # Widen the race window the old read-then-write path lost
+            time.sleep(0.001)
+            task['current_claims'] += 1
+            claim = {
+                'guild_id': guild_id, 'user_id': user_id, 'task_id': task_id, 'status': 'in_progress',
+                'deadline': (datetime.now(timezone.utc) + timedelta(hours=task['duration_hours'])).isoformat()
+            }
+            self.user_tasks[(guild_id, user_id, task_id)] = claim
+            return {'success': True, 'task': dict(task, expires_at=None), 'claim': claim}
+
+
+def _task(**overrides):
+    task = {'task_id': 7, 'guild_id': '1', 'status': 'active', 'max_claims': 10,
+            'current_claims': 0, 'duration_hours': 24, 'expires_at': None}
+    task.update(overrides)
+    return task
+
+
+class TestTaskClaim:
+    """Test suite for TaskManager.claim_task over the claim RPC"""
+
+    def _manager(self, *tasks):
+        backend = LocalClaimRpc({(t['guild_id'], t['task_id']): t for t in tasks})
+        data_manager = Mock(spec=['admin_client'])
+        data_manager.admin_client = backend
+        return TaskManager(data_manager, Mock()), backend
+
+    @pytest.mark.asyncio
+    async def test_claim_is_one_call_and_returns_claim_row(self):
+        manager, backend = self._manager(_task())
+
+        result = await manager.claim_task(1, 2, 7)
+
+        assert result['success'] is True
+        assert backend.calls == 1
+        assert result['claim']['user_id'] == '2'
+        assert isinstance(result['deadline'], datetime)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_claims_past_max_report_full(self):
+        """Only the fake's lock guards the counter here; claim_task() itself is not exercised"""
+        manager, backend = self._manager(_task(max_claims=10))
+
+        results = await asyncio.gather(*(manager.claim_task(1, user_id, 7) for user_id in range(50)))
+
+        assert sum(r['success'] for r in results) == 10
+        assert backend.tasks[('1', 7)]['current_claims'] == 10
+        assert {r['error'] for r in results if not r['success']} == {"Task is full."}
+
+    @pytest.mark.asyncio
+    async def test_rejections_map_to_messages(self):
+        manager, _ = self._manager(_task(), _task(task_id=8, status='paused'),
+                                   _task(task_id=9, expires_at=datetime.now(timezone.utc) - timedelta(hours=1)))
+
+        await manager.claim_task(1, 2, 7)
+        assert (await manager.claim_task(1, 2, 7))['error'] == "You already claimed this task."
+        assert (await manager.claim_task(1, 2, 8))['error'] == "Task is not active."
+        assert (await manager.claim_task(1, 2, 9))['error'] == "Task has expired."
+        assert (await manager.claim_task(1, 2, 99))['error'] == "Task not found."
+
+    @pytest.mark.asyncio
+    async def test_pooled_path_calls_claim_task_function(self):
+        """With a Postgres pool the same claim_task() runs over the pooled connection"""
+        rpc = LocalClaimRpc({('1', 7): _task()})
+        conn = Mock()
+        conn.fetchrow = AsyncMock(side_effect=lambda query, *args: {'result': rpc._claim(*args)})
+        transaction = Mock()
+        transaction.__aenter__ = AsyncMock(return_value=conn)
+        transaction.__aexit__ = AsyncMock(return_value=False)
+        data_manager = Mock(spec=['pg_pool', 'atomic_transaction'])
+        data_manager.atomic_transaction.return_value = transaction
+        manager = TaskManager(data_manager, Mock())
+
+        result = await manager.claim_task(1, 2, 7)
+        duplicate = await manager.claim_task(1, 2, 7)
+
+        assert conn.fetchrow.await_args.args == ("SELECT claim_task($1, $2, $3) AS result", '1', '2', 7)
+        assert result['success'] is True
+        assert result['claim']['user_id'] == '2'
+        assert isinstance(result['deadline'], datetime)
+        assert duplicate['error'] == "You already claimed this task."
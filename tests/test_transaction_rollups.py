@@ -0,0 +1,82 @@
+"""
+Tests for rollup-backed transaction statistics and balance reconciliation
+"""
+
+import pytest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from core.transaction_manager import TransactionManager
+
+
+ROLLUP = {
+    'transaction_count': 4,
+    'total_earned': 300,
+    'total_spent': 120,
+    'volume': 420,
+    'first_at': '2026-10-01T00:00:00+00:00',
+    'last_at': '2026-10-15T12:00:00+00:00',
+    'by_type': {
+        'transfer_send': {'count': 1, 'earned': 0, 'spent': 70, 'volume': 70},
+        'transfer_received': {'count': 1, 'earned': 50, 'spent': 0, 'volume': 50},
+        'task_reward': {'count': 2, 'earned': 250, 'spent': 0, 'volume': 250},
+    },
+    'top_users': [{'user_id': '7', 'transaction_count': 3}, {'user_id': '8', 'transaction_count': 1}],
+}
+
+
+class TestTransactionRollups:
+    """Test suite for TransactionManager statistics and find_balance_discrepancies"""
+
+    @pytest.fixture
+    def manager(self):
+        data_manager = Mock()
+        data_manager.admin_client.rpc.return_value.execute.return_value = SimpleNamespace(data=ROLLUP)
+        data_manager.load_guild_data.side_effect = AssertionError("transaction blob load")
+        return TransactionManager(data_manager)
+
+    def test_user_statistics_map_rollup(self, manager):
+        stats = manager.get_user_statistics(1, 7)
+
+        manager.data_manager.admin_client.rpc.assert_called_once_with('get_transaction_statistics', {
+            'p_guild_id': '1', 'p_user_id': '7', 'p_since': None, 'p_top_users': 10
+        })
+        assert stats['total_earned'] == 300
+        assert stats['total_transferred_sent'] == 70
+        assert stats['total_transferred_received'] == 50
+        assert stats['transaction_count_by_type']['task_reward'] == 2
+        assert stats['average_transaction_size'] == 105
+        assert stats['date_range'] == {'start': ROLLUP['first_at'], 'end': ROLLUP['last_at']}
+
+    def test_server_statistics_map_rollup(self, manager):
+        stats = manager.get_server_statistics(1)
+
+        assert stats['total_transactions'] == 4
+        assert stats['most_active_users'][0] == {'user_id': '7', 'transaction_count': 3}
+        assert stats['transaction_volume_by_type']['task_reward'] == 250
+
+    @pytest.mark.parametrize('period, since', [('day', '2026-10-15'), ('week', '2026-10-09'), ('month', '2026-09-16')])
+    def test_periods_are_rolling_day_windows(self, manager, period, since):
+        """day, week and month cover the last 1, 7 and 30 bucket dates including today"""
+        with patch('core.utils.datetime') as fake_datetime:
+            fake_datetime.now.return_value = SimpleNamespace(date=lambda: date(2026, 10, 15))
+            manager.get_server_statistics(1, period)
+
+        assert manager.data_manager.admin_client.rpc.call_args.args[1]['p_since'] == since
+
+    def test_balance_discrepancies_from_rpc(self, manager):
+        manager.data_manager.admin_client.rpc.return_value.execute.return_value = SimpleNamespace(data=[
+            {'guild_id': '1', 'user_id': '7', 'current_balance': 500, 'calculated_balance': 450, 'transaction_count': 9},
+            {'guild_id': '1', 'user_id': '8', 'current_balance': None, 'calculated_balance': 25},
+        ])
+
+        issues = manager.find_balance_discrepancies(1, tolerance=0.5)
+
+        manager.data_manager.admin_client.rpc.assert_called_once_with(
+            'find_balance_discrepancies', {'p_guild_id': '1', 'p_tolerance': 0.5}
+        )
+        assert issues[0]['discrepancy'] == 50
+        assert issues[0]['transaction_count'] == 9
+        assert issues[1] == {'guild_id': '1', 'user_id': '8', 'current_balance': 0, 'calculated_balance': 25,
+                             'discrepancy': -25, 'transaction_count': 0}
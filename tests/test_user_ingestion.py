@@ -0,0 +1,87 @@
+"""
+Tests for coalesced member-join user creation
+"""
+
+import threading
+from collections import OrderedDict
+import pytest
+from unittest.mock import Mock
+
+from core.data_manager import DataManager
+
+
+class TestUserIngestion:
+    """Test suite for DataManager.queue_user_creation/flush_user_creations"""
+
+    @pytest.fixture
+    def data_manager(self):
+        dm = DataManager.__new__(DataManager)
+        dm._known_users = OrderedDict()
+        dm._pending_user_inserts = {}
+        dm._user_inserts_lock = threading.Lock()
+        dm._user_count_cache = {}
+        dm.admin_client = Mock()
+        dm.supabase = Mock()
+        return dm
+
+    def test_raid_flushes_as_batched_inserts(self, data_manager):
+        for user_id in range(1200):
+            assert data_manager.queue_user_creation(1, user_id) is True
+        # Duplicate join events are answered from memory
+        assert data_manager.queue_user_creation(1, 5) is False
+
+        assert data_manager.flush_user_creations(batch_size=500) == 1200
+
+        upsert = data_manager.admin_client.table.return_value.upsert
+        assert upsert.call_count == 3
+        assert upsert.call_args.kwargs == {'on_conflict': 'guild_id,user_id', 'ignore_duplicates': True}
+        assert data_manager.flush_user_creations() == 0
+
+    def test_failed_batch_is_requeued(self, data_manager):
+        upsert = data_manager.admin_client.table.return_value.upsert
+        upsert.return_value.execute.side_effect = [Exception("timeout"), Mock()]
+        data_manager.queue_user_creation(1, 2)
+
+        assert data_manager.flush_user_creations() == 0
+        assert data_manager.flush_user_creations() == 1
+
+    @pytest.mark.asyncio
+    async def test_ensure_user_exists_skips_round_trips_for_flushed_users(self, data_manager):
+        data_manager.queue_user_creation(1, 2)
+        data_manager.flush_user_creations()
+
+        assert await data_manager.ensure_user_exists(1, 2) is True
+        data_manager.supabase.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_queued_user_is_not_known_until_written(self, data_manager):
+        """A queued row may not exist yet (or ever, while flushes fail), so it is checked"""
+        data_manager.admin_client.table.return_value.upsert.return_value.execute.side_effect = Exception("timeout")
+        data_manager.queue_user_creation(1, 2)
+        data_manager.flush_user_creations()
+        lookup = data_manager.supabase.table.return_value.select.return_value.eq.return_value.eq.return_value
+        lookup.execute.return_value = Mock(data=[])
+
+        assert not data_manager.is_known_user(1, 2)
+        assert await data_manager.ensure_user_exists(1, 2) is True
+        data_manager.supabase.table.return_value.insert.assert_called_once()
+        assert data_manager.is_known_user(1, 2)
+
+    def test_known_users_are_bounded(self, data_manager, monkeypatch):
+        monkeypatch.setattr(DataManager, 'KNOWN_USERS_LIMIT', 3)
+        for user_id in range(5):
+            data_manager._remember_user(1, user_id)
+        data_manager.is_known_user(1, 2)
+        data_manager._remember_user(1, 9)
+
+        assert list(data_manager._known_users) == [('1', '4'), ('1', '2'), ('1', '9')]
+
+    @pytest.mark.asyncio
+    async def test_forgotten_guild_is_checked_again(self, data_manager):
+        data_manager.queue_user_creation(1, 2)
+        data_manager.forget_guild_users(1)
+        data_manager.supabase.table.return_value.select.return_value.eq.return_value.eq.return_value.execute.return_value = Mock(data=[{'user_id': '2'}])
+
+        assert await data_manager.ensure_user_exists(1, 2) is True
+        data_manager.supabase.table.assert_called_once_with("users")
+        assert data_manager.is_known_user(1, 2)
@@ -0,0 +1,71 @@
+"""
+Tests for the server-side vote leaderboard
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+from cogs.vote import VoteCog
+
+
+ROWS = [
+    {'user_id': '111111111111', 'vote_count': 12, 'coins': 1200},
+    {'user_id': '222222222222', 'vote_count': 9, 'coins': 950},
+    {'user_id': '333333333333', 'vote_count': 9, 'coins': 900},
+    {'user_id': '444444444444', 'vote_count': 2, 'coins': 200},
+]
+
+
+class TestVoteLeaderboard:
+    """Test suite for VoteCog._get_top_voters and /votetop"""
+
+    @pytest.fixture
+    def cog(self, monkeypatch):
+        monkeypatch.delenv('TOPGG_TOKEN', raising=False)
+        bot = Mock()
+        bot.data_manager.admin_client.rpc.return_value.execute.return_value = SimpleNamespace(data=ROWS)
+        return VoteCog(bot)
+
+    def test_top_voters_cached_until_ttl(self, cog, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr('cogs.vote.time.time', lambda: clock[0])
+        rpc = cog.data_manager.admin_client.rpc
+
+        assert cog._get_top_voters() == ROWS
+        clock[0] += cog._top_voters_ttl - 1
+        cog._get_top_voters()
+        assert rpc.call_count == 1
+        rpc.assert_called_with('get_top_voters', {'p_days': 30, 'p_limit': 10})
+
+        clock[0] += 1
+        cog._get_top_voters()
+        assert rpc.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_votetop_renders_rpc_rows(self, cog):
+        names = {111111111111: 'Alice', 222222222222: 'Bob', 333333333333: 'Cara'}
+        cog.bot.get_user.side_effect = lambda uid: SimpleNamespace(display_name=names[uid]) if uid in names else None
+        cog.bot.fetch_user = AsyncMock(side_effect=Exception("Unknown User"))
+        interaction = Mock()
+        interaction.response.send_message = AsyncMock()
+
+        await cog.votetop.callback(cog, interaction)
+
+        embed = interaction.response.send_message.await_args.kwargs['embed']
+        assert embed.description.splitlines() == [
+            "🥇 **Alice** - 12 votes (1,200 coins)",
+            "🥈 **Bob** - 9 votes (950 coins)",
+            "🥉 **Cara** - 9 votes (900 coins)",
+            "**4.** **User 44444444...** - 2 votes (200 coins)",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_votetop_without_votes(self, cog):
+        cog.data_manager.admin_client.rpc.return_value.execute.return_value = SimpleNamespace(data=[])
+        interaction = Mock()
+        interaction.response.send_message = AsyncMock()
+
+        await cog.votetop.callback(cog, interaction)
+
+        assert interaction.response.send_message.await_args.kwargs == {'ephemeral': True}